@@ -17,6 +17,7 @@ Usage (CLI dry run)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial behavior cloning baseline.
+v1.1.0  2026-10-18  SoftmaxClassifier.select_actions / action_probabilities for batched OPE.
 """
 
 from __future__ import annotations
@@ -31,6 +32,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Sequence
 
+import numpy as np
 import polars as pl
 
 from mimic_sepsis_rl.datasets.transitions import TransitionRow
@@ -138,6 +140,18 @@ class SoftmaxClassifier:
         probs = self.predict_probs(state)
         return max(range(self.n_actions), key=lambda a: probs[a])
 
+    def action_probabilities(self, states: Any) -> np.ndarray:
+        """Softmax probabilities for an ``[N, state_dim]`` batch, shape ``[N, n_actions]``."""
+        batch = np.atleast_2d(np.asarray(states, dtype=np.float64))
+        logits = batch @ np.asarray(self.weights).T + np.asarray(self.biases)
+        logits -= logits.max(axis=1, keepdims=True)
+        exp_logits = np.exp(logits)
+        return exp_logits / exp_logits.sum(axis=1, keepdims=True)
+
+    def select_actions(self, states: Any) -> np.ndarray:
+        """Most likely action for every row of an ``[N, state_dim]`` batch."""
+        return self.action_probabilities(states).argmax(axis=1)
+
     def train_step(
         self,
         state: Sequence[float],
@@ -9,10 +9,13 @@ Usage
     # Full grid generation
     python -m mimic_sepsis_rl.cli.build_episode_grid
 
+    # Timestep ablation grids (episodes_2h.parquet, episodes_6h.parquet, ...)
+    python -m mimic_sepsis_rl.cli.build_episode_grid --step-hours 2 4 6
+
 The CLI performs these steps:
   1. Load onset assignments (Phase 2, Plan 01 output).
   2. Load ICU stays and optionally admissions for death times.
-  3. Build deterministic 4-hour episode grids.
+  3. Build deterministic 4-hour episode grids (or every --step-hours size).
   4. Write episodes and steps Parquet files.
   5. Write grid audit summary.
 """
@@ -28,9 +31,10 @@ from pathlib import Path
 import polars as pl
 
 from mimic_sepsis_rl.data.episodes import (
-    build_episode_grids,
-    generate_grid_audit,
-    grids_to_dataframes,
+    build_multi_resolution_frames,
+    common_step_hours,
+    resolution_path,
+    summarize_episode_frames,
 )
 from mimic_sepsis_rl.data.episode_models import (
     EPISODE_SPEC_VERSION,
@@ -38,7 +42,9 @@ from mimic_sepsis_rl.data.episode_models import (
     STEP_HOURS,
     WINDOW_END_HOURS,
     WINDOW_START_HOURS,
+    max_steps_for,
 )
+from mimic_sepsis_rl.data.raw_cache import scan_raw_table
 
 logger = logging.getLogger(__name__)
 
@@ -90,7 +96,7 @@ def _dry_run() -> None:
 # ---------------------------------------------------------------------------
 
 
-def _run_build() -> int:
+def _run_build(step_hours: list[int]) -> int:
     """Build episode grids from onset assignments."""
     if not DEFAULT_ONSET_PATH.exists():
         print(f"ERROR: Onset file not found: {DEFAULT_ONSET_PATH}", file=sys.stderr)
@@ -107,46 +113,43 @@ def _run_build() -> int:
         print(f"ERROR: ICU stays not found: {icustays_path}", file=sys.stderr)
         return 1
 
-    icustays = pl.read_csv(icustays_path).with_columns(
-        pl.col("intime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
-        pl.col("outtime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
-    )
+    icustays = scan_raw_table(MIMIC_RAW_ROOT, "icu/icustays").collect()
 
     # Load admissions for death times
     admissions_path = MIMIC_RAW_ROOT / "hosp" / "admissions.csv.gz"
     admissions = None
     if admissions_path.exists():
-        admissions = pl.read_csv(admissions_path).with_columns(
-            pl.col("deathtime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-        )
+        admissions = scan_raw_table(MIMIC_RAW_ROOT, "hosp/admissions").collect()
         logger.info(f"Loaded admissions with death times")
 
     # Build grids
     logger.info("Building episode grids...")
-    grids = build_episode_grids(onset_df, icustays, admissions)
-    logger.info(f"Built {len(grids)} episode grids")
-
-    # Convert to DataFrames
-    episodes_df, steps_df = grids_to_dataframes(grids)
-    audit = generate_grid_audit(grids)
-
-    # Write outputs
-    for p in [DEFAULT_EPISODES_PATH, DEFAULT_STEPS_PATH, DEFAULT_AUDIT_PATH]:
-        p.parent.mkdir(parents=True, exist_ok=True)
-
-    episodes_df.write_parquet(DEFAULT_EPISODES_PATH)
-    steps_df.write_parquet(DEFAULT_STEPS_PATH)
-    with DEFAULT_AUDIT_PATH.open("w") as fh:
-        json.dump(audit, fh, indent=2, default=str)
-
-    print(f"\nEpisodes  → {DEFAULT_EPISODES_PATH}  ({episodes_df.height} episodes)")
-    print(f"Steps     → {DEFAULT_STEPS_PATH}  ({steps_df.height} step rows)")
-    print(f"Audit     → {DEFAULT_AUDIT_PATH}")
-    print(f"\nGrid Summary:")
-    print(f"  Full (18 steps)  : {audit['full_length']}")
-    print(f"  Truncated        : {audit['truncated']} ({audit['truncated_pct']}%)")
-    print(f"  Avg steps        : {audit['avg_steps']}")
-    print(f"  Step range       : [{audit['min_steps']}, {audit['max_steps']}]")
+    frames = build_multi_resolution_frames(onset_df, icustays, admissions, step_hours=step_hours)
+
+    for hours, (episodes_df, steps_df) in frames.items():
+        logger.info(f"Built {episodes_df.height} episode grids at {hours}h")
+        audit = summarize_episode_frames(episodes_df, step_hours=hours)
+
+        # Write outputs
+        episodes_path = resolution_path(DEFAULT_EPISODES_PATH, hours)
+        steps_path = resolution_path(DEFAULT_STEPS_PATH, hours)
+        audit_path = resolution_path(DEFAULT_AUDIT_PATH, hours)
+        for p in [episodes_path, steps_path, audit_path]:
+            p.parent.mkdir(parents=True, exist_ok=True)
+
+        episodes_df.write_parquet(episodes_path)
+        steps_df.write_parquet(steps_path)
+        with audit_path.open("w") as fh:
+            json.dump(audit, fh, indent=2, default=str)
+
+        print(f"\nEpisodes  → {episodes_path}  ({episodes_df.height} episodes)")
+        print(f"Steps     → {steps_path}  ({steps_df.height} step rows)")
+        print(f"Audit     → {audit_path}")
+        print(f"\nGrid Summary ({hours}h steps):")
+        print(f"  Full ({max_steps_for(hours)} steps)  : {audit['full_length']}")
+        print(f"  Truncated        : {audit['truncated']} ({audit['truncated_pct']}%)")
+        print(f"  Avg steps        : {audit['avg_steps']}")
+        print(f"  Step range       : [{audit['min_steps']}, {audit['max_steps']}]")
 
     return 0
 
@@ -170,6 +173,16 @@ def _build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Print grid config and exit without generating data.",
     )
+    parser.add_argument(
+        "--step-hours",
+        type=int,
+        nargs="+",
+        default=[STEP_HOURS],
+        help=(
+            f"Step sizes to build in one run. The default {STEP_HOURS}h grid keeps "
+            "the standard paths; other sizes get an _<h>h suffix. Default: %(default)s."
+        ),
+    )
     return parser
 
 
@@ -187,11 +200,16 @@ def main(argv: list[str] | None = None) -> int:
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
 
+    try:
+        common_step_hours(args.step_hours)
+    except ValueError as exc:
+        parser.error(f"--step-hours: {exc}")
+
     if args.dry_run:
         _dry_run()
         return 0
 
-    return _run_build()
+    return _run_build(args.step_hours)
 
 
 if __name__ == "__main__":
@@ -13,10 +13,28 @@ Usage
 -----
     python -m mimic_sepsis_rl.cli.build_transitions --dry-run
     python -m mimic_sepsis_rl.cli.build_transitions
+    python -m mimic_sepsis_rl.cli.build_transitions --shards 8 --workers 4
+
+    # Timestep ablations: every grid from one raw-event bucketing pass.
+    python -m mimic_sepsis_rl.cli.build_transitions --step-hours 2 4 6
+
+    # Action-granularity ablations: 3x3 and 7x7 exports next to the 5x5 one.
+    python -m mimic_sepsis_rl.cli.build_transitions --action-granularities 3 7
+
+    # Distributed: run each stage for every shard, then merge.
+    python -m mimic_sepsis_rl.cli.build_transitions --shards 8 --shard-index 3 --shard-stage extract
+    python -m mimic_sepsis_rl.cli.build_transitions --shards 8 --shard-stage merge
 
 Version history
 ---------------
 v1.1.0  2026-03-29  Add live replay export from processed episodes + raw MIMIC tables.
+v1.2.0  2026-10-18  Build state tables from time-bucketed step events by default.
+v1.3.0  2026-10-18  Add stay-sharded streaming builds (--shards / --shard-index).
+v1.4.0  2026-10-18  Export replay tables from the columnar transition builder.
+v1.5.0  2026-10-18  Step rewards carry every reward variant's total (reward_<variant>).
+v1.6.0  2026-10-18  Step SOFA proxy uses the shared component rules from data/sofa.py.
+v1.7.0  2026-10-18  Build several step resolutions per run (--step-hours).
+v1.8.0  2026-10-18  Export extra action grids per run (--action-granularities).
 """
 
 from __future__ import annotations
@@ -24,46 +42,78 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import multiprocessing
+import os
 import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Mapping, Sequence
+from typing import Any, Callable, Mapping, Sequence
 
 import polars as pl
 import yaml
 
+from mimic_sepsis_rl.data.episode_models import STEP_HOURS
+from mimic_sepsis_rl.data.episodes import (
+    build_base_step_grid,
+    common_step_hours,
+    resolution_path,
+)
+from mimic_sepsis_rl.data.raw_cache import scan_raw_table, warm_raw_cache
+from mimic_sepsis_rl.data.sofa import sofa_proxy_state_expr
+from mimic_sepsis_rl.data.split_models import SplitManifest
 from mimic_sepsis_rl.data.splits import load_manifest_parquet
 from mimic_sepsis_rl.datasets.replay_buffer import (
     build_replay_buffer,
-    save_replay_buffer,
+    save_replay_frame,
     validate_replay_buffer,
+    validate_transition_frame,
+)
+from mimic_sepsis_rl.datasets.shards import (
+    SHARD_STAGES,
+    ShardLayout,
+    merge_partials,
+    select_shard,
+    write_json_atomic,
 )
 from mimic_sepsis_rl.datasets.transitions import (
+    build_transition_frame,
     build_transitions,
-    save_transitions,
+    save_transition_frame,
 )
 from mimic_sepsis_rl.mdp.actions.bins import (
     ACTION_SPEC_VERSION,
+    N_BINS,
     ActionBinner,
+    encode_action_granularities,
+    fit_action_binners,
+    load_action_bin_artifacts,
     save_action_bin_artifacts,
 )
 from mimic_sepsis_rl.mdp.actions.fluids import FluidAggregator
 from mimic_sepsis_rl.mdp.actions.vasopressors import VasopressorStandardiser
-from mimic_sepsis_rl.mdp.features.builder import build_state_table
+from mimic_sepsis_rl.mdp.features.builder import STATE_TABLE_ENGINES, build_state_table
+from mimic_sepsis_rl.mdp.features.columnar import build_state_table_from_events
 from mimic_sepsis_rl.mdp.features.dictionary import FeatureSpec, load_feature_registry
 from mimic_sepsis_rl.mdp.features.extractors import StepWindowData
+from mimic_sepsis_rl.mdp.features.step_events import (
+    CUMULATIVE_EVENT_TABLES,
+    bucket_step_events,
+    build_step_context,
+    roll_up_step_events,
+)
 from mimic_sepsis_rl.mdp.preprocessing import (
+    PREPROCESSING_SPEC_VERSION,
+    FeatureTransform,
+    PreprocessingArtifacts,
     fit_preprocessing_artifacts,
     fit_train_feature_medians,
+    load_preprocessing_artifacts,
     save_preprocessing_artifacts,
     transform_state_table,
 )
 from mimic_sepsis_rl.mdp.reward_models import RewardConfig, RewardVariant
-from mimic_sepsis_rl.mdp.rewards import (
-    compute_rewards_batch,
-    rewards_to_dataframe,
-    save_reward_config,
-)
+from mimic_sepsis_rl.mdp.rewards import compute_reward_frame, save_reward_config
 
 logger = logging.getLogger(__name__)
 
@@ -157,6 +207,74 @@ def _build_parser() -> argparse.ArgumentParser:
         default=None,
         help="Optional limit for the number of episode stays to process.",
     )
+    p.add_argument(
+        "--state-engine",
+        choices=list(STATE_TABLE_ENGINES),
+        default="columnar",
+        help=(
+            "State-table implementation: 'columnar' buckets raw events into steps "
+            "with one range join, 'rows' materialises per-step windows."
+        ),
+    )
+    p.add_argument(
+        "--step-hours",
+        type=int,
+        nargs="+",
+        default=[STEP_HOURS],
+        help=(
+            "Episode grid step sizes to export. Sizes other than the default "
+            f"{STEP_HOURS}h read <episodes>_<h>h.parquet grids and write to "
+            "timestep_<h>h/ subdirectories. Default: %(default)s."
+        ),
+    )
+    p.add_argument(
+        "--action-granularities",
+        type=int,
+        nargs="+",
+        default=[N_BINS],
+        help=(
+            "Bins per action axis to export. The default "
+            f"{N_BINS}x{N_BINS} grid is always built; every other size N adds "
+            "action_id_NxN step actions, action_bins_NxN.json and replay "
+            "exports under actions_NxN/. Default: %(default)s."
+        ),
+    )
+    p.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help=(
+            "Partition stays into N hash shards so each process only holds its "
+            "own stays' events. Default: 1 (single in-memory build)."
+        ),
+    )
+    p.add_argument(
+        "--shard-index",
+        type=int,
+        default=None,
+        help="Run a single shard (0-based) for --shard-stage instead of the local driver.",
+    )
+    p.add_argument(
+        "--shard-stage",
+        choices=[*SHARD_STAGES, "merge"],
+        default=None,
+        help=(
+            "Stage to run for --shard-index, or 'merge' to combine finished shards. "
+            "Stages must run in order: extract, state, export, merge."
+        ),
+    )
+    p.add_argument(
+        "--shard-dir",
+        type=Path,
+        default=None,
+        help="Directory for per-shard partial outputs. Default: <output-dir>/shards.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for the local shard driver. Default: min(shards, CPUs).",
+    )
     return p
 
 
@@ -282,30 +400,16 @@ def _load_filtered_chartevents(
     chart_max: Any,
     item_ids: Sequence[int],
 ) -> pl.DataFrame:
-    path = raw_root / "icu" / "chartevents.csv.gz"
     lazy = (
-        pl.scan_csv(
-            path,
-            schema_overrides={
-                "stay_id": pl.Int64,
-                "itemid": pl.Int64,
-                "valuenum": pl.Float64,
-            },
-        )
-        .filter(pl.col("stay_id").cast(pl.Int64, strict=False).is_in(list(stay_ids)))
-        .filter(pl.col("itemid").cast(pl.Int64, strict=False).is_in(list(item_ids)))
+        scan_raw_table(raw_root, "icu/chartevents")
+        .filter(pl.col("stay_id").is_in(list(stay_ids)))
+        .filter(pl.col("itemid").is_in(list(item_ids)))
         .select(["stay_id", "charttime", "itemid", "valuenum"])
-        .with_columns(
-            pl.col("stay_id").cast(pl.Int64, strict=False),
-            pl.col("itemid").cast(pl.Int64, strict=False),
-            pl.col("charttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("valuenum").cast(pl.Float64, strict=False),
-        )
         .filter(pl.col("charttime").is_not_null())
         .filter(pl.col("charttime") >= pl.lit(chart_min))
         .filter(pl.col("charttime") < pl.lit(chart_max))
     )
-    return lazy.collect()
+    return lazy.collect(engine="streaming")
 
 
 def _load_filtered_labevents(
@@ -315,32 +419,16 @@ def _load_filtered_labevents(
     chart_max: Any,
     item_ids: Sequence[int],
 ) -> pl.DataFrame:
-    path = raw_root / "hosp" / "labevents.csv.gz"
     lazy = (
-        pl.scan_csv(
-            path,
-            schema_overrides={
-                "hadm_id": pl.Int64,
-                "itemid": pl.Int64,
-                "valuenum": pl.Float64,
-            },
-        )
-        .with_columns(
-            pl.col("hadm_id").cast(pl.Int64, strict=False),
-            pl.col("itemid").cast(pl.Int64, strict=False),
-        )
+        scan_raw_table(raw_root, "hosp/labevents")
         .filter(pl.col("hadm_id").is_in(list(hadm_ids)))
         .filter(pl.col("itemid").is_in(list(item_ids)))
         .select(["hadm_id", "charttime", "itemid", "valuenum"])
-        .with_columns(
-            pl.col("charttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("valuenum").cast(pl.Float64, strict=False),
-        )
         .filter(pl.col("charttime").is_not_null())
         .filter(pl.col("charttime") >= pl.lit(chart_min))
         .filter(pl.col("charttime") < pl.lit(chart_max))
     )
-    return lazy.collect()
+    return lazy.collect(engine="streaming")
 
 
 def _load_filtered_inputevents(
@@ -350,20 +438,10 @@ def _load_filtered_inputevents(
     chart_max: Any,
     item_ids: Sequence[int],
 ) -> pl.DataFrame:
-    path = raw_root / "icu" / "inputevents.csv.gz"
     lazy = (
-        pl.scan_csv(
-            path,
-            schema_overrides={
-                "stay_id": pl.Int64,
-                "itemid": pl.Int64,
-                "amount": pl.Float64,
-                "rate": pl.Float64,
-                "patientweight": pl.Float64,
-            },
-        )
-        .filter(pl.col("stay_id").cast(pl.Int64, strict=False).is_in(list(stay_ids)))
-        .filter(pl.col("itemid").cast(pl.Int64, strict=False).is_in(list(item_ids)))
+        scan_raw_table(raw_root, "icu/inputevents")
+        .filter(pl.col("stay_id").is_in(list(stay_ids)))
+        .filter(pl.col("itemid").is_in(list(item_ids)))
         .select(
             [
                 "stay_id",
@@ -375,15 +453,6 @@ def _load_filtered_inputevents(
                 "patientweight",
             ]
         )
-        .with_columns(
-            pl.col("stay_id").cast(pl.Int64, strict=False),
-            pl.col("itemid").cast(pl.Int64, strict=False),
-            pl.col("starttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("endtime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("amount").cast(pl.Float64, strict=False),
-            pl.col("rate").cast(pl.Float64, strict=False),
-            pl.col("patientweight").cast(pl.Float64, strict=False),
-        )
         .filter(pl.col("starttime").is_not_null())
         .filter(pl.col("starttime") < pl.lit(chart_max))
         .filter(pl.col("endtime").is_null() | (pl.col("endtime") >= pl.lit(chart_min)))
@@ -391,7 +460,7 @@ def _load_filtered_inputevents(
             pl.coalesce([pl.col("endtime"), pl.col("starttime")]).alias("endtime"),
         )
     )
-    return lazy.collect()
+    return lazy.collect(engine="streaming")
 
 
 def _load_filtered_outputevents(
@@ -401,52 +470,28 @@ def _load_filtered_outputevents(
     chart_max: Any,
     item_ids: Sequence[int],
 ) -> pl.DataFrame:
-    path = raw_root / "icu" / "outputevents.csv.gz"
     lazy = (
-        pl.scan_csv(
-            path,
-            schema_overrides={
-                "stay_id": pl.Int64,
-                "itemid": pl.Int64,
-                "value": pl.Float64,
-            },
-        )
-        .filter(pl.col("stay_id").cast(pl.Int64, strict=False).is_in(list(stay_ids)))
-        .filter(pl.col("itemid").cast(pl.Int64, strict=False).is_in(list(item_ids)))
+        scan_raw_table(raw_root, "icu/outputevents")
+        .filter(pl.col("stay_id").is_in(list(stay_ids)))
+        .filter(pl.col("itemid").is_in(list(item_ids)))
         .select(["stay_id", "charttime", "itemid", "value"])
-        .with_columns(
-            pl.col("stay_id").cast(pl.Int64, strict=False),
-            pl.col("itemid").cast(pl.Int64, strict=False),
-            pl.col("charttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("value").cast(pl.Float64, strict=False),
-        )
         .filter(pl.col("charttime").is_not_null())
         .filter(pl.col("charttime") >= pl.lit(chart_min))
         .filter(pl.col("charttime") < pl.lit(chart_max))
     )
-    return lazy.collect()
+    return lazy.collect(engine="streaming")
 
 
 def _load_filtered_admissions(
     raw_root: Path,
     hadm_ids: Sequence[int],
 ) -> pl.DataFrame:
-    path = raw_root / "hosp" / "admissions.csv.gz"
     lazy = (
-        pl.scan_csv(
-            path,
-            schema_overrides={
-                "hadm_id": pl.Int64,
-            },
-        )
-        .with_columns(pl.col("hadm_id").cast(pl.Int64, strict=False))
+        scan_raw_table(raw_root, "hosp/admissions")
         .filter(pl.col("hadm_id").is_in(list(hadm_ids)))
         .select(["hadm_id", "deathtime"])
-        .with_columns(
-            pl.col("deathtime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-        )
     )
-    return lazy.collect()
+    return lazy.collect(engine="streaming")
 
 
 def _group_table(
@@ -560,6 +605,93 @@ def _build_step_windows(
     return step_windows
 
 
+def _state_table_builder(
+    engine: str,
+    step_context_df: pl.DataFrame,
+    chartevents: pl.DataFrame,
+    labevents: pl.DataFrame,
+    inputevents: pl.DataFrame,
+    outputevents: pl.DataFrame,
+    registry: Mapping[str, FeatureSpec],
+    manifest: SplitManifest,
+    step_events: pl.DataFrame | None = None,
+) -> Callable[[Mapping[str, float]], pl.DataFrame]:
+    """Prepare the engine inputs once and return a ``train_medians -> state`` builder.
+
+    *step_events* skips bucketing for the columnar engine when the events
+    were already rolled up onto this grid.
+    """
+    if engine == "columnar":
+        step_context = build_step_context(step_context_df, inputevents)
+        if step_events is None:
+            step_events = bucket_step_events(
+                step_context_df=step_context_df,
+                chartevents=chartevents,
+                labevents=labevents,
+                inputevents=inputevents,
+                outputevents=outputevents,
+            )
+            logger.info("Bucketed %d step events.", step_events.height)
+
+        def _build(train_medians: Mapping[str, float]) -> pl.DataFrame:
+            return build_state_table_from_events(
+                step_context,
+                step_events,
+                registry,
+                split_manifest=manifest,
+                train_medians=train_medians,
+                cumulative_tables=CUMULATIVE_EVENT_TABLES,
+            )
+
+    else:
+        step_windows = _build_step_windows(
+            step_context_df=step_context_df,
+            chartevents=chartevents,
+            labevents=labevents,
+            inputevents=inputevents,
+            outputevents=outputevents,
+        )
+        logger.info("Built %d step windows.", len(step_windows))
+
+        def _build(train_medians: Mapping[str, float]) -> pl.DataFrame:
+            return build_state_table(
+                step_windows,
+                registry,
+                split_manifest=manifest,
+                train_medians=train_medians,
+                engine=engine,
+            )
+
+    return _build
+
+
+def _build_raw_state_table(
+    engine: str,
+    step_context_df: pl.DataFrame,
+    chartevents: pl.DataFrame,
+    labevents: pl.DataFrame,
+    inputevents: pl.DataFrame,
+    outputevents: pl.DataFrame,
+    registry: Mapping[str, FeatureSpec],
+    manifest: SplitManifest,
+    step_events: pl.DataFrame | None = None,
+) -> tuple[pl.DataFrame, dict[str, float]]:
+    """Build the raw state table twice: once to fit train medians, once to impute."""
+    build = _state_table_builder(
+        engine,
+        step_context_df,
+        chartevents,
+        labevents,
+        inputevents,
+        outputevents,
+        registry,
+        manifest,
+        step_events,
+    )
+    train_medians = fit_train_feature_medians(build({}), registry, manifest)
+    return build(train_medians), train_medians
+
+
 def _build_step_context_df(
     episodes_df: pl.DataFrame,
     steps_df: pl.DataFrame,
@@ -583,13 +715,7 @@ def _build_step_context_df(
 
 
 def _append_sofa_proxy(raw_state_df: pl.DataFrame) -> pl.DataFrame:
-    return raw_state_df.with_columns(
-        (
-            (pl.col("map") < 70.0).cast(pl.Int32)
-            + (pl.col("spo2") < 94.0).cast(pl.Int32)
-            + (pl.col("gcs_total") < 15.0).cast(pl.Int32)
-        ).alias("sofa_score")
-    )
+    return raw_state_df.with_columns(sofa_proxy_state_expr())
 
 
 def _build_mortality_labels(
@@ -609,11 +735,9 @@ def _build_mortality_labels(
     ).select(["stay_id", "mortality_90d"])
 
 
-def _fit_and_apply_action_bins(
+def _treatment_levels(
     step_context_df: pl.DataFrame,
     inputevents: pl.DataFrame,
-    split_manifest_seed: int,
-    output_dir: Path,
 ) -> pl.DataFrame:
     step_boundaries = step_context_df.select(
         ["stay_id", "step_index", "step_start", "step_end", "subject_id", "split"]
@@ -630,7 +754,7 @@ def _fit_and_apply_action_bins(
         step_boundaries.select(["stay_id", "step_index", "step_start", "step_end"]),
     )
 
-    treatment_df = (
+    return (
         step_boundaries.join(vaso_steps, on=["stay_id", "step_index"], how="left")
         .join(fluid_steps, on=["stay_id", "step_index"], how="left")
         .with_columns(
@@ -639,21 +763,68 @@ def _fit_and_apply_action_bins(
         )
     )
 
+
+def _fit_action_binners(
+    treatment_df: pl.DataFrame,
+    split_manifest_seed: int,
+    granularities: Sequence[int] = (),
+) -> dict[int, ActionBinner]:
     train_df = treatment_df.filter(pl.col("split") == "train")
     if train_df.is_empty():
         raise ValueError("Training partition is empty; cannot fit action bins.")
-    binner = ActionBinner().fit(train_df, manifest_seed=split_manifest_seed)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    save_action_bin_artifacts(binner.artifacts, output_dir / DEFAULT_ACTION_BINS_PATH)
+    return fit_action_binners(
+        train_df,
+        manifest_seed=split_manifest_seed,
+        n_bins=(N_BINS, *granularities),
+    )
+
 
+def _fit_action_binner(treatment_df: pl.DataFrame, split_manifest_seed: int) -> ActionBinner:
+    return _fit_action_binners(treatment_df, split_manifest_seed)[N_BINS]
+
+
+def _extra_granularities(args: argparse.Namespace) -> list[int]:
+    """Requested action grid sizes other than the default, in ascending order."""
+    return sorted(set(args.action_granularities) - {N_BINS})
+
+
+def _granularity_suffix(n_bins: int) -> str:
+    return f"{n_bins}x{n_bins}"
+
+
+def _encode_actions(treatment_df: pl.DataFrame, binner: ActionBinner) -> pl.DataFrame:
     encoded = binner.transform(treatment_df.select(["vaso_dose_4h", "fluid_volume_4h"]))
-    result = pl.concat(
+    return pl.concat(
         [
             treatment_df.select(["stay_id", "step_index", "vaso_dose_4h", "fluid_volume_4h"]),
             encoded.select(["vaso_bin", "fluid_bin", "action_id"]),
         ],
         how="horizontal",
     )
+
+
+def _fit_and_apply_action_bins(
+    step_context_df: pl.DataFrame,
+    inputevents: pl.DataFrame,
+    split_manifest_seed: int,
+    output_dir: Path,
+    granularities: Sequence[int] = (),
+) -> pl.DataFrame:
+    treatment_df = _treatment_levels(step_context_df, inputevents)
+    binners = _fit_action_binners(treatment_df, split_manifest_seed, granularities)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    save_action_bin_artifacts(binners[N_BINS].artifacts, output_dir / DEFAULT_ACTION_BINS_PATH)
+    for n_bins in granularities:
+        save_action_bin_artifacts(
+            binners[n_bins].artifacts,
+            output_dir / f"action_bins_{_granularity_suffix(n_bins)}.json",
+        )
+
+    result = _encode_actions(treatment_df, binners[N_BINS])
+    if granularities:
+        result = encode_action_granularities(
+            result, {n_bins: binners[n_bins] for n_bins in granularities}
+        )
     result.write_parquet(output_dir / DEFAULT_STEP_ACTIONS_PATH)
     logger.info("Saved step-level action assignments to %s", output_dir / DEFAULT_STEP_ACTIONS_PATH)
     return result
@@ -664,13 +835,26 @@ def _save_train_medians(path: Path, medians: Mapping[str, float]) -> None:
     path.write_text(json.dumps(dict(medians), indent=2))
 
 
-def _run_live(args: argparse.Namespace) -> int:
+def _load_build_inputs(
+    args: argparse.Namespace,
+) -> tuple[dict[str, Any], dict[str, FeatureSpec], SplitManifest]:
     feature_cfg = _load_feature_config(args.features_config)
     registry = load_feature_registry(feature_cfg)
     manifest = load_manifest_parquet(args.split_manifest_dir)
+    return feature_cfg, registry, manifest
+
 
-    episodes_df = _load_required_parquet(args.episodes_path, "Episode parquet")
-    steps_df = _load_required_parquet(args.steps_path, "Episode steps parquet")
+def _prepare_step_context(
+    args: argparse.Namespace,
+    manifest: SplitManifest,
+    step_hours: int = STEP_HOURS,
+) -> pl.DataFrame:
+    episodes_df = _load_required_parquet(
+        resolution_path(args.episodes_path, step_hours), "Episode parquet"
+    )
+    steps_df = _load_required_parquet(
+        resolution_path(args.steps_path, step_hours), "Episode steps parquet"
+    )
     cohort_df = _load_required_parquet(args.cohort_path, "Cohort parquet")
 
     step_context_df = _build_step_context_df(
@@ -682,13 +866,20 @@ def _run_live(args: argparse.Namespace) -> int:
     if step_context_df.is_empty():
         raise ValueError("No episode steps available after applying the requested filters.")
 
-    step_context_df = step_context_df.with_columns(
+    return step_context_df.with_columns(
         pl.Series(
             "split",
             [manifest.split_for(int(subject_id)).value for subject_id in step_context_df.get_column("subject_id").to_list()],
         )
     )
 
+
+def _load_raw_tables(
+    raw_root: Path,
+    step_context_df: pl.DataFrame,
+    registry: Mapping[str, FeatureSpec],
+) -> dict[str, pl.DataFrame]:
+    """Load the raw MIMIC-IV rows needed for the stays in *step_context_df*."""
     stay_ids = step_context_df.get_column("stay_id").unique().sort().to_list()
     hadm_ids = step_context_df.get_column("hadm_id").unique().sort().to_list()
     chart_min = step_context_df.get_column("episode_start").min()
@@ -702,123 +893,273 @@ def _run_live(args: argparse.Namespace) -> int:
         chart_max,
     )
 
-    chartevents = _load_filtered_chartevents(
-        args.raw_root,
-        stay_ids,
-        chart_min,
-        chart_max,
-        _required_item_ids(registry, "chartevents"),
-    )
-    labevents = _load_filtered_labevents(
-        args.raw_root,
-        hadm_ids,
-        chart_min,
-        chart_max,
-        _required_item_ids(registry, "labevents"),
-    )
     input_item_ids = sorted(
         set(_required_item_ids(registry, "inputevents"))
         | set(FluidAggregator().item_ids)
         | {221906, 221289, 221662, 222315, 222042}
     )
-    inputevents = _load_filtered_inputevents(
-        args.raw_root,
-        stay_ids,
-        chart_min,
-        chart_max,
-        input_item_ids,
-    )
-    outputevents = _load_filtered_outputevents(
-        args.raw_root,
-        stay_ids,
-        chart_min,
-        chart_max,
-        _required_item_ids(registry, "outputevents"),
-    )
-    admissions = _load_filtered_admissions(args.raw_root, hadm_ids)
-
-    step_windows = _build_step_windows(
-        step_context_df=step_context_df,
-        chartevents=chartevents,
-        labevents=labevents,
-        inputevents=inputevents,
-        outputevents=outputevents,
-    )
-    logger.info("Built %d step windows.", len(step_windows))
+    return {
+        "chartevents": _load_filtered_chartevents(
+            raw_root,
+            stay_ids,
+            chart_min,
+            chart_max,
+            _required_item_ids(registry, "chartevents"),
+        ),
+        "labevents": _load_filtered_labevents(
+            raw_root,
+            hadm_ids,
+            chart_min,
+            chart_max,
+            _required_item_ids(registry, "labevents"),
+        ),
+        "inputevents": _load_filtered_inputevents(
+            raw_root,
+            stay_ids,
+            chart_min,
+            chart_max,
+            input_item_ids,
+        ),
+        "outputevents": _load_filtered_outputevents(
+            raw_root,
+            stay_ids,
+            chart_min,
+            chart_max,
+            _required_item_ids(registry, "outputevents"),
+        ),
+        "admissions": _load_filtered_admissions(raw_root, hadm_ids),
+    }
 
-    raw_state_first = build_state_table(
-        step_windows,
-        registry,
-        split_manifest=manifest,
-        train_medians={},
-    )
-    train_medians = fit_train_feature_medians(raw_state_first, registry, manifest)
-    raw_state = build_state_table(
-        step_windows,
-        registry,
-        split_manifest=manifest,
-        train_medians=train_medians,
-    )
 
+def _finalize_raw_state(
+    raw_state: pl.DataFrame,
+    step_context_df: pl.DataFrame,
+    admissions: pl.DataFrame,
+) -> pl.DataFrame:
     raw_state = _append_sofa_proxy(raw_state)
     mortality_df = _build_mortality_labels(
         episodes_df=step_context_df.select(["stay_id", "hadm_id", "onset_time"]).unique(),
         admissions_df=admissions,
     )
-    raw_state = raw_state.join(mortality_df, on="stay_id", how="left").with_columns(
+    return raw_state.join(mortality_df, on="stay_id", how="left").with_columns(
         pl.col("mortality_90d").fill_null(0).cast(pl.Int32)
     )
 
-    preprocessing = fit_preprocessing_artifacts(raw_state, registry, manifest, train_medians)
-    normalized_state = transform_state_table(raw_state, preprocessing)
 
+def _compute_step_rewards(raw_state: pl.DataFrame, reward_config: RewardConfig) -> pl.DataFrame:
+    """Step rewards for the configured variant plus every variant's total for ablations."""
+    return compute_reward_frame(
+        raw_state,
+        config=reward_config,
+        variants=tuple(RewardVariant),
+    ).rename(
+        {
+            "total": "reward_total",
+            **{f"total_{variant.value}": f"reward_{variant.value}" for variant in RewardVariant},
+        }
+    )
+
+
+def _merge_step_tables(
+    normalized_state: pl.DataFrame,
+    action_df: pl.DataFrame,
+    reward_df: pl.DataFrame,
+) -> pl.DataFrame:
+    helper_cols = ["stay_id", "step_index", "subject_id", "split", "sofa_score", "mortality_90d"]
+    normalized_with_meta = normalized_state.select(
+        [col for col in helper_cols if col in normalized_state.columns]
+        + [col for col in normalized_state.columns if col not in helper_cols]
+    )
+    return (
+        normalized_with_meta.join(action_df, on=["stay_id", "step_index"], how="left")
+        .join(reward_df.select(["stay_id", "step_index", "reward_total"]), on=["stay_id", "step_index"], how="left")
+        .with_columns(pl.col("reward_total").fill_null(0.0))
+    )
+
+
+def _state_output_paths(feature_cfg: Mapping[str, Any]) -> tuple[Path, Path]:
     state_output_dir = Path(
         feature_cfg.get("output", {}).get("state_table_dir", "data/processed/features/state_vectors")
     )
-    state_output_dir.mkdir(parents=True, exist_ok=True)
     train_medians_path = Path(
         feature_cfg.get("imputation", {}).get(
             "train_medians_path",
             state_output_dir / "train_medians.json",
         )
     )
+    return state_output_dir, train_medians_path
+
+
+def _split_transition_frame(
+    split_df: pl.DataFrame,
+    feature_columns: Sequence[str],
+    *,
+    action_col: str = "action_id",
+    n_actions: int = 25,
+) -> pl.DataFrame:
+    transitions = build_transition_frame(
+        split_df, feature_columns=feature_columns, action_col=action_col
+    )
+    validate_transition_frame(
+        transitions,
+        feature_columns=feature_columns,
+        expected_state_dim=len(feature_columns),
+        expected_n_actions=n_actions,
+    )
+    return transitions
+
+
+def _save_split_exports(
+    transitions: pl.DataFrame | pl.LazyFrame,
+    feature_columns: Sequence[str],
+    output_dir: Path,
+    *,
+    split_label: str,
+    manifest_seed: int,
+    reward_config: RewardConfig,
+    step_hours: int = STEP_HOURS,
+    n_actions: int = 25,
+) -> int:
+    """Write one split's transition and replay exports; returns the transition count."""
+    _, _, meta = save_transition_frame(
+        transitions,
+        feature_columns,
+        output_dir,
+        split_label=split_label,
+        manifest_seed=manifest_seed,
+        action_spec_version=ACTION_SPEC_VERSION,
+        reward_spec_version=reward_config.version,
+        step_hours=step_hours,
+        n_actions=n_actions,
+    )
+    save_replay_frame(transitions, output_dir, meta=meta)
+    return meta.n_transitions
+
+
+def _print_output_locations(
+    output_dir: Path,
+    state_output_dir: Path,
+    action_dir: Path = DEFAULT_ACTION_DIR,
+    reward_dir: Path = DEFAULT_REWARD_DIR,
+) -> None:
+    print(f"Replay exports written to {output_dir}")
+    print(f"State tables written to {state_output_dir}")
+    print(f"Action artifacts written to {action_dir}")
+    print(f"Reward artifacts written to {reward_dir}")
+
+
+def _resolution_dir(path: Path, step_hours: int) -> Path:
+    """*path* at the default step size, ``<path>/timestep_<h>h`` otherwise."""
+    return path if step_hours == STEP_HOURS else path / f"timestep_{step_hours}h"
+
+
+def _step_bounds_frame(step_contexts: Mapping[int, pl.DataFrame]) -> pl.DataFrame:
+    """Stay, admission and time bounds of every step across all resolutions."""
+    return pl.concat(
+        [
+            ctx.select(["stay_id", "hadm_id", "episode_start", "step_end"])
+            for ctx in step_contexts.values()
+        ]
+    )
+
+
+def _rolled_up_step_events(
+    step_contexts: Mapping[int, pl.DataFrame],
+    tables: Mapping[str, pl.DataFrame],
+) -> dict[int, pl.DataFrame]:
+    """Bucket raw events once on the finest common grid and roll up per resolution."""
+    base_hours = common_step_hours(list(step_contexts))
+    windows = (
+        _step_bounds_frame(step_contexts)
+        .group_by("stay_id", maintain_order=True)
+        .agg(
+            pl.col("hadm_id").first(),
+            pl.col("episode_start").first().alias("window_start"),
+            # The last realised step always ends at actual_end.
+            pl.col("step_end").max().alias("actual_end"),
+        )
+    )
+    base_events = bucket_step_events(
+        step_context_df=build_base_step_grid(windows, base_hours),
+        chartevents=tables["chartevents"],
+        labevents=tables["labevents"],
+        inputevents=tables["inputevents"],
+        outputevents=tables["outputevents"],
+    )
+    logger.info("Bucketed %d step events on the %dh base grid.", base_events.height, base_hours)
+    return {
+        step_hours: roll_up_step_events(
+            base_events,
+            step_context_df,
+            base_step_hours=base_hours,
+            step_hours=step_hours,
+        )
+        for step_hours, step_context_df in step_contexts.items()
+    }
+
+
+def _export_resolution(
+    args: argparse.Namespace,
+    feature_cfg: Mapping[str, Any],
+    registry: Mapping[str, FeatureSpec],
+    manifest: SplitManifest,
+    step_context_df: pl.DataFrame,
+    tables: Mapping[str, pl.DataFrame],
+    *,
+    step_hours: int,
+    step_events: pl.DataFrame | None = None,
+) -> None:
+    """State, action, reward and replay exports for one episode grid."""
+    raw_state, train_medians = _build_raw_state_table(
+        engine=args.state_engine,
+        step_context_df=step_context_df,
+        chartevents=tables["chartevents"],
+        labevents=tables["labevents"],
+        inputevents=tables["inputevents"],
+        outputevents=tables["outputevents"],
+        registry=registry,
+        manifest=manifest,
+        step_events=step_events,
+    )
+    raw_state = _finalize_raw_state(raw_state, step_context_df, tables["admissions"])
+
+    preprocessing = fit_preprocessing_artifacts(raw_state, registry, manifest, train_medians)
+    normalized_state = transform_state_table(raw_state, preprocessing)
+
+    state_output_dir, train_medians_path = _state_output_paths(feature_cfg)
+    state_output_dir = _resolution_dir(state_output_dir, step_hours)
+    state_output_dir.mkdir(parents=True, exist_ok=True)
     raw_state.write_parquet(state_output_dir / DEFAULT_RAW_STATE_PATH)
     normalized_state.write_parquet(state_output_dir / DEFAULT_NORMALIZED_STATE_PATH)
-    _save_train_medians(train_medians_path, train_medians)
+    _save_train_medians(resolution_path(train_medians_path, step_hours), train_medians)
     save_preprocessing_artifacts(preprocessing, state_output_dir / DEFAULT_PREPROCESSING_ARTIFACT)
 
+    action_dir = _resolution_dir(DEFAULT_ACTION_DIR, step_hours)
+    granularities = _extra_granularities(args)
     action_df = _fit_and_apply_action_bins(
         step_context_df=step_context_df,
-        inputevents=inputevents,
+        inputevents=tables["inputevents"],
         split_manifest_seed=manifest.seed,
-        output_dir=DEFAULT_ACTION_DIR,
+        output_dir=action_dir,
+        granularities=granularities,
     )
 
+    reward_dir = _resolution_dir(DEFAULT_REWARD_DIR, step_hours)
     reward_config = RewardConfig(variant=RewardVariant(args.reward_variant))
-    reward_df = rewards_to_dataframe(compute_rewards_batch(raw_state, config=reward_config)).rename(
-        {"total": "reward_total"}
-    )
-    DEFAULT_REWARD_DIR.mkdir(parents=True, exist_ok=True)
-    reward_df.write_parquet(DEFAULT_REWARD_DIR / DEFAULT_STEP_REWARDS_PATH)
-    save_reward_config(reward_config, DEFAULT_REWARD_DIR / DEFAULT_REWARD_CONFIG_PATH)
+    reward_df = _compute_step_rewards(raw_state, reward_config)
+    reward_dir.mkdir(parents=True, exist_ok=True)
+    reward_df.write_parquet(reward_dir / DEFAULT_STEP_REWARDS_PATH)
+    save_reward_config(reward_config, reward_dir / DEFAULT_REWARD_CONFIG_PATH)
 
-    helper_cols = ["stay_id", "step_index", "subject_id", "split", "sofa_score", "mortality_90d"]
-    normalized_with_meta = normalized_state.select(
-        [col for col in helper_cols if col in normalized_state.columns]
-        + [col for col in normalized_state.columns if col not in helper_cols]
-    )
-    merged_df = (
-        normalized_with_meta.join(action_df, on=["stay_id", "step_index"], how="left")
-        .join(reward_df.select(["stay_id", "step_index", "reward_total"]), on=["stay_id", "step_index"], how="left")
-        .with_columns(pl.col("reward_total").fill_null(0.0))
-    )
+    merged_df = _merge_step_tables(normalized_state, action_df, reward_df)
 
     feature_columns = _resolve_feature_columns(merged_df, registry)
     if not feature_columns:
         raise ValueError("No feature columns were resolved for transition export.")
 
     requested_splits = _resolve_requested_splits(args.splits)
-    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = _resolution_dir(args.output_dir, step_hours)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     for split_label in requested_splits:
         split_df = merged_df.filter(pl.col("split") == split_label)
@@ -826,47 +1167,510 @@ def _run_live(args: argparse.Namespace) -> int:
             logger.warning("Skipping split '%s' because it contains no rows.", split_label)
             continue
 
-        transitions = build_transitions(
-            split_df,
-            feature_columns=feature_columns,
-        )
-        save_transitions(
+        transitions = _split_transition_frame(split_df, feature_columns)
+        n_transitions = _save_split_exports(
             transitions,
-            feature_columns=feature_columns,
-            output_dir=args.output_dir,
+            feature_columns,
+            output_dir,
             split_label=split_label,
             manifest_seed=manifest.seed,
-            action_spec_version=ACTION_SPEC_VERSION,
-            reward_spec_version=reward_config.version,
+            reward_config=reward_config,
+            step_hours=step_hours,
         )
-        replay_buffer = build_replay_buffer(
-            transitions,
-            feature_columns=feature_columns,
+        logger.info(
+            "Split '%s' (%dh) complete: %d transitions across %d episodes.",
+            split_label,
+            step_hours,
+            n_transitions,
+            transitions.get_column("stay_id").n_unique(),
+        )
+
+        for n_bins in granularities:
+            suffix = _granularity_suffix(n_bins)
+            _save_split_exports(
+                _split_transition_frame(
+                    split_df,
+                    feature_columns,
+                    action_col=f"action_id_{suffix}",
+                    n_actions=n_bins * n_bins,
+                ),
+                feature_columns,
+                output_dir / f"actions_{suffix}",
+                split_label=split_label,
+                manifest_seed=manifest.seed,
+                reward_config=reward_config,
+                step_hours=step_hours,
+                n_actions=n_bins * n_bins,
+            )
+
+    print(f"[{step_hours}h grid]")
+    _print_output_locations(output_dir, state_output_dir, action_dir, reward_dir)
+
+
+def _run_live(args: argparse.Namespace) -> int:
+    feature_cfg, registry, manifest = _load_build_inputs(args)
+    step_contexts = {
+        step_hours: _prepare_step_context(args, manifest, step_hours)
+        for step_hours in sorted(set(args.step_hours))
+    }
+    tables = _load_raw_tables(args.raw_root, _step_bounds_frame(step_contexts), registry)
+
+    # One resolution buckets directly; several share one base-grid bucketing.
+    step_events: dict[int, pl.DataFrame] = {}
+    if len(step_contexts) > 1:
+        step_events = _rolled_up_step_events(step_contexts, tables)
+
+    for step_hours, step_context_df in step_contexts.items():
+        _export_resolution(
+            args,
+            feature_cfg,
+            registry,
+            manifest,
+            step_context_df,
+            tables,
+            step_hours=step_hours,
+            step_events=step_events.get(step_hours),
+        )
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Sharded execution
+# ---------------------------------------------------------------------------
+#
+# ``--shards N`` partitions stays by a stable hash of ``stay_id`` and runs the
+# build as three per-shard stages separated by exact reductions of the
+# train-only statistics:
+#
+#   extract  load the shard's raw events, spill them to Parquet and write the
+#            partial statistics: un-imputed train state rows and per-step
+#            treatment levels.
+#   (reduce) train medians and action-bin edges from all extract partials.
+#   state    impute the shard's raw state, encode actions, compute rewards.
+#   (reduce) normalisation statistics from all train raw-state partials.
+#   export   normalise and write per-split transition partials.
+#   merge    restore the unsharded row order and write the usual exports.
+#
+# Reductions read the same train rows, in the same order, as the unsharded
+# build, so the merged outputs are identical to a single-process run.
+
+_LIVE_RAW_TABLES = (
+    "icu/chartevents",
+    "hosp/labevents",
+    "icu/inputevents",
+    "icu/outputevents",
+    "hosp/admissions",
+)
+_SHARD_RAW_TABLES = ("chartevents", "labevents", "inputevents", "outputevents", "admissions")
+_SHARD_TRAIN_STATE = "train_state.parquet"
+_SHARD_TREATMENT = "treatment.parquet"
+_SHARD_STEP_CONTEXT = "step_context.parquet"
+_SHARD_MERGE_STAGE = "merge"
+_RAW_STATE_ORDER = ("subject_id", "stay_id", "step_index")
+_STEP_ORDER = ("stay_id", "step_index")
+
+
+def _shard_layout(args: argparse.Namespace) -> ShardLayout:
+    root = args.shard_dir if args.shard_dir is not None else args.output_dir / "shards"
+    return ShardLayout(root=root, n_shards=args.shards)
+
+
+def _is_fresh(path: Path, layout: ShardLayout, stage: str) -> bool:
+    """Whether a reduced artifact is newer than every shard's *stage* marker."""
+    if not path.exists():
+        return False
+    newest_marker = max(
+        layout.marker_path(index, stage).stat().st_mtime_ns for index in range(layout.n_shards)
+    )
+    return path.stat().st_mtime_ns >= newest_marker
+
+
+def _reduce_train_medians(
+    layout: ShardLayout,
+    registry: Mapping[str, FeatureSpec],
+    manifest: SplitManifest,
+) -> dict[str, float]:
+    """Exact train medians over all shards, one feature column at a time."""
+    path = layout.artifact_path("train_medians.json")
+    layout.require_complete("extract")
+    if _is_fresh(path, layout, "extract"):
+        return {key: float(value) for key, value in json.loads(path.read_text()).items()}
+
+    partials = layout.partial_paths("extract", _SHARD_TRAIN_STATE)
+    if not partials:
+        raise ValueError("No training rows found for the provided split manifest.")
+    medians: dict[str, float] = {}
+    for feature_id, spec in registry.items():
+        column_df = pl.scan_parquet(partials).select(["subject_id", feature_id]).collect()
+        medians.update(fit_train_feature_medians(column_df, {feature_id: spec}, manifest))
+    write_json_atomic(path, medians)
+    return medians
+
+
+def _reduce_action_binner(layout: ShardLayout, manifest: SplitManifest) -> ActionBinner:
+    """Fit action bins on the concatenated train treatment partials."""
+    path = layout.artifact_path(DEFAULT_ACTION_BINS_PATH)
+    layout.require_complete("extract")
+    if _is_fresh(path, layout, "extract"):
+        return ActionBinner().load(load_action_bin_artifacts(path))
+
+    partials = layout.partial_paths("extract", _SHARD_TREATMENT)
+    if not partials:
+        raise ValueError("Training partition is empty; cannot fit action bins.")
+    train_df = (
+        pl.scan_parquet(partials)
+        .filter(pl.col("split") == "train")
+        .select(["vaso_dose_4h", "fluid_volume_4h", "split"])
+        .collect()
+    )
+    binner = _fit_action_binner(train_df, manifest.seed)
+    write_json_atomic(path, binner.artifacts.to_dict())
+    return binner
+
+
+def _reduce_preprocessing(
+    layout: ShardLayout,
+    registry: Mapping[str, FeatureSpec],
+    manifest: SplitManifest,
+    train_medians: Mapping[str, float],
+) -> PreprocessingArtifacts:
+    """Exact normalisation statistics over the train rows of every shard.
+
+    Each feature is fit on its own column, ordered like the unsharded state
+    table so the floating-point sums match a single-process build.
+    """
+    path = layout.artifact_path(DEFAULT_PREPROCESSING_ARTIFACT)
+    layout.require_complete("state")
+    if _is_fresh(path, layout, "state"):
+        return load_preprocessing_artifacts(path)
+
+    partials = layout.partial_paths("state", DEFAULT_RAW_STATE_PATH)
+    train_ids = sorted(manifest.train_ids)
+    transforms: dict[str, FeatureTransform] = {}
+    for feature_id, spec in registry.items():
+        column_df = (
+            pl.scan_parquet(partials)
+            .select([*_RAW_STATE_ORDER, feature_id])
+            .filter(pl.col("subject_id").is_in(train_ids))
+            .sort(list(_RAW_STATE_ORDER))
+            .collect()
+        )
+        fitted = fit_preprocessing_artifacts(column_df, {feature_id: spec}, manifest, train_medians)
+        transforms.update(fitted.transforms)
+
+    artifacts = PreprocessingArtifacts(
+        spec_version=PREPROCESSING_SPEC_VERSION,
+        manifest_seed=manifest.seed,
+        source_episode_set=manifest.source_episode_set,
+        feature_order=tuple(registry.keys()),
+        transforms=transforms,
+    )
+    write_json_atomic(path, artifacts.to_dict())
+    return artifacts
+
+
+def _read_shard_tables(layout: ShardLayout, shard_index: int) -> dict[str, pl.DataFrame]:
+    return {
+        name: pl.read_parquet(layout.partial_path(shard_index, "extract", f"{name}.parquet"))
+        for name in _SHARD_RAW_TABLES
+    }
+
+
+def _run_shard_extract(
+    args: argparse.Namespace,
+    layout: ShardLayout,
+    shard_index: int,
+) -> dict[str, Any]:
+    _, registry, manifest = _load_build_inputs(args)
+    step_context_df = select_shard(_prepare_step_context(args, manifest), shard_index, layout.n_shards)
+    stage_dir = layout.stage_dir(shard_index, "extract")
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    if step_context_df.is_empty():
+        return {"n_stays": 0, "n_steps": 0}
+
+    tables = _load_raw_tables(args.raw_root, step_context_df, registry)
+    step_context_df.write_parquet(stage_dir / _SHARD_STEP_CONTEXT)
+    for name in _SHARD_RAW_TABLES:
+        tables[name].write_parquet(stage_dir / f"{name}.parquet")
+
+    build = _state_table_builder(
+        args.state_engine,
+        step_context_df,
+        tables["chartevents"],
+        tables["labevents"],
+        tables["inputevents"],
+        tables["outputevents"],
+        registry,
+        manifest,
+    )
+    unimputed = build({})
+    train_state = unimputed.filter(pl.col("subject_id").is_in(sorted(manifest.train_ids)))
+    if not train_state.is_empty():
+        train_state.select(["subject_id", *registry]).write_parquet(stage_dir / _SHARD_TRAIN_STATE)
+    _treatment_levels(step_context_df, tables["inputevents"]).write_parquet(
+        stage_dir / _SHARD_TREATMENT
+    )
+    return {
+        "n_stays": step_context_df.get_column("stay_id").n_unique(),
+        "n_steps": step_context_df.height,
+        "n_train_steps": train_state.height,
+    }
+
+
+def _run_shard_state(
+    args: argparse.Namespace,
+    layout: ShardLayout,
+    shard_index: int,
+) -> dict[str, Any]:
+    _, registry, manifest = _load_build_inputs(args)
+    train_medians = _reduce_train_medians(layout, registry, manifest)
+    binner = _reduce_action_binner(layout, manifest)
+    step_context_path = layout.partial_path(shard_index, "extract", _SHARD_STEP_CONTEXT)
+    stage_dir = layout.stage_dir(shard_index, "state")
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    if not step_context_path.exists():
+        return {"n_steps": 0}
+
+    step_context_df = pl.read_parquet(step_context_path)
+    tables = _read_shard_tables(layout, shard_index)
+    build = _state_table_builder(
+        args.state_engine,
+        step_context_df,
+        tables["chartevents"],
+        tables["labevents"],
+        tables["inputevents"],
+        tables["outputevents"],
+        registry,
+        manifest,
+    )
+    raw_state = _finalize_raw_state(build(train_medians), step_context_df, tables["admissions"])
+    raw_state.write_parquet(stage_dir / DEFAULT_RAW_STATE_PATH)
+
+    treatment_df = pl.read_parquet(layout.partial_path(shard_index, "extract", _SHARD_TREATMENT))
+    _encode_actions(treatment_df, binner).write_parquet(stage_dir / DEFAULT_STEP_ACTIONS_PATH)
+
+    reward_config = RewardConfig(variant=RewardVariant(args.reward_variant))
+    _compute_step_rewards(raw_state, reward_config).write_parquet(
+        stage_dir / DEFAULT_STEP_REWARDS_PATH
+    )
+    return {"n_steps": raw_state.height}
+
+
+def _run_shard_export(
+    args: argparse.Namespace,
+    layout: ShardLayout,
+    shard_index: int,
+) -> dict[str, Any]:
+    _, registry, manifest = _load_build_inputs(args)
+    train_medians = _reduce_train_medians(layout, registry, manifest)
+    preprocessing = _reduce_preprocessing(layout, registry, manifest, train_medians)
+    raw_state_path = layout.partial_path(shard_index, "state", DEFAULT_RAW_STATE_PATH)
+    stage_dir = layout.stage_dir(shard_index, "export")
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    if not raw_state_path.exists():
+        return {"feature_columns": None, "splits": {}}
+
+    normalized_state = transform_state_table(pl.read_parquet(raw_state_path), preprocessing)
+    normalized_state.write_parquet(stage_dir / DEFAULT_NORMALIZED_STATE_PATH)
+    merged_df = _merge_step_tables(
+        normalized_state,
+        pl.read_parquet(layout.partial_path(shard_index, "state", DEFAULT_STEP_ACTIONS_PATH)),
+        pl.read_parquet(layout.partial_path(shard_index, "state", DEFAULT_STEP_REWARDS_PATH)),
+    )
+    feature_columns = _resolve_feature_columns(merged_df, registry)
+    if not feature_columns:
+        raise ValueError("No feature columns were resolved for transition export.")
+
+    split_counts: dict[str, int] = {}
+    for split_label in _resolve_requested_splits(args.splits):
+        split_df = merged_df.filter(pl.col("split") == split_label)
+        if split_df.is_empty():
+            continue
+        transitions = _split_transition_frame(split_df, feature_columns)
+        transitions.write_parquet(stage_dir / f"transitions_{split_label}.parquet")
+        split_counts[split_label] = transitions.height
+    return {"feature_columns": feature_columns, "splits": split_counts}
+
+
+_SHARD_STAGE_RUNNERS: dict[str, Callable[[argparse.Namespace, ShardLayout, int], dict[str, Any]]] = {
+    "extract": _run_shard_extract,
+    "state": _run_shard_state,
+    "export": _run_shard_export,
+}
+
+
+def _run_shard_stage(args: argparse.Namespace, shard_index: int, stage: str) -> int:
+    """Run one stage for one shard and record its completion marker."""
+    layout = _shard_layout(args)
+    layout.reset_stage(shard_index, stage)
+    summary = _SHARD_STAGE_RUNNERS[stage](args, layout, shard_index)
+    layout.mark_complete(shard_index, stage, summary)
+    logger.info(
+        "Shard %d/%d finished stage '%s': %s",
+        shard_index,
+        layout.n_shards,
+        stage,
+        summary,
+    )
+    return 0
+
+
+def _shard_worker(args: argparse.Namespace, shard_index: int, stage: str) -> int:
+    """Process-pool entry point; spawned workers need their own logging setup."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    return _run_shard_stage(args, shard_index, stage)
+
+
+def _merge_shards(args: argparse.Namespace) -> int:
+    """Merge every shard's partial outputs into the unsharded export layout."""
+    feature_cfg, registry, manifest = _load_build_inputs(args)
+    layout = _shard_layout(args)
+    layout.require_complete("export")
+    train_medians = _reduce_train_medians(layout, registry, manifest)
+    binner = _reduce_action_binner(layout, manifest)
+    preprocessing = _reduce_preprocessing(layout, registry, manifest, train_medians)
+    reward_config = RewardConfig(variant=RewardVariant(args.reward_variant))
+
+    state_output_dir, train_medians_path = _state_output_paths(feature_cfg)
+    merge_partials(
+        layout.partial_paths("state", DEFAULT_RAW_STATE_PATH),
+        sort_by=_RAW_STATE_ORDER,
+        output_path=state_output_dir / DEFAULT_RAW_STATE_PATH,
+    )
+    merge_partials(
+        layout.partial_paths("export", DEFAULT_NORMALIZED_STATE_PATH),
+        sort_by=_RAW_STATE_ORDER,
+        output_path=state_output_dir / DEFAULT_NORMALIZED_STATE_PATH,
+    )
+    _save_train_medians(train_medians_path, train_medians)
+    save_preprocessing_artifacts(preprocessing, state_output_dir / DEFAULT_PREPROCESSING_ARTIFACT)
+
+    merge_partials(
+        layout.partial_paths("state", DEFAULT_STEP_ACTIONS_PATH),
+        sort_by=_STEP_ORDER,
+        output_path=DEFAULT_ACTION_DIR / DEFAULT_STEP_ACTIONS_PATH,
+    )
+    save_action_bin_artifacts(binner.artifacts, DEFAULT_ACTION_DIR / DEFAULT_ACTION_BINS_PATH)
+    merge_partials(
+        layout.partial_paths("state", DEFAULT_STEP_REWARDS_PATH),
+        sort_by=_STEP_ORDER,
+        output_path=DEFAULT_REWARD_DIR / DEFAULT_STEP_REWARDS_PATH,
+    )
+    save_reward_config(reward_config, DEFAULT_REWARD_DIR / DEFAULT_REWARD_CONFIG_PATH)
+
+    markers = [
+        json.loads(layout.marker_path(index, "export").read_text())
+        for index in range(layout.n_shards)
+    ]
+    feature_columns = next(
+        (marker["feature_columns"] for marker in markers if marker["feature_columns"]),
+        None,
+    )
+    if not feature_columns:
+        raise ValueError("No feature columns were resolved for transition export.")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for split_label in _resolve_requested_splits(args.splits):
+        partials = layout.partial_paths("export", f"transitions_{split_label}.parquet")
+        if not partials:
+            logger.warning("Skipping split '%s' because it contains no rows.", split_label)
+            continue
+        n_transitions = _save_split_exports(
+            merge_partials(partials, sort_by=_STEP_ORDER),
+            feature_columns,
+            args.output_dir,
             split_label=split_label,
             manifest_seed=manifest.seed,
-            action_spec_version=ACTION_SPEC_VERSION,
-            reward_spec_version=reward_config.version,
-        )
-        validate_replay_buffer(
-            replay_buffer,
-            expected_state_dim=len(feature_columns),
-            expected_n_actions=25,
+            reward_config=reward_config,
         )
-        save_replay_buffer(replay_buffer, args.output_dir)
         logger.info(
-            "Split '%s' complete: %d transitions across %d episodes.",
+            "Split '%s' merged from %d shards: %d transitions.",
             split_label,
-            replay_buffer.n_transitions,
-            replay_buffer.n_episodes,
+            len(partials),
+            n_transitions,
         )
 
-    print(f"Replay exports written to {args.output_dir}")
-    print(f"State tables written to {state_output_dir}")
-    print(f"Action artifacts written to {DEFAULT_ACTION_DIR}")
-    print(f"Reward artifacts written to {DEFAULT_REWARD_DIR}")
+    _print_output_locations(args.output_dir, state_output_dir)
     return 0
 
 
+def _run_sharded(args: argparse.Namespace) -> int:
+    """Local driver: run every stage for every shard in a process pool, then merge."""
+    layout = _shard_layout(args)
+    _, registry, manifest = _load_build_inputs(args)
+    workers = args.workers if args.workers is not None else min(args.shards, os.cpu_count() or 1)
+    logger.info("Running %d shards with %d worker(s) under %s", args.shards, workers, layout.root)
+    # Convert the raw tables once up front instead of racing in every worker.
+    warm_raw_cache(args.raw_root, _LIVE_RAW_TABLES)
+
+    for stage in SHARD_STAGES:
+        # Reduce once here so the workers load the cached artifacts.
+        if stage == "state":
+            _reduce_train_medians(layout, registry, manifest)
+            _reduce_action_binner(layout, manifest)
+        elif stage == "export":
+            _reduce_preprocessing(
+                layout, registry, manifest, _reduce_train_medians(layout, registry, manifest)
+            )
+
+        if workers <= 1:
+            for shard_index in range(args.shards):
+                _run_shard_stage(args, shard_index, stage)
+            continue
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = [
+                pool.submit(_shard_worker, args, shard_index, stage)
+                for shard_index in range(args.shards)
+            ]
+            for future in futures:
+                future.result()
+
+    return _merge_shards(args)
+
+
+def _validate_shard_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.shards < 1:
+        parser.error("--shards must be >= 1.")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be >= 1.")
+    if args.shard_index is not None:
+        if args.shard_stage is None:
+            parser.error("--shard-index requires --shard-stage.")
+        if args.shard_stage == _SHARD_MERGE_STAGE:
+            parser.error("--shard-stage merge runs over all shards; drop --shard-index.")
+        if not 0 <= args.shard_index < args.shards:
+            parser.error(f"--shard-index must be in [0, {args.shards}).")
+    elif args.shard_stage in SHARD_STAGES:
+        parser.error(f"--shard-stage {args.shard_stage} requires --shard-index.")
+    sharded = args.shards > 1 or args.shard_stage is not None
+    if sharded and args.step_hours != [STEP_HOURS]:
+        parser.error(f"Sharded builds export the default {STEP_HOURS}h grid only; drop --step-hours.")
+    if sharded and _extra_granularities(args):
+        parser.error(
+            f"Sharded builds export the default {N_BINS}x{N_BINS} action grid only; "
+            "drop --action-granularities."
+        )
+
+
+def _validate_step_hours(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    try:
+        common_step_hours(args.step_hours)
+    except ValueError as exc:
+        parser.error(f"--step-hours: {exc}")
+    if len(set(args.step_hours)) > 1 and args.state_engine != "columnar":
+        parser.error("Several --step-hours share one event bucketing; use --state-engine columnar.")
+
+
+def _validate_action_granularities(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> None:
+    if min(args.action_granularities) < 2:
+        parser.error("--action-granularities: every grid needs >= 2 bins per axis.")
+
+
 def main(argv: list[str] | None = None) -> int:
     """CLI entry point."""
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -877,6 +1681,15 @@ def main(argv: list[str] | None = None) -> int:
         _dry_run()
         return 0
 
+    _validate_step_hours(parser, args)
+    _validate_action_granularities(parser, args)
+    _validate_shard_args(parser, args)
+    if args.shard_stage == _SHARD_MERGE_STAGE:
+        return _merge_shards(args)
+    if args.shard_index is not None:
+        return _run_shard_stage(args, args.shard_index, args.shard_stage)
+    if args.shards > 1:
+        return _run_sharded(args)
     return _run_live(args)
 
 
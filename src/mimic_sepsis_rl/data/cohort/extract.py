@@ -44,6 +44,7 @@ from mimic_sepsis_rl.data.cohort.models import (
     ExclusionReason,
 )
 from mimic_sepsis_rl.data.cohort.spec import CohortSpec
+from mimic_sepsis_rl.data.raw_cache import scan_raw_table
 
 logger = logging.getLogger(__name__)
 
@@ -86,11 +87,9 @@ class CohortExtractor:
     def _load_icustays(self) -> pl.DataFrame:
         path = self.data_root / "icu" / "icustays.csv.gz"
         logger.info(f"Loading ICU stays from {path}")
-        df = pl.read_csv(path)
+        df = scan_raw_table(self.data_root, "icu/icustays", preserve_order=True).collect()
         # Compute LOS in hours from the `los` column (days)
         df = df.with_columns(
-            pl.col("intime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
-            pl.col("outtime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
             (pl.col("los") * 24.0).alias("los_hours"),
         )
         return df
@@ -98,15 +97,12 @@ class CohortExtractor:
     def _load_patients(self) -> pl.DataFrame:
         path = self.data_root / "hosp" / "patients.csv.gz"
         logger.info(f"Loading patients from {path}")
-        return pl.read_csv(path)
+        return scan_raw_table(self.data_root, "hosp/patients").collect()
 
     def _load_admissions(self) -> pl.DataFrame:
         path = self.data_root / "hosp" / "admissions.csv.gz"
         logger.info(f"Loading admissions from {path}")
-        df = pl.read_csv(path)
-        return df.with_columns(
-            pl.col("deathtime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-        )
+        return scan_raw_table(self.data_root, "hosp/admissions").collect()
 
     # ------------------------------------------------------------------
     # Rule application
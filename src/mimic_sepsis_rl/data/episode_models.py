@@ -11,6 +11,7 @@ metadata about why and where the window was cut short.
 Version history
 ---------------
 v1.0.0  2026-03-28  Initial episode grid contract.
+v1.1.0  2026-10-18  Add max_steps_for for alternative step resolutions.
 """
 
 from __future__ import annotations
@@ -37,6 +38,25 @@ WINDOW_END_HOURS: Final[int] = 48    # relative to onset
 MAX_STEPS: Final[int] = (WINDOW_END_HOURS - WINDOW_START_HOURS) // STEP_HOURS  # 18
 
 
+def max_steps_for(step_hours: int) -> int:
+    """Number of steps in the onset window at a *step_hours* resolution.
+
+    The step size must tile the window and put onset on a step boundary,
+    e.g. 2h → 36 steps, 4h → 18, 6h → 12.
+    """
+    if (
+        step_hours <= 0
+        or (WINDOW_END_HOURS - WINDOW_START_HOURS) % step_hours
+        or WINDOW_START_HOURS % step_hours
+    ):
+        raise ValueError(
+            f"step_hours={step_hours} must be a positive divisor of both the "
+            f"{WINDOW_END_HOURS - WINDOW_START_HOURS}h window and the "
+            f"{-WINDOW_START_HOURS}h pre-onset span."
+        )
+    return (WINDOW_END_HOURS - WINDOW_START_HOURS) // step_hours
+
+
 # ---------------------------------------------------------------------------
 # Truncation reasons
 # ---------------------------------------------------------------------------
@@ -7,22 +7,41 @@ usable ICU episode, anchored to the assigned ``sepsis_onset_time``.
 Window: ``onset - 24h`` to ``onset + 48h``  →  18 steps of 4 hours each.
 Steps are truncated when ICU discharge or death ends the window early.
 
+``build_episode_frames`` produces the episodes/steps tables columnar:
+window bounds and truncation reasons are ``pl.when`` chains and steps come
+from one ``pl.int_ranges(...).explode()``.  Its output equals
+``grids_to_dataframes(build_episode_grids(...))``; ``iter_episode_grids``
+offers the ``EpisodeGrid`` objects as an optional lazy view.
+
+Timestep ablations use other step sizes (``step_hours=2`` → 36 steps,
+``6`` → 12).  ``build_multi_resolution_frames`` builds every requested
+resolution from one bounds pass, and ``build_base_step_grid`` lays out the
+finest common slots that raw events are bucketed into once before being
+rolled up to each resolution.
+
 Usage
 -----
-    from mimic_sepsis_rl.data.episodes import build_episode_grids
+    from mimic_sepsis_rl.data.episodes import build_episode_frames
+
+    episodes_df, steps_df = build_episode_frames(onset_df, icustays_df)
+    audit = summarize_episode_frames(episodes_df)
 
-    grids = build_episode_grids(onset_df, icustays_df)
+    frames = build_multi_resolution_frames(onset_df, icustays_df, step_hours=[2, 4, 6])
 
 Version history
 ---------------
 v1.0.0  2026-03-28  Initial episode grid builder.
+v1.1.0  2026-10-18  Columnar grid builder (build_episode_frames) and lazy grid view.
+v1.2.0  2026-10-18  Configurable step size and multi-resolution grids from one pass.
 """
 
 from __future__ import annotations
 
 import logging
+import math
 from datetime import datetime, timedelta
-from typing import Any
+from pathlib import Path
+from typing import Any, Iterator, Sequence
 
 import polars as pl
 
@@ -35,6 +54,7 @@ from mimic_sepsis_rl.data.episode_models import (
     EpisodeGrid,
     EpisodeStep,
     TruncationReason,
+    max_steps_for,
 )
 
 logger = logging.getLogger(__name__)
@@ -153,6 +173,19 @@ def build_grid_for_episode(
 # ---------------------------------------------------------------------------
 
 
+def _merge_episode_inputs(
+    onset_df: pl.DataFrame,
+    icustays_df: pl.DataFrame,
+) -> pl.DataFrame:
+    """Merge onset assignments with ICU stay boundaries (onset order)."""
+    return onset_df.join(
+        icustays_df.select(["stay_id", "intime", "outtime"]),
+        on="stay_id",
+        how="inner",
+        maintain_order="left",
+    )
+
+
 def build_episode_grids(
     onset_df: pl.DataFrame,
     icustays_df: pl.DataFrame,
@@ -174,12 +207,7 @@ def build_episode_grids(
     -------
     List of EpisodeGrid objects.
     """
-    # Merge onset with ICU stay boundaries
-    merged = onset_df.join(
-        icustays_df.select(["stay_id", "intime", "outtime"]),
-        on="stay_id",
-        how="inner",
-    )
+    merged = _merge_episode_inputs(onset_df, icustays_df)
 
     # Optionally add death times
     death_lookup: dict[int, datetime | None] = {}
@@ -214,6 +242,19 @@ def build_episode_grids(
 # DataFrame conversion
 # ---------------------------------------------------------------------------
 
+_EMPTY_EPISODES_SCHEMA: dict[str, Any] = {
+    "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
+    "onset_time": pl.Datetime, "window_start": pl.Datetime,
+    "window_end": pl.Datetime, "actual_end": pl.Datetime,
+    "n_steps": pl.Int32, "is_truncated": pl.Boolean,
+    "truncation_reason": pl.Utf8, "truncation_step": pl.Int32,
+}
+_EMPTY_STEPS_SCHEMA: dict[str, Any] = {
+    "stay_id": pl.Int64, "step_index": pl.Int32,
+    "step_start": pl.Datetime, "step_end": pl.Datetime,
+    "hours_relative_to_onset": pl.Int32, "is_pre_onset": pl.Boolean,
+}
+
 
 def grids_to_dataframes(
     grids: list[EpisodeGrid],
@@ -254,22 +295,304 @@ def grids_to_dataframes(
                 "is_pre_onset": s.is_pre_onset,
             })
 
-    episodes_df = pl.DataFrame(episode_rows) if episode_rows else pl.DataFrame(schema={
-        "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
-        "onset_time": pl.Datetime, "window_start": pl.Datetime,
-        "window_end": pl.Datetime, "actual_end": pl.Datetime,
-        "n_steps": pl.Int32, "is_truncated": pl.Boolean,
-        "truncation_reason": pl.Utf8, "truncation_step": pl.Int32,
-    })
-    steps_df = pl.DataFrame(step_rows) if step_rows else pl.DataFrame(schema={
-        "stay_id": pl.Int64, "step_index": pl.Int32,
-        "step_start": pl.Datetime, "step_end": pl.Datetime,
-        "hours_relative_to_onset": pl.Int32, "is_pre_onset": pl.Boolean,
-    })
+    episodes_df = (
+        pl.DataFrame(episode_rows)
+        if episode_rows
+        else pl.DataFrame(schema=_EMPTY_EPISODES_SCHEMA)
+    )
+    steps_df = pl.DataFrame(step_rows) if step_rows else pl.DataFrame(schema=_EMPTY_STEPS_SCHEMA)
 
     return episodes_df, steps_df
 
 
+# ---------------------------------------------------------------------------
+# Columnar grid builder
+# ---------------------------------------------------------------------------
+
+
+def _episode_bounds(
+    onset_df: pl.DataFrame,
+    icustays_df: pl.DataFrame,
+    admissions_df: pl.DataFrame | None,
+) -> pl.DataFrame:
+    """Per-episode window bounds and truncation reason (resolution independent)."""
+    merged = _merge_episode_inputs(onset_df, icustays_df).select(
+        pl.col("stay_id").cast(pl.Int64),
+        pl.col("subject_id").cast(pl.Int64),
+        pl.col("hadm_id").cast(pl.Int64),
+        pl.col("sepsis_onset_time").cast(pl.Datetime("us")).alias("onset_time"),
+        pl.col("intime").cast(pl.Datetime("us")),
+        pl.col("outtime").cast(pl.Datetime("us")),
+    )
+    if admissions_df is not None and "deathtime" in admissions_df.columns:
+        deaths = (
+            admissions_df.filter(pl.col("deathtime").is_not_null())
+            .select(
+                pl.col("hadm_id").cast(pl.Int64),
+                pl.col("deathtime").cast(pl.Datetime("us")),
+            )
+            .unique(subset="hadm_id", keep="last", maintain_order=True)
+        )
+        merged = merged.join(deaths, on="hadm_id", how="left", maintain_order="left")
+    else:
+        merged = merged.with_columns(pl.lit(None, dtype=pl.Datetime("us")).alias("deathtime"))
+
+    onset = pl.col("onset_time")
+    window_end = pl.col("window_end")
+    died_first = pl.col("deathtime") < window_end
+    end_after_death = pl.when(died_first).then(pl.col("deathtime")).otherwise(window_end)
+    discharged_first = pl.col("outtime") < end_after_death
+    starts_in_icu = pl.col("intime") > pl.col("window_start")
+
+    return merged.with_columns(
+        (onset + timedelta(hours=WINDOW_START_HOURS)).alias("window_start"),
+        (onset + timedelta(hours=WINDOW_END_HOURS)).alias("window_end"),
+    ).with_columns(
+        pl.when(discharged_first)
+        .then(pl.col("outtime"))
+        .otherwise(end_after_death)
+        .alias("actual_end"),
+        pl.when(starts_in_icu)
+        .then(pl.col("intime"))
+        .otherwise(pl.col("window_start"))
+        .alias("effective_start"),
+        pl.when(died_first)
+        .then(pl.lit(TruncationReason.DEATH.value))
+        .when(discharged_first)
+        .then(pl.lit(TruncationReason.ICU_DISCHARGE.value))
+        .when(starts_in_icu)
+        .then(pl.lit(TruncationReason.ONSET_NEAR_ICU_START.value))
+        .otherwise(pl.lit(TruncationReason.NOT_TRUNCATED.value))
+        .alias("_reason"),
+    ).with_row_index("_episode")
+
+
+def _frames_from_bounds(
+    bounds: pl.DataFrame,
+    step_hours: int,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    max_steps = max_steps_for(step_hours)
+    step = timedelta(hours=step_hours)
+
+    # A step is kept when it overlaps [effective_start, actual_end)
+    step_start = pl.col("onset_time") + pl.duration(
+        hours=WINDOW_START_HOURS + pl.col("step_index") * step_hours
+    )
+    steps = (
+        bounds.select(
+            "_episode",
+            "stay_id",
+            "onset_time",
+            "effective_start",
+            "actual_end",
+            pl.int_ranges(0, max_steps, dtype=pl.Int64).alias("step_index"),
+        )
+        .explode("step_index")
+        .with_columns(step_start.alias("step_start"))
+        .filter(
+            (pl.col("step_start") + step > pl.col("effective_start"))
+            & (pl.col("step_start") < pl.col("actual_end"))
+        )
+    )
+
+    per_episode = steps.group_by("_episode").agg(
+        pl.len().cast(pl.Int64).alias("n_steps"),
+        pl.col("step_index").max().alias("_last_step"),
+    )
+    episodes = (
+        bounds.join(per_episode, on="_episode", how="left", maintain_order="left")
+        .with_columns(pl.col("n_steps").fill_null(0))
+        .with_columns((pl.col("n_steps") < max_steps).alias("is_truncated"))
+        .select(
+            "stay_id",
+            "subject_id",
+            "hadm_id",
+            "onset_time",
+            "window_start",
+            "window_end",
+            "actual_end",
+            "n_steps",
+            "is_truncated",
+            pl.when(pl.col("is_truncated"))
+            .then(pl.col("_reason"))
+            .otherwise(pl.lit(TruncationReason.NOT_TRUNCATED.value))
+            .alias("truncation_reason"),
+            pl.when(pl.col("is_truncated")).then(pl.col("_last_step")).alias("truncation_step"),
+        )
+    )
+    steps_df = steps.sort("_episode", "step_index", maintain_order=True).select(
+        "stay_id",
+        "step_index",
+        "step_start",
+        pl.min_horizontal(pl.col("step_start") + step, pl.col("actual_end")).alias("step_end"),
+        (WINDOW_START_HOURS + pl.col("step_index") * step_hours).alias(
+            "hours_relative_to_onset"
+        ),
+        (pl.col("step_start") < pl.col("onset_time")).alias("is_pre_onset"),
+    )
+
+    if episodes.height == 0:
+        episodes = pl.DataFrame(schema=_EMPTY_EPISODES_SCHEMA)
+    elif episodes["truncation_step"].null_count() == episodes.height:
+        # Row-built frames infer an all-null column as the Null dtype
+        episodes = episodes.with_columns(pl.col("truncation_step").cast(pl.Null))
+    if steps_df.height == 0:
+        steps_df = pl.DataFrame(schema=_EMPTY_STEPS_SCHEMA)
+    return episodes, steps_df
+
+
+def build_episode_frames(
+    onset_df: pl.DataFrame,
+    icustays_df: pl.DataFrame,
+    admissions_df: pl.DataFrame | None = None,
+    *,
+    step_hours: int = STEP_HOURS,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Build the episodes and steps tables for all usable onsets at once.
+
+    Applies the rules of :func:`build_grid_for_episode` with Polars
+    expressions; at the default ``step_hours`` the result equals
+    ``grids_to_dataframes`` applied to :func:`build_episode_grids` with the
+    same inputs.
+
+    Returns
+    -------
+    (episodes_df, steps_df)
+    """
+    return _frames_from_bounds(_episode_bounds(onset_df, icustays_df, admissions_df), step_hours)
+
+
+def build_multi_resolution_frames(
+    onset_df: pl.DataFrame,
+    icustays_df: pl.DataFrame,
+    admissions_df: pl.DataFrame | None = None,
+    *,
+    step_hours: Sequence[int],
+) -> dict[int, tuple[pl.DataFrame, pl.DataFrame]]:
+    """:func:`build_episode_frames` for several step sizes from one bounds pass.
+
+    Returns
+    -------
+    dict[int, (episodes_df, steps_df)]
+        Keyed by step size in hours, in ascending order.
+    """
+    bounds = _episode_bounds(onset_df, icustays_df, admissions_df)
+    return {hours: _frames_from_bounds(bounds, hours) for hours in sorted(set(step_hours))}
+
+
+def common_step_hours(step_hours: Sequence[int]) -> int:
+    """Finest resolution every step size in *step_hours* rolls up from."""
+    if not step_hours:
+        raise ValueError("step_hours must contain at least one step size.")
+    for hours in step_hours:
+        max_steps_for(hours)
+    return math.gcd(*step_hours)
+
+
+def build_base_step_grid(episodes_df: pl.DataFrame, step_hours: int) -> pl.DataFrame:
+    """Every *step_hours* slot of each window that starts before ``actual_end``.
+
+    Unlike the steps table, slots before ICU admission are kept so coarser
+    steps that straddle ``intime`` can be rolled up from them.
+
+    Returns
+    -------
+    pl.DataFrame
+        ``stay_id, hadm_id, step_index, step_start, step_end, episode_start``
+    """
+    step = timedelta(hours=step_hours)
+    step_start = pl.col("window_start") + pl.duration(hours=pl.col("step_index") * step_hours)
+    return (
+        episodes_df.select(
+            pl.col("stay_id").cast(pl.Int64),
+            pl.col("hadm_id").cast(pl.Int64),
+            pl.col("window_start").cast(pl.Datetime("us")),
+            pl.col("actual_end").cast(pl.Datetime("us")),
+            pl.int_ranges(0, max_steps_for(step_hours), dtype=pl.Int64).alias("step_index"),
+        )
+        .explode("step_index")
+        .with_columns(step_start.alias("step_start"))
+        .filter(pl.col("step_start") < pl.col("actual_end"))
+        .select(
+            "stay_id",
+            "hadm_id",
+            "step_index",
+            "step_start",
+            pl.min_horizontal(pl.col("step_start") + step, pl.col("actual_end")).alias(
+                "step_end"
+            ),
+            pl.col("window_start").alias("episode_start"),
+        )
+    )
+
+
+def resolution_path(path: Path, step_hours: int) -> Path:
+    """*path* at the default step size, ``<stem>_<h>h<suffix>`` otherwise."""
+    if step_hours == STEP_HOURS:
+        return path
+    return path.with_name(f"{path.stem}_{step_hours}h{path.suffix}")
+
+
+def iter_episode_grids(
+    episodes_df: pl.DataFrame,
+    steps_df: pl.DataFrame,
+) -> Iterator[EpisodeGrid]:
+    """Lazily yield ``EpisodeGrid`` objects from :func:`build_episode_frames` output."""
+    steps_by_stay = steps_df.partition_by("stay_id", as_dict=True, maintain_order=True)
+    for row in episodes_df.iter_rows(named=True):
+        stay_steps = steps_by_stay.get((row["stay_id"],))
+        steps = (
+            [EpisodeStep(**step) for step in stay_steps.iter_rows(named=True)]
+            if stay_steps is not None
+            else []
+        )
+        yield EpisodeGrid(
+            stay_id=row["stay_id"],
+            subject_id=row["subject_id"],
+            hadm_id=row["hadm_id"],
+            onset_time=row["onset_time"],
+            window_start=row["window_start"],
+            window_end=row["window_end"],
+            actual_end=row["actual_end"],
+            steps=steps,
+            n_steps=row["n_steps"],
+            is_truncated=row["is_truncated"],
+            truncation_reason=TruncationReason(row["truncation_reason"]),
+            truncation_step=row["truncation_step"],
+        )
+
+
+def summarize_episode_frames(
+    episodes_df: pl.DataFrame,
+    *,
+    step_hours: int = STEP_HOURS,
+) -> dict[str, Any]:
+    """:func:`generate_grid_audit` for the episodes table."""
+    total = episodes_df.height
+    truncated = int(episodes_df["is_truncated"].sum())
+    full = total - truncated
+
+    reason_counts: dict[str, int] = {}
+    for reason in episodes_df.filter(pl.col("is_truncated"))["truncation_reason"].to_list():
+        reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+    n_steps = episodes_df["n_steps"]
+    avg_steps = n_steps.sum() / total if total > 0 else 0
+
+    return {
+        "spec_version": EPISODE_SPEC_VERSION,
+        "total_episodes": total,
+        "full_length": full,
+        "truncated": truncated,
+        "truncated_pct": round(truncated / total * 100, 2) if total > 0 else 0,
+        "truncation_reasons": reason_counts,
+        "avg_steps": round(avg_steps, 2),
+        "min_steps": n_steps.min() if total else 0,
+        "max_steps": n_steps.max() if total else 0,
+        "expected_max_steps": max_steps_for(step_hours),
+    }
+
+
 def generate_grid_audit(grids: list[EpisodeGrid]) -> dict[str, Any]:
     """Generate audit summary for episode grid construction."""
     total = len(grids)
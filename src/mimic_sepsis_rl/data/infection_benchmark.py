@@ -0,0 +1,160 @@
+"""
+Suspected-infection pairing benchmark: cross join versus bounded as-of join.
+
+Builds one synthetic high-density admission (thousands of antibiotic starts
+and cultures spread over a long stay) plus a tail of ordinary admissions,
+then times the previous per-admission cross join + 72h filter against
+``pair_infection_events``. Both results are checked for equality before the
+timings are reported.
+
+Usage
+-----
+    python -m mimic_sepsis_rl.data.infection_benchmark
+    python -m mimic_sepsis_rl.data.infection_benchmark --antibiotics 5000 --cultures 5000
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial infection pairing benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+import polars as pl
+
+from mimic_sepsis_rl.data.onset import INFECTION_PAIRING_TOLERANCE, pair_infection_events
+
+_BASE_TIME = datetime(2150, 1, 1)
+
+
+def cross_join_infection_times(
+    antibiotics: pl.DataFrame,
+    cultures: pl.DataFrame,
+    *,
+    tolerance: timedelta = INFECTION_PAIRING_TOLERANCE,
+) -> pl.DataFrame:
+    """Reference pairing: every antibiotic x culture per admission, then filter."""
+    paired = antibiotics.join(cultures, on="hadm_id", how="inner").filter(
+        (pl.col("abx_time") - pl.col("culture_time")).abs() <= tolerance
+    )
+    return (
+        paired.with_columns(
+            pl.min_horizontal("abx_time", "culture_time").alias("suspected_infection_time")
+        )
+        .group_by("hadm_id")
+        .agg(pl.col("suspected_infection_time").min())
+        .sort("hadm_id")
+    )
+
+
+def synthetic_infection_events(
+    *,
+    n_antibiotics: int,
+    n_cultures: int,
+    n_background_admissions: int = 200,
+    stay_days: int = 60,
+    seed: int = 0,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """One dense admission (hadm_id 0) plus small background admissions."""
+    rng = random.Random(seed)
+    horizon_s = stay_days * 86_400
+
+    def _events(hadm_id: int, n: int, span_s: int) -> list[tuple[int, datetime]]:
+        return [
+            (hadm_id, _BASE_TIME + timedelta(seconds=rng.randrange(span_s)))
+            for _ in range(n)
+        ]
+
+    abx = _events(0, n_antibiotics, horizon_s)
+    cultures = _events(0, n_cultures, horizon_s)
+    for hadm_id in range(1, n_background_admissions + 1):
+        abx += _events(hadm_id, rng.randint(0, 6), 10 * 86_400)
+        cultures += _events(hadm_id, rng.randint(0, 6), 10 * 86_400)
+
+    schema = {"hadm_id": pl.Int64}
+    return (
+        pl.DataFrame(abx, schema={**schema, "abx_time": pl.Datetime("us")}, orient="row"),
+        pl.DataFrame(cultures, schema={**schema, "culture_time": pl.Datetime("us")}, orient="row"),
+    )
+
+
+def _best_of(fn: Any, repeats: int) -> tuple[float, pl.DataFrame]:
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_infection_benchmark(
+    *,
+    n_antibiotics: int = 3000,
+    n_cultures: int = 3000,
+    n_background_admissions: int = 200,
+    repeats: int = 3,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Time both pairing strategies and return a JSON-able report."""
+    antibiotics, cultures = synthetic_infection_events(
+        n_antibiotics=n_antibiotics,
+        n_cultures=n_cultures,
+        n_background_admissions=n_background_admissions,
+        seed=seed,
+    )
+    cross_s, expected = _best_of(
+        lambda: cross_join_infection_times(antibiotics, cultures), repeats
+    )
+    asof_s, actual = _best_of(lambda: pair_infection_events(antibiotics, cultures), repeats)
+    if not actual.equals(expected):
+        raise ValueError("As-of pairing disagrees with the cross-join reference.")
+
+    return {
+        "antibiotic_rows": antibiotics.height,
+        "culture_rows": cultures.height,
+        "dense_admission_pairs": n_antibiotics * n_cultures,
+        "admissions_with_infection": actual.height,
+        "cross_join_seconds": round(cross_s, 4),
+        "asof_join_seconds": round(asof_s, 4),
+        "speedup": round(cross_s / asof_s, 2) if asof_s > 0 else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point for ``python -m mimic_sepsis_rl.data.infection_benchmark``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mimic_sepsis_rl.data.infection_benchmark",
+        description="Compare cross-join and as-of suspected-infection pairing.",
+    )
+    parser.add_argument("--antibiotics", type=int, default=3000)
+    parser.add_argument("--cultures", type=int, default=3000)
+    parser.add_argument("--background-admissions", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_infection_benchmark(
+        n_antibiotics=args.antibiotics,
+        n_cultures=args.cultures,
+        n_background_admissions=args.background_admissions,
+        repeats=args.repeats,
+        seed=args.seed,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "cross_join_infection_times",
+    "run_infection_benchmark",
+    "synthetic_infection_events",
+]
@@ -16,6 +16,12 @@ When the MIMIC-IV derived ``sepsis3`` table is unavailable, this module
 computes the onset from raw tables (microbiologyevents, prescriptions,
 chartevents → SOFA proxy).
 
+Onsets are resolved columnar by ``resolve_onsets``: SOFA rows are joined
+to each stay's suspected infection time, the search window, threshold,
+tie-break and ICU-boundary rules are applied as Polars expressions, and the
+output equals ``results_to_dataframes(assign_onsets(...))``.  The per-stay
+``assign_onset_for_stay`` path remains the reference implementation.
+
 Usage
 -----
     python -m mimic_sepsis_rl.data.onset --config configs/onset/default.yaml --dry-run
@@ -23,6 +29,9 @@ Usage
 Version history
 ---------------
 v1.0.0  2026-03-28  Initial onset assignment pipeline.
+v1.1.0  2026-10-18  Columnar onset engine (resolve_onsets / assign_onset_frames).
+v1.2.0  2026-10-18  Lazy infection-event scans paired with a bounded as-of join.
+v1.3.0  2026-10-18  SOFA proxy from the shared streaming intermediate (data/sofa.py).
 """
 
 from __future__ import annotations
@@ -45,6 +54,8 @@ from mimic_sepsis_rl.data.onset_models import (
     OnsetResult,
     UnusableReason,
 )
+from mimic_sepsis_rl.data.raw_cache import scan_raw_table
+from mimic_sepsis_rl.data.sofa import load_or_build_sofa_proxy, scan_sofa_proxy
 
 logger = logging.getLogger(__name__)
 
@@ -76,128 +87,86 @@ def load_onset_config(config_path: Path) -> dict[str, Any]:
 
 
 # ---------------------------------------------------------------------------
-# MIMIC-IV table loaders (from compressed CSV)
+# MIMIC-IV table loaders (Parquet raw cache, falling back to compressed CSV)
 # ---------------------------------------------------------------------------
 
 
 def _load_icustays() -> pl.DataFrame:
     """Load ICU stays with parsed datetime columns."""
-    path = MIMIC_RAW_ROOT / "icu" / "icustays.csv.gz"
-    df = pl.read_csv(path)
-    return df.with_columns(
-        pl.col("intime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
-        pl.col("outtime").str.to_datetime("%Y-%m-%d %H:%M:%S"),
-    )
+    return scan_raw_table(MIMIC_RAW_ROOT, "icu/icustays", preserve_order=True).collect()
+
+
+ANTIBIOTIC_KEYWORDS: tuple[str, ...] = (
+    "CEFAZOLIN", "CEFTRIAXONE", "CEFEPIME", "CEFTAZIDIME",
+    "VANCOMYCIN", "PIPERACILLIN", "MEROPENEM", "IMIPENEM",
+    "CIPROFLOXACIN", "LEVOFLOXACIN", "METRONIDAZOLE",
+    "AMPICILLIN", "GENTAMICIN", "TOBRAMYCIN", "AMIKACIN",
+    "AZITHROMYCIN", "DOXYCYCLINE", "TRIMETHOPRIM",
+    "LINEZOLID", "DAPTOMYCIN", "ERTAPENEM", "DORIPENEM",
+    "COLISTIN", "POLYMYXIN", "TIGECYCLINE", "AZTREONAM",
+    "CEFOXITIN", "CEFUROXIME", "NAFCILLIN", "OXACILLIN",
+    "CLINDAMYCIN", "PENICILLIN", "AMOXICILLIN",
+)
 
+# Maximum |antibiotic start - culture time| for a suspected-infection pair
+INFECTION_PAIRING_TOLERANCE = timedelta(hours=72)
 
-def _load_microbiologyevents() -> pl.DataFrame:
-    """Load microbiology events (culture orders) for infection timing."""
-    path = MIMIC_RAW_ROOT / "hosp" / "microbiologyevents.csv.gz"
-    df = pl.read_csv(
-        path,
-        columns=["subject_id", "hadm_id", "chartdate", "charttime", "spec_type_desc"],
-    )
+
+def _scan_microbiologyevents(hadm_ids: pl.DataFrame) -> pl.LazyFrame:
+    """Lazily scan culture times for the given admissions."""
     # charttime may be null; fall back to chartdate with midnight
-    return df.with_columns(
-        pl.coalesce(
-            pl.col("charttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-            pl.col("chartdate").str.to_datetime("%Y-%m-%d", strict=False),
-        ).alias("culture_time")
+    return (
+        scan_raw_table(MIMIC_RAW_ROOT, "hosp/microbiologyevents")
+        .select(["hadm_id", "chartdate", "charttime"])
+        .join(hadm_ids.lazy(), on="hadm_id", how="semi")
+        .select(
+            "hadm_id",
+            pl.coalesce(pl.col("charttime"), pl.col("chartdate")).alias("culture_time"),
+        )
     )
 
 
-def _load_prescriptions_antibiotics() -> pl.DataFrame:
-    """Load antibiotic prescriptions for suspected infection timing."""
-    path = MIMIC_RAW_ROOT / "hosp" / "prescriptions.csv.gz"
-    df = pl.read_csv(
-        path,
-        columns=["subject_id", "hadm_id", "starttime", "stoptime", "drug", "route"],
+def antibiotic_drug_names(drugs: pl.Series) -> pl.Series:
+    """Return the distinct entries of *drugs* that name an antibiotic.
+
+    The keyword match runs once per distinct drug string (normalised to
+    upper case) instead of once per prescription row.
+    """
+    distinct = drugs.drop_nulls().unique().to_frame("drug")
+    pattern = "|".join(ANTIBIOTIC_KEYWORDS)
+    return distinct.filter(
+        pl.col("drug").str.to_uppercase().str.contains(pattern)
+    )["drug"]
+
+
+def _scan_prescriptions_antibiotics(hadm_ids: pl.DataFrame) -> pl.LazyFrame:
+    """Lazily scan antibiotic start times for the given admissions."""
+    prescriptions = (
+        scan_raw_table(MIMIC_RAW_ROOT, "hosp/prescriptions")
+        .select(["hadm_id", "starttime", "drug"])
+        .join(hadm_ids.lazy(), on="hadm_id", how="semi")
+        .filter(pl.col("starttime").is_not_null())
     )
-    # Filter to IV/IM antibiotics (common antibiotic route patterns)
-    antibiotic_keywords = [
-        "CEFAZOLIN", "CEFTRIAXONE", "CEFEPIME", "CEFTAZIDIME",
-        "VANCOMYCIN", "PIPERACILLIN", "MEROPENEM", "IMIPENEM",
-        "CIPROFLOXACIN", "LEVOFLOXACIN", "METRONIDAZOLE",
-        "AMPICILLIN", "GENTAMICIN", "TOBRAMYCIN", "AMIKACIN",
-        "AZITHROMYCIN", "DOXYCYCLINE", "TRIMETHOPRIM",
-        "LINEZOLID", "DAPTOMYCIN", "ERTAPENEM", "DORIPENEM",
-        "COLISTIN", "POLYMYXIN", "TIGECYCLINE", "AZTREONAM",
-        "CEFOXITIN", "CEFUROXIME", "NAFCILLIN", "OXACILLIN",
-        "CLINDAMYCIN", "PENICILLIN", "AMOXICILLIN",
-    ]
-    # Build case-insensitive OR pattern
-    pattern = "|".join(antibiotic_keywords)
-    df = df.filter(pl.col("drug").str.to_uppercase().str.contains(f"(?i){pattern}"))
-    df = df.with_columns(
-        pl.col("starttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
+    drug_names = prescriptions.select(pl.col("drug").unique()).collect(engine="streaming")
+    antibiotics = antibiotic_drug_names(drug_names["drug"])
+    return prescriptions.filter(pl.col("drug").is_in(antibiotics.implode())).select(
+        "hadm_id", pl.col("starttime").alias("abx_time")
     )
-    return df.filter(pl.col("starttime").is_not_null())
 
 
 def _compute_sofa_proxy(icustays: pl.DataFrame) -> pl.DataFrame:
-    """Compute a simplified SOFA proxy from chartevents.
+    """Compute a simplified SOFA proxy from chartevents for the cohort stays.
 
     This is a simplified implementation that uses a subset of SOFA
-    components available from chartevents.  When the derived sepsis3
-    table is available, it should be used instead.
+    components available from chartevents (see
+    :mod:`mimic_sepsis_rl.data.sofa`).  When the derived sepsis3 table is
+    available, it should be used instead.
 
     Returns a DataFrame with columns:
         subject_id, hadm_id, stay_id, charttime, sofa_score
     """
-    path = MIMIC_RAW_ROOT / "icu" / "chartevents.csv.gz"
-
-    # SOFA-relevant itemids from MIMIC-IV d_items:
-    # Cardiovascular: MAP (220052, 220181), vasopressors
-    # Respiratory: PaO2/FiO2 ratio, SpO2 (220277)
-    # Renal: Urine output (226559), Creatinine
-    # Hepatic: Bilirubin
-    # Coagulation: Platelets
-    # Neurological: GCS (223901 total, or components 220739+223900+223901)
-
-    sofa_itemids = [
-        220052,   # Arterial Blood Pressure mean
-        220181,   # Non Invasive Blood Pressure mean
-        220277,   # SpO2
-        223901,   # GCS - Total
-        226559,   # Urine output
-    ]
-
-    # Read only relevant items to save memory
-    logger.info("Loading chartevents for SOFA proxy (this may take a while)...")
-
-    # Use streaming/lazy for large file
-    df = pl.scan_csv(path).filter(
-        pl.col("itemid").is_in(sofa_itemids)
-    ).select(
-        ["subject_id", "hadm_id", "stay_id", "charttime", "itemid", "valuenum"]
-    ).collect()
-
-    df = df.with_columns(
-        pl.col("charttime").str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False),
-    ).filter(pl.col("valuenum").is_not_null())
-
-    # Pivot to get one row per (stay_id, charttime) with SOFA components
-    # Simple SOFA proxy: count abnormal components
-    # MAP < 70: cardio=1, GCS < 15: neuro score, SpO2 < 94: resp score
-    scored = df.group_by(["subject_id", "hadm_id", "stay_id", "charttime"]).agg([
-        # Cardiovascular: MAP < 70 → 1 point
-        (pl.col("valuenum").filter(
-            pl.col("itemid").is_in([220052, 220181])
-        ).min() < 70).cast(pl.Int32).fill_null(0).first().alias("cardio_score"),
-        # Respiratory: SpO2 < 94 → 1 point
-        (pl.col("valuenum").filter(
-            pl.col("itemid") == 220277
-        ).min() < 94).cast(pl.Int32).fill_null(0).first().alias("resp_score"),
-        # Neurological: GCS < 15 → 1 point (simplified)
-        (pl.col("valuenum").filter(
-            pl.col("itemid") == 223901
-        ).min() < 15).cast(pl.Int32).fill_null(0).first().alias("neuro_score"),
-    ]).with_columns(
-        (pl.col("cardio_score") + pl.col("resp_score") + pl.col("neuro_score"))
-        .alias("sofa_score")
-    )
-
-    return scored.select(["subject_id", "hadm_id", "stay_id", "charttime", "sofa_score"])
+    logger.info("Streaming chartevents for SOFA proxy...")
+    return scan_sofa_proxy(icustays, raw_root=MIMIC_RAW_ROOT).collect(engine="streaming")
 
 
 # ---------------------------------------------------------------------------
@@ -205,6 +174,69 @@ def _compute_sofa_proxy(icustays: pl.DataFrame) -> pl.DataFrame:
 # ---------------------------------------------------------------------------
 
 
+def pair_infection_events(
+    antibiotics: pl.DataFrame,
+    cultures: pl.DataFrame,
+    *,
+    tolerance: timedelta = INFECTION_PAIRING_TOLERANCE,
+) -> pl.DataFrame:
+    """Suspected infection time per admission from paired events.
+
+    An antibiotic start and a culture of the same admission pair up when
+    they are at most *tolerance* apart; the suspected infection time is the
+    earliest event that belongs to any pair.  Instead of materialising every
+    (antibiotic, culture) pair, each event is matched to its nearest
+    counterpart with a sorted as-of join bounded by *tolerance*.
+
+    Parameters
+    ----------
+    antibiotics:
+        Frame with hadm_id, abx_time.
+    cultures:
+        Frame with hadm_id, culture_time.
+
+    Returns DataFrame with: hadm_id, suspected_infection_time (sorted by hadm_id)
+    """
+    abx = (
+        antibiotics.select(
+            pl.col("hadm_id").cast(pl.Int64),
+            pl.col("abx_time").cast(pl.Datetime("us")).alias("event_time"),
+        )
+        .drop_nulls()
+        .sort(["hadm_id", "event_time"])
+    )
+    cult = (
+        cultures.select(
+            pl.col("hadm_id").cast(pl.Int64),
+            pl.col("culture_time").cast(pl.Datetime("us")).alias("event_time"),
+        )
+        .drop_nulls()
+        .sort(["hadm_id", "event_time"])
+    )
+
+    def _earliest_paired(events: pl.DataFrame, others: pl.DataFrame) -> pl.DataFrame:
+        matched = events.join_asof(
+            others.with_columns(pl.col("event_time").alias("paired_time")),
+            on="event_time",
+            by="hadm_id",
+            strategy="nearest",
+            tolerance=tolerance,
+            check_sortedness=False,
+        )
+        return (
+            matched.filter(pl.col("paired_time").is_not_null())
+            .group_by("hadm_id")
+            .agg(pl.col("event_time").min())
+        )
+
+    paired = pl.concat([_earliest_paired(abx, cult), _earliest_paired(cult, abx)])
+    return (
+        paired.group_by("hadm_id")
+        .agg(pl.col("event_time").min().alias("suspected_infection_time"))
+        .sort("hadm_id")
+    )
+
+
 def compute_suspected_infection_times(
     icustays: pl.DataFrame,
 ) -> pl.DataFrame:
@@ -214,49 +246,19 @@ def compute_suspected_infection_times(
     - Culture order within [-24h, +24h] of antibiotic start, OR
     - Antibiotic start within [-72h, +24h] of culture order.
 
-    We use the simpler rule: earliest antibiotic start that's
-    within 24h of any culture order for the same admission.
+    We use the simpler rule: earliest antibiotic start or culture order
+    that lies within 72h of an event of the other kind for the same
+    admission (see :func:`pair_infection_events`).
 
-    Returns DataFrame with: subject_id, hadm_id, suspected_infection_time
+    Returns DataFrame with: hadm_id, suspected_infection_time
     """
-    micro = _load_microbiologyevents()
-    abx = _load_prescriptions_antibiotics()
-
     # Get unique admission IDs from cohort
-    hadm_ids = icustays.select("hadm_id").unique()
-
-    # Filter to cohort admissions
-    micro_cohort = micro.join(hadm_ids, on="hadm_id", how="inner")
-    abx_cohort = abx.join(hadm_ids, on="hadm_id", how="inner")
-
-    # Cross-join within admission to find culture-antibiotic pairs
-    paired = abx_cohort.select(
-        ["hadm_id", "starttime"]
-    ).rename({"starttime": "abx_time"}).join(
-        micro_cohort.select(["hadm_id", "culture_time"]),
-        on="hadm_id",
-        how="inner",
-    )
-
-    # Filter: antibiotic within [-24h, +24h] of culture
-    paired = paired.filter(
-        (pl.col("abx_time") - pl.col("culture_time")).abs() <= timedelta(hours=72)
-    )
+    hadm_ids = icustays.select(pl.col("hadm_id").cast(pl.Int64)).unique()
 
-    # Suspected infection time = earliest of (abx_time, culture_time) per admission
-    if paired.height == 0:
-        return pl.DataFrame(schema={
-            "hadm_id": pl.Int64,
-            "suspected_infection_time": pl.Datetime,
-        })
-
-    result = paired.with_columns(
-        pl.min_horizontal("abx_time", "culture_time").alias("suspected_infection_time")
-    ).group_by("hadm_id").agg(
-        pl.col("suspected_infection_time").min()
-    )
-
-    return result
+    # Projection and the admission semi-join are pushed into the raw scans
+    cultures = _scan_microbiologyevents(hadm_ids).collect(engine="streaming")
+    antibiotics = _scan_prescriptions_antibiotics(hadm_ids).collect(engine="streaming")
+    return pair_infection_events(antibiotics, cultures)
 
 
 # ---------------------------------------------------------------------------
@@ -401,6 +403,9 @@ def assign_onsets(
     logger.info("Computing SOFA proxy scores...")
     sofa_all = _compute_sofa_proxy(cohort)
 
+    sofa_by_stay = sofa_all.partition_by("stay_id", as_dict=True)
+    no_sofa = sofa_all.clear()
+
     results: list[OnsetResult] = []
     total = cohort.height
     for idx, stay_row in enumerate(cohort.iter_rows(named=True)):
@@ -414,7 +419,7 @@ def assign_onsets(
         infection_time = infection_lookup.get(hadm_id)
 
         # Get SOFA scores for this stay
-        sofa_stay = sofa_all.filter(pl.col("stay_id") == stay_id)
+        sofa_stay = sofa_by_stay.get((stay_id,), no_sofa)
 
         result = assign_onset_for_stay(
             stay_row=stay_row,
@@ -427,10 +432,206 @@ def assign_onsets(
     return results
 
 
+# ---------------------------------------------------------------------------
+# Columnar onset assignment
+# ---------------------------------------------------------------------------
+
+
+def resolve_onsets(
+    cohort: pl.DataFrame,
+    infection_times: pl.DataFrame,
+    sofa: pl.DataFrame,
+    cfg: dict[str, Any],
+    *,
+    include_candidates: bool = True,
+) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Assign onsets for every cohort stay with Polars expressions.
+
+    Applies the same rules as :func:`assign_onset_for_stay` without
+    per-stay filtering or ``OnsetCandidate`` objects.
+
+    Parameters
+    ----------
+    cohort:
+        Cohort DataFrame with stay_id, subject_id, hadm_id, intime, outtime.
+    infection_times:
+        Output of :func:`compute_suspected_infection_times`.
+    sofa:
+        SOFA scores with stay_id, charttime, sofa_score.
+    cfg:
+        Full onset config dict.
+    include_candidates:
+        Build the per-candidate audit table.  When ``False`` an empty
+        candidates frame is returned.
+
+    Returns
+    -------
+    (usable_df, unusable_df, candidates_df), equal to
+    ``results_to_dataframes`` applied to the per-stay results.
+    """
+    onset_cfg = cfg["onset"]
+    icu_cfg = cfg["icu_boundary"]
+    lookback = timedelta(hours=onset_cfg["lookback_hours"])
+    lookahead = timedelta(hours=onset_cfg["lookahead_hours"])
+    min_sofa = onset_cfg["min_sofa_increase"]
+    pick = (
+        pl.col("onset_time").arg_min()
+        if onset_cfg.get("tie_break", "earliest") == "earliest"
+        else pl.lit(0)
+    )
+    id_cols = ["stay_id", "subject_id", "hadm_id"]
+
+    infection = infection_times.select(
+        pl.col("hadm_id").cast(pl.Int64),
+        pl.col("suspected_infection_time").cast(pl.Datetime("us")),
+    ).unique(subset="hadm_id", keep="last", maintain_order=True)
+
+    stays = (
+        cohort.select(
+            *(pl.col(c).cast(pl.Int64) for c in id_cols),
+            pl.col("intime").cast(pl.Datetime("us")),
+            pl.col("outtime").cast(pl.Datetime("us")),
+        )
+        .with_row_index("_row")
+        .join(infection, on="hadm_id", how="left", maintain_order="left")
+    )
+
+    infection_time = pl.col("suspected_infection_time")
+    candidates = (
+        stays.filter(infection_time.is_not_null())
+        .select("_row", "stay_id", "suspected_infection_time")
+        .join(
+            sofa.select(
+                pl.col("stay_id").cast(pl.Int64),
+                pl.col("charttime").cast(pl.Datetime("us")).alias("sofa_time"),
+                pl.col("sofa_score").cast(pl.Int64),
+            ),
+            on="stay_id",
+            how="inner",
+        )
+        .filter(
+            (pl.col("sofa_time") >= infection_time - lookback)
+            & (pl.col("sofa_time") <= infection_time + lookahead)
+            & (pl.col("sofa_score") >= min_sofa)
+        )
+        .with_columns(
+            pl.min_horizontal("suspected_infection_time", "sofa_time").alias("onset_time")
+        )
+        .sort(["_row", "sofa_time"], maintain_order=True)
+    )
+
+    selected = candidates.group_by("_row").agg(
+        pl.len().cast(pl.Int64).alias("n_candidates"),
+        pl.col("onset_time").get(pick).alias("sepsis_onset_time"),
+        pl.col("sofa_time").get(pick).alias("_selected_sofa_time"),
+        pl.col("sofa_score").get(pick).alias("sofa_score_at_onset"),
+    )
+
+    onset = pl.col("sepsis_onset_time")
+    outside_icu = pl.lit(False)
+    if icu_cfg.get("require_within_icu", True):
+        grace = timedelta(hours=icu_cfg.get("grace_before_intime_hours", 6.0))
+        outside_icu = (onset < pl.col("intime") - grace) | (onset > pl.col("outtime"))
+
+    resolved = (
+        stays.join(selected, on="_row", how="left")
+        .with_columns(pl.col("n_candidates").fill_null(0))
+        .with_columns(
+            pl.when(infection_time.is_null())
+            .then(pl.lit(UnusableReason.NO_SUSPECTED_INFECTION.value))
+            .when(pl.col("n_candidates") == 0)
+            .then(pl.lit(UnusableReason.NO_SOFA_INCREASE.value))
+            .when(outside_icu)
+            .then(pl.lit(UnusableReason.ONSET_OUTSIDE_ICU.value))
+            .otherwise(pl.lit(None, dtype=pl.Utf8))
+            .alias("unusable_reason")
+        )
+        .sort("_row")
+    )
+
+    usable_df = resolved.filter(pl.col("unusable_reason").is_null()).select(
+        *id_cols, "sepsis_onset_time", "sofa_score_at_onset", "n_candidates"
+    )
+    unusable_df = resolved.filter(pl.col("unusable_reason").is_not_null()).select(
+        *id_cols, "unusable_reason", "n_candidates"
+    )
+    candidates_df = pl.DataFrame(schema=_EMPTY_CANDIDATES_SCHEMA)
+    if include_candidates:
+        candidates_df = candidates.join(
+            resolved.select(
+                "_row", "unusable_reason", "_selected_sofa_time", "sofa_score_at_onset"
+            ),
+            on="_row",
+            how="left",
+            maintain_order="left",
+        ).select(
+            "stay_id",
+            "suspected_infection_time",
+            "sofa_time",
+            "sofa_score",
+            "onset_time",
+            (
+                pl.col("unusable_reason").is_null()
+                & (pl.col("sofa_time") == pl.col("_selected_sofa_time"))
+                & (pl.col("sofa_score") == pl.col("sofa_score_at_onset"))
+            ).alias("selected"),
+        )
+
+    return (
+        usable_df if usable_df.height else pl.DataFrame(schema=_EMPTY_USABLE_SCHEMA),
+        unusable_df if unusable_df.height else pl.DataFrame(schema=_EMPTY_UNUSABLE_SCHEMA),
+        candidates_df
+        if candidates_df.height
+        else pl.DataFrame(schema=_EMPTY_CANDIDATES_SCHEMA),
+    )
+
+
+def assign_onset_frames(
+    cohort: pl.DataFrame,
+    cfg: dict[str, Any],
+    *,
+    include_candidates: bool = True,
+    sofa_path: Path | None = None,
+) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Load infection times and SOFA scores, then :func:`resolve_onsets`.
+
+    With *sofa_path*, the SOFA proxy is read from (or streamed once into)
+    that shared Parquet intermediate.
+    """
+    logger.info("Computing suspected infection times...")
+    infection_times = compute_suspected_infection_times(cohort)
+
+    logger.info("Computing SOFA proxy scores...")
+    if sofa_path is not None:
+        sofa_all = load_or_build_sofa_proxy(cohort, sofa_path, raw_root=MIMIC_RAW_ROOT)
+    else:
+        sofa_all = _compute_sofa_proxy(cohort)
+
+    logger.info(f"Resolving onsets for {cohort.height} stays...")
+    return resolve_onsets(
+        cohort, infection_times, sofa_all, cfg, include_candidates=include_candidates
+    )
+
+
 # ---------------------------------------------------------------------------
 # Result serialisation
 # ---------------------------------------------------------------------------
 
+_EMPTY_USABLE_SCHEMA: dict[str, Any] = {
+    "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
+    "sepsis_onset_time": pl.Datetime, "sofa_score_at_onset": pl.Int32,
+    "n_candidates": pl.Int32,
+}
+_EMPTY_UNUSABLE_SCHEMA: dict[str, Any] = {
+    "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
+    "unusable_reason": pl.Utf8, "n_candidates": pl.Int32,
+}
+_EMPTY_CANDIDATES_SCHEMA: dict[str, Any] = {
+    "stay_id": pl.Int64, "suspected_infection_time": pl.Datetime,
+    "sofa_time": pl.Datetime, "sofa_score": pl.Int32,
+    "onset_time": pl.Datetime, "selected": pl.Boolean,
+}
+
 
 def results_to_dataframes(
     results: list[OnsetResult],
@@ -478,20 +679,19 @@ def results_to_dataframes(
                 "selected": (r.selected_candidate == c) if r.selected_candidate else False,
             })
 
-    usable_df = pl.DataFrame(usable_rows) if usable_rows else pl.DataFrame(schema={
-        "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
-        "sepsis_onset_time": pl.Datetime, "sofa_score_at_onset": pl.Int32,
-        "n_candidates": pl.Int32,
-    })
-    unusable_df = pl.DataFrame(unusable_rows) if unusable_rows else pl.DataFrame(schema={
-        "stay_id": pl.Int64, "subject_id": pl.Int64, "hadm_id": pl.Int64,
-        "unusable_reason": pl.Utf8, "n_candidates": pl.Int32,
-    })
-    candidates_df = pl.DataFrame(candidate_rows) if candidate_rows else pl.DataFrame(schema={
-        "stay_id": pl.Int64, "suspected_infection_time": pl.Datetime,
-        "sofa_time": pl.Datetime, "sofa_score": pl.Int32,
-        "onset_time": pl.Datetime, "selected": pl.Boolean,
-    })
+    usable_df = (
+        pl.DataFrame(usable_rows) if usable_rows else pl.DataFrame(schema=_EMPTY_USABLE_SCHEMA)
+    )
+    unusable_df = (
+        pl.DataFrame(unusable_rows)
+        if unusable_rows
+        else pl.DataFrame(schema=_EMPTY_UNUSABLE_SCHEMA)
+    )
+    candidates_df = (
+        pl.DataFrame(candidate_rows)
+        if candidate_rows
+        else pl.DataFrame(schema=_EMPTY_CANDIDATES_SCHEMA)
+    )
 
     return usable_df, unusable_df, candidates_df
 
@@ -518,6 +718,30 @@ def generate_audit_summary(results: list[OnsetResult]) -> dict[str, Any]:
     }
 
 
+def summarize_onset_frames(
+    usable_df: pl.DataFrame,
+    unusable_df: pl.DataFrame,
+) -> dict[str, Any]:
+    """:func:`generate_audit_summary` for the frames of :func:`resolve_onsets`."""
+    usable = usable_df.height
+    unusable = unusable_df.height
+    total = usable + unusable
+
+    reason_counts: dict[str, int] = {}
+    for reason in unusable_df["unusable_reason"].to_list():
+        if reason:
+            reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+    return {
+        "spec_version": ONSET_SPEC_VERSION,
+        "total_episodes": total,
+        "usable": usable,
+        "unusable": unusable,
+        "usable_pct": round(usable / total * 100, 2) if total > 0 else 0,
+        "unusable_reasons": reason_counts,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Dry run
 # ---------------------------------------------------------------------------
@@ -608,10 +832,11 @@ def main(argv: list[str] | None = None) -> int:
     cohort = pl.read_parquet(cohort_path)
     logger.info(f"Loaded cohort: {cohort.height} stays")
 
-    results = assign_onsets(cohort, cfg)
-
-    usable_df, unusable_df, candidates_df = results_to_dataframes(results)
-    audit = generate_audit_summary(results)
+    sofa_path = Path(output_cfg.get("sofa_parquet", "data/processed/onset/sofa_proxy.parquet"))
+    usable_df, unusable_df, candidates_df = assign_onset_frames(
+        cohort, cfg, sofa_path=sofa_path
+    )
+    audit = summarize_onset_frames(usable_df, unusable_df)
 
     # Write outputs
     onset_path = Path(output_cfg.get("onset_parquet", "data/processed/onset/onset_assignments.parquet"))
@@ -0,0 +1,639 @@
+"""
+One-time CSV.gz → Parquet conversion cache for MIMIC-IV raw tables.
+
+Gzipped CSV can neither be read in parallel nor filtered before it is fully
+decompressed, so every pipeline stage used to pay a single-threaded
+multi-minute decompress of ``chartevents`` and friends. This module converts
+each raw table once into typed Parquet with datetimes already parsed and
+serves all later reads from it:
+
+- every table is one Parquet file sorted by ``itemid`` (where present),
+  then its stay/admission key and time, and written in small row groups,
+  so ``itemid`` predicates are pruned from the row-group statistics;
+- a hidden source row index can restore the original CSV row order on read
+  (``preserve_order=True``) for loaders whose output follows row order.
+
+Cache entries are keyed by the SHA-256 of the source file plus the table
+layout. A per-table index remembers each source's size and mtime, so an
+unchanged file is matched without re-hashing, and a touched but identical
+file re-uses its existing entry.
+
+Configuration
+-------------
+``MIMIC_RAW_CACHE_DIR``   Cache root (default ``data/cache/raw_parquet``).
+``MIMIC_RAW_CACHE=0``     Disable the cache and scan the CSVs directly.
+
+Usage
+-----
+    lazy = scan_raw_table(raw_root, "icu/chartevents")
+    python -m mimic_sepsis_rl.data.raw_cache --raw-root data/raw/.../3.1
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial raw table cache.
+v1.1.0  2026-10-18  Itemid-ordered hive buckets; CSV row order restore is opt-in.
+v1.2.0  2026-10-18  One itemid-sorted file per table instead of bucket directories.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Final, Mapping, Sequence
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+RAW_CACHE_VERSION: Final[str] = "1.2.0"
+MIMIC_RAW_ROOT = Path("data/raw/physionet.org/files/mimiciv/3.1")
+DEFAULT_RAW_CACHE_ROOT = Path("data/cache/raw_parquet")
+DEFAULT_ROW_GROUP_SIZE: Final[int] = 65_536
+RAW_CACHE_DIR_ENV: Final[str] = "MIMIC_RAW_CACHE_DIR"
+RAW_CACHE_ENABLED_ENV: Final[str] = "MIMIC_RAW_CACHE"
+
+_ROW_INDEX: Final[str] = "__source_row"
+_DATETIME_FORMAT: Final[str] = "%Y-%m-%d %H:%M:%S"
+_DATE_FORMAT: Final[str] = "%Y-%m-%d"
+_HASH_CHUNK_BYTES: Final[int] = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Table specs
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class RawTableSpec:
+    """Typed layout of one raw MIMIC-IV table.
+
+    Attributes
+    ----------
+    table : str
+        ``<module>/<name>`` path below the raw root, without ``.csv.gz``.
+    dtypes : Mapping[str, pl.DataType]
+        Non-string columns; every other column is kept as ``Utf8``.
+    datetime_formats : Mapping[str, str]
+        Columns parsed to ``Datetime`` with the given ``strftime`` format.
+    sort_by : tuple[str, ...]
+        Key and time columns the cached file is sorted by, after
+        ``cluster_col``.
+    cluster_col : str | None
+        Column rows are sorted by first (``itemid``), so its row-group
+        statistics are tight and equality filters skip most row groups.
+    """
+
+    table: str
+    dtypes: Mapping[str, pl.DataType]
+    datetime_formats: Mapping[str, str]
+    sort_by: tuple[str, ...]
+    cluster_col: str | None = None
+
+    @property
+    def relative_path(self) -> Path:
+        return Path(f"{self.table}.csv.gz")
+
+    def fingerprint(self) -> str:
+        """Stable description of the layout, part of every cache key."""
+        return json.dumps(
+            {
+                "table": self.table,
+                "dtypes": {col: str(dtype) for col, dtype in sorted(self.dtypes.items())},
+                "datetime_formats": dict(sorted(self.datetime_formats.items())),
+                "sort_by": list(self.sort_by),
+                "cluster_col": self.cluster_col,
+            },
+            sort_keys=True,
+        )
+
+
+_I64 = pl.Int64
+_F64 = pl.Float64
+
+RAW_TABLE_SPECS: Final[dict[str, RawTableSpec]] = {
+    spec.table: spec
+    for spec in (
+        RawTableSpec(
+            table="icu/chartevents",
+            dtypes={
+                "subject_id": _I64,
+                "hadm_id": _I64,
+                "stay_id": _I64,
+                "caregiver_id": _I64,
+                "itemid": _I64,
+                "valuenum": _F64,
+                "warning": _I64,
+            },
+            datetime_formats={"charttime": _DATETIME_FORMAT, "storetime": _DATETIME_FORMAT},
+            sort_by=("stay_id", "charttime"),
+            cluster_col="itemid",
+        ),
+        RawTableSpec(
+            table="icu/inputevents",
+            dtypes={
+                "subject_id": _I64,
+                "hadm_id": _I64,
+                "stay_id": _I64,
+                "caregiver_id": _I64,
+                "itemid": _I64,
+                "amount": _F64,
+                "rate": _F64,
+                "orderid": _I64,
+                "linkorderid": _I64,
+                "patientweight": _F64,
+                "totalamount": _F64,
+                "originalamount": _F64,
+                "originalrate": _F64,
+                "isopenbag": _I64,
+                "continueinnextdept": _I64,
+            },
+            datetime_formats={
+                "starttime": _DATETIME_FORMAT,
+                "endtime": _DATETIME_FORMAT,
+                "storetime": _DATETIME_FORMAT,
+            },
+            sort_by=("stay_id", "starttime"),
+            cluster_col="itemid",
+        ),
+        RawTableSpec(
+            table="icu/outputevents",
+            dtypes={
+                "subject_id": _I64,
+                "hadm_id": _I64,
+                "stay_id": _I64,
+                "caregiver_id": _I64,
+                "itemid": _I64,
+                "value": _F64,
+            },
+            datetime_formats={"charttime": _DATETIME_FORMAT, "storetime": _DATETIME_FORMAT},
+            sort_by=("stay_id", "charttime"),
+            cluster_col="itemid",
+        ),
+        RawTableSpec(
+            table="hosp/labevents",
+            dtypes={
+                "labevent_id": _I64,
+                "subject_id": _I64,
+                "hadm_id": _I64,
+                "specimen_id": _I64,
+                "itemid": _I64,
+                "valuenum": _F64,
+                "ref_range_lower": _F64,
+                "ref_range_upper": _F64,
+            },
+            datetime_formats={"charttime": _DATETIME_FORMAT, "storetime": _DATETIME_FORMAT},
+            sort_by=("hadm_id", "charttime"),
+            cluster_col="itemid",
+        ),
+        RawTableSpec(
+            table="icu/icustays",
+            dtypes={"subject_id": _I64, "hadm_id": _I64, "stay_id": _I64, "los": _F64},
+            datetime_formats={"intime": _DATETIME_FORMAT, "outtime": _DATETIME_FORMAT},
+            sort_by=("stay_id",),
+        ),
+        RawTableSpec(
+            table="hosp/admissions",
+            dtypes={"subject_id": _I64, "hadm_id": _I64, "hospital_expire_flag": _I64},
+            datetime_formats={
+                "admittime": _DATETIME_FORMAT,
+                "dischtime": _DATETIME_FORMAT,
+                "deathtime": _DATETIME_FORMAT,
+                "edregtime": _DATETIME_FORMAT,
+                "edouttime": _DATETIME_FORMAT,
+            },
+            sort_by=("hadm_id",),
+        ),
+        RawTableSpec(
+            table="hosp/patients",
+            dtypes={"subject_id": _I64, "anchor_age": _I64, "anchor_year": _I64},
+            datetime_formats={"dod": _DATE_FORMAT},
+            sort_by=("subject_id",),
+        ),
+        RawTableSpec(
+            table="hosp/microbiologyevents",
+            dtypes={
+                "microevent_id": _I64,
+                "subject_id": _I64,
+                "hadm_id": _I64,
+                "micro_specimen_id": _I64,
+                "spec_itemid": _I64,
+                "test_itemid": _I64,
+                "org_itemid": _I64,
+                "ab_itemid": _I64,
+            },
+            datetime_formats={
+                "chartdate": _DATE_FORMAT,
+                "charttime": _DATETIME_FORMAT,
+                "storedate": _DATE_FORMAT,
+                "storetime": _DATETIME_FORMAT,
+            },
+            sort_by=("hadm_id", "charttime"),
+        ),
+        RawTableSpec(
+            table="hosp/prescriptions",
+            dtypes={"subject_id": _I64, "hadm_id": _I64, "pharmacy_id": _I64, "poe_seq": _I64},
+            datetime_formats={"starttime": _DATETIME_FORMAT, "stoptime": _DATETIME_FORMAT},
+            sort_by=("hadm_id", "starttime"),
+        ),
+    )
+}
+
+
+def get_raw_table_spec(table: str) -> RawTableSpec:
+    """Look up the layout of *table* (``"<module>/<name>"``)."""
+    try:
+        return RAW_TABLE_SPECS[table]
+    except KeyError:
+        raise ValueError(
+            f"Unknown raw table '{table}'. Known tables: {sorted(RAW_TABLE_SPECS)}."
+        ) from None
+
+
+def raw_table_path(raw_root: Path, table: str) -> Path:
+    """Path of the gzipped CSV for *table* under *raw_root*."""
+    return raw_root / get_raw_table_spec(table).relative_path
+
+
+# ---------------------------------------------------------------------------
+# Typed CSV scan
+# ---------------------------------------------------------------------------
+
+
+def _read_header(path: Path) -> list[str]:
+    with gzip.open(path, "rt", newline="") as handle:
+        return next(csv.reader(handle), [])
+
+
+def scan_raw_csv(
+    path: Path,
+    table: str,
+    *,
+    row_index: bool = False,
+) -> pl.LazyFrame:
+    """Scan a raw CSV with the typed layout of *table*.
+
+    Every column is read as text and then cast non-strictly, so malformed
+    values become nulls instead of aborting a multi-gigabyte scan.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Raw table not found: {path}")
+    spec = get_raw_table_spec(table)
+    header = _read_header(path)
+    lazy = pl.scan_csv(
+        path,
+        infer_schema=False,
+        row_index_name=_ROW_INDEX if row_index else None,
+    )
+    casts = [
+        pl.col(col).cast(dtype, strict=False)
+        for col, dtype in spec.dtypes.items()
+        if col in header
+    ]
+    parses = [
+        pl.col(col).str.to_datetime(fmt, strict=False)
+        for col, fmt in spec.datetime_formats.items()
+        if col in header
+    ]
+    return lazy.with_columns(casts + parses) if casts or parses else lazy
+
+
+# ---------------------------------------------------------------------------
+# Cache entries
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class RawCacheEntry:
+    """Manifest of one converted raw table."""
+
+    cache_version: str
+    table: str
+    key: str
+    source_path: str
+    source_size: int
+    source_mtime_ns: int
+    source_sha256: str
+    n_rows: int
+    files: tuple[str, ...] = field(default_factory=tuple)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "cache_version": self.cache_version,
+            "table": self.table,
+            "key": self.key,
+            "source_path": self.source_path,
+            "source_size": self.source_size,
+            "source_mtime_ns": self.source_mtime_ns,
+            "source_sha256": self.source_sha256,
+            "n_rows": self.n_rows,
+            "files": list(self.files),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Mapping[str, Any]) -> "RawCacheEntry":
+        return cls(
+            cache_version=str(payload["cache_version"]),
+            table=str(payload["table"]),
+            key=str(payload["key"]),
+            source_path=str(payload["source_path"]),
+            source_size=int(payload["source_size"]),
+            source_mtime_ns=int(payload["source_mtime_ns"]),
+            source_sha256=str(payload["source_sha256"]),
+            n_rows=int(payload["n_rows"]),
+            files=tuple(payload["files"]),
+        )
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: Path, payload: Mapping[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(dict(payload), indent=2))
+    os.replace(tmp_path, path)
+
+
+class RawTableCache:
+    """Convert raw CSV tables to Parquet once and serve typed scans from it.
+
+    Parameters
+    ----------
+    root:
+        Directory holding one subdirectory per table.
+    row_group_size:
+        Rows per Parquet row group; smaller groups prune more finely.
+    """
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_RAW_CACHE_ROOT,
+        *,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> None:
+        if row_group_size < 1:
+            raise ValueError(f"row_group_size must be >= 1, got {row_group_size}.")
+        self.root = root
+        self.row_group_size = row_group_size
+
+    # ------------------------------------------------------------------
+    # Keys and index
+    # ------------------------------------------------------------------
+
+    def _table_dir(self, spec: RawTableSpec) -> Path:
+        return self.root / spec.table
+
+    def _index_path(self, spec: RawTableSpec) -> Path:
+        return self._table_dir(spec) / "sources.json"
+
+    def _read_index(self, spec: RawTableSpec) -> dict[str, dict[str, Any]]:
+        path = self._index_path(spec)
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text())
+
+    def _entry_key(self, spec: RawTableSpec, source_sha256: str) -> str:
+        layout = f"{RAW_CACHE_VERSION}|{spec.fingerprint()}|{self.row_group_size}"
+        return hashlib.sha256(f"{source_sha256}|{layout}".encode()).hexdigest()[:16]
+
+    def _source_sha256(self, spec: RawTableSpec, source: Path) -> str:
+        """SHA-256 of *source*, skipping the hash when size and mtime are unchanged."""
+        stat = source.stat()
+        known = self._read_index(spec).get(str(source.resolve()))
+        if (
+            known is not None
+            and known["size"] == stat.st_size
+            and known["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return str(known["sha256"])
+        return _sha256(source)
+
+    def _remember_source(self, spec: RawTableSpec, source: Path, source_sha256: str) -> None:
+        stat = source.stat()
+        index = self._read_index(spec)
+        record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": source_sha256}
+        if index.get(str(source.resolve())) != record:
+            index[str(source.resolve())] = record
+            _write_json_atomic(self._index_path(spec), index)
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    def ensure(self, source: Path, table: str) -> RawCacheEntry:
+        """Return the cache entry for *source*, converting it on first use."""
+        if not source.exists():
+            raise FileNotFoundError(f"Raw table not found: {source}")
+        spec = get_raw_table_spec(table)
+        source_sha256 = self._source_sha256(spec, source)
+        entry_dir = self._table_dir(spec) / self._entry_key(spec, source_sha256)
+        manifest = entry_dir / "manifest.json"
+        if not manifest.exists():
+            self._convert(spec, source, source_sha256, entry_dir)
+        self._remember_source(spec, source, source_sha256)
+        return RawCacheEntry.from_dict(json.loads(manifest.read_text()))
+
+    def _convert(
+        self,
+        spec: RawTableSpec,
+        source: Path,
+        source_sha256: str,
+        entry_dir: Path,
+    ) -> None:
+        logger.info("Converting %s to the Parquet raw cache at %s", source, entry_dir)
+        tmp_dir = entry_dir.with_name(f".{entry_dir.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        # The gzip is decompressed exactly once, streaming into the sort.
+        lazy = scan_raw_csv(source, spec.table, row_index=True)
+        columns = lazy.collect_schema()
+        sort_by = [col for col in (spec.cluster_col, *spec.sort_by) if col in columns]
+        sort_by.append(_ROW_INDEX)
+        files = ["part-0.parquet"]
+        lazy.sort(sort_by).sink_parquet(tmp_dir / files[0], row_group_size=self.row_group_size)
+
+        stat = source.stat()
+        entry = RawCacheEntry(
+            cache_version=RAW_CACHE_VERSION,
+            table=spec.table,
+            key=entry_dir.name,
+            source_path=str(source.resolve()),
+            source_size=stat.st_size,
+            source_mtime_ns=stat.st_mtime_ns,
+            source_sha256=source_sha256,
+            n_rows=int(pl.scan_parquet([tmp_dir / f for f in files]).select(pl.len()).collect().item()),
+            files=tuple(files),
+        )
+        (tmp_dir / "manifest.json").write_text(json.dumps(entry.to_dict(), indent=2))
+        try:
+            tmp_dir.rename(entry_dir)
+        except OSError:
+            # Another process finished the same conversion first.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not (entry_dir / "manifest.json").exists():
+                raise
+        logger.info("Cached %d rows of %s in %d file(s).", entry.n_rows, spec.table, len(files))
+
+    def scan(
+        self,
+        source: Path,
+        table: str,
+        *,
+        preserve_order: bool = False,
+    ) -> pl.LazyFrame:
+        """Typed scan of *source* served from the cache.
+
+        Rows arrive in cache layout order (``itemid``, then key and time).
+        With *preserve_order* they are re-sorted into CSV row order; filters
+        are still pushed below that sort, so only matching rows are sorted.
+        """
+        entry = self.ensure(source, table)
+        entry_dir = self._table_dir(get_raw_table_spec(table)) / entry.key
+        lazy = pl.scan_parquet([entry_dir / name for name in entry.files])
+        if preserve_order:
+            lazy = lazy.sort(_ROW_INDEX)
+        return lazy.drop(_ROW_INDEX)
+
+
+# ---------------------------------------------------------------------------
+# Public entry points
+# ---------------------------------------------------------------------------
+
+
+def default_raw_cache() -> RawTableCache | None:
+    """Cache configured from the environment, or ``None`` when disabled."""
+    enabled = os.environ.get(RAW_CACHE_ENABLED_ENV, "1").strip().lower()
+    if enabled in {"0", "false", "no", "off"}:
+        return None
+    return RawTableCache(Path(os.environ.get(RAW_CACHE_DIR_ENV, DEFAULT_RAW_CACHE_ROOT)))
+
+
+def scan_raw_table(
+    raw_root: Path,
+    table: str,
+    *,
+    cache: RawTableCache | None = None,
+    use_cache: bool = True,
+    preserve_order: bool = False,
+) -> pl.LazyFrame:
+    """Typed lazy scan of a raw MIMIC-IV table.
+
+    Reads from the Parquet cache (converting on first use) unless the cache
+    is disabled, in which case the gzipped CSV is scanned directly. Both
+    paths return the same columns and dtypes; cached rows follow the cache
+    layout unless *preserve_order* asks for CSV row order.
+    """
+    path = raw_table_path(raw_root, table)
+    if use_cache:
+        cache = cache if cache is not None else default_raw_cache()
+    else:
+        cache = None
+    if cache is None:
+        return scan_raw_csv(path, table)
+    return cache.scan(path, table, preserve_order=preserve_order)
+
+
+def warm_raw_cache(
+    raw_root: Path,
+    tables: Sequence[str] | None = None,
+    *,
+    cache: RawTableCache | None = None,
+) -> list[RawCacheEntry]:
+    """Convert every existing raw table under *raw_root* ahead of time."""
+    cache = cache if cache is not None else default_raw_cache()
+    if cache is None:
+        return []
+    entries: list[RawCacheEntry] = []
+    for table in tables if tables is not None else sorted(RAW_TABLE_SPECS):
+        path = raw_table_path(raw_root, table)
+        if not path.exists():
+            logger.info("Skipping %s: %s does not exist.", table, path)
+            continue
+        entries.append(cache.ensure(path, table))
+    return entries
+
+
+__all__ = [
+    "DEFAULT_RAW_CACHE_ROOT",
+    "RAW_CACHE_VERSION",
+    "RAW_TABLE_SPECS",
+    "RawCacheEntry",
+    "RawTableCache",
+    "RawTableSpec",
+    "default_raw_cache",
+    "get_raw_table_spec",
+    "raw_table_path",
+    "scan_raw_csv",
+    "scan_raw_table",
+    "warm_raw_cache",
+]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="python -m mimic_sepsis_rl.data.raw_cache",
+        description="Convert MIMIC-IV raw CSV.gz tables to the Parquet raw cache.",
+    )
+    p.add_argument(
+        "--raw-root",
+        type=Path,
+        default=MIMIC_RAW_ROOT,
+        help="Root directory containing MIMIC-IV raw tables.",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help=f"Cache root. Default: ${RAW_CACHE_DIR_ENV} or {DEFAULT_RAW_CACHE_ROOT}.",
+    )
+    p.add_argument(
+        "--tables",
+        nargs="+",
+        choices=sorted(RAW_TABLE_SPECS),
+        default=None,
+        help="Tables to convert. Default: every table present under --raw-root.",
+    )
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    args = _build_parser().parse_args(argv)
+    cache = (
+        RawTableCache(args.cache_dir)
+        if args.cache_dir is not None
+        else RawTableCache(Path(os.environ.get(RAW_CACHE_DIR_ENV, DEFAULT_RAW_CACHE_ROOT)))
+    )
+    for entry in warm_raw_cache(args.raw_root, args.tables, cache=cache):
+        print(f"{entry.table}: {entry.n_rows} rows → {cache.root / entry.table / entry.key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
@@ -0,0 +1,240 @@
+"""
+Streaming SOFA proxy over chartevents.
+
+The SOFA proxy counts abnormal organ components at each chart time:
+
+- cardiovascular: mean arterial pressure < 70 mmHg
+- respiratory:    SpO2 < 94 %
+- neurological:   GCS total < 15
+
+``scan_sofa_proxy`` builds the whole stage as one lazy plan: the cohort
+``stay_id`` semi-join and the ``itemid`` filter are pushed into the
+chartevents scan, and every component is a conditional max over one
+``(stay, charttime)`` group_by. ``write_sofa_proxy`` sinks that plan to a
+Parquet intermediate with the streaming engine, so peak memory is bounded
+by the number of scored chart times rather than the size of chartevents.
+``load_or_build_sofa_proxy`` reuses an intermediate built for the same
+cohort from the same raw chartevents file (path, size and mtime), so the
+onset CLI and later stages read one shared SOFA table.
+
+The component thresholds are defined once in ``SOFA_PROXY_COMPONENTS``;
+``sofa_proxy_state_expr`` applies the same rules to step-level state
+columns (``map``, ``spo2``, ``gcs_total``) for ``build_transitions``.
+
+Usage
+-----
+    sofa = load_or_build_sofa_proxy(cohort, Path("data/processed/onset/sofa_proxy.parquet"))
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial streaming SOFA proxy intermediate.
+v1.1.0  2026-10-18  Intermediate metadata records and checks the raw source fingerprint.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import operator
+import os
+from dataclasses import dataclass
+from functools import reduce
+from pathlib import Path
+from typing import Any, Final
+
+import polars as pl
+
+from mimic_sepsis_rl.data.raw_cache import MIMIC_RAW_ROOT, raw_table_path, scan_raw_table
+
+logger = logging.getLogger(__name__)
+
+SOFA_PROXY_VERSION: Final[str] = "1.0.0"
+
+# Raw tables the SOFA proxy is computed from.
+SOFA_SOURCE_TABLES: Final[tuple[str, ...]] = ("icu/chartevents",)
+
+# Urine output rows do not score yet but still mark a chart time as observed.
+URINE_OUTPUT_ITEMID: Final[int] = 226559
+
+SOFA_PROXY_COLUMNS: Final[tuple[str, ...]] = (
+    "subject_id",
+    "hadm_id",
+    "stay_id",
+    "charttime",
+    "sofa_score",
+)
+
+
+@dataclass(frozen=True)
+class SofaComponent:
+    """One organ component of the SOFA proxy."""
+
+    name: str
+    itemids: tuple[int, ...]
+    state_column: str
+    threshold: float
+
+
+SOFA_PROXY_COMPONENTS: Final[tuple[SofaComponent, ...]] = (
+    # Arterial / non-invasive blood pressure mean
+    SofaComponent("cardio_score", (220052, 220181), "map", 70.0),
+    SofaComponent("resp_score", (220277,), "spo2", 94.0),
+    SofaComponent("neuro_score", (223901,), "gcs_total", 15.0),
+)
+
+SOFA_PROXY_ITEMIDS: Final[tuple[int, ...]] = tuple(
+    itemid for component in SOFA_PROXY_COMPONENTS for itemid in component.itemids
+) + (URINE_OUTPUT_ITEMID,)
+
+
+def sofa_proxy_state_expr() -> pl.Expr:
+    """SOFA proxy from step-level state columns (null if any input is null)."""
+    return reduce(
+        operator.add,
+        [
+            (pl.col(component.state_column) < component.threshold).cast(pl.Int32)
+            for component in SOFA_PROXY_COMPONENTS
+        ],
+    ).alias("sofa_score")
+
+
+def scan_sofa_proxy(
+    icustays: pl.DataFrame,
+    *,
+    raw_root: Path = MIMIC_RAW_ROOT,
+) -> pl.LazyFrame:
+    """Lazy SOFA proxy per (stay, charttime) for the stays in *icustays*.
+
+    Returns a LazyFrame with columns:
+        subject_id, hadm_id, stay_id, charttime, sofa_score
+    """
+    stay_ids = icustays.select(pl.col("stay_id").cast(pl.Int64)).unique()
+    events = (
+        scan_raw_table(raw_root, "icu/chartevents")
+        .filter(pl.col("itemid").is_in(list(SOFA_PROXY_ITEMIDS)))
+        .join(stay_ids.lazy(), on="stay_id", how="semi")
+        .select(["subject_id", "hadm_id", "stay_id", "charttime", "itemid", "valuenum"])
+        .filter(pl.col("valuenum").is_not_null())
+    )
+    # min(value) < threshold  <=>  any(value < threshold): one pass of flags
+    components = [
+        (
+            pl.col("itemid").is_in(list(component.itemids))
+            & (pl.col("valuenum") < component.threshold)
+        )
+        .max()
+        .cast(pl.Int32)
+        .alias(component.name)
+        for component in SOFA_PROXY_COMPONENTS
+    ]
+    return (
+        events.group_by(["subject_id", "hadm_id", "stay_id", "charttime"])
+        .agg(components)
+        .select(
+            "subject_id",
+            "hadm_id",
+            "stay_id",
+            "charttime",
+            pl.sum_horizontal(component.name for component in SOFA_PROXY_COMPONENTS)
+            .cast(pl.Int32)
+            .alias("sofa_score"),
+        )
+    )
+
+
+def sofa_cohort_fingerprint(icustays: pl.DataFrame) -> str:
+    """Stable fingerprint of the cohort stays a SOFA intermediate covers."""
+    stay_ids = icustays.get_column("stay_id").cast(pl.Int64).unique().sort()
+    digest = hashlib.sha256(stay_ids.to_numpy().tobytes())
+    digest.update(SOFA_PROXY_VERSION.encode())
+    return digest.hexdigest()[:16]
+
+
+def sofa_source_fingerprint(raw_root: Path = MIMIC_RAW_ROOT) -> str:
+    """Fingerprint of the raw tables under *raw_root* the SOFA proxy reads.
+
+    Uses each source file's resolved path, size and mtime, so replacing or
+    editing chartevents, or pointing at another raw root, invalidates the
+    intermediate without hashing gigabytes of CSV.
+    """
+    digest = hashlib.sha256()
+    for table in SOFA_SOURCE_TABLES:
+        path = raw_table_path(raw_root, table)
+        if not path.exists():
+            raise FileNotFoundError(f"Raw table not found: {path}")
+        stat = path.stat()
+        digest.update(f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.meta.json")
+
+
+def write_sofa_proxy(
+    icustays: pl.DataFrame,
+    path: Path,
+    *,
+    raw_root: Path = MIMIC_RAW_ROOT,
+) -> Path:
+    """Stream the SOFA proxy for *icustays* to a Parquet intermediate."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    source_fingerprint = sofa_source_fingerprint(raw_root)
+    logger.info("Streaming SOFA proxy from chartevents → %s", path)
+    scan_sofa_proxy(icustays, raw_root=raw_root).sort(["stay_id", "charttime"]).sink_parquet(
+        tmp_path, engine="streaming"
+    )
+    os.replace(tmp_path, path)
+
+    meta: dict[str, Any] = {
+        "sofa_proxy_version": SOFA_PROXY_VERSION,
+        "cohort_fingerprint": sofa_cohort_fingerprint(icustays),
+        "source_fingerprint": source_fingerprint,
+        "n_stays": icustays.get_column("stay_id").n_unique(),
+    }
+    _meta_path(path).write_text(json.dumps(meta, indent=2) + "\n")
+    return path
+
+
+def load_or_build_sofa_proxy(
+    icustays: pl.DataFrame,
+    path: Path,
+    *,
+    raw_root: Path = MIMIC_RAW_ROOT,
+) -> pl.DataFrame:
+    """Read the SOFA intermediate at *path*, building it if stale or missing.
+
+    The intermediate is stale when the cohort, the proxy version or the raw
+    chartevents source under *raw_root* differ from the ones it was built from.
+    """
+    meta_path = _meta_path(path)
+    fingerprint = sofa_cohort_fingerprint(icustays)
+    if path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        if (
+            meta.get("sofa_proxy_version") == SOFA_PROXY_VERSION
+            and meta.get("cohort_fingerprint") == fingerprint
+            and meta.get("source_fingerprint") == sofa_source_fingerprint(raw_root)
+        ):
+            logger.info("Reusing SOFA proxy intermediate %s", path)
+            return pl.read_parquet(path)
+    write_sofa_proxy(icustays, path, raw_root=raw_root)
+    return pl.read_parquet(path)
+
+
+__all__ = [
+    "SOFA_PROXY_COLUMNS",
+    "SOFA_PROXY_COMPONENTS",
+    "SOFA_PROXY_ITEMIDS",
+    "SOFA_PROXY_VERSION",
+    "SOFA_SOURCE_TABLES",
+    "SofaComponent",
+    "load_or_build_sofa_proxy",
+    "scan_sofa_proxy",
+    "sofa_cohort_fingerprint",
+    "sofa_proxy_state_expr",
+    "sofa_source_fingerprint",
+    "write_sofa_proxy",
+]
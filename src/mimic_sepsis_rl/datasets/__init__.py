@@ -9,4 +9,8 @@ transitions
 replay_buffer
     Episode-aware serialisation of transition datasets for offline RL
     trainers.
+replay_cache
+    Memory-mapped binary arrays written next to each replay export.
+shards
+    Stay-hash partitioning, partial outputs and merges for sharded builds.
 """
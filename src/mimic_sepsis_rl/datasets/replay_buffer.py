@@ -11,6 +11,10 @@ Key capabilities:
 - Serialise / deserialise the full replay buffer as a portable directory.
 - Validate buffer integrity (episode boundaries, state dimensions, action
   range) before training begins.
+- Validate and export flat transition tables directly, without building
+  per-row ``TransitionRow`` objects.
+- Write the memory-mapped replay cache next to every export, so trainers
+  map the arrays instead of decoding Parquet.
 
 Usage (CLI validation)
 ----------------------
@@ -19,6 +23,9 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial replay buffer contract.
+v1.1.0  2026-10-18  Add columnar validation and replay export for transition frames.
+v1.2.0  2026-10-18  Write the memory-mapped replay cache alongside each export.
+v1.3.0  2026-10-18  Columnar validation checks the state dimension.
 """
 
 from __future__ import annotations
@@ -31,12 +38,14 @@ from typing import Any, Final, Mapping, Sequence
 
 import polars as pl
 
+from mimic_sepsis_rl.datasets.replay_cache import write_replay_cache
 from mimic_sepsis_rl.datasets.transitions import (
     TransitionDatasetMeta,
     TransitionRow,
     build_dataset_meta,
     transitions_to_dataframe,
     load_transition_meta,
+    transition_columns,
 )
 
 logger = logging.getLogger(__name__)
@@ -237,6 +246,75 @@ def validate_replay_buffer(
     )
 
 
+def validate_transition_frame(
+    frame: pl.DataFrame,
+    *,
+    feature_columns: Sequence[str],
+    expected_state_dim: int | None = None,
+    expected_n_actions: int = 25,
+) -> None:
+    """Validate a flat transition table with the same checks as
+    :func:`validate_replay_buffer`.
+
+    Raises
+    ------
+    ReplayBufferValidationError
+        If any structural check fails.
+    """
+    missing = [col for col in transition_columns(feature_columns) if col not in frame.columns]
+    if missing:
+        raise ReplayBufferValidationError(
+            "Replay buffer validation failed:\n"
+            f"  - Transition table is missing columns {missing}."
+        )
+
+    errors: list[str] = []
+    ordered = frame.sort(["stay_id", "step_index"], maintain_order=True)
+    is_last = pl.col("stay_id").shift(-1).ne_missing(pl.col("stay_id"))
+
+    # Episode boundary check: done exactly on the last transition of each episode
+    boundary = ordered.filter(pl.col("done") != is_last).select(
+        "stay_id", "step_index", "done"
+    )
+    for stay_id, step_index, done in boundary.iter_rows():
+        if done:
+            errors.append(
+                f"Episode {stay_id}, step {step_index}: "
+                "non-terminal transition marked as done."
+            )
+        else:
+            errors.append(f"Episode {stay_id}: last transition is not marked done.")
+
+    # State dimension check
+    if expected_state_dim is not None:
+        for prefix, label in (("s_", "state"), ("ns_", "next_state")):
+            dim = sum(col.startswith(prefix) for col in frame.columns)
+            if dim != expected_state_dim:
+                errors.append(f"{label} dim {dim} != expected {expected_state_dim}.")
+
+    # Action range check
+    bad_actions = ordered.filter(
+        pl.col("action").is_null()
+        | (pl.col("action") < 0)
+        | (pl.col("action") >= expected_n_actions)
+    ).select("stay_id", "step_index", "action")
+    for stay_id, step_index, action in bad_actions.iter_rows():
+        errors.append(
+            f"Episode {stay_id}, step {step_index}: "
+            f"action {action} out of range [0, {expected_n_actions})."
+        )
+
+    if errors:
+        msg = "Replay buffer validation failed:\n" + "\n".join(f"  - {e}" for e in errors)
+        raise ReplayBufferValidationError(msg)
+
+    logger.info(
+        "✅ Replay buffer validation passed: %d episodes, %d transitions.",
+        frame.get_column("stay_id").n_unique(),
+        frame.height,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Persistence
 # ---------------------------------------------------------------------------
@@ -248,6 +326,10 @@ def save_replay_buffer(
 ) -> tuple[Path, Path]:
     """Save replay buffer to disk.
 
+    The memory-mapped replay cache (see
+    :mod:`mimic_sepsis_rl.datasets.replay_cache`) is written next to the
+    Parquet file.
+
     Outputs
     -------
     (parquet_path, meta_path)
@@ -260,6 +342,7 @@ def save_replay_buffer(
     df = transitions_to_dataframe(all_transitions, buffer.meta.feature_columns)
     parquet_path = output_dir / f"replay_{split}.parquet"
     df.write_parquet(parquet_path)
+    write_replay_cache(parquet_path)
 
     meta_path = output_dir / f"replay_{split}_meta.json"
     meta_dict = buffer.meta.to_dict()
@@ -276,6 +359,47 @@ def save_replay_buffer(
     return parquet_path, meta_path
 
 
+def save_replay_frame(
+    frame: pl.DataFrame | pl.LazyFrame,
+    output_dir: Path,
+    *,
+    meta: TransitionDatasetMeta,
+) -> tuple[Path, Path]:
+    """Save a flat transition table as a replay buffer export.
+
+    Writes the same files as :func:`save_replay_buffer` straight from the
+    table built by
+    :func:`~mimic_sepsis_rl.datasets.transitions.build_transition_frame`.
+
+    Outputs
+    -------
+    (parquet_path, meta_path)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    split = meta.split_label
+
+    parquet_path = output_dir / f"replay_{split}.parquet"
+    if isinstance(frame, pl.LazyFrame):
+        frame.sink_parquet(parquet_path)
+    else:
+        frame.write_parquet(parquet_path)
+    write_replay_cache(parquet_path)
+
+    meta_path = output_dir / f"replay_{split}_meta.json"
+    meta_dict = meta.to_dict()
+    meta_dict["replay_buffer_version"] = REPLAY_BUFFER_VERSION
+    meta_dict["n_episode_buffers"] = meta.n_episodes
+    meta_path.write_text(json.dumps(meta_dict, indent=2))
+
+    logger.info(
+        "Saved replay buffer (%d episodes, %d transitions) to %s",
+        meta.n_episodes,
+        meta.n_transitions,
+        output_dir,
+    )
+    return parquet_path, meta_path
+
+
 def load_replay_buffer_meta(path: Path) -> dict[str, Any]:
     """Load replay buffer metadata from JSON."""
     return json.loads(path.read_text())
@@ -288,6 +412,8 @@ __all__ = [
     "ReplayBufferValidationError",
     "build_replay_buffer",
     "validate_replay_buffer",
+    "validate_transition_frame",
     "save_replay_buffer",
+    "save_replay_frame",
     "load_replay_buffer_meta",
 ]
@@ -0,0 +1,277 @@
+"""
+Memory-mapped binary cache for replay-buffer exports.
+
+Loading a replay Parquet file into training tensors used to decode the
+whole table, copy it to NumPy and copy it again into ``torch`` tensors, in
+every trainer process. This module writes each export once more as plain
+contiguous arrays next to the Parquet file:
+
+- ``states.bin`` / ``next_states.bin``  float32, shape ``(N, state_dim)``
+- ``actions.bin``                        int64,   shape ``(N,)``
+- ``rewards.bin`` / ``dones.bin``        float32, shape ``(N,)``
+- ``header.json``                        dtypes, shapes, state columns and
+  the Parquet fingerprint the arrays were built from
+
+Readers ``np.memmap`` the arrays copy-on-write, so
+:class:`~mimic_sepsis_rl.training.common.ReplayDataset` can wrap them with
+``torch.from_numpy`` without copying, and every trainer or sweep worker on
+one host shares the same page cache.
+
+Entries are keyed by the size and mtime of the source Parquet file. A
+rewritten export therefore never matches a stale entry, and old entries are
+removed when a new one is written. Arrays are filled in row chunks, so
+writing the cache never holds more than one chunk of the table in memory.
+
+Usage
+-----
+    cache_dir = write_replay_cache(Path("data/replay/replay_train.parquet"))
+    cache = open_replay_cache(Path("data/replay/replay_train.parquet"))
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial memory-mapped replay cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final, Sequence
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+REPLAY_CACHE_VERSION: Final[str] = "1.0.0"
+REPLAY_CACHE_SUFFIX: Final[str] = ".memmap"
+
+_HEADER_NAME: Final[str] = "header.json"
+_CHUNK_ROWS: Final[int] = 65_536
+
+# array name → (file name, numpy dtype)
+_ARRAY_LAYOUT: Final[dict[str, tuple[str, str]]] = {
+    "states": ("states.bin", "float32"),
+    "next_states": ("next_states.bin", "float32"),
+    "actions": ("actions.bin", "int64"),
+    "rewards": ("rewards.bin", "float32"),
+    "dones": ("dones.bin", "float32"),
+}
+
+
+@dataclass(frozen=True)
+class ReplayCache:
+    """Memory-mapped arrays of one replay export.
+
+    Attributes
+    ----------
+    path : Path
+        Cache entry directory.
+    state_columns : tuple[str, ...]
+        ``s_``-prefixed state columns, in the order of the state arrays.
+    states, next_states, actions, rewards, dones
+        Copy-on-write ``numpy.memmap`` views (plain empty arrays when the
+        export has no rows).
+    """
+
+    path: Path
+    state_columns: tuple[str, ...]
+    states: Any
+    next_states: Any
+    actions: Any
+    rewards: Any
+    dones: Any
+
+    @property
+    def n_transitions(self) -> int:
+        return int(self.actions.shape[0])
+
+
+def replay_cache_root(parquet_path: Path) -> Path:
+    """Directory holding the cache entries of *parquet_path*."""
+    return parquet_path.with_name(parquet_path.stem + REPLAY_CACHE_SUFFIX)
+
+
+def _entry_key(parquet_path: Path) -> str:
+    stat = parquet_path.stat()
+    token = f"{REPLAY_CACHE_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def _default_state_columns(columns: Sequence[str]) -> list[str]:
+    # Same auto-detection as ReplayDataset, so default loads hit the cache.
+    return sorted(c for c in columns if c.startswith("s_") and not c.startswith("ns_"))
+
+
+def write_replay_cache(
+    parquet_path: Path,
+    *,
+    state_columns: Sequence[str] | None = None,
+    chunk_rows: int = _CHUNK_ROWS,
+) -> Path:
+    """Write the memory-mapped cache entry for a replay Parquet file.
+
+    Parameters
+    ----------
+    parquet_path:
+        Replay export written by
+        :func:`~mimic_sepsis_rl.datasets.replay_buffer.save_replay_buffer`
+        or :func:`~mimic_sepsis_rl.datasets.replay_buffer.save_replay_frame`.
+    state_columns:
+        Ordered ``s_`` columns. Defaults to the sorted ``s_`` columns that
+        ``ReplayDataset`` auto-detects.
+    chunk_rows:
+        Rows decoded from Parquet per write.
+
+    Returns
+    -------
+    Path
+        The cache entry directory.
+
+    Raises
+    ------
+    ValueError
+        If required columns are missing or ``action``/``reward``/``done``
+        contain nulls.
+    """
+    import numpy as np
+
+    schema = pl.read_parquet_schema(parquet_path)
+    if state_columns is None:
+        state_columns = _default_state_columns(list(schema))
+    state_columns = list(state_columns)
+    if not state_columns:
+        raise ValueError(f"No state columns (prefix 's_') found in {parquet_path}.")
+    ns_columns = [f"ns_{c[2:]}" for c in state_columns]
+    missing = (set(state_columns) | set(ns_columns) | {"action", "reward", "done"}) - set(schema)
+    if missing:
+        raise ValueError(f"Replay Parquet at {parquet_path} is missing columns: {missing}")
+
+    scan = pl.scan_parquet(parquet_path)
+    null_counts = (
+        scan.select(pl.col("action", "reward", "done").null_count()).collect().row(0, named=True)
+    )
+    nullable = sorted(col for col, count in null_counts.items() if count)
+    if nullable:
+        raise ValueError(f"Replay Parquet at {parquet_path} has nulls in {nullable}.")
+
+    n_rows = int(scan.select(pl.len()).collect().item())
+    state_dim = len(state_columns)
+    shapes = {
+        "states": (n_rows, state_dim),
+        "next_states": (n_rows, state_dim),
+        "actions": (n_rows,),
+        "rewards": (n_rows,),
+        "dones": (n_rows,),
+    }
+
+    root = replay_cache_root(parquet_path)
+    entry_dir = root / _entry_key(parquet_path)
+    tmp_dir = root / f".{entry_dir.name}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    arrays = {}
+    for name, (file_name, dtype) in _ARRAY_LAYOUT.items():
+        if n_rows:
+            arrays[name] = np.memmap(
+                tmp_dir / file_name, dtype=dtype, mode="w+", shape=shapes[name]
+            )
+        else:
+            (tmp_dir / file_name).touch()
+
+    for offset in range(0, n_rows, chunk_rows):
+        chunk = scan.slice(offset, chunk_rows).collect()
+        end = offset + chunk.height
+        arrays["states"][offset:end] = chunk.select(state_columns).to_numpy()
+        arrays["next_states"][offset:end] = chunk.select(ns_columns).to_numpy()
+        arrays["actions"][offset:end] = chunk.get_column("action").cast(pl.Int64).to_numpy()
+        arrays["rewards"][offset:end] = chunk.get_column("reward").cast(pl.Float64).to_numpy()
+        arrays["dones"][offset:end] = chunk.get_column("done").cast(pl.Float32).to_numpy()
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    header = {
+        "replay_cache_version": REPLAY_CACHE_VERSION,
+        "source": parquet_path.name,
+        "source_size": parquet_path.stat().st_size,
+        "source_mtime_ns": parquet_path.stat().st_mtime_ns,
+        "n_transitions": n_rows,
+        "state_columns": state_columns,
+        "arrays": {
+            name: {"file": file_name, "dtype": dtype, "shape": list(shapes[name])}
+            for name, (file_name, dtype) in _ARRAY_LAYOUT.items()
+        },
+    }
+    (tmp_dir / _HEADER_NAME).write_text(json.dumps(header, indent=2))
+
+    try:
+        tmp_dir.rename(entry_dir)
+    except OSError:
+        # Another process finished the same entry first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not (entry_dir / _HEADER_NAME).exists():
+            raise
+
+    # Open mappings keep unlinked files alive, so pruning is safe for readers.
+    for stale in root.iterdir():
+        if stale.name != entry_dir.name and not stale.name.startswith("."):
+            shutil.rmtree(stale, ignore_errors=True)
+
+    logger.info(
+        "Cached %d transitions (state_dim=%d) for %s at %s",
+        n_rows,
+        state_dim,
+        parquet_path.name,
+        entry_dir,
+    )
+    return entry_dir
+
+
+def open_replay_cache(parquet_path: Path) -> ReplayCache | None:
+    """Map the cache entry of *parquet_path*, or ``None`` if there is none.
+
+    Entries written for an older version of the Parquet file are ignored.
+    """
+    import numpy as np
+
+    if not parquet_path.exists():
+        return None
+    entry_dir = replay_cache_root(parquet_path) / _entry_key(parquet_path)
+    header_path = entry_dir / _HEADER_NAME
+    if not header_path.exists():
+        return None
+    header = json.loads(header_path.read_text())
+    if header.get("replay_cache_version") != REPLAY_CACHE_VERSION:
+        return None
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if shape[0] == 0:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            # Copy-on-write: pages are shared until a caller writes to them.
+            arrays[name] = np.memmap(
+                entry_dir / spec["file"], dtype=spec["dtype"], mode="c", shape=shape
+            )
+    return ReplayCache(
+        path=entry_dir,
+        state_columns=tuple(header["state_columns"]),
+        **arrays,
+    )
+
+
+__all__ = [
+    "REPLAY_CACHE_SUFFIX",
+    "REPLAY_CACHE_VERSION",
+    "ReplayCache",
+    "open_replay_cache",
+    "replay_cache_root",
+    "write_replay_cache",
+]
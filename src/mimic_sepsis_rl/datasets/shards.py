@@ -0,0 +1,222 @@
+"""
+Stay-partitioned shard layout for streaming transition builds.
+
+A sharded build splits the cohort into ``n_shards`` disjoint sets of ICU
+stays using a stable hash of ``stay_id``. Every shard only ever holds its
+own stays' raw events, so peak memory is bounded by the shard size rather
+than by the full MIMIC-IV event tables.
+
+Each shard writes partial Parquet outputs under its own directory, one
+subdirectory per stage, plus a JSON completion marker. Train-only statistics
+are reduced *exactly* from the partials (the reduction reads the same train
+rows, in the same order, as the unsharded build), and :func:`merge_partials`
+stitches the per-shard tables back into the unsharded export layout.
+
+Layout
+------
+    <root>/
+        shard-000-of-004/
+            extract/ ... extract.json
+            state/   ... state.json
+            export/  ... export.json
+        shard-001-of-004/
+        ...
+        train_medians.json, action_bins.json, preprocessing_artifacts.json
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial sharded build layout.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final, Mapping, Sequence
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+SHARD_LAYOUT_VERSION: Final[str] = "1.0.0"
+
+#: Per-shard stages in execution order.
+SHARD_STAGES: Final[tuple[str, ...]] = ("extract", "state", "export")
+
+
+def shard_for_stay(stay_id: int, n_shards: int) -> int:
+    """Return the shard index owning *stay_id*.
+
+    Uses CRC-32 of the little-endian ``stay_id`` bytes so the assignment is
+    stable across processes, Python versions and Polars releases.
+    """
+    if n_shards < 1:
+        raise ValueError(f"n_shards must be >= 1, got {n_shards}.")
+    return zlib.crc32(int(stay_id).to_bytes(8, "little", signed=True)) % n_shards
+
+
+def select_shard(
+    df: pl.DataFrame,
+    shard_index: int,
+    n_shards: int,
+    *,
+    stay_id_col: str = "stay_id",
+) -> pl.DataFrame:
+    """Return the rows of *df* whose stay belongs to *shard_index*."""
+    if not 0 <= shard_index < n_shards:
+        raise ValueError(
+            f"shard_index must be in [0, {n_shards}), got {shard_index}."
+        )
+    stay_ids = df.get_column(stay_id_col).unique().to_list()
+    owned = [sid for sid in stay_ids if shard_for_stay(sid, n_shards) == shard_index]
+    return df.filter(pl.col(stay_id_col).is_in(owned))
+
+
+@dataclass(frozen=True)
+class ShardLayout:
+    """Filesystem layout shared by all shards of one build.
+
+    Attributes
+    ----------
+    root : Path
+        Directory holding every shard's partial outputs and reduced artifacts.
+    n_shards : int
+        Total number of stay partitions.
+    """
+
+    root: Path
+    n_shards: int
+
+    def __post_init__(self) -> None:
+        if self.n_shards < 1:
+            raise ValueError(f"n_shards must be >= 1, got {self.n_shards}.")
+
+    def shard_dir(self, shard_index: int) -> Path:
+        """Directory owned by one shard."""
+        if not 0 <= shard_index < self.n_shards:
+            raise ValueError(
+                f"shard_index must be in [0, {self.n_shards}), got {shard_index}."
+            )
+        return self.root / f"shard-{shard_index:03d}-of-{self.n_shards:03d}"
+
+    def stage_dir(self, shard_index: int, stage: str) -> Path:
+        """Directory holding one shard's partial outputs for *stage*."""
+        _require_stage(stage)
+        return self.shard_dir(shard_index) / stage
+
+    def partial_path(self, shard_index: int, stage: str, name: str) -> Path:
+        """Path of one partial Parquet output."""
+        return self.stage_dir(shard_index, stage) / name
+
+    def marker_path(self, shard_index: int, stage: str) -> Path:
+        """Completion marker written once a shard finishes *stage*."""
+        _require_stage(stage)
+        return self.shard_dir(shard_index) / f"{stage}.json"
+
+    def reset_stage(self, shard_index: int, stage: str) -> None:
+        """Drop one shard's previous outputs for *stage* before it is re-run.
+
+        Shards only write the partials they have rows for, so stale files from
+        an earlier run would otherwise leak into the reductions.
+        """
+        shutil.rmtree(self.stage_dir(shard_index, stage), ignore_errors=True)
+        self.marker_path(shard_index, stage).unlink(missing_ok=True)
+
+    def artifact_path(self, name: str) -> Path:
+        """Path of a reduced, build-wide artifact."""
+        return self.root / name
+
+    def mark_complete(
+        self,
+        shard_index: int,
+        stage: str,
+        summary: Mapping[str, Any],
+    ) -> Path:
+        """Atomically write the completion marker for *stage*."""
+        path = self.marker_path(shard_index, stage)
+        payload = {
+            "layout_version": SHARD_LAYOUT_VERSION,
+            "shard_index": shard_index,
+            "n_shards": self.n_shards,
+            "stage": stage,
+            **dict(summary),
+        }
+        write_json_atomic(path, payload)
+        return path
+
+    def require_complete(self, stage: str) -> None:
+        """Raise unless every shard has finished *stage*."""
+        missing = [
+            index
+            for index in range(self.n_shards)
+            if not self.marker_path(index, stage).exists()
+        ]
+        if missing:
+            raise ValueError(
+                f"Shards {missing} of {self.n_shards} have not completed the "
+                f"'{stage}' stage under {self.root}."
+            )
+
+    def partial_paths(self, stage: str, name: str) -> list[Path]:
+        """Existing partial outputs called *name* for *stage*, in shard order.
+
+        Shards without rows for a given output simply do not write it.
+        """
+        self.require_complete(stage)
+        return [
+            path
+            for path in (
+                self.partial_path(index, stage, name) for index in range(self.n_shards)
+            )
+            if path.exists()
+        ]
+
+
+def merge_partials(
+    paths: Sequence[Path],
+    *,
+    sort_by: Sequence[str],
+    output_path: Path | None = None,
+) -> pl.LazyFrame:
+    """Concatenate partial tables and restore the unsharded row order.
+
+    Stays are disjoint across shards, so sorting on the unsharded export keys
+    reproduces the unsharded table exactly. When *output_path* is given the
+    merged table is streamed to Parquet without materialising it.
+    """
+    if not paths:
+        raise ValueError("Cannot merge an empty set of shard partials.")
+    merged = pl.scan_parquet(list(paths)).sort(list(sort_by), maintain_order=True)
+    if output_path is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        merged.sink_parquet(output_path)
+    return merged
+
+
+def write_json_atomic(path: Path, payload: Mapping[str, Any]) -> None:
+    """Write JSON via a temporary file so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(dict(payload), indent=2))
+    os.replace(tmp_path, path)
+
+
+def _require_stage(stage: str) -> None:
+    if stage not in SHARD_STAGES:
+        raise ValueError(f"Unknown shard stage '{stage}'. Expected one of {SHARD_STAGES}.")
+
+
+__all__ = [
+    "SHARD_LAYOUT_VERSION",
+    "SHARD_STAGES",
+    "ShardLayout",
+    "merge_partials",
+    "select_shard",
+    "shard_for_stay",
+    "write_json_atomic",
+]
@@ -15,6 +15,10 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial transition dataset contract.
+v1.1.0  2026-10-18  Add the columnar transition frame builder; the row API is a view over it.
+v1.2.0  2026-10-18  Metadata records the episode grid step size (step_hours).
+v1.3.0  2026-10-18  Null action/reward checks run inside the lazy plan for every input.
+v1.4.0  2026-10-18  save_transition_frame records the action-space size (n_actions).
 """
 
 from __future__ import annotations
@@ -28,6 +32,8 @@ from typing import Any, Final, Mapping, Sequence
 
 import polars as pl
 
+from mimic_sepsis_rl.data.episode_models import STEP_HOURS
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -36,6 +42,14 @@ logger = logging.getLogger(__name__)
 
 TRANSITION_SPEC_VERSION: Final[str] = "1.0.0"
 
+_TRANSITION_KEY_COLUMNS: Final[tuple[str, ...]] = (
+    "stay_id",
+    "step_index",
+    "action",
+    "reward",
+    "done",
+)
+
 # ---------------------------------------------------------------------------
 # Transition row
 # ---------------------------------------------------------------------------
@@ -95,6 +109,7 @@ class TransitionDatasetMeta:
     action_spec_version: str
     reward_spec_version: str
     feature_columns: tuple[str, ...]
+    step_hours: int = STEP_HOURS
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -108,6 +123,7 @@ class TransitionDatasetMeta:
             "action_spec_version": self.action_spec_version,
             "reward_spec_version": self.reward_spec_version,
             "feature_columns": list(self.feature_columns),
+            "step_hours": self.step_hours,
         }
 
     @classmethod
@@ -123,6 +139,7 @@ class TransitionDatasetMeta:
             action_spec_version=str(payload["action_spec_version"]),
             reward_spec_version=str(payload["reward_spec_version"]),
             feature_columns=tuple(payload["feature_columns"]),
+            step_hours=int(payload.get("step_hours", STEP_HOURS)),
         )
 
 
@@ -230,6 +247,10 @@ def build_transitions(
 ) -> list[TransitionRow]:
     """Build transitions for all episodes in a merged dataframe.
 
+    This is a row view over :func:`build_transition_frame`, kept for tests
+    and baselines that want :class:`TransitionRow` objects. Exports should
+    use the frame directly.
+
     Parameters
     ----------
     merged_df:
@@ -241,22 +262,128 @@ def build_transitions(
     list[TransitionRow]
         All transitions ordered by stay_id → step_index.
     """
-    all_transitions: list[TransitionRow] = []
-
-    stay_ids = merged_df.get_column(stay_id_col).unique().sort().to_list()
-    for sid in stay_ids:
-        episode = merged_df.filter(pl.col(stay_id_col) == sid)
-        ep_trans = build_episode_transitions(
-            episode,
-            feature_columns=feature_columns,
-            action_col=action_col,
-            reward_col=reward_col,
-            stay_id_col=stay_id_col,
-            step_col=step_col,
+    frame = build_transition_frame(
+        merged_df,
+        feature_columns=feature_columns,
+        action_col=action_col,
+        reward_col=reward_col,
+        stay_id_col=stay_id_col,
+        step_col=step_col,
+    )
+    return transitions_from_dataframe(frame, feature_columns)
+
+
+# ---------------------------------------------------------------------------
+# Columnar transition builder
+# ---------------------------------------------------------------------------
+
+
+def transition_columns(feature_columns: Sequence[str]) -> list[str]:
+    """Column order of a flat transition table.
+
+    Matches :func:`transitions_to_dataframe`: the key columns followed by
+    interleaved ``s_<feature>`` / ``ns_<feature>`` pairs.
+    """
+    columns = list(_TRANSITION_KEY_COLUMNS)
+    for col in feature_columns:
+        columns.extend([f"s_{col}", f"ns_{col}"])
+    return columns
+
+
+def _require_non_null(col: str) -> pl.Expr:
+    """``pl.col(col)``, failing the query if any batch holds a null.
+
+    The check runs when the plan is collected or sunk, so lazy inputs are
+    validated without an extra pass over the data.
+    """
+
+    def _check(series: pl.Series) -> pl.Series:
+        n_null = series.null_count()
+        if n_null:
+            raise ValueError(
+                f"Column '{col}' has {n_null} null value(s); every step needs "
+                "an action and a reward before transitions can be built."
+            )
+        return series
+
+    return pl.col(col).map_batches(_check, is_elementwise=True)
+
+
+def build_transition_frame(
+    merged: pl.DataFrame | pl.LazyFrame,
+    *,
+    feature_columns: Sequence[str],
+    action_col: str = "action_id",
+    reward_col: str = "reward_total",
+    stay_id_col: str = "stay_id",
+    step_col: str = "step_index",
+) -> pl.DataFrame | pl.LazyFrame:
+    """Build the flat transition table for all episodes without Python rows.
+
+    Produces the same table as ``transitions_to_dataframe(build_transitions(...))``
+    using expressions only: states are null/NaN → 0.0 filled, ``ns_*`` is the
+    next step's state within the stay (the current state on the last step),
+    and ``done`` marks each stay's last step index.
+
+    Returns a ``LazyFrame`` when given one, so callers can sink the result
+    straight to Parquet. A null action or reward raises ``ValueError`` when
+    the frame is built, or when the returned ``LazyFrame`` is collected or
+    sunk.
+    """
+    frame = (
+        merged.lazy()
+        .select(
+            pl.col(stay_id_col).cast(pl.Int64).alias("stay_id"),
+            pl.col(step_col).cast(pl.Int64).alias("step_index"),
+            _require_non_null(action_col).cast(pl.Int64).alias("action"),
+            _require_non_null(reward_col).cast(pl.Float64).alias("reward"),
+            *[
+                pl.col(col).cast(pl.Float64).fill_nan(0.0).fill_null(0.0).alias(f"s_{col}")
+                for col in feature_columns
+            ],
         )
-        all_transitions.extend(ep_trans)
+        .sort(["stay_id", "step_index"], maintain_order=True)
+        .with_columns(
+            (pl.col("step_index") == pl.col("step_index").max().over("stay_id")).alias("done"),
+            *[
+                pl.col(f"s_{col}")
+                .shift(-1)
+                .over("stay_id")
+                .fill_null(pl.col(f"s_{col}"))
+                .alias(f"ns_{col}")
+                for col in feature_columns
+            ],
+        )
+        .select(transition_columns(feature_columns))
+    )
+    return frame.collect() if isinstance(merged, pl.DataFrame) else frame
 
-    return all_transitions
+
+def transitions_from_dataframe(
+    frame: pl.DataFrame,
+    feature_columns: Sequence[str],
+) -> list[TransitionRow]:
+    """Materialise :class:`TransitionRow` objects from a flat transition table."""
+    keys = frame.select(_TRANSITION_KEY_COLUMNS).rows()
+    if feature_columns:
+        states = frame.select([f"s_{col}" for col in feature_columns]).rows()
+        next_states = frame.select([f"ns_{col}" for col in feature_columns]).rows()
+    else:
+        states = next_states = [()] * frame.height
+    return [
+        TransitionRow(
+            stay_id=stay_id,
+            step_index=step_index,
+            state=state,
+            action=action,
+            reward=reward,
+            next_state=next_state,
+            done=done,
+        )
+        for (stay_id, step_index, action, reward, done), state, next_state in zip(
+            keys, states, next_states
+        )
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -334,6 +461,42 @@ def build_dataset_meta(
     )
 
 
+def build_frame_meta(
+    frame: pl.DataFrame | pl.LazyFrame,
+    *,
+    feature_columns: Sequence[str],
+    split_label: str,
+    manifest_seed: int,
+    action_spec_version: str,
+    reward_spec_version: str,
+    n_actions: int = 25,
+    step_hours: int = STEP_HOURS,
+) -> TransitionDatasetMeta:
+    """Build metadata for a flat transition table (see :func:`build_transition_frame`)."""
+    counts = (
+        frame.lazy()
+        .select(
+            pl.len().alias("n_transitions"),
+            pl.col("stay_id").n_unique().alias("n_episodes"),
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    return TransitionDatasetMeta(
+        spec_version=TRANSITION_SPEC_VERSION,
+        n_episodes=int(counts["n_episodes"]),
+        n_transitions=int(counts["n_transitions"]),
+        state_dim=len(feature_columns),
+        n_actions=n_actions,
+        split_label=split_label,
+        manifest_seed=manifest_seed,
+        action_spec_version=action_spec_version,
+        reward_spec_version=reward_spec_version,
+        feature_columns=tuple(feature_columns),
+        step_hours=step_hours,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Persistence
 # ---------------------------------------------------------------------------
@@ -383,6 +546,58 @@ def save_transitions(
     return parquet_path, meta_path
 
 
+def save_transition_frame(
+    frame: pl.DataFrame | pl.LazyFrame,
+    feature_columns: Sequence[str],
+    output_dir: Path,
+    *,
+    split_label: str,
+    manifest_seed: int,
+    action_spec_version: str,
+    reward_spec_version: str,
+    step_hours: int = STEP_HOURS,
+    n_actions: int = 25,
+) -> tuple[Path, Path, TransitionDatasetMeta]:
+    """Save a flat transition table and its metadata to disk.
+
+    Same layout as :func:`save_transitions`; lazy frames are streamed to
+    Parquet without materialising them. *n_actions* is the size of the
+    action grid the ``action`` column was encoded on.
+
+    Returns
+    -------
+    (parquet_path, meta_path, meta)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    parquet_path = output_dir / f"transitions_{split_label}.parquet"
+    if isinstance(frame, pl.LazyFrame):
+        frame.sink_parquet(parquet_path)
+    else:
+        frame.write_parquet(parquet_path)
+
+    meta = build_frame_meta(
+        frame,
+        feature_columns=feature_columns,
+        split_label=split_label,
+        manifest_seed=manifest_seed,
+        action_spec_version=action_spec_version,
+        reward_spec_version=reward_spec_version,
+        n_actions=n_actions,
+        step_hours=step_hours,
+    )
+    meta_path = output_dir / f"transitions_{split_label}_meta.json"
+    meta_path.write_text(json.dumps(meta.to_dict(), indent=2))
+
+    logger.info(
+        "Saved %d transitions (%d episodes) to %s",
+        meta.n_transitions,
+        meta.n_episodes,
+        parquet_path,
+    )
+    return parquet_path, meta_path, meta
+
+
 def load_transition_meta(path: Path) -> TransitionDatasetMeta:
     """Load transition metadata from JSON."""
     return TransitionDatasetMeta.from_dict(json.loads(path.read_text()))
@@ -394,8 +609,13 @@ __all__ = [
     "TransitionDatasetMeta",
     "build_episode_transitions",
     "build_transitions",
+    "build_transition_frame",
     "build_dataset_meta",
+    "build_frame_meta",
+    "transition_columns",
+    "transitions_from_dataframe",
     "transitions_to_dataframe",
     "save_transitions",
+    "save_transition_frame",
     "load_transition_meta",
 ]
@@ -0,0 +1,293 @@
+"""
+kNN behavior-policy estimator for held-out OPE and safety review.
+
+OPE needs the clinician (behavior) probability of every logged held-out
+action, and safety review needs behavior support (probability and sample
+count) for every action a candidate policy picks. This module fits a count
+model on the *train* split: a KD-tree over (optionally standardised) train
+states, where the behavior distribution at ``s`` is the smoothed action
+histogram of the ``k`` nearest train states.
+
+Queries are answered in bulk: ``support_batch(states[N], actions[N])``
+returns ``(probs[N], counts[N])`` from one tree query per chunk. The full
+``[N, n_actions]`` neighbour histogram of recently queried state sets is
+memoised, so scoring several candidate policies on the same held-out steps
+runs the tree query once. The fitted model (tree included) is persisted
+with :meth:`KNNBehaviorPolicy.save` and reused across evaluations.
+
+Usage
+-----
+    behavior = KNNBehaviorPolicy.from_replay(train_replay, n_neighbors=50)
+    behavior.save(Path("artifacts/behavior_knn.pkl"))
+
+    episodes = with_behavior_probabilities(held_out_episodes, behavior)
+    rows = build_safety_review_rows(policy, episodes, behavior)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from mimic_sepsis_rl.evaluation.ope import HeldOutEpisode
+from mimic_sepsis_rl.evaluation.safety import ActionSupport
+from mimic_sepsis_rl.training.common import ReplayDataset
+
+BEHAVIOR_MODEL_VERSION: str = "1.0.0"
+_QUERY_CHUNK_ROWS: int = 16384
+_MEMO_ENTRIES: int = 4
+
+
+class KNNBehaviorPolicy:
+    """Smoothed kNN action-count model of the clinician policy.
+
+    Parameters
+    ----------
+    n_neighbors:
+        Train states per query (``k``).
+    n_actions:
+        Number of discrete actions.
+    smoothing:
+        Additive (Laplace) pseudo-count per action; keeps every probability
+        strictly positive, as held-out OPE requires.
+    standardize:
+        Scale state features to zero mean / unit variance (train statistics)
+        before measuring distances.
+    leaf_size:
+        KD-tree leaf size.
+    """
+
+    def __init__(
+        self,
+        *,
+        n_neighbors: int = 50,
+        n_actions: int = 25,
+        smoothing: float = 1.0,
+        standardize: bool = True,
+        leaf_size: int = 40,
+    ) -> None:
+        if n_neighbors < 1:
+            raise ValueError(f"n_neighbors must be >= 1, got {n_neighbors}.")
+        if smoothing < 0.0:
+            raise ValueError(f"smoothing must be >= 0, got {smoothing}.")
+        self.n_neighbors = n_neighbors
+        self.n_actions = n_actions
+        self.smoothing = smoothing
+        self.standardize = standardize
+        self.leaf_size = leaf_size
+        self._tree: KDTree | None = None
+        self._actions: np.ndarray | None = None
+        self._mean: np.ndarray | None = None
+        self._scale: np.ndarray | None = None
+        self._memo: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------------
+
+    def fit(self, states: Any, actions: Any) -> KNNBehaviorPolicy:
+        """Index train ``states[N, D]`` with their logged ``actions[N]``."""
+        states_arr = np.asarray(states, dtype=np.float64)
+        actions_arr = np.asarray(actions, dtype=np.int64).reshape(-1)
+        if states_arr.ndim != 2 or states_arr.shape[0] != actions_arr.shape[0]:
+            raise ValueError(
+                f"Expected states[N, D] and actions[N]; got {states_arr.shape} and "
+                f"{actions_arr.shape}."
+            )
+        if states_arr.shape[0] < self.n_neighbors:
+            raise ValueError(
+                f"Need at least n_neighbors={self.n_neighbors} train transitions, "
+                f"got {states_arr.shape[0]}."
+            )
+        if actions_arr.min() < 0 or actions_arr.max() >= self.n_actions:
+            raise ValueError(f"Train actions must lie in [0, {self.n_actions}).")
+
+        if self.standardize:
+            self._mean = states_arr.mean(axis=0)
+            scale = states_arr.std(axis=0)
+            self._scale = np.where(scale > 0.0, scale, 1.0)
+        else:
+            self._mean = np.zeros(states_arr.shape[1])
+            self._scale = np.ones(states_arr.shape[1])
+        self._tree = KDTree(self._transform(states_arr), leaf_size=self.leaf_size)
+        self._actions = actions_arr
+        self._memo.clear()
+        return self
+
+    @classmethod
+    def from_replay(cls, dataset: ReplayDataset, **kwargs: Any) -> KNNBehaviorPolicy:
+        """Fit on the (state, logged action) pairs of a train replay."""
+        batch = dataset.full_batch()
+        return cls(**kwargs).fit(batch.states.numpy(), batch.actions.numpy())
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._tree is not None
+
+    @property
+    def state_dim(self) -> int:
+        self._require_fitted()
+        return int(self._mean.shape[0])
+
+    def _require_fitted(self) -> None:
+        if self._tree is None:
+            raise ValueError("KNNBehaviorPolicy is not fitted; call fit() or load() first.")
+
+    def _transform(self, states: np.ndarray) -> np.ndarray:
+        return (states - self._mean) / self._scale
+
+    # ------------------------------------------------------------------
+    # Bulk queries
+    # ------------------------------------------------------------------
+
+    def _as_states(self, states: Any) -> np.ndarray:
+        states_arr = np.atleast_2d(np.asarray(states, dtype=np.float64))
+        if states_arr.ndim != 2 or states_arr.shape[1] != self.state_dim:
+            raise ValueError(
+                f"Expected states[N, {self.state_dim}], got shape {states_arr.shape}."
+            )
+        return states_arr
+
+    def neighbor_action_counts(self, states: Any) -> np.ndarray:
+        """``int64[N, n_actions]`` action histogram of each state's ``k`` neighbours."""
+        self._require_fitted()
+        states_arr = self._as_states(states)
+        key = hashlib.sha1(np.ascontiguousarray(states_arr).tobytes()).hexdigest()
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        chunks = []
+        for start in range(0, states_arr.shape[0], _QUERY_CHUNK_ROWS):
+            chunk = self._transform(states_arr[start : start + _QUERY_CHUNK_ROWS])
+            neighbors = self._tree.query(chunk, k=self.n_neighbors, return_distance=False)
+            neighbor_actions = self._actions[neighbors]
+            flat = neighbor_actions + (np.arange(len(chunk)) * self.n_actions)[:, None]
+            counts = np.bincount(flat.ravel(), minlength=len(chunk) * self.n_actions)
+            chunks.append(counts.reshape(len(chunk), self.n_actions))
+        counts = (
+            np.concatenate(chunks)
+            if chunks
+            else np.zeros((0, self.n_actions), dtype=np.int64)
+        )
+
+        self._memo[key] = counts
+        while len(self._memo) > _MEMO_ENTRIES:
+            self._memo.popitem(last=False)
+        return counts
+
+    def action_probabilities(self, states: Any) -> np.ndarray:
+        """Smoothed behavior distribution ``float64[N, n_actions]``."""
+        counts = self.neighbor_action_counts(states)
+        denominator = self.n_neighbors + self.smoothing * self.n_actions
+        return (counts + self.smoothing) / denominator
+
+    def select_actions(self, states: Any) -> np.ndarray:
+        """Most frequent neighbour action per state."""
+        return self.neighbor_action_counts(states).argmax(axis=1)
+
+    def support_batch(self, states: Any, actions: Any) -> tuple[np.ndarray, np.ndarray]:
+        """Behavior ``(probs[N], counts[N])`` of ``actions[N]`` at ``states[N]``."""
+        counts = self.neighbor_action_counts(states)
+        actions_arr = np.asarray(actions, dtype=np.int64).reshape(-1)
+        if actions_arr.shape[0] != counts.shape[0]:
+            raise ValueError(
+                f"Got {actions_arr.shape[0]} actions for {counts.shape[0]} states."
+            )
+        if actions_arr.size and (actions_arr.min() < 0 or actions_arr.max() >= self.n_actions):
+            raise ValueError(f"Actions must lie in [0, {self.n_actions}).")
+        action_counts = counts[np.arange(counts.shape[0]), actions_arr]
+        denominator = self.n_neighbors + self.smoothing * self.n_actions
+        return (action_counts + self.smoothing) / denominator, action_counts
+
+    def __call__(self, state: Sequence[float], action: int) -> ActionSupport:
+        """Single-state :class:`~mimic_sepsis_rl.evaluation.safety.ActionSupportLookup`."""
+        probs, counts = self.support_batch([state], [action])
+        return ActionSupport(behavior_prob=float(probs[0]), count=int(counts[0]))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> Path:
+        """Atomically persist the fitted model, KD-tree included."""
+        self._require_fitted()
+        payload = {
+            "version": BEHAVIOR_MODEL_VERSION,
+            "n_neighbors": self.n_neighbors,
+            "n_actions": self.n_actions,
+            "smoothing": self.smoothing,
+            "standardize": self.standardize,
+            "leaf_size": self.leaf_size,
+            "mean": self._mean,
+            "scale": self._scale,
+            "actions": self._actions,
+            "tree": self._tree,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> KNNBehaviorPolicy:
+        """Load a model written by :meth:`save` (trusted local artifacts only)."""
+        with path.open("rb") as handle:
+            payload = pickle.load(handle)
+        if payload.get("version") != BEHAVIOR_MODEL_VERSION:
+            raise ValueError(
+                f"Unsupported behavior model version {payload.get('version')!r} at {path}."
+            )
+        model = cls(
+            n_neighbors=payload["n_neighbors"],
+            n_actions=payload["n_actions"],
+            smoothing=payload["smoothing"],
+            standardize=payload["standardize"],
+            leaf_size=payload["leaf_size"],
+        )
+        model._mean = payload["mean"]
+        model._scale = payload["scale"]
+        model._actions = payload["actions"]
+        model._tree = payload["tree"]
+        return model
+
+
+def with_behavior_probabilities(
+    episodes: Sequence[HeldOutEpisode],
+    behavior: KNNBehaviorPolicy,
+) -> tuple[HeldOutEpisode, ...]:
+    """Return ``episodes`` with ``behavior_action_prob`` filled from ``behavior``.
+
+    All held-out steps are scored with one bulk query.
+    """
+    steps = [step for episode in episodes for step in episode.steps]
+    probs, _ = behavior.support_batch(
+        [step.state for step in steps], [step.action for step in steps]
+    )
+    probs_iter = iter(probs.tolist())
+    return tuple(
+        replace(
+            episode,
+            steps=tuple(
+                replace(step, behavior_action_prob=next(probs_iter)) for step in episode.steps
+            ),
+        )
+        for episode in episodes
+    )
+
+
+__all__ = [
+    "BEHAVIOR_MODEL_VERSION",
+    "KNNBehaviorPolicy",
+    "with_behavior_probabilities",
+]
@@ -0,0 +1,566 @@
+"""
+Batched Fitted Q Evaluation (FQE) producing frozen OPE inputs.
+
+FQE fits Q^π of a fixed target policy π on the *train* replay by regressing
+Q(s, a) onto ``r + γ (1 - done) Σ_a' π(a' | s') Q_target(s', a')``. The
+fitted network then scores held-out initial states, which is exactly what
+:class:`~mimic_sepsis_rl.evaluation.ope.FrozenFQEOutputs` consumes.
+
+Several target policies are evaluated together: their Q-networks are
+stacked with :func:`torch.func.stack_module_state` and every mini-batch of
+the shared replay pass updates all of them in one ``vmap``'d step. Target
+distributions π(· | s') are computed once up front with the policies'
+batched inference surface, so the policies are never queried inside the
+training loop.
+
+Each policy stops on its own held-in TD error (a validation slice of the
+train replay) and keeps its best epoch's weights. Fitted outputs are cached
+as JSON artifacts keyed by the policy checkpoint hash, the replay file, the
+FQE settings and the held-out initial states, so re-evaluating an unchanged
+policy only reads the cache.
+
+Usage
+-----
+    from mimic_sepsis_rl.evaluation.fqe import FQEConfig, fit_frozen_fqe_outputs
+
+    outputs = fit_frozen_fqe_outputs(
+        {"cql": cql_policy, "bcq": bcq_policy},
+        held_out_episodes,
+        dataset=train_replay,
+        config=FQEConfig(gamma=0.99),
+        cache_dir=Path("artifacts/fqe"),
+    )
+    report = evaluate_policy_run(run, held_out_episodes, cql_policy, outputs["cql"])
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.func import functional_call, stack_module_state, vmap
+
+from mimic_sepsis_rl.evaluation.ope import (
+    DEFAULT_POLICY_CHUNK_SIZE,
+    ActionProbabilityPolicy,
+    BatchActionProbabilityPolicy,
+    EpisodeId,
+    EvaluationPolicy,
+    FrozenFQEOutputs,
+    HeldOutEpisode,
+    policy_action_probabilities,
+    policy_actions,
+)
+from mimic_sepsis_rl.training.common import (
+    ReplayDataset,
+    build_adam,
+    clip_grad_norm_per_member_,
+)
+from mimic_sepsis_rl.training.cql import QNetwork
+
+logger = logging.getLogger(__name__)
+
+FQE_SCHEMA_VERSION: str = "1.0.0"
+FQE_FITTED_SPLIT: str = "train"
+_HASH_LENGTH: int = 16
+_HASH_CHUNK_BYTES: int = 1 << 20
+_EVAL_CHUNK_ROWS: int = 8192
+
+
+@dataclass(frozen=True)
+class FQEConfig:
+    """Hyper-parameters shared by every policy in one FQE fit."""
+
+    gamma: float = 0.99
+    hidden_sizes: tuple[int, ...] = (256, 256)
+    lr: float = 1e-4
+    batch_size: int = 256
+    max_epochs: int = 50
+    target_update_freq: int = 1
+    grad_clip: float = 10.0
+    validation_fraction: float = 0.1
+    patience: int = 5
+    min_delta: float = 1e-4
+    seed: int = 0
+
+    def validate(self) -> None:
+        if not 0.0 <= self.gamma <= 1.0:
+            raise ValueError(f"gamma must be in [0, 1], got {self.gamma}.")
+        if self.batch_size < 1 or self.max_epochs < 1 or self.target_update_freq < 1:
+            raise ValueError(
+                "batch_size, max_epochs and target_update_freq must all be >= 1."
+            )
+        if not 0.0 <= self.validation_fraction < 1.0:
+            raise ValueError(
+                f"validation_fraction must be in [0, 1), got {self.validation_fraction}."
+            )
+        if self.patience < 1:
+            raise ValueError(f"patience must be >= 1, got {self.patience}.")
+
+    def to_dict(self) -> dict[str, Any]:
+        payload = asdict(self)
+        payload["hidden_sizes"] = list(self.hidden_sizes)
+        return payload
+
+
+@dataclass
+class FittedQEvaluator:
+    """One policy's fitted FQE network and its early-stopping history."""
+
+    label: str
+    q_network: QNetwork
+    best_epoch: int
+    held_in_td_errors: tuple[float, ...] = field(default_factory=tuple)
+
+    @property
+    def best_held_in_td_error(self) -> float:
+        return self.held_in_td_errors[self.best_epoch - 1]
+
+    def initial_state_action_values(
+        self,
+        episodes: Sequence[HeldOutEpisode],
+    ) -> dict[EpisodeId, tuple[float, ...]]:
+        """Q(s_0, ·) for the first state of every held-out episode."""
+        device = next(self.q_network.parameters()).device
+        states = torch.tensor(
+            [episode.steps[0].state for episode in episodes],
+            dtype=torch.float32,
+            device=device,
+        )
+        self.q_network.eval()
+        with torch.no_grad():
+            q_values = self.q_network(states).double().cpu().tolist()
+        return {
+            episode.episode_id: tuple(values) for episode, values in zip(episodes, q_values)
+        }
+
+    def frozen_outputs(
+        self,
+        episodes: Sequence[HeldOutEpisode],
+        *,
+        artifact_label: str | None = None,
+    ) -> FrozenFQEOutputs:
+        return FrozenFQEOutputs(
+            fitted_split=FQE_FITTED_SPLIT,
+            initial_state_action_values=self.initial_state_action_values(episodes),
+            artifact_label=artifact_label or f"fqe_{self.label}",
+        )
+
+
+def target_action_distribution(
+    policy: EvaluationPolicy,
+    states: np.ndarray,
+    *,
+    n_actions: int,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+) -> np.ndarray:
+    """π(· | s) for every state as ``ndarray[N, n_actions]``.
+
+    Deterministic policies become one-hot rows, matching how
+    :meth:`FrozenFQEOutputs.estimate_policy_value` scores them.
+    """
+    if isinstance(policy, BatchActionProbabilityPolicy):
+        return policy_action_probabilities(
+            policy, states, n_actions=n_actions, chunk_size=chunk_size
+        )
+    if isinstance(policy, ActionProbabilityPolicy):
+        return np.asarray(
+            [
+                [float(policy.action_probability(state, action)) for action in range(n_actions)]
+                for state in states
+            ],
+            dtype=np.float64,
+        )
+    actions = policy_actions(policy, states, chunk_size=chunk_size)
+    if actions.size and not (actions.min() >= 0 and actions.max() < n_actions):
+        raise ValueError(f"Policy chose an action outside [0, {n_actions}).")
+    distribution = np.zeros((len(actions), n_actions), dtype=np.float64)
+    distribution[np.arange(len(actions)), actions] = 1.0
+    return distribution
+
+
+class BatchedFQETrainer:
+    """Fit FQE for several target policies in one shared replay pass.
+
+    Parameters
+    ----------
+    dataset:
+        Train replay; FQE must never be fitted on the held-out split.
+    targets:
+        Target policies keyed by label.
+    config:
+        Shared FQE hyper-parameters.
+    n_actions:
+        Number of discrete actions (default 25).
+    device:
+        Device for the stacked Q-networks and the replay tensors.
+    """
+
+    def __init__(
+        self,
+        dataset: ReplayDataset,
+        targets: Mapping[str, EvaluationPolicy],
+        *,
+        config: FQEConfig | None = None,
+        n_actions: int = 25,
+        device: str | torch.device = "cpu",
+    ) -> None:
+        if not targets:
+            raise ValueError("FQE needs at least one target policy.")
+        self._config = config or FQEConfig()
+        self._config.validate()
+        self._labels = list(targets)
+        self._n_actions = n_actions
+        self._device = torch.device(device)
+
+        data = dataset.full_batch()
+        self._states = data.states.to(self._device)
+        self._actions = data.actions.to(self._device)
+        self._rewards = data.rewards.to(self._device)
+        self._next_states = data.next_states.to(self._device)
+        self._dones = data.dones.to(self._device)
+        self._state_dim = dataset.state_dim
+
+        next_states_np = data.next_states.numpy()
+        self._next_action_probs = torch.stack(
+            [
+                torch.from_numpy(
+                    target_action_distribution(
+                        targets[label], next_states_np, n_actions=n_actions
+                    )
+                ).to(torch.float32)
+                for label in self._labels
+            ]
+        ).to(self._device)
+
+        generator = torch.Generator().manual_seed(self._config.seed)
+        order = torch.randperm(dataset.n_transitions, generator=generator)
+        n_held_in = int(round(dataset.n_transitions * self._config.validation_fraction))
+        if n_held_in >= dataset.n_transitions:
+            raise ValueError("validation_fraction leaves no transitions to fit on.")
+        self._fit_rows = order[n_held_in:].to(self._device)
+        # With no validation slice the TD error is tracked on the fit rows.
+        self._held_in_rows = (order[:n_held_in] if n_held_in else order).to(self._device)
+
+        # Every head starts from the same seeded init, so a policy's fit does
+        # not depend on which other policies share the pass.
+        members = []
+        for _ in self._labels:
+            torch.manual_seed(self._config.seed)
+            members.append(
+                QNetwork(self._state_dim, n_actions, list(self._config.hidden_sizes)).to(
+                    self._device
+                )
+            )
+        params, buffers = stack_module_state(members)
+        self._params: dict[str, torch.Tensor] = params
+        self._buffers: dict[str, torch.Tensor] = buffers
+        self._target_params = {name: p.detach().clone() for name, p in params.items()}
+        self._base_net = copy.deepcopy(members[0]).to("meta")
+        self._member_q_values = vmap(self._q_values, in_dims=(0, None))
+        self._optimizer = build_adam(
+            self._params.values(), lr=self._config.lr, device=self._device
+        )
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self._labels)
+
+    def _q_values(self, params: dict[str, torch.Tensor], states: torch.Tensor) -> torch.Tensor:
+        return functional_call(self._base_net, (params, self._buffers), (states,))
+
+    def _bellman_targets(
+        self,
+        params: dict[str, torch.Tensor],
+        rows: torch.Tensor,
+    ) -> torch.Tensor:
+        """``(K, B)`` regression targets under each member's policy."""
+        next_q = self._member_q_values(params, self._next_states[rows])
+        next_v = (self._next_action_probs[:, rows] * next_q).sum(dim=-1)
+        not_done = 1.0 - self._dones[rows]
+        return self._rewards[rows] + self._config.gamma * not_done * next_v
+
+    def _predicted(self, params: dict[str, torch.Tensor], rows: torch.Tensor) -> torch.Tensor:
+        q_values = self._member_q_values(params, self._states[rows])
+        actions = self._actions[rows].expand(len(self._labels), -1).unsqueeze(-1)
+        return q_values.gather(2, actions).squeeze(-1)
+
+    def _training_step(self, rows: torch.Tensor) -> None:
+        with torch.no_grad():
+            targets = self._bellman_targets(self._target_params, rows)
+        predicted = self._predicted(self._params, rows)
+        losses = F.mse_loss(predicted, targets, reduction="none").mean(dim=1)
+
+        self._optimizer.zero_grad()
+        # Member k's loss only touches member k's slice of the parameters.
+        losses.sum().backward()
+        if self._config.grad_clip > 0:
+            clip_grad_norm_per_member_(self._params.values(), self._config.grad_clip)
+        self._optimizer.step()
+
+    @torch.no_grad()
+    def held_in_td_error(self) -> torch.Tensor:
+        """``(K,)`` mean squared Bellman residual of the online networks."""
+        total = torch.zeros(len(self._labels), dtype=torch.float64, device=self._device)
+        for start in range(0, len(self._held_in_rows), _EVAL_CHUNK_ROWS):
+            rows = self._held_in_rows[start : start + _EVAL_CHUNK_ROWS]
+            residual = self._predicted(self._params, rows) - self._bellman_targets(
+                self._params, rows
+            )
+            total += residual.double().pow(2).sum(dim=1)
+        return total / len(self._held_in_rows)
+
+    def fit(self) -> dict[str, FittedQEvaluator]:
+        """Run FQE until every policy early-stops or ``max_epochs`` is reached."""
+        cfg = self._config
+        n_members = len(self._labels)
+        best_params = {name: p.detach().clone() for name, p in self._params.items()}
+        best_error = torch.full((n_members,), float("inf"), dtype=torch.float64)
+        best_epoch = torch.zeros(n_members, dtype=torch.int64)
+        stale = torch.zeros(n_members, dtype=torch.int64)
+        active = torch.ones(n_members, dtype=torch.bool)
+        history: list[list[float]] = [[] for _ in self._labels]
+        generator = torch.Generator().manual_seed(cfg.seed)
+
+        for epoch in range(1, cfg.max_epochs + 1):
+            order = self._fit_rows[
+                torch.randperm(len(self._fit_rows), generator=generator).to(self._device)
+            ]
+            for start in range(0, len(order), cfg.batch_size):
+                self._training_step(order[start : start + cfg.batch_size])
+            if epoch % cfg.target_update_freq == 0:
+                with torch.no_grad():
+                    torch._foreach_copy_(
+                        list(self._target_params.values()), list(self._params.values())
+                    )
+
+            errors = self.held_in_td_error().cpu()
+            for k, error in enumerate(errors.tolist()):
+                if active[k]:
+                    history[k].append(error)
+            improved = active & (errors < best_error - cfg.min_delta)
+            if improved.any():
+                mask = improved.to(self._device)
+                for name, param in self._params.items():
+                    best_params[name][mask] = param.detach()[mask]
+                best_error = torch.where(improved, errors, best_error)
+                best_epoch = torch.where(improved, torch.tensor(epoch), best_epoch)
+            stale = torch.where(improved, torch.zeros_like(stale), stale + active.long())
+            active &= stale < cfg.patience
+
+            logger.info(
+                "FQE epoch %d | held-in TD error %s | active=%d/%d",
+                epoch,
+                ", ".join(f"{label}={err:.5f}" for label, err in zip(self._labels, errors.tolist())),
+                int(active.sum()),
+                n_members,
+            )
+            if not active.any():
+                break
+
+        evaluators: dict[str, FittedQEvaluator] = {}
+        for k, label in enumerate(self._labels):
+            network = QNetwork(self._state_dim, self._n_actions, list(cfg.hidden_sizes))
+            network.load_state_dict(
+                {name: tensor[k].detach().cpu().clone() for name, tensor in best_params.items()}
+            )
+            evaluators[label] = FittedQEvaluator(
+                label=label,
+                q_network=network.eval(),
+                best_epoch=int(best_epoch[k]),
+                held_in_td_errors=tuple(history[k]),
+            )
+        return evaluators
+
+
+# ---------------------------------------------------------------------------
+# Cached artifacts
+# ---------------------------------------------------------------------------
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dataset_fingerprint(dataset: ReplayDataset) -> str:
+    stat = dataset.path.stat()
+    return f"{dataset.path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{dataset.n_transitions}"
+
+
+def _episodes_fingerprint(episodes: Sequence[HeldOutEpisode]) -> str:
+    digest = hashlib.sha256()
+    for episode in episodes:
+        digest.update(repr((episode.episode_id, episode.steps[0].state)).encode())
+    return digest.hexdigest()
+
+
+def fqe_cache_key(
+    policy: EvaluationPolicy,
+    *,
+    dataset: ReplayDataset,
+    episodes: Sequence[HeldOutEpisode],
+    config: FQEConfig,
+    n_actions: int = 25,
+) -> str | None:
+    """Cache key for one policy's FQE outputs, or ``None`` without a checkpoint.
+
+    Combines the policy checkpoint's content hash with the train replay file,
+    the FQE settings and the held-out initial states.
+    """
+    checkpoint_path = getattr(policy, "checkpoint_path", None)
+    if checkpoint_path is None or not Path(checkpoint_path).exists():
+        return None
+    token = json.dumps(
+        {
+            "schema_version": FQE_SCHEMA_VERSION,
+            "policy_sha256": _file_sha256(Path(checkpoint_path)),
+            "dataset": _dataset_fingerprint(dataset),
+            "episodes": _episodes_fingerprint(episodes),
+            "config": config.to_dict(),
+            "n_actions": n_actions,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(token.encode()).hexdigest()[:_HASH_LENGTH]
+
+
+def fqe_artifact_path(cache_dir: Path, cache_key: str) -> Path:
+    return cache_dir / f"fqe_{cache_key}.json"
+
+
+def write_fqe_artifact(
+    path: Path,
+    outputs: FrozenFQEOutputs,
+    *,
+    cache_key: str,
+    evaluator: FittedQEvaluator,
+    config: FQEConfig,
+    policy_checkpoint: Path | None,
+) -> None:
+    """Atomically write one policy's frozen FQE outputs."""
+    payload = {
+        "schema_version": FQE_SCHEMA_VERSION,
+        "cache_key": cache_key,
+        "label": evaluator.label,
+        "policy_checkpoint": str(policy_checkpoint) if policy_checkpoint else None,
+        "fitted_split": outputs.fitted_split,
+        "artifact_label": outputs.artifact_label,
+        "config": config.to_dict(),
+        "best_epoch": evaluator.best_epoch,
+        "held_in_td_errors": list(evaluator.held_in_td_errors),
+        "initial_state_action_values": [
+            [episode_id, list(values)]
+            for episode_id, values in outputs.initial_state_action_values.items()
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp_path, path)
+
+
+def load_fqe_artifact(path: Path) -> FrozenFQEOutputs:
+    """Read frozen FQE outputs written by :func:`write_fqe_artifact`."""
+    payload = json.loads(path.read_text())
+    if payload.get("schema_version") != FQE_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported FQE artifact schema {payload.get('schema_version')!r} at {path}."
+        )
+    return FrozenFQEOutputs(
+        fitted_split=payload["fitted_split"],
+        initial_state_action_values={
+            episode_id: tuple(float(value) for value in values)
+            for episode_id, values in payload["initial_state_action_values"]
+        },
+        artifact_label=payload["artifact_label"],
+    )
+
+
+def fit_frozen_fqe_outputs(
+    targets: Mapping[str, EvaluationPolicy],
+    held_out_episodes: Sequence[HeldOutEpisode],
+    *,
+    dataset: ReplayDataset,
+    config: FQEConfig | None = None,
+    cache_dir: Path | None = None,
+    n_actions: int = 25,
+    device: str | torch.device = "cpu",
+) -> dict[str, FrozenFQEOutputs]:
+    """Frozen FQE outputs for every target policy, fitting only cache misses.
+
+    Policies with an unchanged checkpoint (and the same replay, settings and
+    held-out initial states) are read from ``cache_dir``; all remaining
+    policies are fitted together in one :class:`BatchedFQETrainer` pass.
+    """
+    config = config or FQEConfig()
+    outputs: dict[str, FrozenFQEOutputs] = {}
+    cache_keys: dict[str, str | None] = {}
+
+    for label, policy in targets.items():
+        key = (
+            fqe_cache_key(
+                policy,
+                dataset=dataset,
+                episodes=held_out_episodes,
+                config=config,
+                n_actions=n_actions,
+            )
+            if cache_dir is not None
+            else None
+        )
+        cache_keys[label] = key
+        if key is not None and fqe_artifact_path(cache_dir, key).exists():
+            logger.info("FQE cache hit for %s (%s).", label, key)
+            outputs[label] = load_fqe_artifact(fqe_artifact_path(cache_dir, key))
+
+    pending = {label: policy for label, policy in targets.items() if label not in outputs}
+    if pending:
+        evaluators = BatchedFQETrainer(
+            dataset,
+            pending,
+            config=config,
+            n_actions=n_actions,
+            device=device,
+        ).fit()
+        for label, evaluator in evaluators.items():
+            outputs[label] = evaluator.frozen_outputs(held_out_episodes)
+            key = cache_keys[label]
+            if key is not None:
+                write_fqe_artifact(
+                    fqe_artifact_path(cache_dir, key),
+                    outputs[label],
+                    cache_key=key,
+                    evaluator=evaluator,
+                    config=config,
+                    policy_checkpoint=getattr(pending[label], "checkpoint_path", None),
+                )
+
+    return {label: outputs[label] for label in targets}
+
+
+__all__ = [
+    "FQE_FITTED_SPLIT",
+    "FQE_SCHEMA_VERSION",
+    "BatchedFQETrainer",
+    "FQEConfig",
+    "FittedQEvaluator",
+    "fit_frozen_fqe_outputs",
+    "fqe_artifact_path",
+    "fqe_cache_key",
+    "load_fqe_artifact",
+    "target_action_distribution",
+    "write_fqe_artifact",
+]
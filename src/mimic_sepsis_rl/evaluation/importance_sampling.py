@@ -0,0 +1,337 @@
+"""
+Columnar importance-sampling core for held-out OPE.
+
+Stores held-out trajectories as padded ``[episodes, max_steps]`` arrays and
+computes trajectory-wise and per-decision IS / WIS, ESS and discounted
+returns with NumPy reductions. Bootstrap confidence intervals resample
+episodes through a count matrix, so a block of resamples is scored with a
+handful of matrix products instead of a Python loop.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+DEFAULT_BOOTSTRAP_RESAMPLES: int = 2000
+# Upper bound on resamples x episodes held in one count matrix (~32 MB).
+_BOOTSTRAP_BLOCK_ELEMENTS: int = 1 << 22
+
+
+@dataclass(frozen=True)
+class TrajectoryArrays:
+    """Padded ``[episodes, max_steps]`` view of held-out trajectories.
+
+    Entries past an episode's last step are padding: rewards are 0 and both
+    probabilities are 1, so padded steps leave returns and cumulative
+    importance weights unchanged.
+    """
+
+    lengths: np.ndarray
+    step_index: np.ndarray
+    rewards: np.ndarray
+    behavior_probs: np.ndarray
+    target_probs: np.ndarray
+    matched: np.ndarray
+
+    @classmethod
+    def from_ragged(
+        cls,
+        *,
+        lengths: Sequence[int] | np.ndarray,
+        step_index: Sequence[int] | np.ndarray,
+        rewards: Sequence[float] | np.ndarray,
+        behavior_probs: Sequence[float] | np.ndarray,
+        target_probs: Sequence[float] | np.ndarray,
+        matched: Sequence[bool] | np.ndarray | None = None,
+    ) -> TrajectoryArrays:
+        """Pad flat per-step columns (episode-major order) into a 2-D layout."""
+        lengths_arr = np.asarray(lengths, dtype=np.int64)
+        if lengths_arr.ndim != 1 or lengths_arr.size == 0:
+            raise ValueError("At least one episode length is required.")
+        if (lengths_arr < 1).any():
+            raise ValueError("Every episode must contain at least one step.")
+
+        n_steps = int(lengths_arr.sum())
+        columns = {
+            "step_index": np.asarray(step_index, dtype=np.int64),
+            "rewards": np.asarray(rewards, dtype=np.float64),
+            "behavior_probs": np.asarray(behavior_probs, dtype=np.float64),
+            "target_probs": np.asarray(target_probs, dtype=np.float64),
+        }
+        columns["matched"] = (
+            np.asarray(matched, dtype=bool)
+            if matched is not None
+            else columns["target_probs"] > 0.0
+        )
+        for name, column in columns.items():
+            if column.shape != (n_steps,):
+                raise ValueError(
+                    f"{name} must hold one value per step ({n_steps}), got shape {column.shape}."
+                )
+
+        n_episodes = lengths_arr.size
+        max_steps = int(lengths_arr.max())
+        starts = np.cumsum(lengths_arr) - lengths_arr
+        rows = np.repeat(np.arange(n_episodes), lengths_arr)
+        cols = np.arange(n_steps) - np.repeat(starts, lengths_arr)
+
+        def _pad(values: np.ndarray, fill: Any) -> np.ndarray:
+            padded = np.full((n_episodes, max_steps), fill, dtype=values.dtype)
+            padded[rows, cols] = values
+            return padded
+
+        return cls(
+            lengths=lengths_arr,
+            step_index=_pad(columns["step_index"], 0),
+            rewards=_pad(columns["rewards"], 0.0),
+            behavior_probs=_pad(columns["behavior_probs"], 1.0),
+            target_probs=_pad(columns["target_probs"], 1.0),
+            matched=_pad(columns["matched"], False),
+        )
+
+    @property
+    def n_episodes(self) -> int:
+        return int(self.lengths.size)
+
+    @property
+    def max_steps(self) -> int:
+        return int(self.rewards.shape[1])
+
+    @property
+    def mask(self) -> np.ndarray:
+        """``[E, T]`` boolean mask of real (non-padded) steps."""
+        return np.arange(self.max_steps)[None, :] < self.lengths[:, None]
+
+    def discounted_rewards(self, gamma: float) -> np.ndarray:
+        """``gamma ** step_index * reward`` per step, 0 on padding."""
+        return np.where(self.mask, np.power(float(gamma), self.step_index) * self.rewards, 0.0)
+
+    def discounted_returns(self, gamma: float) -> np.ndarray:
+        """Per-episode discounted return, shape ``[E]``."""
+        # cumsum accumulates left to right, matching a per-step Python sum.
+        return np.cumsum(self.discounted_rewards(gamma), axis=1)[:, -1]
+
+    def importance_ratios(self, max_importance_ratio: float | None = None) -> np.ndarray:
+        """Per-step ``π(a|s) / μ(a|s)``, optionally clipped from above."""
+        ratios = self.target_probs / self.behavior_probs
+        if max_importance_ratio is not None:
+            ratios = np.minimum(ratios, max_importance_ratio)
+        return ratios
+
+    def cumulative_weights(self, max_importance_ratio: float | None = None) -> np.ndarray:
+        """Per-decision weights ``w_{i,t} = prod_{k<=t} ratio_{i,k}``, shape ``[E, T]``.
+
+        The last column is the trajectory-wise importance weight.
+        """
+        return np.cumprod(self.importance_ratios(max_importance_ratio), axis=1)
+
+
+@dataclass(frozen=True)
+class ImportanceSamplingEstimates:
+    """Point estimates from one pass over :class:`TrajectoryArrays`."""
+
+    is_estimate: float
+    wis: float
+    pdis: float
+    pdwis: float
+    ess: float
+    weight_sum: float
+    nonzero_episodes: int
+    mean_behavior_return: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """``numerator / denominator`` where the denominator is positive, else 0."""
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0.0)
+    return out
+
+
+def _estimates_from_sums(
+    *,
+    n_episodes: int,
+    weight_sum: np.ndarray,
+    squared_weight_sum: np.ndarray,
+    weighted_return_sum: np.ndarray,
+    return_sum: np.ndarray,
+    decision_numerator: np.ndarray,
+    decision_denominator: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Turn (possibly resampled) weighted sums into every estimator at once."""
+    ess = _safe_ratio(weight_sum * weight_sum, squared_weight_sum)
+    ess = np.where(weight_sum > 0.0, ess, 0.0)
+    return {
+        "is_estimate": weighted_return_sum / n_episodes,
+        "wis": _safe_ratio(weighted_return_sum, weight_sum),
+        "pdis": decision_numerator.sum(axis=-1) / n_episodes,
+        "pdwis": _safe_ratio(decision_numerator, decision_denominator).sum(axis=-1),
+        "ess": ess,
+        "mean_behavior_return": return_sum / n_episodes,
+    }
+
+
+def importance_sampling_estimates(
+    arrays: TrajectoryArrays,
+    *,
+    gamma: float = 1.0,
+    max_importance_ratio: float | None = None,
+) -> ImportanceSamplingEstimates:
+    """Trajectory-wise and per-decision IS / WIS plus ESS for held-out episodes.
+
+    Per-decision WIS normalises each decision step by the summed weights of
+    all episodes at that step; episodes that already ended keep their final
+    weight, which is what the padded layout produces.
+    """
+    weights = arrays.cumulative_weights(max_importance_ratio)
+    discounted = arrays.discounted_rewards(gamma)
+    trajectory_weights = weights[:, -1]
+    returns = np.cumsum(discounted, axis=1)[:, -1]
+
+    estimates = _estimates_from_sums(
+        n_episodes=arrays.n_episodes,
+        weight_sum=trajectory_weights.sum(),
+        squared_weight_sum=(trajectory_weights * trajectory_weights).sum(),
+        weighted_return_sum=(trajectory_weights * returns).sum(),
+        return_sum=returns.sum(),
+        decision_numerator=(weights * discounted).sum(axis=0),
+        decision_denominator=weights.sum(axis=0),
+    )
+    return ImportanceSamplingEstimates(
+        **{name: float(value) for name, value in estimates.items()},
+        weight_sum=float(trajectory_weights.sum()),
+        nonzero_episodes=int((trajectory_weights > 0.0).sum()),
+    )
+
+
+@dataclass(frozen=True)
+class ConfidenceInterval:
+    """Point estimate with a percentile bootstrap interval."""
+
+    estimate: float
+    lower: float
+    upper: float
+
+    def to_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class BootstrapIntervals:
+    """Percentile bootstrap intervals for every IS estimator."""
+
+    n_resamples: int
+    confidence: float
+    seed: int
+    intervals: Mapping[str, ConfidenceInterval]
+
+    def __getitem__(self, name: str) -> ConfidenceInterval:
+        return self.intervals[name]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "n_resamples": self.n_resamples,
+            "confidence": self.confidence,
+            "seed": self.seed,
+            "intervals": {name: ci.to_dict() for name, ci in self.intervals.items()},
+        }
+
+
+def _resample_counts(
+    rng: np.random.Generator,
+    n_resamples: int,
+    n_episodes: int,
+) -> np.ndarray:
+    """``[B, E]`` matrix of how often each episode is drawn per resample."""
+    draws = rng.integers(0, n_episodes, size=(n_resamples, n_episodes))
+    flat = draws + (np.arange(n_resamples) * n_episodes)[:, None]
+    counts = np.bincount(flat.ravel(), minlength=n_resamples * n_episodes)
+    return counts.reshape(n_resamples, n_episodes).astype(np.float64)
+
+
+def bootstrap_confidence_intervals(
+    arrays: TrajectoryArrays,
+    *,
+    gamma: float = 1.0,
+    max_importance_ratio: float | None = None,
+    n_resamples: int = DEFAULT_BOOTSTRAP_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> BootstrapIntervals:
+    """Percentile bootstrap over episodes for IS, WIS, PDIS, PDWIS and ESS.
+
+    Each resample is a row of episode draw counts, so all per-episode sums
+    for a block of resamples come out of a few ``counts @ column`` products.
+    """
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be >= 1, got {n_resamples}.")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}.")
+
+    weights = arrays.cumulative_weights(max_importance_ratio)
+    discounted = arrays.discounted_rewards(gamma)
+    trajectory_weights = weights[:, -1]
+    returns = np.cumsum(discounted, axis=1)[:, -1]
+    columns = np.column_stack(
+        [
+            trajectory_weights,
+            trajectory_weights * trajectory_weights,
+            trajectory_weights * returns,
+            returns,
+        ]
+    )
+    decision_numerator = weights * discounted
+    point = importance_sampling_estimates(
+        arrays, gamma=gamma, max_importance_ratio=max_importance_ratio
+    )
+
+    rng = np.random.default_rng(seed)
+    n_episodes = arrays.n_episodes
+    block = max(1, _BOOTSTRAP_BLOCK_ELEMENTS // n_episodes)
+    samples: dict[str, list[np.ndarray]] = {}
+    for start in range(0, n_resamples, block):
+        counts = _resample_counts(rng, min(block, n_resamples - start), n_episodes)
+        sums = counts @ columns
+        estimates = _estimates_from_sums(
+            n_episodes=n_episodes,
+            weight_sum=sums[:, 0],
+            squared_weight_sum=sums[:, 1],
+            weighted_return_sum=sums[:, 2],
+            return_sum=sums[:, 3],
+            decision_numerator=counts @ decision_numerator,
+            decision_denominator=counts @ weights,
+        )
+        for name, values in estimates.items():
+            samples.setdefault(name, []).append(values)
+
+    alpha = 1.0 - confidence
+    intervals: dict[str, ConfidenceInterval] = {}
+    for name, chunks in samples.items():
+        lower, upper = np.quantile(np.concatenate(chunks), [alpha / 2.0, 1.0 - alpha / 2.0])
+        intervals[name] = ConfidenceInterval(
+            estimate=float(getattr(point, name)),
+            lower=float(lower),
+            upper=float(upper),
+        )
+    return BootstrapIntervals(
+        n_resamples=n_resamples,
+        confidence=confidence,
+        seed=seed,
+        intervals=intervals,
+    )
+
+
+__all__ = [
+    "DEFAULT_BOOTSTRAP_RESAMPLES",
+    "BootstrapIntervals",
+    "ConfidenceInterval",
+    "ImportanceSamplingEstimates",
+    "TrajectoryArrays",
+    "bootstrap_confidence_intervals",
+    "importance_sampling_estimates",
+]
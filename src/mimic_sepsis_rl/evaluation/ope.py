@@ -4,17 +4,33 @@ Offline policy evaluation helpers for held-out retrospective assessment.
 Consumes the standardized Phase 8 run artifacts together with held-out
 transition summaries so researchers can report WIS, ESS, and frozen FQE
 estimates without refitting anything on the held-out split.
+
+Policies that implement the batched protocols (``select_actions`` /
+``action_probabilities``) are scored with one call per chunk of held-out
+steps instead of one call per step. Weights, returns and the IS / WIS
+family are computed on the padded arrays from
+:mod:`mimic_sepsis_rl.evaluation.importance_sampling`, which also provides
+the bootstrap confidence intervals.
 """
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, replace
 from typing import Any, Mapping, Protocol, Sequence, TypeAlias, runtime_checkable
 
+import numpy as np
+
+from mimic_sepsis_rl.evaluation.importance_sampling import (
+    BootstrapIntervals,
+    TrajectoryArrays,
+    bootstrap_confidence_intervals,
+    importance_sampling_estimates,
+)
 from mimic_sepsis_rl.training.comparison import DatasetContractRecord, RunArtifact
 
 EpisodeId: TypeAlias = str | int
 _HELD_OUT_SPLIT_ALIASES = frozenset({"eval", "evaluation", "heldout", "holdout", "test"})
+DEFAULT_POLICY_CHUNK_SIZE: int = 4096
 
 
 @runtime_checkable
@@ -33,6 +49,25 @@ class ActionProbabilityPolicy(ActionSelectionPolicy, Protocol):
         """Return π(a | s) for the supplied action."""
 
 
+@runtime_checkable
+class BatchActionSelectionPolicy(Protocol):
+    """Batched policy surface: one call scores a whole ``[N, D]`` state matrix."""
+
+    def select_actions(self, states: Any) -> np.ndarray:
+        """Return the policy action for every row of ``states`` as ``ndarray[N]``."""
+
+
+@runtime_checkable
+class BatchActionProbabilityPolicy(BatchActionSelectionPolicy, Protocol):
+    """Batched extension returning the full action distribution per state."""
+
+    def action_probabilities(self, states: Any) -> np.ndarray:
+        """Return π(· | s) for every row of ``states`` as ``ndarray[N, A]``."""
+
+
+EvaluationPolicy: TypeAlias = ActionSelectionPolicy | BatchActionSelectionPolicy
+
+
 @dataclass(frozen=True)
 class HeldOutStep:
     """One held-out transition summary needed for OPE.
@@ -131,27 +166,36 @@ class FrozenFQEOutputs:
 
     def estimate_policy_value(
         self,
-        policy: ActionSelectionPolicy,
+        policy: EvaluationPolicy,
         episodes: Sequence[HeldOutEpisode],
         *,
         n_actions: int,
+        chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
     ) -> float:
         self.validate(n_actions=n_actions)
-        values: list[float] = []
-
         for episode in episodes:
             if episode.episode_id not in self.initial_state_action_values:
                 raise KeyError(
                     f"Missing frozen FQE values for held-out episode {episode.episode_id}."
                 )
-            q_values = self.initial_state_action_values[episode.episode_id]
-            initial_state = episode.steps[0].state
+        initial_states = [episode.steps[0].state for episode in episodes]
+        values: list[float] = []
 
-            if isinstance(policy, ActionProbabilityPolicy):
-                action_probs = tuple(
-                    float(policy.action_probability(initial_state, action))
-                    for action in range(n_actions)
-                )
+        if _uses_action_probabilities(policy):
+            if isinstance(policy, BatchActionProbabilityPolicy):
+                prob_rows = policy_action_probabilities(
+                    policy, initial_states, n_actions=n_actions, chunk_size=chunk_size
+                ).tolist()
+            else:
+                prob_rows = [
+                    [
+                        float(policy.action_probability(initial_state, action))
+                        for action in range(n_actions)
+                    ]
+                    for initial_state in initial_states
+                ]
+            for episode, action_probs in zip(episodes, prob_rows):
+                q_values = self.initial_state_action_values[episode.episode_id]
                 total_prob = sum(action_probs)
                 if total_prob <= 0.0:
                     raise ValueError(
@@ -161,15 +205,16 @@ class FrozenFQEOutputs:
                     (prob / total_prob) * q_value
                     for prob, q_value in zip(action_probs, q_values)
                 )
-            else:
-                chosen_action = int(policy.select_action(initial_state))
+                values.append(float(value))
+        else:
+            chosen_actions = policy_actions(policy, initial_states, chunk_size=chunk_size)
+            for episode, chosen_action in zip(episodes, chosen_actions.tolist()):
                 if not 0 <= chosen_action < n_actions:
                     raise ValueError(
                         f"Policy chose invalid action {chosen_action}; expected [0, {n_actions})."
                     )
-                value = q_values[chosen_action]
-
-            values.append(float(value))
+                q_values = self.initial_state_action_values[episode.episode_id]
+                values.append(float(q_values[chosen_action]))
 
         return sum(values) / len(values)
 
@@ -205,6 +250,9 @@ class OPEMetrics:
     wis_weight_sum: float
     wis_nonzero_episodes: int
     mean_behavior_return: float
+    is_estimate: float = 0.0
+    pdis: float = 0.0
+    pdwis: float = 0.0
 
     def to_dict(self) -> dict[str, Any]:
         return asdict(self)
@@ -231,6 +279,7 @@ class PolicyOPEReport:
     contract_check: DatasetContractCheck
     metrics: OPEMetrics
     per_episode: tuple[EpisodeOPEEstimate, ...]
+    confidence_intervals: BootstrapIntervals | None = None
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -242,6 +291,9 @@ class PolicyOPEReport:
             "contract_check": self.contract_check.to_dict(),
             "metrics": self.metrics.to_dict(),
             "per_episode": [episode.to_dict() for episode in self.per_episode],
+            "confidence_intervals": self.confidence_intervals.to_dict()
+            if self.confidence_intervals
+            else None,
         }
 
 
@@ -311,6 +363,77 @@ def compare_dataset_contracts(
     return DatasetContractCheck(is_consistent=not issues, issues=tuple(issues))
 
 
+def _uses_action_probabilities(policy: EvaluationPolicy) -> bool:
+    return isinstance(policy, (BatchActionProbabilityPolicy, ActionProbabilityPolicy))
+
+
+def _state_chunks(
+    states: Sequence[Sequence[float]],
+    chunk_size: int,
+) -> list[np.ndarray]:
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be >= 1, got {chunk_size}.")
+    return [
+        np.asarray(states[start : start + chunk_size], dtype=np.float64)
+        for start in range(0, len(states), chunk_size)
+    ]
+
+
+def policy_actions(
+    policy: EvaluationPolicy,
+    states: Sequence[Sequence[float]],
+    *,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+) -> np.ndarray:
+    """Return the policy action for each state as ``ndarray[N]``.
+
+    Batched policies are called once per ``chunk_size`` states; per-state
+    policies fall back to one ``select_action`` call per state.
+    """
+    if not isinstance(policy, BatchActionSelectionPolicy):
+        return np.asarray(
+            [int(policy.select_action(state)) for state in states], dtype=np.int64
+        )
+
+    chunks: list[np.ndarray] = []
+    for chunk in _state_chunks(states, chunk_size):
+        actions = np.asarray(policy.select_actions(chunk)).reshape(-1)
+        if actions.shape[0] != chunk.shape[0]:
+            raise ValueError(
+                f"select_actions returned {actions.shape[0]} actions for "
+                f"{chunk.shape[0]} states."
+            )
+        chunks.append(actions.astype(np.int64))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+
+def policy_action_probabilities(
+    policy: BatchActionProbabilityPolicy,
+    states: Sequence[Sequence[float]],
+    *,
+    n_actions: int | None = None,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+) -> np.ndarray:
+    """Return π(· | s) for each state as ``ndarray[N, A]``, one call per chunk."""
+    chunks: list[np.ndarray] = []
+    for chunk in _state_chunks(states, chunk_size):
+        probs = np.asarray(policy.action_probabilities(chunk), dtype=np.float64)
+        if probs.ndim != 2 or probs.shape[0] != chunk.shape[0]:
+            raise ValueError(
+                f"action_probabilities returned shape {probs.shape} for "
+                f"{chunk.shape[0]} states; expected (N, n_actions)."
+            )
+        if n_actions is not None and probs.shape[1] != n_actions:
+            raise ValueError(
+                f"action_probabilities width mismatch: expected {n_actions}, "
+                f"got {probs.shape[1]}."
+            )
+        chunks.append(probs)
+    if not chunks:
+        return np.zeros((0, n_actions or 0), dtype=np.float64)
+    return np.concatenate(chunks)
+
+
 def _policy_action_probability(
     policy: ActionSelectionPolicy,
     state: Sequence[float],
@@ -331,89 +454,157 @@ def _policy_action_probability(
     return (1.0, True) if chosen_action == action else (0.0, False)
 
 
-def _evaluate_episode(
-    episode: HeldOutEpisode,
-    policy: ActionSelectionPolicy,
+def _logged_action_probabilities(
+    policy: EvaluationPolicy,
+    steps: Sequence[HeldOutStep],
     *,
-    gamma: float,
-    max_importance_ratio: float | None,
-) -> EpisodeOPEEstimate:
-    weight = 1.0
-    matched_steps = 0
-
-    for step in episode.steps:
-        policy_prob, matched = _policy_action_probability(policy, step.state, step.action)
-        if matched:
-            matched_steps += 1
-        ratio = policy_prob / step.behavior_action_prob
-        if max_importance_ratio is not None:
-            ratio = min(ratio, max_importance_ratio)
-        weight *= ratio
-
-    return EpisodeOPEEstimate(
-        episode_id=episode.episode_id,
-        discounted_return=episode.discounted_return(gamma),
-        importance_weight=weight,
-        matched_steps=matched_steps,
-        n_steps=len(episode.steps),
+    chunk_size: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return π(a | s) and the match flag for the logged action of every step."""
+    batched = isinstance(policy, BatchActionProbabilityPolicy) or (
+        isinstance(policy, BatchActionSelectionPolicy)
+        and not isinstance(policy, ActionProbabilityPolicy)
     )
+    if not batched:
+        pairs = [
+            _policy_action_probability(policy, step.state, step.action) for step in steps
+        ]
+        return (
+            np.asarray([probability for probability, _ in pairs], dtype=np.float64),
+            np.asarray([matched for _, matched in pairs], dtype=bool),
+        )
 
+    states = [step.state for step in steps]
+    logged_actions = np.asarray([step.action for step in steps], dtype=np.int64)
 
-def compute_wis_and_ess(
+    if isinstance(policy, BatchActionProbabilityPolicy):
+        probs = policy_action_probabilities(policy, states, chunk_size=chunk_size)
+        if logged_actions.size and not (
+            0 <= logged_actions.min() and logged_actions.max() < probs.shape[1]
+        ):
+            raise ValueError(
+                f"Logged actions must lie in [0, {probs.shape[1]}) for the target policy."
+            )
+        logged_probs = probs[np.arange(len(steps)), logged_actions]
+        invalid = (logged_probs < 0.0) | (logged_probs > 1.0)
+        if invalid.any():
+            probability = float(logged_probs[invalid.argmax()])
+            raise ValueError(
+                f"Policy probability must be in [0, 1]; got {probability!r}."
+            )
+        return logged_probs, logged_probs > 0.0
+
+    chosen_actions = policy_actions(policy, states, chunk_size=chunk_size)
+    if chosen_actions.size and chosen_actions.min() < 0:
+        raise ValueError(
+            f"Policy chose an invalid negative action {int(chosen_actions.min())}."
+        )
+    matched = chosen_actions == logged_actions
+    return matched.astype(np.float64), matched
+
+
+def build_trajectory_arrays(
     episodes: Sequence[HeldOutEpisode],
-    policy: ActionSelectionPolicy,
+    policy: EvaluationPolicy,
     *,
-    gamma: float = 1.0,
-    max_importance_ratio: float | None = None,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+) -> TrajectoryArrays:
+    """Score ``policy`` on every held-out step and pad the result per episode."""
+    steps = [step for episode in episodes for step in episode.steps]
+    target_probs, matched = _logged_action_probabilities(
+        policy, steps, chunk_size=chunk_size
+    )
+    return TrajectoryArrays.from_ragged(
+        lengths=[len(episode.steps) for episode in episodes],
+        step_index=[step.step_index for step in steps],
+        rewards=[step.reward for step in steps],
+        behavior_probs=[step.behavior_action_prob for step in steps],
+        target_probs=target_probs,
+        matched=matched,
+    )
+
+
+def _ope_metrics_from_arrays(
+    episodes: Sequence[HeldOutEpisode],
+    arrays: TrajectoryArrays,
+    *,
+    gamma: float,
+    max_importance_ratio: float | None,
 ) -> tuple[OPEMetrics, tuple[EpisodeOPEEstimate, ...]]:
-    """Compute WIS/ESS from held-out trajectories and a target policy."""
-    validated_episodes = validate_held_out_episodes(episodes)
+    weights = arrays.cumulative_weights(max_importance_ratio)[:, -1].tolist()
+    returns = arrays.discounted_returns(gamma).tolist()
+    matched_steps = arrays.matched.sum(axis=1).tolist()
     per_episode = tuple(
-        _evaluate_episode(
-            episode,
-            policy,
-            gamma=gamma,
-            max_importance_ratio=max_importance_ratio,
+        EpisodeOPEEstimate(
+            episode_id=episode.episode_id,
+            discounted_return=ret,
+            importance_weight=weight,
+            matched_steps=int(matched),
+            n_steps=len(episode.steps),
         )
-        for episode in validated_episodes
+        for episode, weight, ret, matched in zip(episodes, weights, returns, matched_steps)
     )
 
-    weights = [episode.importance_weight for episode in per_episode]
-    returns = [episode.discounted_return for episode in per_episode]
-    weight_sum = sum(weights)
-    squared_weight_sum = sum(weight * weight for weight in weights)
-
-    wis = 0.0
-    if weight_sum > 0.0:
-        wis = sum(weight * ret for weight, ret in zip(weights, returns)) / weight_sum
-
-    ess = 0.0
-    if weight_sum > 0.0 and squared_weight_sum > 0.0:
-        ess = (weight_sum * weight_sum) / squared_weight_sum
-
+    estimates = importance_sampling_estimates(
+        arrays, gamma=gamma, max_importance_ratio=max_importance_ratio
+    )
     metrics = OPEMetrics(
-        wis=wis,
-        ess=ess,
+        wis=estimates.wis,
+        ess=estimates.ess,
         fqe=0.0,
-        n_episodes=len(per_episode),
-        wis_weight_sum=weight_sum,
-        wis_nonzero_episodes=sum(1 for weight in weights if weight > 0.0),
-        mean_behavior_return=sum(returns) / len(returns),
+        n_episodes=arrays.n_episodes,
+        wis_weight_sum=estimates.weight_sum,
+        wis_nonzero_episodes=estimates.nonzero_episodes,
+        mean_behavior_return=estimates.mean_behavior_return,
+        is_estimate=estimates.is_estimate,
+        pdis=estimates.pdis,
+        pdwis=estimates.pdwis,
     )
     return metrics, per_episode
 
 
+def compute_wis_and_ess(
+    episodes: Sequence[HeldOutEpisode],
+    policy: EvaluationPolicy,
+    *,
+    gamma: float = 1.0,
+    max_importance_ratio: float | None = None,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+) -> tuple[OPEMetrics, tuple[EpisodeOPEEstimate, ...]]:
+    """Compute WIS/ESS from held-out trajectories and a target policy.
+
+    Batched policies are queried once per ``chunk_size`` held-out steps.
+    The metrics also carry trajectory-wise IS and per-decision IS / WIS.
+    """
+    validated_episodes = validate_held_out_episodes(episodes)
+    arrays = build_trajectory_arrays(validated_episodes, policy, chunk_size=chunk_size)
+    return _ope_metrics_from_arrays(
+        validated_episodes,
+        arrays,
+        gamma=gamma,
+        max_importance_ratio=max_importance_ratio,
+    )
+
+
 def evaluate_policy_run(
     run_artifact: RunArtifact,
     held_out_episodes: Sequence[HeldOutEpisode],
-    policy: ActionSelectionPolicy,
+    policy: EvaluationPolicy,
     frozen_fqe_outputs: FrozenFQEOutputs,
     *,
     held_out_contract: DatasetContractRecord | None = None,
     gamma: float | None = None,
     max_importance_ratio: float | None = None,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
+    bootstrap_resamples: int = 0,
+    bootstrap_confidence: float = 0.95,
+    bootstrap_seed: int = 0,
 ) -> PolicyOPEReport:
-    """Evaluate one run artifact on held-out trajectories without refitting."""
+    """Evaluate one run artifact on held-out trajectories without refitting.
+
+    With ``bootstrap_resamples > 0`` the report also carries percentile
+    bootstrap intervals over held-out episodes for the IS / WIS family.
+    """
     expected_state_dim: int | None = None
     expected_n_actions: int | None = None
 
@@ -434,28 +625,32 @@ def evaluate_policy_run(
         else float(run_artifact.config_provenance.gamma)
     )
 
-    metrics, per_episode = compute_wis_and_ess(
+    arrays = build_trajectory_arrays(validated_episodes, policy, chunk_size=chunk_size)
+    metrics, per_episode = _ope_metrics_from_arrays(
         validated_episodes,
-        policy,
+        arrays,
         gamma=resolved_gamma,
         max_importance_ratio=max_importance_ratio,
     )
+    confidence_intervals = None
+    if bootstrap_resamples > 0:
+        confidence_intervals = bootstrap_confidence_intervals(
+            arrays,
+            gamma=resolved_gamma,
+            max_importance_ratio=max_importance_ratio,
+            n_resamples=bootstrap_resamples,
+            confidence=bootstrap_confidence,
+            seed=bootstrap_seed,
+        )
 
     resolved_n_actions = expected_n_actions or 25
     fqe_value = frozen_fqe_outputs.estimate_policy_value(
         policy,
         validated_episodes,
         n_actions=resolved_n_actions,
+        chunk_size=chunk_size,
     )
-    metrics = OPEMetrics(
-        wis=metrics.wis,
-        ess=metrics.ess,
-        fqe=fqe_value,
-        n_episodes=metrics.n_episodes,
-        wis_weight_sum=metrics.wis_weight_sum,
-        wis_nonzero_episodes=metrics.wis_nonzero_episodes,
-        mean_behavior_return=metrics.mean_behavior_return,
-    )
+    metrics = replace(metrics, fqe=fqe_value)
 
     contract_check = compare_dataset_contracts(
         run_artifact.dataset_contract,
@@ -469,22 +664,30 @@ def evaluate_policy_run(
         contract_check=contract_check,
         metrics=metrics,
         per_episode=per_episode,
+        confidence_intervals=confidence_intervals,
     )
 
 
 __all__ = [
+    "DEFAULT_POLICY_CHUNK_SIZE",
     "ActionProbabilityPolicy",
     "ActionSelectionPolicy",
+    "BatchActionProbabilityPolicy",
+    "BatchActionSelectionPolicy",
     "DatasetContractCheck",
     "EpisodeOPEEstimate",
+    "EvaluationPolicy",
     "FrozenFQEOutputs",
     "HeldOutEpisode",
     "HeldOutStep",
     "OPEMetrics",
     "PolicyOPEReport",
+    "build_trajectory_arrays",
     "compare_dataset_contracts",
     "compute_wis_and_ess",
     "evaluate_policy_run",
+    "policy_action_probabilities",
+    "policy_actions",
     "validate_held_out_episodes",
 ]
 
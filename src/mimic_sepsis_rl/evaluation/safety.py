@@ -10,9 +10,15 @@ from __future__ import annotations
 
 from collections import Counter, defaultdict
 from dataclasses import asdict, dataclass
-from typing import Any, Callable, Protocol, Sequence, TypeAlias
-
-from mimic_sepsis_rl.evaluation.ope import ActionSelectionPolicy, HeldOutEpisode, HeldOutStep
+from typing import Any, Callable, Protocol, Sequence, TypeAlias, runtime_checkable
+
+from mimic_sepsis_rl.evaluation.ope import (
+    DEFAULT_POLICY_CHUNK_SIZE,
+    EvaluationPolicy,
+    HeldOutEpisode,
+    HeldOutStep,
+    policy_actions,
+)
 from mimic_sepsis_rl.mdp.actions.bins import ActionBinArtifacts, ActionBinner, N_BINS
 
 EpisodeId: TypeAlias = str | int
@@ -181,6 +187,14 @@ class ActionSupportLookup(Protocol):
         """Return support probability and count."""
 
 
+@runtime_checkable
+class BatchActionSupportLookup(Protocol):
+    """Lookup behavior support for many (state, action) pairs at once."""
+
+    def support_batch(self, states: Any, actions: Any) -> tuple[Any, Any]:
+        """Return ``(probs[N], counts[N])`` for ``states[N]`` and ``actions[N]``."""
+
+
 SubgroupLookup = Callable[[HeldOutStep], str]
 
 
@@ -193,35 +207,55 @@ def _coerce_action_binner(
 
 
 def build_safety_review_rows(
-    policy: ActionSelectionPolicy,
+    policy: EvaluationPolicy,
     held_out_episodes: Sequence[HeldOutEpisode],
     support_lookup: ActionSupportLookup,
     *,
     subgroup_lookup: SubgroupLookup | None = None,
+    chunk_size: int = DEFAULT_POLICY_CHUNK_SIZE,
 ) -> tuple[SafetyReviewRow, ...]:
-    """Build row-wise safety review data directly from held-out episodes."""
-    rows: list[SafetyReviewRow] = []
+    """Build row-wise safety review data directly from held-out episodes.
 
-    for episode in held_out_episodes:
-        for step in episode.steps:
-            policy_action = int(policy.select_action(step.state))
-            support = support_lookup(step.state, policy_action)
-            if not 0.0 <= support.behavior_prob <= 1.0:
-                raise ValueError(
-                    f"Support probability must be in [0, 1], got {support.behavior_prob!r}."
-                )
-            subgroup = subgroup_lookup(step) if subgroup_lookup else "all"
-            rows.append(
-                SafetyReviewRow(
-                    episode_id=step.episode_id,
-                    step_index=step.step_index,
-                    clinician_action=step.action,
-                    policy_action=policy_action,
-                    policy_action_support_prob=support.behavior_prob,
-                    policy_action_support_count=support.count,
-                    subgroup=subgroup,
-                )
+    Batched policies are queried once per ``chunk_size`` held-out steps, and
+    a :class:`BatchActionSupportLookup` is queried once for all steps.
+    """
+    rows: list[SafetyReviewRow] = []
+    steps = [step for episode in held_out_episodes for step in episode.steps]
+    states = [step.state for step in steps]
+    chosen_actions = policy_actions(policy, states, chunk_size=chunk_size).tolist()
+
+    if isinstance(support_lookup, BatchActionSupportLookup):
+        probs, counts = support_lookup.support_batch(states, chosen_actions)
+        supports = [
+            ActionSupport(behavior_prob=float(prob), count=int(count))
+            for prob, count in zip(probs, counts)
+        ]
+        if len(supports) != len(steps):
+            raise ValueError(
+                f"Batch support lookup returned {len(supports)} rows for {len(steps)} steps."
+            )
+    else:
+        supports = [
+            support_lookup(state, action) for state, action in zip(states, chosen_actions)
+        ]
+
+    for step, policy_action, support in zip(steps, chosen_actions, supports):
+        if not 0.0 <= support.behavior_prob <= 1.0:
+            raise ValueError(
+                f"Support probability must be in [0, 1], got {support.behavior_prob!r}."
             )
+        subgroup = subgroup_lookup(step) if subgroup_lookup else "all"
+        rows.append(
+            SafetyReviewRow(
+                episode_id=step.episode_id,
+                step_index=step.step_index,
+                clinician_action=step.action,
+                policy_action=policy_action,
+                policy_action_support_prob=support.behavior_prob,
+                policy_action_support_count=support.count,
+                subgroup=subgroup,
+            )
+        )
 
     return tuple(rows)
 
@@ -523,6 +557,8 @@ def build_safety_review(
 __all__ = [
     "ActionHeatmap",
     "ActionSupport",
+    "ActionSupportLookup",
+    "BatchActionSupportLookup",
     "ClinicianAgreementSummary",
     "ClinicianSanityCase",
     "SafetyReviewRow",
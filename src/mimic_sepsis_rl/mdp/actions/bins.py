@@ -15,6 +15,11 @@ Bin layout
 This ensures that the zero-dose case is handled explicitly, not merged
 into the lowest dose quartile.
 
+Other granularities (the 3×3 and 7×7 action ablations) use the same layout
+with ``n_bins - 1`` equal-frequency non-zero bins per axis; see
+:func:`fit_action_binners` to fit several grids from one pass over the
+training doses.
+
 The frozen thresholds are serialisable to JSON via ``ActionBinArtifacts``
 so downstream phases (baselines, RL training, evaluation) reuse the
 exact same action boundaries without refitting.
@@ -26,6 +31,7 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial 5×5 action binning contract.
+v1.1.0  2026-10-18  Vectorised bin assignment; configurable n_bins × n_bins grids.
 """
 
 from __future__ import annotations
@@ -34,10 +40,11 @@ import argparse
 import json
 import logging
 import math
+import re
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Final, Mapping
+from typing import Any, Final, Mapping, Sequence
 
 import polars as pl
 
@@ -60,6 +67,40 @@ N_NONZERO_BINS: Final[int] = 4  # quartiles for non-zero doses
 # Quartile cut-points (relative fractions of non-zero distribution)
 QUARTILE_CUTS: Final[tuple[float, ...]] = (0.25, 0.50, 0.75)
 
+_GRID_PATTERN: Final[re.Pattern[str]] = re.compile(r"^(\d+)x(\d+)(?:_bins)?$")
+
+
+def quantile_cuts(n_bins: int) -> tuple[float, ...]:
+    """Cut-points splitting non-zero doses into ``n_bins - 1`` equal-frequency bins.
+
+    ``quantile_cuts(5) == QUARTILE_CUTS``.
+    """
+    _check_n_bins(n_bins)
+    n_nonzero = n_bins - 1
+    return tuple(k / n_nonzero for k in range(1, n_nonzero))
+
+
+def action_grid_size(granularity: str | int) -> int:
+    """Bins per axis for an action-granularity ablation value such as ``"3x3_bins"``."""
+    if isinstance(granularity, int):
+        _check_n_bins(granularity)
+        return granularity
+    match = _GRID_PATTERN.match(granularity.strip())
+    if match is None or match.group(1) != match.group(2):
+        raise ValueError(
+            f"Action granularity must look like 'NxN_bins', got {granularity!r}."
+        )
+    n_bins = int(match.group(1))
+    _check_n_bins(n_bins)
+    return n_bins
+
+
+def _check_n_bins(n_bins: int) -> None:
+    if n_bins < 2:
+        raise ValueError(
+            f"n_bins must be >= 2 (a zero-dose bin plus dose bins), got {n_bins}."
+        )
+
 
 # ---------------------------------------------------------------------------
 # Frozen artifact
@@ -77,13 +118,16 @@ class ActionBinArtifacts:
     manifest_seed : int
         Split manifest seed used during fitting.
     vaso_edges : tuple[float, ...]
-        Three internal bin edges for non-zero vasopressor doses (Q25, Q50, Q75).
+        ``n_bins - 2`` internal bin edges for non-zero vasopressor doses
+        (Q25, Q50, Q75 for the default grid).
     fluid_edges : tuple[float, ...]
-        Three internal bin edges for non-zero fluid volumes (Q25, Q50, Q75).
+        ``n_bins - 2`` internal bin edges for non-zero fluid volumes.
     n_train_vaso_nonzero : int
         Number of non-zero vasopressor observations used for fitting.
     n_train_fluid_nonzero : int
         Number of non-zero fluid observations used for fitting.
+    n_bins : int
+        Bins per axis, including the zero-dose bin (5 for the 5×5 grid).
     """
 
     spec_version: str
@@ -92,6 +136,7 @@ class ActionBinArtifacts:
     fluid_edges: tuple[float, ...]
     n_train_vaso_nonzero: int
     n_train_fluid_nonzero: int
+    n_bins: int = N_BINS
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to a JSON-serialisable mapping."""
@@ -102,6 +147,7 @@ class ActionBinArtifacts:
             "fluid_edges": list(self.fluid_edges),
             "n_train_vaso_nonzero": self.n_train_vaso_nonzero,
             "n_train_fluid_nonzero": self.n_train_fluid_nonzero,
+            "n_bins": self.n_bins,
         }
 
     @classmethod
@@ -114,6 +160,7 @@ class ActionBinArtifacts:
             fluid_edges=tuple(float(e) for e in payload["fluid_edges"]),
             n_train_vaso_nonzero=int(payload["n_train_vaso_nonzero"]),
             n_train_fluid_nonzero=int(payload["n_train_fluid_nonzero"]),
+            n_bins=int(payload.get("n_bins", N_BINS)),
         )
 
 
@@ -125,39 +172,53 @@ class ActionBinArtifacts:
 def _learn_edges(
     values: pl.Series,
     label: str,
+    n_bins: int = N_BINS,
 ) -> tuple[float, ...]:
-    """Learn quartile edges from non-zero values.
+    """Learn equal-frequency edges from non-zero values.
 
     Returns
     -------
-    tuple of three floats
-        (Q25, Q50, Q75) thresholds for non-zero values.
+    tuple of ``n_bins - 2`` floats
+        (Q25, Q50, Q75) thresholds for the default 5-bin axis.
 
     Raises
     ------
     ValueError
-        If there are fewer than 4 non-zero observations (one per quartile).
+        If there are fewer non-zero observations than non-zero bins.
     """
+    return _learn_edge_sets(values, label, (n_bins,))[n_bins]
+
+
+def _learn_edge_sets(
+    values: pl.Series,
+    label: str,
+    n_bins: Sequence[int],
+) -> dict[int, tuple[float, ...]]:
+    """Learn edges for several granularities from one filtered pass."""
     nonzero = values.filter(values > 0.0)
-    if nonzero.len() < N_NONZERO_BINS:
+    needed = max(n_bins) - 1
+    if nonzero.len() < needed:
         raise ValueError(
-            f"Cannot learn {label} edges: need at least {N_NONZERO_BINS} "
+            f"Cannot learn {label} edges: need at least {needed} "
             f"non-zero observations, got {nonzero.len()}."
         )
 
-    edges: list[float] = []
-    for q in QUARTILE_CUTS:
-        edge = nonzero.quantile(q)
-        if edge is None:
-            raise ValueError(f"Quantile {q} returned None for {label}.")
-        edges.append(float(edge))
+    edge_sets: dict[int, tuple[float, ...]] = {}
+    for n in n_bins:
+        edges: list[float] = []
+        for q in quantile_cuts(n):
+            edge = nonzero.quantile(q)
+            if edge is None:
+                raise ValueError(f"Quantile {q} returned None for {label}.")
+            edges.append(float(edge))
 
-    # Ensure strict monotonicity (deduplicate ties)
-    for i in range(1, len(edges)):
-        if edges[i] <= edges[i - 1]:
-            edges[i] = edges[i - 1] + 1e-9
+        # Ensure strict monotonicity (deduplicate ties)
+        for i in range(1, len(edges)):
+            if edges[i] <= edges[i - 1]:
+                edges[i] = edges[i - 1] + 1e-9
 
-    return tuple(edges)
+        edge_sets[n] = tuple(edges)
+    return edge_sets
 
 
 def _assign_bin(value: float, edges: tuple[float, ...]) -> int:
@@ -168,13 +229,30 @@ def _assign_bin(value: float, edges: tuple[float, ...]) -> int:
     - 2 if Q25 < value ≤ Q50
     - 3 if Q50 < value ≤ Q75
     - 4 if value > Q75
+
+    Scalar reference for :func:`_bin_expr`.
     """
     if value <= 0.0 or math.isnan(value):
         return 0
     for i, edge in enumerate(edges):
         if value <= edge:
             return i + 1
-    return N_NONZERO_BINS  # bin 4 (highest)
+    return len(edges) + 1  # highest bin
+
+
+def _bin_expr(col: str, edges: tuple[float, ...]) -> pl.Expr:
+    """Vectorised :func:`_assign_bin`: binary search over the learned edges.
+
+    Null, NaN and non-positive doses map to the zero-dose bin.
+    """
+    value = pl.col(col).cast(pl.Float64)
+    position = pl.lit(pl.Series(edges, dtype=pl.Float64)).search_sorted(value, side="left")
+    return (
+        pl.when(value.is_null() | value.is_nan() | (value <= 0.0))
+        .then(0)
+        .otherwise(position.cast(pl.Int32) + 1)
+        .cast(pl.Int32)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -183,7 +261,7 @@ def _assign_bin(value: float, edges: tuple[float, ...]) -> int:
 
 
 class ActionBinner:
-    """Learn and apply the 5×5 discrete action map.
+    """Learn and apply the ``n_bins × n_bins`` discrete action map (5×5 by default).
 
     Call :meth:`fit` on training-split treatment levels, then :meth:`transform`
     on any split to produce integer action IDs.
@@ -191,9 +269,21 @@ class ActionBinner:
     The fitted state is captured in :attr:`artifacts` for serialisation.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, n_bins: int = N_BINS) -> None:
+        _check_n_bins(n_bins)
+        self._n_bins = n_bins
         self._artifacts: ActionBinArtifacts | None = None
 
+    @property
+    def n_bins(self) -> int:
+        """Bins per treatment axis, including the zero-dose bin."""
+        return self._n_bins
+
+    @property
+    def n_actions(self) -> int:
+        """Number of discrete actions (``n_bins ** 2``)."""
+        return self._n_bins * self._n_bins
+
     @property
     def artifacts(self) -> ActionBinArtifacts:
         """Access fitted bin artifacts (raises if not fitted)."""
@@ -231,34 +321,19 @@ class ActionBinner:
         -------
         self
         """
-        vaso_series = train_df.get_column(vaso_col).cast(pl.Float64)
-        fluid_series = train_df.get_column(fluid_col).cast(pl.Float64)
-
-        vaso_edges = _learn_edges(vaso_series, "vasopressor")
-        fluid_edges = _learn_edges(fluid_series, "IV_fluid")
-
-        self._artifacts = ActionBinArtifacts(
-            spec_version=ACTION_SPEC_VERSION,
+        fitted = fit_action_binners(
+            train_df,
             manifest_seed=manifest_seed,
-            vaso_edges=vaso_edges,
-            fluid_edges=fluid_edges,
-            n_train_vaso_nonzero=int(
-                vaso_series.filter(vaso_series > 0.0).len()
-            ),
-            n_train_fluid_nonzero=int(
-                fluid_series.filter(fluid_series > 0.0).len()
-            ),
-        )
-
-        logger.info(
-            "Fitted action bins: vaso_edges=%s, fluid_edges=%s",
-            self._artifacts.vaso_edges,
-            self._artifacts.fluid_edges,
+            n_bins=(self._n_bins,),
+            vaso_col=vaso_col,
+            fluid_col=fluid_col,
         )
+        self._artifacts = fitted[self._n_bins].artifacts
         return self
 
     def load(self, artifacts: ActionBinArtifacts) -> "ActionBinner":
-        """Load previously fitted bin artifacts."""
+        """Load previously fitted bin artifacts (adopting their grid size)."""
+        self._n_bins = artifacts.n_bins
         self._artifacts = artifacts
         return self
 
@@ -280,37 +355,128 @@ class ActionBinner:
         -------
         pl.DataFrame
             Original DataFrame with added columns:
-            ``vaso_bin`` (0–4), ``fluid_bin`` (0–4), ``action_id`` (0–24).
+            ``vaso_bin`` (0–4), ``fluid_bin`` (0–4), ``action_id`` (0–24)
+            for the default 5×5 grid.
         """
-        arts = self.artifacts  # raises if not fitted
-
-        vaso_vals = df.get_column(vaso_col).to_list()
-        fluid_vals = df.get_column(fluid_col).to_list()
-
-        vaso_bins = [_assign_bin(float(v) if v is not None else 0.0, arts.vaso_edges) for v in vaso_vals]
-        fluid_bins = [_assign_bin(float(v) if v is not None else 0.0, arts.fluid_edges) for v in fluid_vals]
-        action_ids = [vb * N_BINS + fb for vb, fb in zip(vaso_bins, fluid_bins)]
-
         return df.with_columns(
-            pl.Series("vaso_bin", vaso_bins, dtype=pl.Int32),
-            pl.Series("fluid_bin", fluid_bins, dtype=pl.Int32),
-            pl.Series("action_id", action_ids, dtype=pl.Int32),
+            self.action_exprs(vaso_col=vaso_col, fluid_col=fluid_col)
         )
 
+    def action_exprs(
+        self,
+        *,
+        vaso_col: str = "vaso_dose_4h",
+        fluid_col: str = "fluid_volume_4h",
+        suffix: str = "",
+    ) -> list[pl.Expr]:
+        """Expressions for ``vaso_bin``, ``fluid_bin`` and ``action_id``.
+
+        *suffix* is appended to the output names so several grids can be
+        encoded side by side (see :func:`encode_action_granularities`).
+        """
+        arts = self.artifacts  # raises if not fitted
+        vaso_bin = _bin_expr(vaso_col, arts.vaso_edges)
+        fluid_bin = _bin_expr(fluid_col, arts.fluid_edges)
+        return [
+            vaso_bin.alias(f"vaso_bin{suffix}"),
+            fluid_bin.alias(f"fluid_bin{suffix}"),
+            (vaso_bin * self._n_bins + fluid_bin).alias(f"action_id{suffix}"),
+        ]
+
     def decode_action(self, action_id: int) -> tuple[int, int]:
         """Decode a single action ID into (vaso_bin, fluid_bin)."""
-        if not 0 <= action_id < N_ACTIONS:
+        if not 0 <= action_id < self.n_actions:
             raise ValueError(
-                f"action_id must be in [0, {N_ACTIONS}), got {action_id}."
+                f"action_id must be in [0, {self.n_actions}), got {action_id}."
             )
-        return divmod(action_id, N_BINS)
+        return divmod(action_id, self._n_bins)
 
     def action_label(self, action_id: int) -> str:
         """Human-readable label for an action ID."""
         vb, fb = self.decode_action(action_id)
-        vaso_labels = ["no_vaso", "vaso_Q1", "vaso_Q2", "vaso_Q3", "vaso_Q4"]
-        fluid_labels = ["no_fluid", "fluid_Q1", "fluid_Q2", "fluid_Q3", "fluid_Q4"]
-        return f"{vaso_labels[vb]}×{fluid_labels[fb]}"
+        vaso_label = f"vaso_Q{vb}" if vb else "no_vaso"
+        fluid_label = f"fluid_Q{fb}" if fb else "no_fluid"
+        return f"{vaso_label}×{fluid_label}"
+
+
+def fit_action_binners(
+    train_df: pl.DataFrame,
+    *,
+    manifest_seed: int,
+    n_bins: Sequence[int] = (N_BINS,),
+    vaso_col: str = "vaso_dose_4h",
+    fluid_col: str = "fluid_volume_4h",
+) -> dict[int, ActionBinner]:
+    """Fit one :class:`ActionBinner` per grid size from a single pass.
+
+    The treatment columns are cast and filtered once; each granularity only
+    adds its own quantile look-ups. ``fit_action_binners(df, n_bins=(5,))[5]``
+    is identical to ``ActionBinner().fit(df)``.
+
+    Returns
+    -------
+    dict[int, ActionBinner]
+        Fitted binners keyed by bins per axis.
+    """
+    sizes = tuple(dict.fromkeys(n_bins))
+    if not sizes:
+        raise ValueError("n_bins must name at least one grid size.")
+    for size in sizes:
+        _check_n_bins(size)
+
+    vaso_series = train_df.get_column(vaso_col).cast(pl.Float64)
+    fluid_series = train_df.get_column(fluid_col).cast(pl.Float64)
+    vaso_edges = _learn_edge_sets(vaso_series, "vasopressor", sizes)
+    fluid_edges = _learn_edge_sets(fluid_series, "IV_fluid", sizes)
+    n_vaso_nonzero = int(vaso_series.filter(vaso_series > 0.0).len())
+    n_fluid_nonzero = int(fluid_series.filter(fluid_series > 0.0).len())
+
+    binners: dict[int, ActionBinner] = {}
+    for size in sizes:
+        binners[size] = ActionBinner(size).load(
+            ActionBinArtifacts(
+                spec_version=ACTION_SPEC_VERSION,
+                manifest_seed=manifest_seed,
+                vaso_edges=vaso_edges[size],
+                fluid_edges=fluid_edges[size],
+                n_train_vaso_nonzero=n_vaso_nonzero,
+                n_train_fluid_nonzero=n_fluid_nonzero,
+                n_bins=size,
+            )
+        )
+        logger.info(
+            "Fitted %dx%d action bins: vaso_edges=%s, fluid_edges=%s",
+            size,
+            size,
+            vaso_edges[size],
+            fluid_edges[size],
+        )
+    return binners
+
+
+def encode_action_granularities(
+    df: pl.DataFrame,
+    binners: Mapping[int, ActionBinner],
+    *,
+    vaso_col: str = "vaso_dose_4h",
+    fluid_col: str = "fluid_volume_4h",
+) -> pl.DataFrame:
+    """Add ``vaso_bin_NxN``, ``fluid_bin_NxN`` and ``action_id_NxN`` per binner.
+
+    Lets action-granularity ablations re-encode stored treatment levels
+    without rebuilding the transition dataset.
+    """
+    return df.with_columns(
+        [
+            expr
+            for size, binner in binners.items()
+            for expr in binner.action_exprs(
+                vaso_col=vaso_col,
+                fluid_col=fluid_col,
+                suffix=f"_{size}x{size}",
+            )
+        ]
+    )
 
 
 # ---------------------------------------------------------------------------
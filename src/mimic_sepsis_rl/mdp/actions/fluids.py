@@ -16,6 +16,7 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial fluid aggregation contract.
+v1.1.0  2026-10-18  Assign events to steps by grid arithmetic instead of a stay-level join.
 """
 
 from __future__ import annotations
@@ -27,6 +28,8 @@ from typing import Final
 
 import polars as pl
 
+from mimic_sepsis_rl.mdp.actions.intervals import overlapping_steps
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -153,17 +156,11 @@ class FluidAggregator:
                 pl.lit(0.0).alias("fluid_volume_4h")
             )
 
-        # Assign each fluid event to a step
-        joined = step_boundaries.join(
+        # Assign each fluid event to the step containing it
+        in_step = overlapping_steps(
             fluid_df.select("stay_id", time_col, amount_col),
-            on="stay_id",
-            how="left",
-        )
-
-        # Filter events within step boundaries
-        in_step = joined.filter(
-            (pl.col(time_col) >= pl.col("step_start"))
-            & (pl.col(time_col) < pl.col("step_end"))
+            step_boundaries,
+            start_col=time_col,
         )
 
         if in_step.is_empty():
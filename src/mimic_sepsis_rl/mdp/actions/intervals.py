@@ -0,0 +1,143 @@
+"""
+Step-grid overlap matching shared by the treatment aggregators.
+
+Both :class:`~mimic_sepsis_rl.mdp.actions.vasopressors.VasopressorStandardiser`
+and :class:`~mimic_sepsis_rl.mdp.actions.fluids.FluidAggregator` need to pair
+treatment rows with the decision steps they touch. Joining every step of a
+stay with every treatment row of that stay grows with infusions × steps;
+instead, steps of one stay sit on a fixed grid (``step_start = origin +
+(step_index - first_index) * width``), so the first and last step an event
+can touch follow arithmetically from its timestamps. Only those steps are
+exploded and joined, so memory scales with the number of overlaps.
+
+The exact boundary predicates are still applied after the join, so results
+are identical to the cross join. Stays whose boundaries do not form a
+regular grid fall back to the stay-level join.
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial grid-arithmetic overlap matching.
+"""
+
+from __future__ import annotations
+
+import polars as pl
+
+_STEP_COLUMNS = ("stay_id", "step_index", "step_start", "step_end")
+
+
+def _step_grid(step_boundaries: pl.DataFrame) -> pl.DataFrame:
+    """Per-stay grid parameters plus a flag telling whether the grid is regular."""
+    width_us = (pl.col("step_end") - pl.col("step_start")).dt.total_microseconds()
+    offset_us = (pl.col("step_start") - pl.col("step_start").min()).dt.total_microseconds()
+    return (
+        step_boundaries.group_by("stay_id")
+        .agg(
+            pl.col("step_start").min().alias("_origin"),
+            pl.col("step_index").min().alias("_first_index"),
+            pl.col("step_index").max().alias("_last_index"),
+            width_us.first().alias("_width_us"),
+            (
+                (width_us.n_unique() == 1)
+                & (width_us.first() > 0)
+                & (
+                    offset_us
+                    == (pl.col("step_index") - pl.col("step_index").min()) * width_us.first()
+                ).all()
+                & pl.col("step_start").is_not_null().all()
+                & pl.col("step_end").is_not_null().all()
+            ).alias("_regular"),
+        )
+    )
+
+
+def overlapping_steps(
+    events: pl.DataFrame,
+    step_boundaries: pl.DataFrame,
+    *,
+    start_col: str,
+    end_col: str | None = None,
+) -> pl.DataFrame:
+    """Pair every event with each step of its stay that it falls into.
+
+    Parameters
+    ----------
+    events:
+        Rows with ``stay_id`` and *start_col* (and *end_col* for intervals).
+    step_boundaries:
+        DataFrame with ``stay_id``, ``step_index``, ``step_start``,
+        ``step_end``.
+    start_col:
+        Event start (or timestamp, for point events).
+    end_col:
+        Event end for interval events. Intervals match every step with
+        ``start < step_end`` and ``end > step_start``; point events (no
+        *end_col*) match the step with ``step_start <= start < step_end``.
+
+    Returns
+    -------
+    pl.DataFrame
+        One row per (event, matching step): the event columns followed by
+        ``step_index``, ``step_start`` and ``step_end``, in event order.
+    """
+    steps = step_boundaries.select(_STEP_COLUMNS)
+    grid = _step_grid(steps)
+    regular_stays = grid.filter(pl.col("_regular")).drop("_regular")
+    irregular_ids = grid.filter(~pl.col("_regular")).get_column("stay_id")
+
+    event_cols = events.columns
+    ordered = events.with_row_index("_event_row")
+
+    def _relative_us(col: str) -> pl.Expr:
+        return (pl.col(col) - pl.col("_origin")).dt.total_microseconds()
+
+    # First step whose end lies after the event start; last step starting
+    # before the event end (or containing the point event).
+    # Integer ``//`` floors, so events before the origin get negative indices.
+    first_step = _relative_us(start_col) // pl.col("_width_us")
+    if end_col is None:
+        last_step = first_step
+    else:
+        last_step = -(-_relative_us(end_col) // pl.col("_width_us")) - 1
+
+    candidates = (
+        ordered.join(regular_stays, on="stay_id", how="inner")
+        .with_columns(
+            pl.max_horizontal(first_step + pl.col("_first_index"), "_first_index").alias("_lo"),
+            pl.min_horizontal(last_step + pl.col("_first_index"), "_last_index").alias("_hi"),
+        )
+        .filter(pl.col("_lo") <= pl.col("_hi"))
+        .with_columns(
+            pl.int_ranges("_lo", pl.col("_hi") + 1, dtype=steps.schema["step_index"])
+            .alias("step_index")
+        )
+        .explode("step_index")
+        .select("_event_row", *event_cols, "step_index")
+        .join(steps, on=["stay_id", "step_index"], how="inner")
+    )
+
+    if not irregular_ids.is_empty():
+        fallback = (
+            ordered.filter(pl.col("stay_id").is_in(irregular_ids.implode()))
+            .join(steps, on="stay_id", how="inner")
+            .select("_event_row", *event_cols, "step_index", "step_start", "step_end")
+        )
+        candidates = pl.concat([candidates, fallback], how="vertical")
+
+    if end_col is None:
+        in_step = (pl.col(start_col) >= pl.col("step_start")) & (
+            pl.col(start_col) < pl.col("step_end")
+        )
+    else:
+        in_step = (pl.col(start_col) < pl.col("step_end")) & (
+            pl.col(end_col) > pl.col("step_start")
+        )
+
+    return (
+        candidates.filter(in_step)
+        .sort(["_event_row", "step_index"], maintain_order=True)
+        .drop("_event_row")
+    )
+
+
+__all__ = ["overlapping_steps"]
@@ -27,6 +27,7 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial vasopressor standardisation contract.
+v1.1.0  2026-10-18  Match infusions to steps by grid arithmetic instead of a stay-level join.
 """
 
 from __future__ import annotations
@@ -39,6 +40,8 @@ from typing import Final
 
 import polars as pl
 
+from mimic_sepsis_rl.mdp.actions.intervals import overlapping_steps
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -207,19 +210,14 @@ class VasopressorStandardiser:
                 pl.lit(0.0).alias("vaso_dose_4h")
             )
 
-        # Cross-join approach: for each step, find overlapping infusions
-        joined = step_boundaries.join(
+        # Pair each infusion with only the steps it overlaps
+        overlap = overlapping_steps(
             standardised_df.select(
                 "stay_id", "starttime", "endtime", "ne_equiv_rate"
             ),
-            on="stay_id",
-            how="left",
-        )
-
-        # Filter to overlapping time windows
-        overlap = joined.filter(
-            (pl.col("starttime") < pl.col("step_end"))
-            & (pl.col("endtime") > pl.col("step_start"))
+            step_boundaries,
+            start_col="starttime",
+            end_col="endtime",
         )
 
         if overlap.is_empty():
@@ -10,6 +10,10 @@ missing-data contract explicit:
 3. Fall back to train-only medians when no prior value exists.
 4. Emit optional missingness flags based on whether a raw measurement was
    present in the current step.
+
+``build_state_table(..., engine="columnar")`` routes the same inputs through
+:class:`~mimic_sepsis_rl.mdp.features.columnar.ColumnarStateTableBuilder`,
+which produces an identical table in a few grouped Polars passes.
 """
 
 from __future__ import annotations
@@ -28,6 +32,9 @@ from mimic_sepsis_rl.mdp.features.extractors import (
     get_extractor_for_spec,
 )
 
+#: Engines accepted by :func:`build_state_table`.
+STATE_TABLE_ENGINES: tuple[str, ...] = ("rows", "columnar")
+
 
 @dataclass(frozen=True)
 class _ResolvedStepWindow:
@@ -257,9 +264,23 @@ def build_state_table(
     train_medians: Mapping[str, float] | None = None,
     emit_missingness_flags: bool = True,
     impute_missing: bool = True,
+    engine: str = "rows",
 ) -> pl.DataFrame:
-    """Convenience wrapper around :class:`StateTableBuilder`."""
-    builder = StateTableBuilder(
+    """Convenience wrapper around :class:`StateTableBuilder`.
+
+    ``engine="columnar"`` selects the grouped-pass implementation; both
+    engines return the same table.
+    """
+    if engine not in STATE_TABLE_ENGINES:
+        raise ValueError(
+            f"Unknown state-table engine '{engine}'; expected one of {STATE_TABLE_ENGINES}."
+        )
+    builder_cls: type[StateTableBuilder] = StateTableBuilder
+    if engine == "columnar":
+        from mimic_sepsis_rl.mdp.features.columnar import ColumnarStateTableBuilder
+
+        builder_cls = ColumnarStateTableBuilder
+    builder = builder_cls(
         registry=registry,
         train_medians=train_medians,
         emit_missingness_flags=emit_missingness_flags,
@@ -272,4 +293,4 @@ def build_state_table(
     )
 
 
-__all__ = ["StateTableBuilder", "build_state_table"]
+__all__ = ["STATE_TABLE_ENGINES", "StateTableBuilder", "build_state_table"]
@@ -0,0 +1,618 @@
+"""
+Columnar state-table engine for Phase 4.
+
+``StateTableBuilder`` walks every step window and runs each extractor on a
+tiny Polars frame, which means tens of millions of small DataFrame
+operations on a full cohort.  This module produces the same table from one
+long-format *step events* frame in a handful of grouped passes:
+
+1. Join events to the feature registry on ``(source_table, itemid)`` and
+   evaluate the valid-range masks for extraction and missingness flags.
+2. Aggregate LAST / MEAN / MAX / MIN / SUM per
+   ``(stay_id, step_index, feature_id)`` and spread the result to one
+   column per feature with a conditional aggregation.
+3. Resolve static, derived, clipped and imputed values in registry order,
+   using forward-fill window expressions over ``stay_id``.
+
+The output matches :class:`StateTableBuilder` column-for-column and value
+for value, including its missingness-flag semantics.
+
+Step events contract
+--------------------
+One row per raw measurement assigned to a ``(stay_id, step_index)``:
+
+``stay_id``, ``step_index``
+    Step the event belongs to.
+``source_table``
+    ``chartevents`` / ``labevents`` / ``inputevents`` / ``outputevents``.
+``itemid``
+    MIMIC-IV item identifier.
+``value``
+    Value the extractor aggregates (``valuenum`` for charts and labs,
+    ``amount`` for inputs, ``value`` for outputs).
+``range_value`` / ``range_checked``
+    Value the extraction range filter is applied to, and whether the row
+    engine would range-filter this row at all (only when the source
+    window carries ``valuenum``).
+``flag_value``
+    Value inspected by the raw-measurement check behind ``*_missing``.
+``event_order``
+    Within-step ordering; LAST aggregation takes the highest order.
+
+Tables listed in ``cumulative_tables`` hold each event once, in the step it
+started in, instead of repeating it in every later window; their per-step
+sums and raw-present flags are accumulated over ``stay_id``.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import polars as pl
+
+from mimic_sepsis_rl.data.split_models import SplitLabel, SplitManifest
+from mimic_sepsis_rl.mdp.features.builder import StateTableBuilder
+from mimic_sepsis_rl.mdp.features.dictionary import (
+    AggregationRule,
+    FeatureSpec,
+    MissingStrategy,
+)
+from mimic_sepsis_rl.mdp.features.extractors import StepWindowData
+
+#: Raw tables whose rows reach extractors through ``FeatureSpec.item_ids``.
+EVENT_TABLES: tuple[str, ...] = (
+    "chartevents",
+    "labevents",
+    "inputevents",
+    "outputevents",
+)
+
+STEP_EVENT_SCHEMA: dict[str, pl.DataType] = {
+    "stay_id": pl.Int64,
+    "step_index": pl.Int64,
+    "source_table": pl.Utf8,
+    "itemid": pl.Int64,
+    "value": pl.Float64,
+    "range_value": pl.Float64,
+    "range_checked": pl.Boolean,
+    "flag_value": pl.Float64,
+    "event_order": pl.Int64,
+}
+
+STEP_CONTEXT_SCHEMA: dict[str, pl.DataType] = {
+    "stay_id": pl.Int64,
+    "step_index": pl.Int64,
+    "hours_relative_to_onset": pl.Float64,
+    "age_years": pl.Float64,
+    "weight_kg": pl.Float64,
+    "subject_id": pl.Int64,
+}
+
+# Chart and lab extractors honour ``spec.aggregation`` and sort by charttime;
+# the treatment extractors always sum in source order.
+_RULE_TABLES = frozenset({"chartevents", "labevents"})
+
+_VALUE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "chartevents": ("valuenum",),
+    "labevents": ("valuenum",),
+    "inputevents": ("amount", "valuenum"),
+    "outputevents": ("value", "valuenum"),
+}
+_FLAG_COLUMNS: tuple[str, ...] = ("valuenum", "value", "amount")
+
+_DERIVED_PARENTS: dict[str, tuple[str, str]] = {
+    "pf_ratio": ("pao2", "fio2_vent"),
+    "shock_index": ("heart_rate", "sbp"),
+}
+
+_STEP_KEYS = ["stay_id", "step_index"]
+
+
+# ---------------------------------------------------------------------------
+# Step-window flattening
+# ---------------------------------------------------------------------------
+
+
+def _first_present(columns: Sequence[str], candidates: Sequence[str]) -> pl.Expr:
+    for candidate in candidates:
+        if candidate in columns:
+            return pl.col(candidate).cast(pl.Float64)
+    return pl.lit(None, dtype=pl.Float64)
+
+
+def _window_events(
+    window_df: pl.DataFrame,
+    table: str,
+    stay_id: int,
+    step_index: int,
+) -> pl.DataFrame | None:
+    """Normalise one window table into the step-events schema."""
+    if window_df.is_empty() or "itemid" not in window_df.columns:
+        return None
+    columns = window_df.columns
+    if table in _RULE_TABLES and "charttime" in columns:
+        window_df = window_df.sort("charttime", maintain_order=True)
+    range_checked = "valuenum" in columns
+    return window_df.select(
+        pl.lit(stay_id, dtype=pl.Int64).alias("stay_id"),
+        pl.lit(step_index, dtype=pl.Int64).alias("step_index"),
+        pl.lit(table, dtype=pl.Utf8).alias("source_table"),
+        pl.col("itemid").cast(pl.Int64),
+        _first_present(columns, _VALUE_COLUMNS[table]).alias("value"),
+        _first_present(columns, ("valuenum",) if range_checked else ()).alias("range_value"),
+        pl.lit(range_checked, dtype=pl.Boolean).alias("range_checked"),
+        _first_present(columns, _FLAG_COLUMNS).alias("flag_value"),
+        pl.int_range(pl.len(), dtype=pl.Int64).alias("event_order"),
+    )
+
+
+def step_windows_to_frames(
+    step_windows: Sequence[StepWindowData],
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Flatten step windows into ``(step_context, step_events)`` frames."""
+    context_rows = {column: [] for column in STEP_CONTEXT_SCHEMA}
+    event_frames: list[pl.DataFrame] = []
+    for window in step_windows:
+        context_rows["stay_id"].append(window.stay_id)
+        context_rows["step_index"].append(window.step_index)
+        context_rows["hours_relative_to_onset"].append(float(window.hours_relative_to_onset))
+        context_rows["age_years"].append(
+            float(window.age_years) if window.age_years is not None else None
+        )
+        context_rows["weight_kg"].append(
+            float(window.weight_kg) if window.weight_kg is not None else None
+        )
+        context_rows["subject_id"].append(window.subject_id)
+        for table in EVENT_TABLES:
+            events = _window_events(
+                window.get_df_for_table(table),
+                table,
+                window.stay_id,
+                window.step_index,
+            )
+            if events is not None:
+                event_frames.append(events)
+
+    step_context = pl.DataFrame(context_rows, schema=STEP_CONTEXT_SCHEMA)
+    if event_frames:
+        step_events = pl.concat(event_frames, how="vertical")
+    else:
+        step_events = pl.DataFrame(schema=STEP_EVENT_SCHEMA)
+    return step_context, step_events
+
+
+# ---------------------------------------------------------------------------
+# Columnar builder
+# ---------------------------------------------------------------------------
+
+
+def _clip_scalar(value: float | None, spec: FeatureSpec) -> float | None:
+    if value is None:
+        return None
+    if spec.clip_low is not None:
+        value = max(value, spec.clip_low)
+    if spec.clip_high is not None:
+        value = min(value, spec.clip_high)
+    return value
+
+
+def _clip_expr(expr: pl.Expr, spec: FeatureSpec) -> pl.Expr:
+    # when/otherwise mirrors Python's max/min, including NaN passthrough.
+    if spec.clip_low is not None:
+        expr = pl.when(expr < spec.clip_low).then(pl.lit(float(spec.clip_low))).otherwise(expr)
+    if spec.clip_high is not None:
+        expr = pl.when(expr > spec.clip_high).then(pl.lit(float(spec.clip_high))).otherwise(expr)
+    return expr
+
+
+def _in_bounds(value: pl.Expr) -> pl.Expr:
+    return (
+        (pl.col("valid_low").is_null() | (value >= pl.col("valid_low")))
+        & (pl.col("valid_high").is_null() | (value <= pl.col("valid_high")))
+    ).fill_null(False)
+
+
+class ColumnarStateTableBuilder(StateTableBuilder):
+    """Grouped-pass equivalent of :class:`StateTableBuilder`.
+
+    ``build`` accepts the same step windows as the row engine;
+    ``build_from_events`` skips window materialisation entirely and consumes
+    pre-bucketed step events.
+    """
+
+    def build(
+        self,
+        step_windows: list[StepWindowData],
+        split_manifest: SplitManifest | None = None,
+        stay_to_subject_id: Mapping[int, int] | None = None,
+    ) -> pl.DataFrame:
+        """Build one state row per step window."""
+        step_context, step_events = step_windows_to_frames(step_windows)
+        return self.build_from_events(
+            step_context,
+            step_events,
+            split_manifest=split_manifest,
+            stay_to_subject_id=stay_to_subject_id,
+        )
+
+    def build_from_events(
+        self,
+        step_context: pl.DataFrame,
+        step_events: pl.DataFrame,
+        split_manifest: SplitManifest | None = None,
+        stay_to_subject_id: Mapping[int, int] | None = None,
+        cumulative_tables: Sequence[str] = (),
+    ) -> pl.DataFrame:
+        """Build one state row per ``step_context`` row from step events.
+
+        ``cumulative_tables`` names source tables whose events are bucketed
+        once rather than repeated in every window from episode start.
+        """
+        if step_context.is_empty():
+            return self._empty_schema(
+                include_subject_id=split_manifest is not None or stay_to_subject_id is not None,
+                include_split=split_manifest is not None,
+            )
+
+        context = self._resolve_context(step_context, split_manifest, stay_to_subject_id)
+        raw_values, raw_present = self._aggregate_events(step_events)
+        frame = (
+            context.join(raw_values, on=_STEP_KEYS, how="left")
+            .join(raw_present, on=_STEP_KEYS, how="left")
+            .sort(_STEP_KEYS)
+        )
+        frame = self._accumulate(frame, cumulative_tables)
+        frame = self._resolve_features(frame)
+
+        include_subject_id = frame.get_column("subject_id").null_count() < frame.height
+        include_split = split_manifest is not None
+        output_columns = list(_STEP_KEYS)
+        if include_subject_id:
+            output_columns.append("subject_id")
+        if include_split:
+            output_columns.append("split")
+        for feature_id, spec in self._registry.items():
+            output_columns.append(feature_id)
+            if self._emit_flags and spec.include_missingness_flag:
+                output_columns.append(f"{feature_id}_missing")
+
+        sort_columns = ["subject_id", *_STEP_KEYS] if include_subject_id else _STEP_KEYS
+        return frame.select(output_columns).sort(sort_columns)
+
+    # ------------------------------------------------------------------
+    # Context resolution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _resolve_context(
+        step_context: pl.DataFrame,
+        split_manifest: SplitManifest | None,
+        stay_to_subject_id: Mapping[int, int] | None,
+    ) -> pl.DataFrame:
+        context = step_context.select(
+            [pl.col(column).cast(dtype) for column, dtype in STEP_CONTEXT_SCHEMA.items()]
+        )
+        if stay_to_subject_id is not None:
+            lookup = pl.DataFrame(
+                {
+                    "stay_id": list(stay_to_subject_id.keys()),
+                    "__mapped_subject_id": list(stay_to_subject_id.values()),
+                },
+                schema={"stay_id": pl.Int64, "__mapped_subject_id": pl.Int64},
+            )
+            context = (
+                context.join(lookup, on="stay_id", how="left")
+                .with_columns(pl.coalesce("subject_id", "__mapped_subject_id").alias("subject_id"))
+                .drop("__mapped_subject_id")
+            )
+
+        if split_manifest is not None:
+            unresolved = context.filter(pl.col("subject_id").is_null())
+            if not unresolved.is_empty():
+                raise ValueError(
+                    "split_manifest was provided but no subject_id could be "
+                    f"resolved for stay_id={unresolved['stay_id'][0]}."
+                )
+            split_lookup = pl.concat(
+                [
+                    pl.DataFrame(
+                        {"subject_id": sorted(ids), "split": [label.value] * len(ids)},
+                        schema={"subject_id": pl.Int64, "split": pl.Utf8},
+                    )
+                    for label, ids in (
+                        (SplitLabel.TRAIN, split_manifest.train_ids),
+                        (SplitLabel.VALIDATION, split_manifest.validation_ids),
+                        (SplitLabel.TEST, split_manifest.test_ids),
+                    )
+                ]
+            ).unique(subset="subject_id", keep="first", maintain_order=True)
+            context = context.join(split_lookup, on="subject_id", how="left")
+            unknown = context.filter(pl.col("split").is_null()).sort(_STEP_KEYS)
+            if not unknown.is_empty():
+                raise ValueError(
+                    f"subject_id={unknown['subject_id'][0]} for stay_id={unknown['stay_id'][0]} "
+                    "is not present in the provided split manifest."
+                )
+
+        subjects_per_stay = (
+            context.filter(pl.col("subject_id").is_not_null())
+            .group_by("stay_id")
+            .agg(pl.col("subject_id").unique().sort())
+            .filter(pl.col("subject_id").list.len() > 1)
+            .sort("stay_id")
+        )
+        if not subjects_per_stay.is_empty():
+            row = subjects_per_stay.row(0, named=True)
+            raise ValueError(
+                f"stay_id={row['stay_id']} resolved to multiple subject_ids: {row['subject_id']}."
+            )
+
+        duplicates = context.filter(pl.len().over(_STEP_KEYS) > 1).sort(_STEP_KEYS)
+        if not duplicates.is_empty():
+            raise ValueError(
+                f"Duplicate step_index={duplicates['step_index'][0]} encountered for "
+                f"stay_id={duplicates['stay_id'][0]}."
+            )
+        return context
+
+    # ------------------------------------------------------------------
+    # Grouped event aggregation
+    # ------------------------------------------------------------------
+
+    def _feature_item_frame(self) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """Return ``(item-keyed, table-keyed)`` feature lookups for events."""
+        by_item: dict[str, list] = {"source_table": [], "itemid": [], "feature_id": []}
+        by_table: dict[str, list] = {"source_table": [], "feature_id": []}
+        for feature_id, spec in self._registry.items():
+            if spec.source_table not in EVENT_TABLES:
+                continue
+            if spec.item_ids:
+                for item_id in dict.fromkeys(spec.item_ids):
+                    by_item["source_table"].append(spec.source_table)
+                    by_item["itemid"].append(int(item_id))
+                    by_item["feature_id"].append(feature_id)
+            else:
+                by_table["source_table"].append(spec.source_table)
+                by_table["feature_id"].append(feature_id)
+        return (
+            pl.DataFrame(
+                by_item,
+                schema={"source_table": pl.Utf8, "itemid": pl.Int64, "feature_id": pl.Utf8},
+            ),
+            pl.DataFrame(by_table, schema={"source_table": pl.Utf8, "feature_id": pl.Utf8}),
+        )
+
+    def _feature_params_frame(self) -> pl.DataFrame:
+        rows: dict[str, list] = {
+            "feature_id": [],
+            "valid_low": [],
+            "valid_high": [],
+            "rule": [],
+            "has_items": [],
+        }
+        for feature_id, spec in self._registry.items():
+            if spec.source_table not in EVENT_TABLES:
+                continue
+            rule = spec.aggregation
+            if spec.source_table not in _RULE_TABLES or rule == AggregationRule.CUMULATIVE:
+                rule = AggregationRule.SUM
+            rows["feature_id"].append(feature_id)
+            rows["valid_low"].append(spec.valid_low)
+            rows["valid_high"].append(spec.valid_high)
+            rows["rule"].append(rule.value)
+            rows["has_items"].append(bool(spec.item_ids))
+        return pl.DataFrame(
+            rows,
+            schema={
+                "feature_id": pl.Utf8,
+                "valid_low": pl.Float64,
+                "valid_high": pl.Float64,
+                "rule": pl.Utf8,
+                "has_items": pl.Boolean,
+            },
+        )
+
+    def _aggregate_events(
+        self,
+        step_events: pl.DataFrame,
+    ) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """Aggregate step events into wide raw-value and raw-present frames."""
+        event_features = [
+            feature_id
+            for feature_id, spec in self._registry.items()
+            if spec.source_table in EVENT_TABLES
+        ]
+        events = step_events.select(
+            [pl.col(column).cast(dtype) for column, dtype in STEP_EVENT_SCHEMA.items()]
+        )
+        by_item, by_table = self._feature_item_frame()
+        matched = pl.concat(
+            [
+                events.join(by_item, on=["source_table", "itemid"], how="inner"),
+                events.join(by_table, on="source_table", how="inner").select(
+                    [*STEP_EVENT_SCHEMA, "feature_id"]
+                ),
+            ],
+            how="vertical",
+        ).join(self._feature_params_frame(), on="feature_id", how="inner")
+
+        extract_ok = pl.col("value").is_not_null() & (
+            ~pl.col("range_checked") | _in_bounds(pl.col("range_value"))
+        )
+        flag_ok = (
+            pl.col("has_items")
+            & pl.col("flag_value").is_not_null()
+            & _in_bounds(pl.col("flag_value"))
+        )
+
+        # Imploded list reductions reproduce Series.sum/mean bit-for-bit;
+        # grouped sum/mean kernels accumulate in a different order.
+        values = pl.col("value")
+        aggregated = (
+            matched.filter(extract_ok)
+            .sort([*_STEP_KEYS, "feature_id", "event_order"])
+            .group_by([*_STEP_KEYS, "feature_id"], maintain_order=True)
+            .agg(values, pl.col("rule").first())
+            .with_columns(
+                pl.when(pl.col("rule") == AggregationRule.LAST.value)
+                .then(values.list.last())
+                .when(pl.col("rule") == AggregationRule.MEAN.value)
+                .then(values.list.mean())
+                .when(pl.col("rule") == AggregationRule.MAX.value)
+                .then(values.list.max())
+                .when(pl.col("rule") == AggregationRule.MIN.value)
+                .then(values.list.min())
+                .otherwise(values.list.sum())
+                .alias("value")
+            )
+        )
+        raw_values = aggregated.group_by(_STEP_KEYS).agg(
+            [
+                pl.col("value").filter(pl.col("feature_id") == feature_id).first().alias(
+                    f"__raw_{feature_id}"
+                )
+                for feature_id in event_features
+            ]
+        )
+        raw_present = (
+            matched.filter(flag_ok)
+            .group_by(_STEP_KEYS)
+            .agg(
+                [
+                    (pl.col("feature_id") == feature_id).any().alias(f"__present_{feature_id}")
+                    for feature_id in event_features
+                ]
+            )
+        )
+        return raw_values, raw_present
+
+    def _accumulate(self, frame: pl.DataFrame, cumulative_tables: Sequence[str]) -> pl.DataFrame:
+        """Turn per-step sums of cumulative tables into running totals."""
+        columns: list[pl.Expr] = []
+        for feature_id, spec in self._registry.items():
+            if spec.source_table not in cumulative_tables:
+                continue
+            raw = pl.col(f"__raw_{feature_id}")
+            present = pl.col(f"__present_{feature_id}").fill_null(False)
+            seen = raw.is_not_null().cum_sum().over("stay_id") > 0
+            columns.append(
+                pl.when(seen)
+                .then(raw.fill_null(0.0).cum_sum().over("stay_id"))
+                .otherwise(pl.lit(None, dtype=pl.Float64))
+                .alias(f"__raw_{feature_id}")
+            )
+            columns.append(
+                (present.cast(pl.Int64).cum_sum().over("stay_id") > 0).alias(
+                    f"__present_{feature_id}"
+                )
+            )
+        return frame.with_columns(columns) if columns else frame
+
+    # ------------------------------------------------------------------
+    # Registry-order resolution
+    # ------------------------------------------------------------------
+
+    def _raw_expr(self, feature_id: str, spec: FeatureSpec, resolved: set[str]) -> pl.Expr:
+        if spec.source_table in EVENT_TABLES:
+            return pl.col(f"__raw_{feature_id}")
+        if spec.source_table == "patients":
+            if feature_id == "weight_kg":
+                return pl.col("__context_weight_kg")
+            if feature_id == "age_years":
+                return pl.col("__context_age_years")
+            return pl.lit(None, dtype=pl.Float64)
+        if spec.source_table == "derived":
+            if feature_id == "hours_since_onset":
+                return pl.col("hours_relative_to_onset")
+            parents = _DERIVED_PARENTS.get(feature_id)
+            # Derived features only see parents already extracted this step.
+            if parents is None or not set(parents) <= resolved:
+                return pl.lit(None, dtype=pl.Float64)
+            numerator, denominator = (pl.col(parent) for parent in parents)
+            return (
+                pl.when(numerator.is_not_null() & denominator.is_not_null() & ~(denominator <= 0.0))
+                .then(numerator / denominator)
+                .otherwise(pl.lit(None, dtype=pl.Float64))
+            )
+        raise ValueError(
+            f"No extractor registered for source_table='{spec.source_table}' "
+            f"(feature_id='{feature_id}')."
+        )
+
+    def _fallback_value(self, feature_id: str, spec: FeatureSpec) -> float | None:
+        strategy = spec.missing_strategy
+        if strategy in (MissingStrategy.FORWARD_FILL, MissingStrategy.MEDIAN_TRAIN):
+            median = self._train_medians.get(feature_id)
+            return median if median is not None else spec.normal_value
+        if strategy == MissingStrategy.ZERO:
+            return 0.0
+        if strategy == MissingStrategy.NORMAL_VALUE:
+            return spec.normal_value
+        return None
+
+    def _resolve_features(self, frame: pl.DataFrame) -> pl.DataFrame:
+        frame = frame.rename(
+            {"age_years": "__context_age_years", "weight_kg": "__context_weight_kg"}
+        )
+        resolved: set[str] = set()
+        for feature_id, spec in self._registry.items():
+            value = _clip_expr(self._raw_expr(feature_id, spec, resolved).cast(pl.Float64), spec)
+            if self._impute_missing:
+                fallback = pl.lit(
+                    _clip_scalar(self._fallback_value(feature_id, spec), spec),
+                    dtype=pl.Float64,
+                )
+                if spec.missing_strategy == MissingStrategy.FORWARD_FILL:
+                    value = pl.coalesce(value, value.forward_fill().over("stay_id"), fallback)
+                else:
+                    value = pl.coalesce(value, fallback)
+            columns = [value.alias(feature_id)]
+            if self._emit_flags and spec.include_missingness_flag:
+                present = (
+                    pl.col(f"__present_{feature_id}")
+                    if spec.source_table in EVENT_TABLES
+                    else pl.lit(False)
+                )
+                columns.append(
+                    (~present.fill_null(False)).cast(pl.Int64).alias(f"{feature_id}_missing")
+                )
+            frame = frame.with_columns(columns)
+            resolved.add(feature_id)
+        return frame
+
+
+def build_state_table_from_events(
+    step_context: pl.DataFrame,
+    step_events: pl.DataFrame,
+    registry: Mapping[str, FeatureSpec],
+    split_manifest: SplitManifest | None = None,
+    stay_to_subject_id: Mapping[int, int] | None = None,
+    train_medians: Mapping[str, float] | None = None,
+    emit_missingness_flags: bool = True,
+    impute_missing: bool = True,
+    cumulative_tables: Sequence[str] = (),
+) -> pl.DataFrame:
+    """Convenience wrapper around :meth:`ColumnarStateTableBuilder.build_from_events`."""
+    builder = ColumnarStateTableBuilder(
+        registry=registry,
+        train_medians=train_medians,
+        emit_missingness_flags=emit_missingness_flags,
+        impute_missing=impute_missing,
+    )
+    return builder.build_from_events(
+        step_context,
+        step_events,
+        split_manifest=split_manifest,
+        stay_to_subject_id=stay_to_subject_id,
+        cumulative_tables=cumulative_tables,
+    )
+
+
+__all__ = [
+    "ColumnarStateTableBuilder",
+    "build_state_table_from_events",
+    "EVENT_TABLES",
+    "STEP_CONTEXT_SCHEMA",
+    "STEP_EVENT_SCHEMA",
+    "step_windows_to_frames",
+]
@@ -0,0 +1,316 @@
+"""
+Time-bucketed step events for the columnar state-table engine.
+
+The window path slices every stay's raw tables once per step, and
+re-slices all inputevents from episode start at every step for the
+cumulative treatment features, which is quadratic in the number of steps.
+This stage instead assigns each raw event to exactly one
+``(stay_id, step_index)`` with a sorted as-of join against the step
+boundaries and emits a single long-format table in the
+:data:`~mimic_sepsis_rl.mdp.features.columnar.STEP_EVENT_SCHEMA` layout.
+
+Memory is proportional to the number of events: inputevents are bucketed
+once (events before the first realised step fall into that step) and
+:class:`~mimic_sepsis_rl.mdp.features.columnar.ColumnarStateTableBuilder`
+turns per-step sums into episode-cumulative totals with a running sum over
+``stay_id``.
+
+Usage
+-----
+    step_context = build_step_context(step_context_df, inputevents)
+    step_events = bucket_step_events(
+        step_context_df, chartevents, labevents, inputevents, outputevents
+    )
+    state_df = build_state_table_from_events(step_context, step_events, registry)
+
+    # Several resolutions: bucket once on the finest grid, then relabel.
+    base_events = bucket_step_events(
+        build_base_step_grid(episodes_df, 2), chartevents, labevents, inputevents, outputevents
+    )
+    events_6h = roll_up_step_events(
+        base_events, step_context_6h, base_step_hours=2, step_hours=6
+    )
+"""
+
+from __future__ import annotations
+
+import polars as pl
+
+from mimic_sepsis_rl.mdp.features.columnar import (
+    STEP_CONTEXT_SCHEMA,
+    STEP_EVENT_SCHEMA,
+)
+
+#: Tables whose features aggregate from episode start to the step end.
+CUMULATIVE_EVENT_TABLES: tuple[str, ...] = ("inputevents",)
+
+#: Order in which ``bucket_step_events`` concatenates the source tables.
+_EVENT_TABLE_ORDER: tuple[str, ...] = ("chartevents", "labevents", "inputevents", "outputevents")
+
+_TIME = pl.Datetime("us")
+
+
+def _step_bounds(step_context_df: pl.DataFrame, cumulative: bool) -> pl.DataFrame:
+    """Return ``stay_id, step_index, bucket_start, bucket_end`` sorted by start."""
+    bounds = step_context_df.select(
+        pl.col("stay_id").cast(pl.Int64),
+        pl.col("step_index").cast(pl.Int64),
+        pl.col("step_start").cast(_TIME).alias("bucket_start"),
+        pl.col("step_end").cast(_TIME).alias("bucket_end"),
+        pl.col("episode_start").cast(_TIME),
+    )
+    if cumulative:
+        # Cumulative windows open at episode start, so anything charted before
+        # the first realised step still counts towards it.
+        first_step = pl.col("step_index") == pl.col("step_index").min().over("stay_id")
+        bounds = bounds.with_columns(
+            pl.when(first_step & (pl.col("episode_start") < pl.col("bucket_start")))
+            .then(pl.col("episode_start"))
+            .otherwise(pl.col("bucket_start"))
+            .alias("bucket_start")
+        )
+    return bounds.drop("episode_start").sort("bucket_start")
+
+
+def _assign_steps(
+    events: pl.DataFrame,
+    bounds: pl.DataFrame,
+    time_col: str,
+) -> pl.DataFrame:
+    """Attach ``step_index`` to every event inside a step of its stay."""
+    events = (
+        events.with_columns(pl.col("stay_id").cast(pl.Int64), pl.col(time_col).cast(_TIME))
+        .filter(pl.col(time_col).is_not_null())
+        .sort(time_col, maintain_order=True)
+    )
+    return (
+        events.join_asof(
+            bounds,
+            left_on=time_col,
+            right_on="bucket_start",
+            by="stay_id",
+            strategy="backward",
+            check_sortedness=False,
+        )
+        .filter(pl.col("step_index").is_not_null() & (pl.col(time_col) < pl.col("bucket_end")))
+    )
+
+
+def _to_step_events(
+    bucketed: pl.DataFrame,
+    table: str,
+    time_col: str,
+    value_col: str,
+    range_checked: bool,
+) -> pl.DataFrame:
+    value = pl.col(value_col).cast(pl.Float64)
+    return (
+        bucketed.sort(["stay_id", "step_index", time_col], maintain_order=True)
+        .select(
+            pl.col("stay_id"),
+            pl.col("step_index"),
+            pl.lit(table, dtype=pl.Utf8).alias("source_table"),
+            pl.col("itemid").cast(pl.Int64),
+            value.alias("value"),
+            (value if range_checked else pl.lit(None, dtype=pl.Float64)).alias("range_value"),
+            pl.lit(range_checked, dtype=pl.Boolean).alias("range_checked"),
+            value.alias("flag_value"),
+            pl.int_range(pl.len(), dtype=pl.Int64).over(["stay_id", "step_index"]).alias(
+                "event_order"
+            ),
+        )
+    )
+
+
+def bucket_step_events(
+    step_context_df: pl.DataFrame,
+    chartevents: pl.DataFrame,
+    labevents: pl.DataFrame,
+    inputevents: pl.DataFrame,
+    outputevents: pl.DataFrame,
+) -> pl.DataFrame:
+    """Assign raw events to episode steps in one sorted range join per table.
+
+    Parameters
+    ----------
+    step_context_df:
+        One row per step with ``stay_id``, ``hadm_id``, ``step_index``,
+        ``step_start``, ``step_end`` and ``episode_start``.
+    chartevents, outputevents:
+        Stay-keyed events with ``charttime``, ``itemid`` and ``valuenum`` /
+        ``value``.
+    labevents:
+        Admission-keyed events with ``hadm_id``, ``charttime``, ``itemid``
+        and ``valuenum``; each is routed to every stay of its admission.
+    inputevents:
+        Stay-keyed infusions with ``starttime``, ``itemid`` and ``amount``,
+        bucketed on ``starttime`` for cumulative aggregation.
+
+    Returns
+    -------
+    pl.DataFrame
+        Step events in the ``STEP_EVENT_SCHEMA`` layout.
+    """
+    step_bounds = _step_bounds(step_context_df, cumulative=False)
+    frames: list[pl.DataFrame] = []
+
+    if not chartevents.is_empty():
+        frames.append(
+            _to_step_events(
+                _assign_steps(chartevents, step_bounds, "charttime"),
+                "chartevents",
+                "charttime",
+                "valuenum",
+                range_checked=True,
+            )
+        )
+    if not labevents.is_empty():
+        stays_by_hadm = step_context_df.select(
+            pl.col("hadm_id").cast(pl.Int64),
+            pl.col("stay_id").cast(pl.Int64),
+        ).unique(maintain_order=True)
+        labs_by_stay = labevents.with_columns(pl.col("hadm_id").cast(pl.Int64)).join(
+            stays_by_hadm,
+            on="hadm_id",
+            how="inner",
+        )
+        frames.append(
+            _to_step_events(
+                _assign_steps(labs_by_stay, step_bounds, "charttime"),
+                "labevents",
+                "charttime",
+                "valuenum",
+                range_checked=True,
+            )
+        )
+    if not inputevents.is_empty():
+        frames.append(
+            _to_step_events(
+                _assign_steps(
+                    inputevents,
+                    _step_bounds(step_context_df, cumulative=True),
+                    "starttime",
+                ),
+                "inputevents",
+                "starttime",
+                "amount",
+                range_checked=False,
+            )
+        )
+    if not outputevents.is_empty():
+        frames.append(
+            _to_step_events(
+                _assign_steps(outputevents, step_bounds, "charttime"),
+                "outputevents",
+                "charttime",
+                "value",
+                range_checked=False,
+            )
+        )
+
+    if not frames:
+        return pl.DataFrame(schema=STEP_EVENT_SCHEMA)
+    return pl.concat(frames, how="vertical")
+
+
+def roll_up_step_events(
+    base_events: pl.DataFrame,
+    step_context_df: pl.DataFrame,
+    *,
+    base_step_hours: int,
+    step_hours: int,
+) -> pl.DataFrame:
+    """Relabel events bucketed on a fine base grid onto a coarser grid.
+
+    *base_events* is :func:`bucket_step_events` output over
+    :func:`~mimic_sepsis_rl.data.episodes.build_base_step_grid`, i.e. every
+    ``base_step_hours`` slot from episode start.  Each coarse step is a
+    contiguous run of base slots, so relabelling ``step_index`` and
+    renumbering ``event_order`` in base order yields exactly the events
+    (and within-step order) that bucketing directly on *step_context_df*
+    would: MEAN/MIN/MAX/SUM see the same values and LAST the same final
+    event.  Cumulative tables keep events from before the first realised
+    step in that step.
+
+    Returns
+    -------
+    pl.DataFrame
+        Step events in the ``STEP_EVENT_SCHEMA`` layout for *step_context_df*.
+    """
+    if step_hours % base_step_hours:
+        raise ValueError(
+            f"step_hours={step_hours} is not a multiple of base_step_hours={base_step_hours}."
+        )
+    ratio = step_hours // base_step_hours
+    steps = step_context_df.select(
+        pl.col("stay_id").cast(pl.Int64),
+        pl.col("step_index").cast(pl.Int64).alias("_step"),
+    )
+    first_steps = steps.group_by("stay_id").agg(pl.col("_step").min().alias("_first_step"))
+    coarse = pl.col("step_index") // ratio
+    table_rank = pl.col("source_table").replace_strict(
+        {table: rank for rank, table in enumerate(_EVENT_TABLE_ORDER)},
+        return_dtype=pl.Int64,
+    )
+    rolled = (
+        base_events.join(first_steps, on="stay_id", how="inner")
+        .with_columns(
+            pl.when(pl.col("source_table").is_in(list(CUMULATIVE_EVENT_TABLES)))
+            .then(pl.max_horizontal(coarse, pl.col("_first_step")))
+            .otherwise(coarse)
+            .alias("_step"),
+            table_rank.alias("_table"),
+        )
+        .join(steps, on=["stay_id", "_step"], how="semi")
+        # Base slots are time-ordered, so (slot, event_order) is time order.
+        .sort(["_table", "stay_id", "_step", "step_index", "event_order"])
+    )
+    return rolled.select(
+        pl.col("stay_id"),
+        pl.col("_step").alias("step_index"),
+        pl.col("source_table"),
+        pl.col("itemid"),
+        pl.col("value"),
+        pl.col("range_value"),
+        pl.col("range_checked"),
+        pl.col("flag_value"),
+        pl.int_range(pl.len(), dtype=pl.Int64)
+        .over(["_table", "stay_id", "_step"])
+        .alias("event_order"),
+    ).select(list(STEP_EVENT_SCHEMA))
+
+
+def build_step_context(
+    step_context_df: pl.DataFrame,
+    inputevents: pl.DataFrame,
+) -> pl.DataFrame:
+    """Return the static per-step context consumed by the columnar builder.
+
+    Weight is the median charted ``patientweight`` across the stay's
+    inputevents; age is the cohort ``anchor_age``.
+    """
+    context = step_context_df.select(
+        pl.col("stay_id").cast(pl.Int64),
+        pl.col("step_index").cast(pl.Int64),
+        pl.col("hours_relative_to_onset").cast(pl.Float64),
+        pl.col("anchor_age").cast(pl.Float64).alias("age_years"),
+        pl.col("subject_id").cast(pl.Int64),
+    )
+    if inputevents.is_empty() or "patientweight" not in inputevents.columns:
+        weights = pl.DataFrame(schema={"stay_id": pl.Int64, "weight_kg": pl.Float64})
+    else:
+        weights = (
+            inputevents.filter(pl.col("patientweight").is_not_null())
+            .group_by("stay_id")
+            .agg(pl.col("patientweight").median().cast(pl.Float64).alias("weight_kg"))
+            .with_columns(pl.col("stay_id").cast(pl.Int64))
+        )
+    return context.join(weights, on="stay_id", how="left").select(list(STEP_CONTEXT_SCHEMA))
+
+
+__all__ = [
+    "CUMULATIVE_EVENT_TABLES",
+    "bucket_step_events",
+    "build_step_context",
+    "roll_up_step_events",
+]
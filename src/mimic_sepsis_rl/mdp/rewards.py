@@ -18,6 +18,7 @@ Usage (CLI validation)
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial reward contract.
+v1.1.0  2026-10-18  Add the expression-based reward frame; batch rewards are a view over it.
 """
 
 from __future__ import annotations
@@ -28,7 +29,7 @@ import logging
 import math
 import sys
 from pathlib import Path
-from typing import Any, Final
+from typing import Any, Final, Sequence
 
 import polars as pl
 
@@ -48,6 +49,18 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_REWARD_CONFIG: Final[RewardConfig] = RewardConfig()
 
+#: Columns of a reward table, in :func:`rewards_to_dataframe` order.
+REWARD_COLUMNS: Final[tuple[str, ...]] = (
+    "stay_id",
+    "step_index",
+    "terminal",
+    "sofa_shaping",
+    "lactate_shaping",
+    "map_shaping",
+    "total",
+    "is_terminal",
+)
+
 
 # ---------------------------------------------------------------------------
 # Core reward computation
@@ -248,6 +261,9 @@ def compute_rewards_batch(
 ) -> list[StepReward]:
     """Compute rewards for all episodes in a dataset.
 
+    A row view over :func:`compute_reward_frame`; exports should use the
+    frame directly.
+
     Parameters
     ----------
     state_df:
@@ -262,17 +278,170 @@ def compute_rewards_batch(
     list[StepReward]
         All rewards across all episodes, ordered by stay_id then step_index.
     """
-    all_rewards: list[StepReward] = []
+    frame = compute_reward_frame(
+        state_df, config=config, stay_id_col=stay_id_col, **kwargs
+    )
+    return rewards_from_dataframe(frame)
+
+
+# ---------------------------------------------------------------------------
+# Expression-based computation
+# ---------------------------------------------------------------------------
+
+
+def _applies_shaping(variant: RewardVariant) -> tuple[bool, bool]:
+    """Return ``(sofa, lactate_and_map)`` shaping switches for *variant*."""
+    return (
+        variant in (RewardVariant.SOFA_SHAPED, RewardVariant.FULL_SHAPED),
+        variant == RewardVariant.FULL_SHAPED,
+    )
+
+
+def _variant_total(variant: RewardVariant) -> pl.Expr:
+    """Total reward for *variant*, summed in :func:`compute_step_reward` order."""
+    sofa, full = _applies_shaping(variant)
+    zero = pl.lit(0.0)
+    return (
+        pl.col("terminal")
+        + (pl.col("_sofa_shaping") if sofa else zero)
+        + (pl.col("_lactate_shaping") if full else zero)
+        + (pl.col("_map_shaping") if full else zero)
+    )
+
+
+def compute_reward_frame(
+    state_df: pl.DataFrame,
+    *,
+    config: RewardConfig = DEFAULT_REWARD_CONFIG,
+    variants: Sequence[RewardVariant | str] = (),
+    stay_id_col: str = "stay_id",
+    step_col: str = "step_index",
+    sofa_col: str = "sofa_score",
+    lactate_col: str = "lactate",
+    map_col: str = "map",
+    mortality_col: str = "mortality_90d",
+) -> pl.DataFrame:
+    """Compute the reward table for all episodes with Polars expressions.
+
+    Produces exactly ``rewards_to_dataframe(compute_rewards_batch(...))``:
+    previous-step SOFA and lactate come from a lag over ``stay_id``, nulls
+    and NaNs count as missing (so the first step never shapes), and the
+    90-day outcome is read from each episode's first step.
+
+    Parameters
+    ----------
+    state_df:
+        State table with all episodes (see :func:`compute_rewards_batch`).
+    config:
+        Reward configuration; its variant fills the component columns.
+    variants:
+        Extra variants to emit as ``total_<variant>`` columns, computed from
+        the same components and *config* weights in the same pass.
+
+    Returns
+    -------
+    pl.DataFrame
+        :data:`REWARD_COLUMNS` followed by one ``total_<variant>`` column per
+        requested variant, ordered by stay_id then step_index.
+    """
 
-    stay_ids = state_df.get_column(stay_id_col).unique().sort().to_list()
-    for sid in stay_ids:
-        episode = state_df.filter(pl.col(stay_id_col) == sid)
-        ep_rewards = compute_episode_rewards(
-            episode, config=config, stay_id_col=stay_id_col, **kwargs
+    def _value(col: str) -> pl.Expr:
+        # Mirrors _safe_float: null, NaN and non-numeric values are missing.
+        if col not in state_df.columns:
+            return pl.lit(None, dtype=pl.Float64)
+        return pl.col(col).cast(pl.Float64, strict=False).fill_nan(None)
+
+    sofa = pl.col("_sofa")
+    lactate = pl.col("_lactate")
+    map_value = pl.col("_map")
+    sofa_previous = sofa.shift(1).over("stay_id")
+    lactate_previous = lactate.shift(1).over("stay_id")
+    survived = pl.col("_mortality").first().over("stay_id").cast(pl.Int64) == 0
+    is_terminal = pl.col("stay_id").shift(-1).ne_missing(pl.col("stay_id"))
+
+    components = (
+        state_df.lazy()
+        .select(
+            pl.col(stay_id_col).cast(pl.Int64).alias("stay_id"),
+            pl.col(step_col).cast(pl.Int64).alias("step_index"),
+            _value(sofa_col).alias("_sofa"),
+            _value(lactate_col).alias("_lactate"),
+            _value(map_col).alias("_map"),
+            pl.col(mortality_col).alias("_mortality"),
         )
-        all_rewards.extend(ep_rewards)
+        .sort(["stay_id", "step_index"], maintain_order=True)
+        .with_columns(
+            is_terminal.alias("is_terminal"),
+            pl.when(is_terminal & survived.is_not_null())
+            .then(
+                pl.when(survived)
+                .then(pl.lit(config.terminal_reward_survived))
+                .otherwise(pl.lit(config.terminal_reward_died))
+            )
+            .otherwise(0.0)
+            .alias("terminal"),
+            (pl.lit(config.sofa_delta_weight) * (sofa - sofa_previous))
+            .fill_null(0.0)
+            .alias("_sofa_shaping"),
+            pl.when(lactate.is_not_null() & (lactate_previous > 0))
+            .then(
+                pl.lit(config.lactate_clearance_weight)
+                * ((lactate_previous - lactate) / lactate_previous)
+            )
+            .otherwise(0.0)
+            .alias("_lactate_shaping"),
+            pl.when(map_value < config.map_threshold)
+            .then(
+                pl.lit(-config.map_stability_weight)
+                * (pl.lit(config.map_threshold) - map_value)
+            )
+            .otherwise(0.0)
+            .alias("_map_shaping"),
+        )
+    )
 
-    return all_rewards
+    sofa_on, full_on = _applies_shaping(config.variant)
+    extra = [RewardVariant(variant) for variant in variants]
+    return (
+        components.with_columns(
+            (pl.col("_sofa_shaping") if sofa_on else pl.lit(0.0)).alias("sofa_shaping"),
+            (pl.col("_lactate_shaping") if full_on else pl.lit(0.0)).alias("lactate_shaping"),
+            (pl.col("_map_shaping") if full_on else pl.lit(0.0)).alias("map_shaping"),
+            _variant_total(config.variant).alias("total"),
+            *[
+                _variant_total(variant).alias(f"total_{variant.value}")
+                for variant in extra
+            ],
+        )
+        .select([*REWARD_COLUMNS, *[f"total_{variant.value}" for variant in extra]])
+        .collect()
+    )
+
+
+def rewards_from_dataframe(frame: pl.DataFrame) -> list[StepReward]:
+    """Materialise :class:`StepReward` objects from a reward table."""
+    return [
+        StepReward(
+            stay_id=stay_id,
+            step_index=step_index,
+            terminal=terminal,
+            sofa_shaping=sofa_shaping,
+            lactate_shaping=lactate_shaping,
+            map_shaping=map_shaping,
+            total=total,
+            is_terminal=is_terminal,
+        )
+        for (
+            stay_id,
+            step_index,
+            terminal,
+            sofa_shaping,
+            lactate_shaping,
+            map_shaping,
+            total,
+            is_terminal,
+        ) in frame.select(REWARD_COLUMNS).iter_rows()
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -12,7 +12,9 @@ Public surface
 - :mod:`mimic_sepsis_rl.training.cql`     – Discrete CQL reference trainer
 - :mod:`mimic_sepsis_rl.training.bcq`     – Discrete BCQ trainer
 - :mod:`mimic_sepsis_rl.training.iql`     – Discrete IQL trainer
+- :mod:`mimic_sepsis_rl.training.ensemble` – vmap'd multi-seed CQL ensembles
 - :mod:`mimic_sepsis_rl.training.comparison` – Shared comparison artifacts
+- :mod:`mimic_sepsis_rl.training.sweep`   – Parallel grid / ablation sweeps
 """
 
 __all__ = [
@@ -22,5 +24,7 @@ __all__ = [
     "cql",
     "bcq",
     "iql",
+    "ensemble",
     "comparison",
+    "sweep",
 ]
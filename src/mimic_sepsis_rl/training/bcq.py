@@ -19,19 +19,29 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 from mimic_sepsis_rl.training.common import (
+    CompiledStep,
     EventLogger,
     MetricLogger,
     ReplayDataset,
+    ResumePoint,
+    StepMetricAccumulator,
     TransitionBatch,
+    as_state_batch,
+    build_adam,
     build_checkpoint_manager,
+    build_training_state,
+    greedy_action_probabilities,
     load_replay_dataset,
+    load_resume_point,
     set_global_seed,
     should_checkpoint,
+    soft_update_,
 )
 from mimic_sepsis_rl.training.config import (
     TrainingConfig,
@@ -55,6 +65,17 @@ _DEFAULT_IMITATION_THRESHOLD: float = 0.3
 _DEFAULT_BEHAVIOR_CLONING_WEIGHT: float = 1.0
 _DEFAULT_GRAD_CLIP: float = 10.0
 
+# Per-step metrics, buffered on the device and written one record per step
+# every ``log_every_n_steps`` steps.
+_STEP_METRICS: tuple[str, ...] = (
+    "td_loss",
+    "imitation_loss",
+    "total_loss",
+    "mean_q_dataset",
+    "behavior_entropy",
+    "support_rate",
+)
+
 
 class BehaviorPolicy(nn.Module):
     """Behavior-cloning policy head used to constrain BCQ action selection."""
@@ -158,14 +179,11 @@ class BCQPolicy:
     checkpoint_path: Path | None = None
 
     def select_action(self, state: list[float] | torch.Tensor) -> int:
-        if not isinstance(state, torch.Tensor):
-            state_tensor = torch.tensor(state, dtype=torch.float32, device=self.device)
-        else:
-            state_tensor = state.to(self.device)
-
-        if state_tensor.dim() == 1:
-            state_tensor = state_tensor.unsqueeze(0)
+        return int(self.select_actions(state)[0])
 
+    def select_actions(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Return BCQ-filtered greedy actions for an ``[N, state_dim]`` batch."""
+        state_tensor = as_state_batch(states, device=self.device)
         self.q_network.eval()
         self.behavior_policy.eval()
         with torch.no_grad():
@@ -176,7 +194,12 @@ class BCQPolicy:
                 behavior_logits,
                 threshold=self.threshold,
             )
-        return int(actions.item())
+        return actions.cpu().numpy()
+
+    def action_probabilities(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Return the deterministic BCQ policy as one-hot probabilities."""
+        actions = torch.from_numpy(self.select_actions(states))
+        return greedy_action_probabilities(actions, self.n_actions)
 
 
 class BCQTrainer:
@@ -222,13 +245,20 @@ class BCQTrainer:
             hidden_sizes=hidden_sizes,
         ).to(self._device)
 
-        self._critic_optimizer = torch.optim.Adam(
+        self._critic_optimizer = build_adam(
             self._q_network.parameters(),
             lr=self._critic_lr,
+            device=self._device,
         )
-        self._actor_optimizer = torch.optim.Adam(
+        self._actor_optimizer = build_adam(
             self._behavior_policy.parameters(),
             lr=self._actor_lr,
+            device=self._device,
+        )
+        self._compute_losses = CompiledStep(
+            self._losses,
+            enabled=cfg.runtime.compile,
+            device_meta=cfg.device_meta,
         )
 
         self._checkpoint_manager = build_checkpoint_manager(cfg)
@@ -263,17 +293,34 @@ class BCQTrainer:
             return
 
         tau = min(max(self._polyak_tau, 0.0), 1.0)
-        for online_param, target_param in zip(
-            self._q_network.parameters(),
-            self._target_q_network.parameters(),
-        ):
-            target_param.data.mul_(1.0 - tau)
-            target_param.data.add_(tau * online_param.data)
+        soft_update_(self._target_q_network, self._q_network, tau)
 
-    def _training_step(self, batch: TransitionBatch) -> dict[str, float]:
+    def _training_step(self, batch: TransitionBatch) -> dict[str, torch.Tensor]:
         self._q_network.train()
         self._behavior_policy.train()
+        total_loss, step_metrics = self._compute_losses(batch)
+
+        self._critic_optimizer.zero_grad()
+        self._actor_optimizer.zero_grad()
+        total_loss.backward()
+
+        if self._grad_clip > 0:
+            nn.utils.clip_grad_norm_(self._q_network.parameters(), self._grad_clip)
+            nn.utils.clip_grad_norm_(
+                self._behavior_policy.parameters(),
+                self._grad_clip,
+            )
+
+        self._critic_optimizer.step()
+        self._actor_optimizer.step()
 
+        self._global_step += 1
+        self._update_target_network()
+
+        return step_metrics
+
+    def _losses(self, batch: TransitionBatch) -> tuple[torch.Tensor, dict[str, torch.Tensor]]:
+        """Forward passes and losses of one step (the ``torch.compile`` region)."""
         q_values = self._q_network(batch.states)
         chosen_q_values = q_values.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
 
@@ -306,33 +353,29 @@ class BCQTrainer:
         imitation_loss = F.cross_entropy(behavior_logits, batch.actions)
         total_loss = td_loss + self._behavior_cloning_weight * imitation_loss
 
-        self._critic_optimizer.zero_grad()
-        self._actor_optimizer.zero_grad()
-        total_loss.backward()
-
-        if self._grad_clip > 0:
-            nn.utils.clip_grad_norm_(self._q_network.parameters(), self._grad_clip)
-            nn.utils.clip_grad_norm_(
-                self._behavior_policy.parameters(),
-                self._grad_clip,
-            )
-
-        self._critic_optimizer.step()
-        self._actor_optimizer.step()
-
-        self._global_step += 1
-        self._update_target_network()
-
-        return {
-            "td_loss": td_loss.item(),
-            "imitation_loss": imitation_loss.item(),
-            "total_loss": total_loss.item(),
-            "mean_q_dataset": chosen_q_values.mean().item(),
-            "behavior_entropy": behavior_entropy.item(),
-            "support_rate": support_mask.float().mean().item(),
+        return total_loss, {
+            "td_loss": td_loss.detach(),
+            "imitation_loss": imitation_loss.detach(),
+            "total_loss": total_loss.detach(),
+            "mean_q_dataset": chosen_q_values.detach().mean(),
+            "behavior_entropy": behavior_entropy.detach(),
+            "support_rate": support_mask.float().mean(),
         }
 
-    def train(self) -> BCQTrainingResult:
+    def _restore(self, point: ResumePoint) -> None:
+        """Load networks, optimizers, step counter and RNG state from *point*."""
+        model_state = point.payload["model_state_dict"]
+        self._q_network.load_state_dict(model_state["q_network"])
+        self._target_q_network.load_state_dict(model_state["target_q_network"])
+        self._behavior_policy.load_state_dict(model_state["behavior_policy"])
+        optimizer_state = point.payload["optimizer_state_dict"]
+        self._critic_optimizer.load_state_dict(optimizer_state["critic"])
+        self._actor_optimizer.load_state_dict(optimizer_state["actor"])
+        self._global_step = point.global_step
+        point.restore_rng_state()
+
+    def train(self, *, resume: bool = False) -> BCQTrainingResult:
+        """Run the BCQ training loop, optionally resuming the latest checkpoint."""
         cfg = self._cfg
         set_global_seed(cfg.runtime.seed)
         self._start_time = time.time()
@@ -342,10 +385,31 @@ class BCQTrainer:
         final_total_loss = float("nan")
         last_checkpoint: Path | None = None
 
-        td_losses: list[float] = []
-        imitation_losses: list[float] = []
-        total_losses: list[float] = []
+        step_metrics = StepMetricAccumulator(
+            self._metric_logger,
+            _STEP_METRICS,
+            device=self._device,
+        )
         epoch_durations: list[float] = []
+        start_epoch = 1
+
+        point = (
+            load_resume_point(
+                self._checkpoint_manager,
+                self._metric_logger,
+                device=self._device,
+            )
+            if resume
+            else None
+        )
+        if point is not None:
+            self._restore(point)
+            start_epoch = point.epoch + 1
+            epoch_durations = list(point.epoch_durations)
+            final_td_loss = point.epoch_metrics["td_loss_mean"]
+            final_imitation_loss = point.epoch_metrics["imitation_loss_mean"]
+            final_total_loss = point.epoch_metrics["total_loss_mean"]
+            last_checkpoint = point.checkpoint_path
 
         self._training_event_logger.log_event(
             level="INFO",
@@ -360,6 +424,7 @@ class BCQTrainer:
                 "gamma": cfg.gamma,
                 "n_epochs": cfg.n_epochs,
                 "n_actions": self._n_actions,
+                "resumed_from": str(point.checkpoint_path) if point else None,
             },
         )
 
@@ -371,37 +436,27 @@ class BCQTrainer:
             self._imitation_threshold,
         )
 
-        for epoch in range(1, cfg.n_epochs + 1):
+        for epoch in range(start_epoch, cfg.n_epochs + 1):
             epoch_started_at = time.time()
-            td_losses.clear()
-            imitation_losses.clear()
-            total_losses.clear()
 
             for batch in self._dataset.iter_batches(
                 cfg.batch_size,
                 shuffle=True,
                 epoch=epoch,
             ):
-                step_metrics = self._training_step(batch)
-                td_losses.append(step_metrics["td_loss"])
-                imitation_losses.append(step_metrics["imitation_loss"])
-                total_losses.append(step_metrics["total_loss"])
-
-                for name, value in step_metrics.items():
-                    self._metric_logger.log_scalar(
-                        name,
-                        value,
-                        step=self._global_step,
-                        epoch=epoch,
-                    )
+                step_metrics.update(
+                    self._training_step(batch),
+                    step=self._global_step,
+                    epoch=epoch,
+                )
 
             epoch_duration = time.time() - epoch_started_at
             epoch_durations.append(epoch_duration)
+            means = step_metrics.end_epoch(step=self._global_step, epoch=epoch)
             epoch_metrics = {
-                "td_loss_mean": sum(td_losses) / max(len(td_losses), 1),
-                "imitation_loss_mean": sum(imitation_losses)
-                / max(len(imitation_losses), 1),
-                "total_loss_mean": sum(total_losses) / max(len(total_losses), 1),
+                "td_loss_mean": means["td_loss"],
+                "imitation_loss_mean": means["imitation_loss"],
+                "total_loss_mean": means["total_loss"],
             }
             self._metric_logger.log_epoch_summary(
                 epoch,
@@ -456,6 +511,11 @@ class BCQTrainer:
                         "critic": self._critic_optimizer.state_dict(),
                         "actor": self._actor_optimizer.state_dict(),
                     },
+                    training_state=build_training_state(
+                        self._metric_logger,
+                        epoch_metrics=epoch_metrics,
+                        epoch_durations=epoch_durations,
+                    ),
                 )
                 self._training_event_logger.log_event(
                     level="INFO",
@@ -472,6 +532,8 @@ class BCQTrainer:
             final_imitation_loss = epoch_metrics["imitation_loss_mean"]
             final_total_loss = epoch_metrics["total_loss_mean"]
 
+        # Barrier for background checkpoint writes: last_checkpoint is durable below.
+        self._checkpoint_manager.close()
         elapsed_seconds = time.time() - self._start_time
         logger.info(
             "BCQ training complete: %d epochs, %d steps, %.1fs elapsed.",
@@ -716,6 +778,11 @@ def main(argv: list[str] | None = None) -> None:
         default=25,
         help="Number of discrete actions (default: 25).",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the latest checkpoint in checkpoint_dir.",
+    )
     args = parser.parse_args(argv)
 
     config_path = Path(args.config)
@@ -741,7 +808,7 @@ def main(argv: list[str] | None = None) -> None:
 
     dataset = load_replay_dataset(cfg)
     trainer = BCQTrainer(cfg, dataset, n_actions=args.n_actions)
-    result = trainer.train()
+    result = trainer.train(resume=args.resume)
     print(json.dumps(result.to_dict(), indent=2))
     sys.exit(0)
 
@@ -7,9 +7,19 @@ Algorithm code should never re-implement these helpers independently.
 
 Responsibilities
 ----------------
-- Load replay-buffer Parquet files into in-memory tensor batches.
-- Persist and restore model checkpoints with provenance manifests.
-- Accumulate and flush scalar training metrics to JSON log files.
+- Load replay-buffer Parquet files into in-memory tensor batches, mapping
+  the memory-mapped replay cache without copying when it is present.
+- Sample mini-batches either fully on the training device or from pinned
+  host memory with background prefetch.
+- Persist and restore model checkpoints with provenance manifests, plus the
+  RNG and metric-log state a trainer needs to resume an interrupted run,
+  optionally on a background writer thread.
+- Accumulate and flush scalar training metrics to JSON log files, buffering
+  per-step values on the device between logging steps.
+- Provide the optimiser fast path shared by all trainers: fused Adam,
+  foreach Polyak updates and optionally ``torch.compile``'d losses.
+- Provide the state-batch helpers behind the policies' batched
+  ``select_actions`` / ``action_probabilities`` inference surface.
 - Provide a reproducibility seed-setter that covers Python, NumPy, and
   PyTorch (CPU + CUDA/MPS where supported).
 
@@ -25,6 +35,19 @@ Usage
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial shared training utilities.
+v1.1.0  2026-10-18  ReplayDataset maps the replay cache zero-copy before falling back to Parquet.
+v1.2.0  2026-10-18  Device-resident and pinned-prefetch batch samplers behind ReplayDataset.
+v1.3.0  2026-10-18  StepMetricAccumulator keeps step metrics on the device between log steps.
+v1.4.0  2026-10-18  Fused Adam, foreach Polyak updates and optional torch.compile'd losses.
+v1.5.0  2026-10-18  ReplayDataset.iter_member_batches for multi-seed ensembles.
+v1.6.0  2026-10-18  Resumable checkpoints: RNG / metric-log state and atomic checkpoint writes.
+v1.7.0  2026-10-18  Optional background checkpoint writer with CPU snapshots and flush()/close().
+v1.8.0  2026-10-18  as_state_batch / greedy_action_probabilities for batched policy inference.
+v1.9.0  2026-10-18  ReplayDataset.path / full_batch() for whole-table consumers such as FQE.
+v1.10.0 2026-10-18  StepMetricAccumulator logs every buffered step instead of window means.
+v1.11.0 2026-10-18  All sampler modes draw epoch shuffles from one host generator.
+v1.12.0 2026-10-18  StepMetricAccumulator takes one logger per ensemble member (leading member dim).
+v1.13.0 2026-10-18  Add clip_grad_norm_per_member_ for stacked (vmap'd) parameters.
 """
 
 from __future__ import annotations
@@ -32,22 +55,32 @@ from __future__ import annotations
 import json
 import logging
 import math
+import os
+import queue
 import random
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Sequence
 from zoneinfo import ZoneInfo
 
 import polars as pl
 import torch
 
-from mimic_sepsis_rl.training.config import TrainingConfig
+from mimic_sepsis_rl.datasets.replay_cache import open_replay_cache
+from mimic_sepsis_rl.training.config import SAMPLER_MODES, TrainingConfig
+from mimic_sepsis_rl.training.device import DeviceMetadata
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
-COMMON_MODULE_VERSION: str = "1.0.0"
+COMMON_MODULE_VERSION: str = "1.13.0"
 LOG_TIMEZONE_NAME: str = "Europe/Istanbul"
 
 # ---------------------------------------------------------------------------
@@ -88,6 +121,51 @@ def set_global_seed(seed: int) -> None:
     logger.debug("Global seed set to %d.", seed)
 
 
+def capture_rng_state() -> dict[str, Any]:
+    """Snapshot the Python, NumPy and PyTorch RNG states.
+
+    The snapshot only holds tensors and plain Python values, so it can be
+    stored in a checkpoint and read back with ``weights_only=True``.
+    """
+    state: dict[str, Any] = {
+        "python": random.getstate(),
+        "torch": torch.get_rng_state(),
+    }
+    try:
+        import numpy as np
+
+        name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+        keys_tensor = torch.from_numpy(keys.astype(np.int64))
+        state["numpy"] = (name, keys_tensor, pos, has_gauss, cached_gaussian)
+    except ImportError:
+        pass
+
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: Mapping[str, Any]) -> None:
+    """Restore RNG states captured by :func:`capture_rng_state`."""
+    version, internal, gauss = state["python"]
+    random.setstate((version, tuple(internal), gauss))
+    torch.set_rng_state(state["torch"].cpu())
+
+    if "numpy" in state:
+        try:
+            import numpy as np
+
+            name, keys, pos, has_gauss, cached_gaussian = state["numpy"]
+            np.random.set_state(
+                (name, keys.cpu().numpy().astype(np.uint32), pos, has_gauss, cached_gaussian)
+            )
+        except ImportError:
+            pass
+
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all([s.cpu() for s in state["cuda"]])
+
+
 # ---------------------------------------------------------------------------
 # Replay dataset
 # ---------------------------------------------------------------------------
@@ -137,12 +215,231 @@ class TransitionBatch:
         return self
 
 
+# ---------------------------------------------------------------------------
+# Batch samplers
+# ---------------------------------------------------------------------------
+
+# Share of free CUDA memory the ``"auto"`` sampler lets the dataset occupy.
+_DEVICE_RESIDENT_FRACTION: float = 0.5
+
+
+def _epoch_order(n: int, seed: int, epoch: int, device: torch.device) -> torch.Tensor:
+    """Shuffle for one epoch, drawn on the host and moved to *device*.
+
+    Every sampler mode draws from the same CPU generator seeded with
+    ``seed + epoch``, so the batch order does not depend on which sampler
+    ``"auto"`` picked.
+    """
+    generator = torch.Generator()
+    generator.manual_seed(seed + epoch)
+    return torch.randperm(n, generator=generator).to(device)
+
+
+def _member_orders(
+    n: int, seeds: Sequence[int], epoch: int, device: torch.device
+) -> torch.Tensor:
+    """``(K, n)`` permutations; row *k* is the shuffle a ``seeds[k]`` run draws."""
+    return torch.stack([_epoch_order(n, seed, epoch, device) for seed in seeds])
+
+
+class DeviceResidentSampler:
+    """Batch sampler that keeps the whole dataset on the target device.
+
+    The transition tensors are moved once; each epoch's permutation is drawn
+    from a host generator seeded with ``seed + epoch`` (one small index
+    copy) and batches are gathered on the device, so training never waits
+    on per-batch host transfers. On CPU this is the plain in-memory sampler
+    and copies nothing.
+    """
+
+    mode: str = "device"
+
+    def __init__(
+        self,
+        tensors: Sequence[torch.Tensor],
+        *,
+        device: torch.device,
+        seed: int,
+    ) -> None:
+        self._device = device
+        self._seed = seed
+        self._tensors = tuple(t.to(device) for t in tensors)
+
+    def _gather(self, idx: torch.Tensor) -> TransitionBatch:
+        return TransitionBatch(*(t[idx] for t in self._tensors))
+
+    def iter_batches(
+        self, batch_size: int, *, shuffle: bool, epoch: int
+    ) -> Iterator[TransitionBatch]:
+        n = self._tensors[0].shape[0]
+        if shuffle:
+            order = _epoch_order(n, self._seed, epoch, self._device)
+        else:
+            order = torch.arange(n, device=self._device)
+        for start in range(0, n, batch_size):
+            yield self._gather(order[start : start + batch_size])
+
+    def iter_member_batches(
+        self, batch_size: int, *, seeds: Sequence[int], epoch: int
+    ) -> Iterator[TransitionBatch]:
+        orders = _member_orders(self._tensors[0].shape[0], seeds, epoch, self._device)
+        for start in range(0, orders.shape[1], batch_size):
+            yield self._gather(orders[:, start : start + batch_size])
+
+    def sample_batch(self, batch_size: int) -> TransitionBatch:
+        n = self._tensors[0].shape[0]
+        return self._gather(torch.randint(0, n, (batch_size,), device=self._device))
+
+
+class PinnedPrefetchSampler:
+    """Batch sampler that streams batches from (pinned) host memory.
+
+    For datasets too large for device memory. Batches are gathered on the
+    host by ``num_workers`` threads, ahead of the consumer, into page-locked
+    buffers when the target is CUDA. Each batch is copied with
+    ``non_blocking=True`` on a side stream before the previous batch is
+    handed out, so the copy overlaps the previous training step. Shuffles
+    use the same host generator (``seed + epoch``) as before.
+    """
+
+    mode: str = "pinned"
+
+    def __init__(
+        self,
+        tensors: Sequence[torch.Tensor],
+        *,
+        device: torch.device,
+        seed: int,
+        num_workers: int = 0,
+    ) -> None:
+        self._device = device
+        self._seed = seed
+        self._num_workers = max(int(num_workers), 0)
+        self._depth = max(2, self._num_workers)
+        self._pin = device.type == "cuda"
+        self._tensors = tuple(t.pin_memory() if self._pin else t for t in tensors)
+
+    def _gather_host(self, idx: torch.Tensor) -> tuple[torch.Tensor, ...]:
+        flat = idx.reshape(-1)
+        host = []
+        for t in self._tensors:
+            buffer = torch.empty(
+                (flat.shape[0], *t.shape[1:]), dtype=t.dtype, pin_memory=self._pin
+            )
+            torch.index_select(t, 0, flat, out=buffer)
+            host.append(buffer.view(*idx.shape, *t.shape[1:]))
+        return tuple(host)
+
+    def _host_batches(
+        self, chunks: Iterator[torch.Tensor]
+    ) -> Iterator[tuple[torch.Tensor, ...]]:
+        if self._num_workers == 0:
+            for idx in chunks:
+                yield self._gather_host(idx)
+            return
+        with ThreadPoolExecutor(
+            max_workers=self._num_workers, thread_name_prefix="replay-prefetch"
+        ) as pool:
+            pending: deque[Future[tuple[torch.Tensor, ...]]] = deque()
+            try:
+                for idx in chunks:
+                    pending.append(pool.submit(self._gather_host, idx))
+                    if len(pending) >= self._depth:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_batches(
+        self, batch_size: int, *, shuffle: bool, epoch: int
+    ) -> Iterator[TransitionBatch]:
+        n = self._tensors[0].shape[0]
+        if shuffle:
+            order = _epoch_order(n, self._seed, epoch, torch.device("cpu"))
+        else:
+            order = torch.arange(n)
+        chunks = (order[start : start + batch_size] for start in range(0, n, batch_size))
+        return self._stream(chunks)
+
+    def iter_member_batches(
+        self, batch_size: int, *, seeds: Sequence[int], epoch: int
+    ) -> Iterator[TransitionBatch]:
+        n = self._tensors[0].shape[0]
+        orders = _member_orders(n, seeds, epoch, torch.device("cpu"))
+        chunks = (orders[:, start : start + batch_size] for start in range(0, n, batch_size))
+        return self._stream(chunks)
+
+    def _stream(self, chunks: Iterator[torch.Tensor]) -> Iterator[TransitionBatch]:
+        copy_stream = torch.cuda.Stream(self._device) if self._device.type == "cuda" else None
+        pending: tuple[TransitionBatch, Any] | None = None
+        for host in self._host_batches(chunks):
+            issued = self._transfer(host, copy_stream)
+            if pending is not None:
+                yield self._ready(*pending)
+            pending = issued
+        if pending is not None:
+            yield self._ready(*pending)
+
+    def _transfer(
+        self, host: tuple[torch.Tensor, ...], copy_stream: Any
+    ) -> tuple[TransitionBatch, Any]:
+        if copy_stream is None:
+            return TransitionBatch(*(t.to(self._device) for t in host)), None
+        with torch.cuda.stream(copy_stream):
+            batch = TransitionBatch(
+                *(t.to(self._device, non_blocking=True) for t in host)
+            )
+            copied = torch.cuda.Event()
+            copied.record(copy_stream)
+        return batch, copied
+
+    def _ready(self, batch: TransitionBatch, copied: Any) -> TransitionBatch:
+        if copied is not None:
+            # Wait only for this batch's copy, not the one issued after it.
+            current = torch.cuda.current_stream(self._device)
+            current.wait_event(copied)
+            for t in (batch.states, batch.actions, batch.rewards, batch.next_states, batch.dones):
+                t.record_stream(current)
+        return batch
+
+    def sample_batch(self, batch_size: int) -> TransitionBatch:
+        n = self._tensors[0].shape[0]
+        host = self._gather_host(torch.randint(0, n, (batch_size,)))
+        return TransitionBatch(*(t.to(self._device, non_blocking=self._pin) for t in host))
+
+
+def resolve_sampler_mode(mode: str, *, device: torch.device, nbytes: int) -> str:
+    """Resolve ``"auto"`` to a concrete sampler mode for *device*.
+
+    CUDA keeps the dataset resident when it fits in half of the free device
+    memory and streams pinned batches otherwise; CPU and MPS (unified
+    memory) always use the device-resident sampler.
+    """
+    if mode not in SAMPLER_MODES:
+        raise ValueError(f"Unknown sampler mode {mode!r}; expected one of {SAMPLER_MODES}.")
+    if mode != "auto":
+        return mode
+    if device.type == "cuda":
+        free_bytes, _ = torch.cuda.mem_get_info(device)
+        if nbytes > free_bytes * _DEVICE_RESIDENT_FRACTION:
+            return "pinned"
+    return "device"
+
+
 class ReplayDataset:
     """In-memory replay dataset loaded from a Parquet transition file.
 
     Wraps the flat transition table exported by Phase 6 into shuffled
     mini-batch iterators compatible with all algorithm trainers.
 
+    When the export has an up-to-date memory-mapped replay cache (written
+    by :func:`~mimic_sepsis_rl.datasets.replay_cache.write_replay_cache`)
+    whose state columns match, the tensors are zero-copy views of the
+    mapped arrays and every process on the host shares one page cache.
+    Otherwise the Parquet file is decoded as before.
+
     Parameters
     ----------
     parquet_path:
@@ -155,6 +452,11 @@ class ReplayDataset:
         loader auto-detects columns with the ``s_`` prefix.
     seed:
         Shuffle seed; passed to the sampler on each epoch.
+    sampler:
+        Batch sampler mode (see :data:`SAMPLER_MODES`): ``"device"``,
+        ``"pinned"`` or ``"auto"``.
+    num_workers:
+        Host prefetch threads used by the ``"pinned"`` sampler.
     """
 
     def __init__(
@@ -164,11 +466,51 @@ class ReplayDataset:
         device: torch.device,
         state_columns: list[str] | None = None,
         seed: int = 42,
+        sampler: str = "auto",
+        num_workers: int = 0,
     ) -> None:
         self._path = parquet_path
         self._device = device
         self._seed = seed
 
+        cache = open_replay_cache(parquet_path)
+        if cache is not None and (
+            state_columns is None or tuple(state_columns) == cache.state_columns
+        ):
+            logger.info("Mapping replay cache %s …", cache.path)
+            self._state_columns = list(cache.state_columns)
+            self._states = torch.from_numpy(cache.states)
+            self._next_states = torch.from_numpy(cache.next_states)
+            self._actions = torch.from_numpy(cache.actions)
+            self._rewards = torch.from_numpy(cache.rewards)
+            self._dones = torch.from_numpy(cache.dones)
+            self._memory_mapped = True
+        else:
+            self._load_parquet(parquet_path, state_columns)
+            self._memory_mapped = False
+
+        logger.info(
+            "Loaded %d transitions | state_dim=%d | actions=[0,%d)",
+            self.n_transitions,
+            len(self._state_columns),
+            int(self._actions.max().item()) + 1,
+        )
+
+        tensors = (self._states, self._actions, self._rewards, self._next_states, self._dones)
+        mode = resolve_sampler_mode(
+            sampler, device=device, nbytes=sum(t.nbytes for t in tensors)
+        )
+        if mode == "device":
+            self._sampler: DeviceResidentSampler | PinnedPrefetchSampler = (
+                DeviceResidentSampler(tensors, device=device, seed=seed)
+            )
+        else:
+            self._sampler = PinnedPrefetchSampler(
+                tensors, device=device, seed=seed, num_workers=num_workers
+            )
+        logger.info("Replay batch sampler: %s (num_workers=%d)", mode, num_workers)
+
+    def _load_parquet(self, parquet_path: Path, state_columns: list[str] | None) -> None:
         logger.info("Loading replay dataset from %s …", parquet_path)
         df = pl.read_parquet(parquet_path)
 
@@ -206,17 +548,25 @@ class ReplayDataset:
         self._rewards = torch.tensor(rewards_np, dtype=torch.float32)
         self._dones = torch.tensor(dones_np, dtype=torch.float32)
 
-        logger.info(
-            "Loaded %d transitions | state_dim=%d | actions=[0,%d)",
-            len(df),
-            len(state_columns),
-            int(self._actions.max().item()) + 1,
-        )
+    @property
+    def path(self) -> Path:
+        """Replay Parquet file the dataset was loaded from."""
+        return self._path
 
     @property
     def n_transitions(self) -> int:
         return self._states.shape[0]
 
+    @property
+    def sampler_mode(self) -> str:
+        """Resolved batch sampler mode (``"device"`` or ``"pinned"``)."""
+        return self._sampler.mode
+
+    @property
+    def memory_mapped(self) -> bool:
+        """``True`` when the tensors are views of the replay cache."""
+        return self._memory_mapped
+
     @property
     def state_dim(self) -> int:
         return self._states.shape[1]
@@ -252,24 +602,37 @@ class ReplayDataset:
         TransitionBatch
             Tensors already moved to ``self._device``.
         """
-        n = self.n_transitions
-        indices = torch.arange(n)
+        return self._sampler.iter_batches(batch_size, shuffle=shuffle, epoch=epoch)
 
-        if shuffle:
-            g = torch.Generator()
-            g.manual_seed(self._seed + epoch)
-            indices = indices[torch.randperm(n, generator=g)]
+    def iter_member_batches(
+        self,
+        batch_size: int,
+        *,
+        seeds: Sequence[int],
+        epoch: int = 0,
+    ) -> Iterator[TransitionBatch]:
+        """Yield stacked mini-batches for an ensemble of seeded runs.
 
-        for start in range(0, n, batch_size):
-            idx = indices[start : start + batch_size]
-            batch = TransitionBatch(
-                states=self._states[idx].to(self._device),
-                actions=self._actions[idx].to(self._device),
-                rewards=self._rewards[idx].to(self._device),
-                next_states=self._next_states[idx].to(self._device),
-                dones=self._dones[idx].to(self._device),
-            )
-            yield batch
+        Every tensor gains a leading member dimension ``K = len(seeds)``:
+        row *k* holds exactly the batch that ``iter_batches`` of a dataset
+        seeded with ``seeds[k]`` would yield, so *K* independent runs share
+        one copy of the data.
+        """
+        return self._sampler.iter_member_batches(batch_size, seeds=seeds, epoch=epoch)
+
+    def full_batch(self) -> TransitionBatch:
+        """Return every transition as one host-side batch.
+
+        The tensors are the dataset's own (views of the replay cache when it
+        is mapped); callers must not modify them in place.
+        """
+        return TransitionBatch(
+            states=self._states,
+            actions=self._actions,
+            rewards=self._rewards,
+            next_states=self._next_states,
+            dones=self._dones,
+        )
 
     def sample_batch(self, batch_size: int) -> TransitionBatch:
         """Sample a random mini-batch (with replacement).
@@ -277,14 +640,7 @@ class ReplayDataset:
         Useful for off-policy algorithms that maintain their own replay
         sampling logic rather than epoch-based iteration.
         """
-        idx = torch.randint(0, self.n_transitions, (batch_size,))
-        return TransitionBatch(
-            states=self._states[idx].to(self._device),
-            actions=self._actions[idx].to(self._device),
-            rewards=self._rewards[idx].to(self._device),
-            next_states=self._next_states[idx].to(self._device),
-            dones=self._dones[idx].to(self._device),
-        )
+        return self._sampler.sample_batch(batch_size)
 
 
 def load_replay_dataset(cfg: TrainingConfig) -> ReplayDataset:
@@ -309,6 +665,8 @@ def load_replay_dataset(cfg: TrainingConfig) -> ReplayDataset:
         cfg.dataset_path,
         device=cfg.device,
         seed=cfg.runtime.seed,
+        sampler=cfg.runtime.sampler,
+        num_workers=cfg.runtime.num_workers,
     )
 
 
@@ -370,6 +728,19 @@ class CheckpointManifest:
         )
 
 
+def _snapshot_to_cpu(obj: Any) -> Any:
+    """Deep-copy the tensors in a checkpoint payload to CPU."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: _snapshot_to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_snapshot_to_cpu(value) for value in obj]
+    if isinstance(obj, tuple):
+        return tuple(_snapshot_to_cpu(value) for value in obj)
+    return obj
+
+
 class CheckpointManager:
     """Save and restore model checkpoints with provenance manifests.
 
@@ -381,6 +752,12 @@ class CheckpointManager:
         Algorithm name, used as a filename prefix.
     keep_last_n:
         Number of most-recent checkpoints to retain (0 = keep all).
+    async_write:
+        Write checkpoints and prune old ones on a background thread.
+        :meth:`save` snapshots the state to CPU and returns immediately;
+        call :meth:`flush` or :meth:`close` before relying on the files.
+    max_pending:
+        Snapshots that may wait for the writer before :meth:`save` blocks.
     """
 
     def __init__(
@@ -389,12 +766,25 @@ class CheckpointManager:
         *,
         algorithm: str,
         keep_last_n: int = 3,
+        async_write: bool = False,
+        max_pending: int = 2,
     ) -> None:
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be >= 1, got {max_pending}.")
         self._dir = checkpoint_dir
         self._dir.mkdir(parents=True, exist_ok=True)
         self._algorithm = algorithm
         self._keep_last_n = keep_last_n
         self._saved: list[Path] = []
+        self._async_write = async_write
+        self._max_pending = max_pending
+        self._queue: queue.Queue | None = None
+        self._writer: threading.Thread | None = None
+        self._writer_error: BaseException | None = None
+
+    @property
+    def async_write(self) -> bool:
+        return self._async_write
 
     def save(
         self,
@@ -405,6 +795,7 @@ class CheckpointManager:
         metrics: dict[str, float],
         cfg: TrainingConfig,
         optimizer_state_dict: dict[str, Any] | None = None,
+        training_state: dict[str, Any] | None = None,
     ) -> Path:
         """Persist a model checkpoint and its manifest.
 
@@ -422,11 +813,21 @@ class CheckpointManager:
             Training config (serialised into the manifest).
         optimizer_state_dict:
             Optional optimizer state for training resumption.
+        training_state:
+            Optional resume state from :func:`build_training_state`.
 
         Returns
         -------
         Path
             Path to the saved ``.pt`` checkpoint file.
+
+        Notes
+        -----
+        Both files are written to a temporary name and renamed into place,
+        manifest first, so a crash mid-write never leaves a truncated
+        checkpoint for :meth:`latest_checkpoint` to pick up. With
+        ``async_write`` the returned path is final but only durable after
+        :meth:`flush`.
         """
         stem = f"{self._algorithm}_epoch{epoch:04d}_step{global_step:07d}"
         ckpt_path = self._dir / f"{stem}.pt"
@@ -439,8 +840,8 @@ class CheckpointManager:
         }
         if optimizer_state_dict is not None:
             payload["optimizer_state_dict"] = optimizer_state_dict
-
-        torch.save(payload, ckpt_path)
+        if training_state is not None:
+            payload["training_state"] = training_state
 
         manifest = CheckpointManifest(
             algorithm=self._algorithm,
@@ -450,13 +851,93 @@ class CheckpointManager:
             config_dict=cfg.to_dict(),
             device_meta=cfg.device_meta.to_dict(),
         )
-        manifest_path.write_text(manifest.to_json())
+        if not self._async_write:
+            self._write(ckpt_path, manifest_path, payload, manifest.to_json())
+            return ckpt_path
+
+        self._raise_writer_error()
+        self._start_writer()
+        # Training keeps mutating the live tensors, so hand the writer a copy.
+        job = (ckpt_path, manifest_path, _snapshot_to_cpu(payload), manifest.to_json())
+        self._queue.put(job)
+        logger.debug("Checkpoint queued: %s", ckpt_path)
+        return ckpt_path
+
+    def _write(
+        self,
+        ckpt_path: Path,
+        manifest_path: Path,
+        payload: dict[str, Any],
+        manifest_json: str,
+    ) -> None:
+        """Write manifest and checkpoint atomically, then prune old ones."""
+        tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+        tmp_manifest.write_text(manifest_json)
+        os.replace(tmp_manifest, manifest_path)
+
+        tmp_ckpt = ckpt_path.with_name(ckpt_path.name + ".tmp")
+        torch.save(payload, tmp_ckpt)
+        os.replace(tmp_ckpt, ckpt_path)
 
         logger.info("Checkpoint saved: %s", ckpt_path)
         self._saved.append(ckpt_path)
         self._prune()
 
-        return ckpt_path
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+        self._queue = queue.Queue(maxsize=self._max_pending)
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name=f"{self._algorithm}-checkpoint-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def _writer_loop(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except BaseException as exc:  # surfaced by flush() / the next save()
+                logger.error("Background checkpoint write failed: %s", exc)
+                if self._writer_error is None:
+                    self._writer_error = exc
+            finally:
+                self._queue.task_done()
+
+    def _raise_writer_error(self) -> None:
+        error, self._writer_error = self._writer_error, None
+        if error is not None:
+            raise error
+
+    def flush(self) -> None:
+        """Block until every queued checkpoint is written and pruned.
+
+        Re-raises the first error the background writer hit. A no-op for
+        synchronous managers.
+        """
+        if self._queue is not None:
+            self._queue.join()
+        self._raise_writer_error()
+
+    def close(self) -> None:
+        """Flush pending checkpoints and stop the writer thread.
+
+        Trainers call this at run end so the returned checkpoint path is
+        durable. The manager stays usable; a later :meth:`save` restarts the
+        writer.
+        """
+        if self._writer is not None:
+            assert self._queue is not None
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._queue = None
+        self._raise_writer_error()
 
     def _prune(self) -> None:
         """Remove oldest checkpoints beyond keep_last_n."""
@@ -471,8 +952,23 @@ class CheckpointManager:
             if old_manifest.exists():
                 old_manifest.unlink()
 
+    def track_existing(self) -> None:
+        """Adopt checkpoints already on disk into the ``keep_last_n`` window.
+
+        Called when resuming, so checkpoints written before the restart are
+        pruned like the ones this manager saves itself.
+        """
+        self.flush()
+        existing = sorted(self._dir.glob(f"{self._algorithm}_epoch*.pt"))
+        self._saved = existing + [p for p in self._saved if p not in existing]
+        self._prune()
+
     def latest_checkpoint(self) -> Path | None:
-        """Return the path to the most-recently saved checkpoint, or None."""
+        """Return the path to the most-recently saved checkpoint, or None.
+
+        Waits for pending background writes first.
+        """
+        self.flush()
         candidates = sorted(self._dir.glob(f"{self._algorithm}_epoch*.pt"))
         return candidates[-1] if candidates else None
 
@@ -573,6 +1069,10 @@ class MetricLogger:
         self._buffer: list[ScalarMetric] = []
         self._step_accum: dict[str, list[float]] = {}
 
+    @property
+    def log_every_n_steps(self) -> int:
+        return self._log_every_n
+
     def log_scalar(
         self,
         name: str,
@@ -630,6 +1130,38 @@ class MetricLogger:
         )
         self._buffer.clear()
 
+    @property
+    def log_path(self) -> Path:
+        return self._log_path
+
+    def position(self) -> int:
+        """Flush, then return the byte length of the metrics log."""
+        self.flush()
+        return self._log_path.stat().st_size if self._log_path.exists() else 0
+
+    def truncate(self, position: int) -> None:
+        """Drop buffered records and cut the log back to *position* bytes.
+
+        Used on resume to discard records written after the checkpoint the
+        run restarts from, so the log matches an uninterrupted run.
+        """
+        self._buffer.clear()
+        self._step_accum.clear()
+        if not self._log_path.exists():
+            if position > 0:
+                raise ValueError(
+                    f"Metrics log {self._log_path} is missing; expected {position} bytes."
+                )
+            return
+        size = self._log_path.stat().st_size
+        if size < position:
+            raise ValueError(
+                f"Metrics log {self._log_path} has {size} bytes; the checkpoint "
+                f"expects at least {position}."
+            )
+        with self._log_path.open("r+b") as fh:
+            fh.truncate(position)
+
     def epoch_mean(self, name: str) -> float | None:
         """Return the mean of accumulated values for *name*, then reset."""
         vals = self._step_accum.pop(name, None)
@@ -651,6 +1183,121 @@ class MetricLogger:
         )
 
 
+class StepMetricAccumulator:
+    """Buffer per-step training metrics on the training device.
+
+    Trainers hand over their step metrics as 0-d tensors; each step's values
+    are copied into a ``[log_every_n_steps, n_metrics]`` device buffer, so a
+    step never waits for a device sync. The buffer is moved to the host only
+    every ``log_every_n_steps`` steps and at epoch end, and then every
+    buffered step is written through the :class:`MetricLogger` with its own
+    step number. The metrics log therefore holds the same one-record-per-step
+    content as logging each step directly. Epoch sums are kept on the device
+    alongside the buffer and returned as epoch means.
+
+    Given one logger per ensemble member instead, step metrics are ``(K,)``
+    tensors, the buffer gains a leading ``n_members`` dimension and member
+    ``k``'s values go to ``metric_logger[k]``.
+
+    Parameters
+    ----------
+    metric_logger:
+        Logger receiving the step values, or a sequence of one logger per
+        ensemble member; the (first) logger's ``log_every_n_steps`` sets the
+        buffer size and transfer cadence.
+    names:
+        Metric names accumulated every step.
+    device:
+        Device the step metrics live on.
+    log_names:
+        Subset of *names* written to the log, in that order (default: all);
+        the others only feed the epoch means.
+    """
+
+    def __init__(
+        self,
+        metric_logger: "MetricLogger | Sequence[MetricLogger]",
+        names: Sequence[str],
+        *,
+        device: torch.device,
+        log_names: Sequence[str] | None = None,
+    ) -> None:
+        self._per_member = not isinstance(metric_logger, MetricLogger)
+        self._metric_loggers: tuple[MetricLogger, ...] = (
+            tuple(metric_logger) if self._per_member else (metric_logger,)
+        )
+        if not self._metric_loggers:
+            raise ValueError("StepMetricAccumulator needs at least one metric logger.")
+        self._names = tuple(names)
+        log_names = self._names if log_names is None else tuple(log_names)
+        unknown = set(log_names) - set(self._names)
+        if unknown:
+            raise ValueError(f"log_names {sorted(unknown)} are not accumulated metrics.")
+        self._log_positions = [(name, self._names.index(name)) for name in log_names]
+        self._log_every_n = max(self._metric_loggers[0].log_every_n_steps, 1)
+        members = (len(self._metric_loggers),) if self._per_member else ()
+        # MPS has no float64; elsewhere keep float64 like the Python floats did.
+        dtype = torch.float32 if device.type == "mps" else torch.float64
+        self._window = torch.zeros(
+            (*members, self._log_every_n, len(self._names)), dtype=dtype, device=device
+        )
+        self._epoch_sums = torch.zeros((*members, len(self._names)), dtype=dtype, device=device)
+        self._window_steps: list[int] = []
+        self._epoch_steps = 0
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return self._names
+
+    def update(
+        self,
+        metrics: Mapping[str, torch.Tensor],
+        *,
+        step: int,
+        epoch: int,
+    ) -> None:
+        """Buffer one step's metrics; write the buffer on cadence steps."""
+        if len(self._window_steps) == self._log_every_n:
+            self._log_window(epoch=epoch)
+        values = torch.stack(
+            [metrics[name].detach().to(self._window.dtype) for name in self._names], dim=-1
+        )
+        self._window[..., len(self._window_steps), :].copy_(values)
+        self._epoch_sums.add_(values)
+        self._window_steps.append(step)
+        self._epoch_steps += 1
+        if step > 0 and step % self._log_every_n == 0:
+            self._log_window(epoch=epoch)
+
+    def _log_window(self, *, epoch: int) -> None:
+        if not self._window_steps:
+            return
+        rows = self._window[..., : len(self._window_steps), :].tolist()
+        for metric_logger, member_rows in zip(
+            self._metric_loggers, rows if self._per_member else [rows]
+        ):
+            for step, row in zip(self._window_steps, member_rows):
+                for name, position in self._log_positions:
+                    metric_logger.log_scalar(name, row[position], step=step, epoch=epoch)
+        self._window_steps.clear()
+
+    def end_epoch(
+        self, *, step: int, epoch: int
+    ) -> dict[str, float] | list[dict[str, float]]:
+        """Write the buffered steps and return (then reset) the epoch means.
+
+        Means are ``0.0`` for an epoch without steps. With one logger per
+        member, returns one dict of means per member.
+        """
+        self._log_window(epoch=epoch)
+        means = (self._epoch_sums / max(self._epoch_steps, 1)).tolist()
+        self._epoch_sums.zero_()
+        self._epoch_steps = 0
+        if self._per_member:
+            return [dict(zip(self._names, member)) for member in means]
+        return dict(zip(self._names, means))
+
+
 def _timestamped_now() -> str:
     """Return an ISO 8601 timestamp in the project default timezone."""
     return datetime.now(ZoneInfo(LOG_TIMEZONE_NAME)).isoformat(timespec="seconds")
@@ -724,6 +1371,98 @@ def build_checkpoint_manager(cfg: TrainingConfig) -> CheckpointManager:
         cfg.checkpoint.checkpoint_dir,
         algorithm=cfg.algorithm,
         keep_last_n=cfg.checkpoint.keep_last_n,
+        async_write=cfg.checkpoint.async_write,
+    )
+
+
+def build_training_state(
+    metric_logger: MetricLogger,
+    *,
+    epoch_metrics: Mapping[str, float],
+    epoch_durations: Sequence[float],
+    **extra: Any,
+) -> dict[str, Any]:
+    """Collect the non-weight state needed to resume after the current epoch.
+
+    Call it after the epoch summary is logged and right before
+    :meth:`CheckpointManager.save`. *extra* holds trainer-specific entries,
+    such as a target network that is not part of the model payload.
+    """
+    return {
+        "rng_state": capture_rng_state(),
+        "metric_log_position": metric_logger.position(),
+        "epoch_metrics": dict(epoch_metrics),
+        "epoch_durations": list(epoch_durations),
+        **extra,
+    }
+
+
+@dataclass(frozen=True)
+class ResumePoint:
+    """A checkpoint a trainer restarts from, loaded by :func:`load_resume_point`."""
+
+    checkpoint_path: Path
+    payload: dict[str, Any]
+    epoch: int
+    global_step: int
+    epoch_metrics: dict[str, float]
+    epoch_durations: list[float]
+
+    @property
+    def training_state(self) -> dict[str, Any]:
+        return self.payload["training_state"]
+
+    def restore_rng_state(self) -> None:
+        """Restore the RNG states captured when the checkpoint was written."""
+        restore_rng_state(self.training_state["rng_state"])
+
+
+def load_resume_point(
+    checkpoint_manager: CheckpointManager,
+    metric_logger: MetricLogger,
+    *,
+    device: torch.device,
+) -> ResumePoint | None:
+    """Load the latest checkpoint for resuming, or ``None`` if there is none.
+
+    Truncates the metrics log back to its length at checkpoint time and
+    adopts the existing checkpoints into the pruning window. The caller
+    restores weights and optimizers from ``payload``, then calls
+    :meth:`ResumePoint.restore_rng_state` after seeding.
+
+    Raises
+    ------
+    ValueError
+        If the checkpoint has no ``training_state`` (written before resume
+        support), since such a run cannot continue bit-identically.
+    """
+    path = checkpoint_manager.latest_checkpoint()
+    if path is None:
+        logger.info("No checkpoint to resume from; starting at epoch 1.")
+        return None
+
+    payload = CheckpointManager.load(path, device=device)
+    state = payload.get("training_state")
+    if state is None:
+        raise ValueError(
+            f"Checkpoint {path} has no training_state and cannot be resumed; "
+            "it was written before resume support."
+        )
+    metric_logger.truncate(int(state["metric_log_position"]))
+    checkpoint_manager.track_existing()
+    logger.info(
+        "Resuming from %s (epoch %d, step %d).",
+        path,
+        payload["epoch"],
+        payload["global_step"],
+    )
+    return ResumePoint(
+        checkpoint_path=path,
+        payload=payload,
+        epoch=int(payload["epoch"]),
+        global_step=int(payload["global_step"]),
+        epoch_metrics={k: float(v) for k, v in state["epoch_metrics"].items()},
+        epoch_durations=[float(d) for d in state["epoch_durations"]],
     )
 
 
@@ -747,6 +1486,109 @@ def should_checkpoint(
     return every > 0 and epoch % every == 0
 
 
+def build_adam(
+    params: Iterable[torch.nn.Parameter],
+    *,
+    lr: float,
+    device: torch.device,
+) -> torch.optim.Adam:
+    """Adam using the fused kernel on CUDA/CPU and the foreach path elsewhere.
+
+    Both update every parameter of the group in a handful of kernels instead
+    of one small kernel chain per tensor.
+    """
+    if device.type in ("cuda", "cpu"):
+        return torch.optim.Adam(params, lr=lr, fused=True)
+    return torch.optim.Adam(params, lr=lr, foreach=True)
+
+
+@torch.no_grad()
+def soft_update_(target: torch.nn.Module, online: torch.nn.Module, tau: float) -> None:
+    """Polyak update ``target ← target + τ · (online − target)`` in one foreach op."""
+    torch._foreach_lerp_(list(target.parameters()), list(online.parameters()), tau)
+
+
+@torch.no_grad()
+def clip_grad_norm_per_member_(
+    parameters: Iterable[torch.Tensor], max_norm: float
+) -> torch.Tensor:
+    """Clip the gradients of stacked parameters member by member.
+
+    Equivalent to calling :func:`torch.nn.utils.clip_grad_norm_` on each
+    member's slice (dimension 0) of every parameter.
+
+    Returns
+    -------
+    torch.Tensor
+        ``(K,)`` total gradient norms before clipping.
+    """
+    grads = [p.grad for p in parameters if p.grad is not None]
+    if not grads:
+        return torch.zeros(0)
+    norms = torch.stack([g.pow(2).flatten(1).sum(dim=1) for g in grads]).sum(dim=0).sqrt()
+    coef = (max_norm / (norms + 1e-6)).clamp(max=1.0)
+    for g in grads:
+        g.mul_(coef.view(-1, *([1] * (g.dim() - 1))))
+    return norms
+
+
+class CompiledStep:
+    """Call the loss computation of a training step through ``torch.compile``.
+
+    Trainers compile only their forward passes and losses; ``backward``, the
+    optimiser step, the step counter and target-network schedule stay eager,
+    which keeps the compiled region free of graph breaks.
+
+    If compilation fails on the first call (no compiler toolchain,
+    unsupported backend, …) the step falls back to eager execution for the
+    rest of the run and the fallback is recorded in *device_meta*. Errors
+    after the first successful call are not swallowed.
+
+    Parameters
+    ----------
+    fn:
+        The eager loss function; must only do tensor work (no Python-level
+        counters or branching on step numbers).
+    enabled:
+        Compile *fn*; when ``False`` it is called as-is.
+    device_meta:
+        Metadata updated when a compile fallback happens.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        *,
+        enabled: bool,
+        device_meta: DeviceMetadata | None = None,
+    ) -> None:
+        self._eager = fn
+        self._compiled = torch.compile(fn) if enabled else None
+        self._device_meta = device_meta
+        self._verified = False
+
+    @property
+    def compiled(self) -> bool:
+        return self._compiled is not None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if self._compiled is None:
+            return self._eager(*args, **kwargs)
+        if self._verified:
+            return self._compiled(*args, **kwargs)
+        try:
+            result = self._compiled(*args, **kwargs)
+        except Exception as exc:  # compiler / toolchain failures surface here
+            logger.warning("torch.compile failed (%s); running eagerly.", exc)
+            self._compiled = None
+            if self._device_meta is not None:
+                self._device_meta.compile_enabled = False
+                self._device_meta.compile_fallback_reason = f"{type(exc).__name__}: {exc}"
+            return self._eager(*args, **kwargs)
+        self._verified = True
+        return result
+
+
 def compute_epoch_metrics(
     losses: Sequence[float],
     *,
@@ -775,19 +1617,61 @@ def compute_epoch_metrics(
     }
 
 
+# ---------------------------------------------------------------------------
+# Batched policy inference
+# ---------------------------------------------------------------------------
+
+
+def as_state_batch(states: Any, *, device: torch.device) -> torch.Tensor:
+    """Return ``states`` as a float32 ``[N, state_dim]`` tensor on ``device``.
+
+    Accepts a single state vector or a batch given as a list, NumPy array or
+    tensor; a 1-D state becomes a batch of one.
+    """
+    batch = torch.as_tensor(states, dtype=torch.float32, device=device)
+    if batch.dim() == 1:
+        batch = batch.unsqueeze(0)
+    if batch.dim() != 2:
+        raise ValueError(
+            f"Expected a state vector or an [N, state_dim] batch, got shape {tuple(batch.shape)}."
+        )
+    return batch
+
+
+def greedy_action_probabilities(actions: torch.Tensor, n_actions: int) -> np.ndarray:
+    """One-hot ``[N, n_actions]`` distribution for a deterministic greedy policy."""
+    one_hot = torch.nn.functional.one_hot(actions.long(), n_actions)
+    return one_hot.to(torch.float64).cpu().numpy()
+
+
 __all__ = [
     "COMMON_MODULE_VERSION",
     "LOG_TIMEZONE_NAME",
     "TransitionBatch",
+    "DeviceResidentSampler",
+    "PinnedPrefetchSampler",
+    "resolve_sampler_mode",
     "ReplayDataset",
     "CheckpointManifest",
     "CheckpointManager",
     "ScalarMetric",
     "MetricLogger",
+    "StepMetricAccumulator",
     "EventLogger",
     "set_global_seed",
+    "capture_rng_state",
+    "restore_rng_state",
     "load_replay_dataset",
     "build_checkpoint_manager",
+    "build_training_state",
+    "ResumePoint",
+    "load_resume_point",
     "should_checkpoint",
     "compute_epoch_metrics",
+    "build_adam",
+    "soft_update_",
+    "clip_grad_norm_per_member_",
+    "CompiledStep",
+    "as_state_batch",
+    "greedy_action_probabilities",
 ]
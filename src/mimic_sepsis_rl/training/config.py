@@ -24,6 +24,9 @@ Usage
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial training config layer.
+v1.1.0  2026-10-18  Add ``runtime.sampler`` to choose the replay batch sampler.
+v1.2.0  2026-10-18  Add ``runtime.compile`` for torch.compile'd training steps.
+v1.3.0  2026-10-18  Add ``checkpoint.async_write`` for background checkpoint writes.
 """
 
 from __future__ import annotations
@@ -39,6 +42,7 @@ import yaml
 from mimic_sepsis_rl.training.device import (
     Backend,
     DeviceMetadata,
+    resolve_compile,
     resolve_device,
 )
 
@@ -46,6 +50,9 @@ logger = logging.getLogger(__name__)
 
 CONFIG_SCHEMA_VERSION: str = "1.0.0"
 
+#: Replay batch sampler modes accepted by ``runtime.sampler``.
+SAMPLER_MODES: tuple[str, ...] = ("auto", "device", "pinned")
+
 # ---------------------------------------------------------------------------
 # Raw YAML helpers
 # ---------------------------------------------------------------------------
@@ -81,6 +88,14 @@ class RuntimeConfig:
         Global random seed for reproducible training runs.
     num_workers : int
         DataLoader / prefetch worker count (0 = main process only).
+    sampler : str
+        Replay batch sampler: ``"device"`` keeps the dataset on the device,
+        ``"pinned"`` streams batches from pinned host memory with
+        ``num_workers`` prefetch threads, ``"auto"`` picks one per device.
+    compile : bool
+        Whether trainers wrap their gradient update in ``torch.compile``.
+        ``False`` when requested but unsupported; the request and any
+        fallback reason are kept in :attr:`device_meta`.
     """
 
     requested_device: str
@@ -88,6 +103,8 @@ class RuntimeConfig:
     device_meta: DeviceMetadata
     seed: int
     num_workers: int
+    sampler: str = "auto"
+    compile: bool = False
 
 
 @dataclass(frozen=True)
@@ -102,11 +119,14 @@ class CheckpointConfig:
         Save a checkpoint every N epochs (0 = only at end).
     keep_last_n : int
         Number of recent checkpoints to retain (0 = keep all).
+    async_write : bool
+        Write checkpoints on a background thread from CPU snapshots.
     """
 
     checkpoint_dir: Path
     save_every_n_epochs: int
     keep_last_n: int
+    async_write: bool = False
 
 
 @dataclass(frozen=True)
@@ -195,12 +215,15 @@ class TrainingConfig:
                 "torch_device_str": self.runtime.device_meta.torch_device_str,
                 "seed": self.runtime.seed,
                 "num_workers": self.runtime.num_workers,
+                "sampler": self.runtime.sampler,
+                "compile": self.runtime.compile,
                 "device_meta": self.runtime.device_meta.to_dict(),
             },
             "checkpoint": {
                 "checkpoint_dir": str(self.checkpoint.checkpoint_dir),
                 "save_every_n_epochs": self.checkpoint.save_every_n_epochs,
                 "keep_last_n": self.checkpoint.keep_last_n,
+                "async_write": self.checkpoint.async_write,
             },
             "logging": {
                 "log_dir": str(self.logging.log_dir),
@@ -227,6 +250,8 @@ def _parse_runtime(raw: dict[str, Any]) -> RuntimeConfig:
     """Parse the ``runtime`` block from raw YAML."""
     requested = str(raw.get("device", "auto"))
     device, meta = resolve_device(Backend.from_str(requested))
+    sampler = _parse_sampler(raw.get("sampler", "auto"))
+    use_compile = resolve_compile(bool(raw.get("compile", False)), device, meta)
 
     return RuntimeConfig(
         requested_device=requested,
@@ -234,15 +259,28 @@ def _parse_runtime(raw: dict[str, Any]) -> RuntimeConfig:
         device_meta=meta,
         seed=int(raw.get("seed", 42)),
         num_workers=int(raw.get("num_workers", 0)),
+        sampler=sampler,
+        compile=use_compile,
     )
 
 
+def _parse_sampler(value: Any) -> str:
+    """Validate a ``runtime.sampler`` value."""
+    sampler = str(value).strip().lower()
+    if sampler not in SAMPLER_MODES:
+        raise ValueError(
+            f"Unknown runtime.sampler {value!r}; expected one of {SAMPLER_MODES}."
+        )
+    return sampler
+
+
 def _parse_checkpoint(raw: dict[str, Any]) -> CheckpointConfig:
     """Parse the ``checkpoint`` block from raw YAML."""
     return CheckpointConfig(
         checkpoint_dir=Path(raw.get("checkpoint_dir", "checkpoints")),
         save_every_n_epochs=int(raw.get("save_every_n_epochs", 10)),
         keep_last_n=int(raw.get("keep_last_n", 3)),
+        async_write=bool(raw.get("async_write", False)),
     )
 
 
@@ -375,7 +413,11 @@ def build_training_config(
     batch_size: int = 256,
     gamma: float = 0.99,
     seed: int = 42,
+    num_workers: int = 0,
+    sampler: str = "auto",
+    compile: bool = False,
     checkpoint_dir: str | Path = "checkpoints",
+    async_checkpoint: bool = False,
     log_dir: str | Path = "runs",
     experiment_name: str = "mimic_rl",
     extra: dict[str, Any] | None = None,
@@ -392,12 +434,15 @@ def build_training_config(
         device=torch_device,
         device_meta=meta,
         seed=seed,
-        num_workers=0,
+        num_workers=num_workers,
+        sampler=_parse_sampler(sampler),
+        compile=resolve_compile(compile, torch_device, meta),
     )
     checkpoint = CheckpointConfig(
         checkpoint_dir=Path(checkpoint_dir),
         save_every_n_epochs=10,
         keep_last_n=3,
+        async_write=async_checkpoint,
     )
     log_cfg = LoggingConfig(
         log_dir=Path(log_dir),
@@ -422,6 +467,7 @@ def build_training_config(
 
 __all__ = [
     "CONFIG_SCHEMA_VERSION",
+    "SAMPLER_MODES",
     "RuntimeConfig",
     "CheckpointConfig",
     "LoggingConfig",
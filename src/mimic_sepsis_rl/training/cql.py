@@ -34,6 +34,11 @@ training graph without touching real data.
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial discrete CQL reference trainer.
+v1.1.0  2026-10-18  Keep step metrics on the device; write every step's record every N steps.
+v1.2.0  2026-10-18  Fused Adam, foreach soft updates and optional torch.compile'd losses.
+v1.3.0  2026-10-18  train(resume=True) / --resume continue from the latest checkpoint.
+v1.4.0  2026-10-18  Wait for background checkpoint writes before returning the result.
+v1.5.0  2026-10-18  CQLPolicy.select_actions / action_probabilities for batched inference.
 """
 
 from __future__ import annotations
@@ -47,21 +52,31 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 from mimic_sepsis_rl.training.common import (
     CheckpointManager,
+    CompiledStep,
     EventLogger,
     MetricLogger,
     ReplayDataset,
+    ResumePoint,
+    StepMetricAccumulator,
     TransitionBatch,
+    as_state_batch,
+    build_adam,
     build_checkpoint_manager,
+    build_training_state,
     compute_epoch_metrics,
+    greedy_action_probabilities,
     load_replay_dataset,
+    load_resume_point,
     set_global_seed,
     should_checkpoint,
+    soft_update_,
 )
 from mimic_sepsis_rl.training.config import (
     TrainingConfig,
@@ -86,6 +101,24 @@ _DEFAULT_TARGET_UPDATE_FREQ: int = 10  # epochs between hard target updates
 _DEFAULT_POLYAK_TAU: float = 0.005  # for soft target updates (if enabled)
 _DEFAULT_GRAD_CLIP: float = 10.0
 
+# Per-step metrics buffered on the device, and the subset written to the
+# metrics log (one record per step, flushed every ``log_every_n_steps`` steps).
+_STEP_METRICS: tuple[str, ...] = (
+    "td_loss",
+    "cql_loss",
+    "total_loss",
+    "mean_q_dataset",
+    "mean_q_max",
+    "conservative_gap",
+)
+_LOGGED_STEP_METRICS: tuple[str, ...] = (
+    "td_loss",
+    "cql_loss",
+    "mean_q_dataset",
+    "mean_q_max",
+    "conservative_gap",
+)
+
 
 # ---------------------------------------------------------------------------
 # Q-Network
@@ -330,18 +363,30 @@ class CQLPolicy:
         int
             Greedy action index (argmax Q).
         """
-        if not isinstance(state, torch.Tensor):
-            state_t = torch.tensor(state, dtype=torch.float32, device=self.device)
-        else:
-            state_t = state.to(self.device)
+        return int(self.select_actions(state)[0])
 
-        if state_t.dim() == 1:
-            state_t = state_t.unsqueeze(0)
+    def select_actions(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Select greedy actions for a batch of states in one forward pass.
 
+        Parameters
+        ----------
+        states:
+            ``[N, state_dim]`` state matrix (a 1-D state is treated as N=1).
+
+        Returns
+        -------
+        np.ndarray
+            ``int64`` array of shape ``[N]`` with the argmax-Q action per row.
+        """
         self.q_network.eval()
         with torch.no_grad():
-            q = self.q_network(state_t)
-        return int(q.argmax(dim=1).item())
+            q = self.q_network(as_state_batch(states, device=self.device))
+        return q.argmax(dim=1).cpu().numpy()
+
+    def action_probabilities(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Return the greedy policy as one-hot probabilities, shape ``[N, n_actions]``."""
+        actions = torch.from_numpy(self.select_actions(states))
+        return greedy_action_probabilities(actions, self.n_actions)
 
     def q_values(self, state: list[float] | torch.Tensor) -> list[float]:
         """Return Q-values for all actions given a single state vector."""
@@ -412,7 +457,12 @@ class CQLTrainer:
         self._target_net.eval()
 
         # Optimizer
-        self._optimizer = torch.optim.Adam(self._q_net.parameters(), lr=lr)
+        self._optimizer = build_adam(self._q_net.parameters(), lr=lr, device=self._device)
+        self._compute_losses = CompiledStep(
+            self._losses,
+            enabled=cfg.runtime.compile,
+            device_meta=cfg.device_meta,
+        )
 
         # Infra
         self._ckpt_mgr = build_checkpoint_manager(cfg)
@@ -443,16 +493,31 @@ class CQLTrainer:
     # Core training step
     # ------------------------------------------------------------------
 
-    def _training_step(self, batch: TransitionBatch) -> dict[str, float]:
+    def _training_step(self, batch: TransitionBatch) -> dict[str, torch.Tensor]:
         """Compute CQL loss and perform one gradient update.
 
         Returns
         -------
-        dict[str, float]
-            ``{"td_loss": …, "cql_loss": …, "total_loss": …}``
+        dict[str, torch.Tensor]
+            0-d device tensors for :data:`_STEP_METRICS`; nothing is synced
+            to the host here.
         """
         self._q_net.train()
+        total_loss, step_metrics = self._compute_losses(batch)
+
+        self._optimizer.zero_grad()
+        total_loss.backward()
+
+        if self._grad_clip > 0:
+            nn.utils.clip_grad_norm_(self._q_net.parameters(), self._grad_clip)
+
+        self._optimizer.step()
+        self._global_step += 1
+
+        return step_metrics
 
+    def _losses(self, batch: TransitionBatch) -> tuple[torch.Tensor, dict[str, torch.Tensor]]:
+        """Forward passes and losses of one step (the ``torch.compile`` region)."""
         q_values = self._q_net(batch.states)  # (B, n_actions)
         q_data = q_values.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
         q_max = q_values.max(dim=1).values
@@ -471,22 +536,13 @@ class CQLTrainer:
         loss_cql = cql_loss(q_values, batch.actions)
         total_loss = loss_td + self._cql_alpha * loss_cql
 
-        self._optimizer.zero_grad()
-        total_loss.backward()
-
-        if self._grad_clip > 0:
-            nn.utils.clip_grad_norm_(self._q_net.parameters(), self._grad_clip)
-
-        self._optimizer.step()
-        self._global_step += 1
-
-        return {
-            "td_loss": loss_td.item(),
-            "cql_loss": loss_cql.item(),
-            "total_loss": total_loss.item(),
-            "mean_q_dataset": q_data.mean().item(),
-            "mean_q_max": q_max.mean().item(),
-            "conservative_gap": conservative_gap.item(),
+        return total_loss, {
+            "td_loss": loss_td.detach(),
+            "cql_loss": loss_cql.detach(),
+            "total_loss": total_loss.detach(),
+            "mean_q_dataset": q_data.detach().mean(),
+            "mean_q_max": q_max.detach().mean(),
+            "conservative_gap": conservative_gap.detach(),
         }
 
     # ------------------------------------------------------------------
@@ -504,20 +560,33 @@ class CQLTrainer:
         logger.debug("Target network hard-updated at step %d.", self._global_step)
 
     def _soft_update_target(self) -> None:
-        tau = self._polyak_tau
-        for p_online, p_target in zip(
-            self._q_net.parameters(), self._target_net.parameters()
-        ):
-            p_target.data.mul_(1.0 - tau)
-            p_target.data.add_(tau * p_online.data)
+        soft_update_(self._target_net, self._q_net, self._polyak_tau)
 
     # ------------------------------------------------------------------
     # Full training loop
     # ------------------------------------------------------------------
 
-    def train(self) -> CQLTrainingResult:
+    def _restore(self, point: ResumePoint) -> None:
+        """Load weights, optimizer, step counter and RNG state from *point*."""
+        payload = point.payload
+        self._q_net.load_state_dict(payload["model_state_dict"])
+        self._target_net.load_state_dict(point.training_state["target_state_dict"])
+        self._optimizer.load_state_dict(payload["optimizer_state_dict"])
+        self._global_step = point.global_step
+        point.restore_rng_state()
+
+    def train(self, *, resume: bool = False) -> CQLTrainingResult:
         """Run the full CQL training loop.
 
+        Parameters
+        ----------
+        resume:
+            Continue from the latest checkpoint in ``checkpoint_dir``,
+            restoring networks, optimizer, RNG state and the metrics log
+            position. On CPU the resumed run is bit-identical to an
+            uninterrupted one. Starts from epoch 1 when there is no
+            checkpoint.
+
         Returns
         -------
         CQLTrainingResult
@@ -533,10 +602,28 @@ class CQLTrainer:
         final_total: float = float("nan")
         last_ckpt: Path | None = None
 
-        td_losses: list[float] = []
-        cql_losses: list[float] = []
-        total_losses: list[float] = []
+        step_metrics = StepMetricAccumulator(
+            self._metric_logger,
+            _STEP_METRICS,
+            device=self._device,
+            log_names=_LOGGED_STEP_METRICS,
+        )
         epoch_durations: list[float] = []
+        start_epoch = 1
+
+        point = (
+            load_resume_point(self._ckpt_mgr, self._metric_logger, device=self._device)
+            if resume
+            else None
+        )
+        if point is not None:
+            self._restore(point)
+            start_epoch = point.epoch + 1
+            epoch_durations = list(point.epoch_durations)
+            final_td = point.epoch_metrics["td_loss_mean"]
+            final_cql = point.epoch_metrics["cql_loss_mean"]
+            final_total = point.epoch_metrics["total_loss_mean"]
+            last_ckpt = point.checkpoint_path
 
         self._training_event_logger.log_event(
             level="INFO",
@@ -551,6 +638,7 @@ class CQLTrainer:
                 "gamma": cfg.gamma,
                 "n_epochs": cfg.n_epochs,
                 "n_actions": self._n_actions,
+                "resumed_from": str(point.checkpoint_path) if point else None,
             },
         )
 
@@ -562,58 +650,24 @@ class CQLTrainer:
             self._cql_alpha,
         )
 
-        for epoch in range(1, cfg.n_epochs + 1):
+        for epoch in range(start_epoch, cfg.n_epochs + 1):
             epoch_started_at = time.time()
-            td_losses.clear()
-            cql_losses.clear()
-            total_losses.clear()
 
             for batch in self._dataset.iter_batches(
                 cfg.batch_size, shuffle=True, epoch=epoch
             ):
-                step_metrics = self._training_step(batch)
-                td_losses.append(step_metrics["td_loss"])
-                cql_losses.append(step_metrics["cql_loss"])
-                total_losses.append(step_metrics["total_loss"])
-
-                self._metric_logger.log_scalar(
-                    "td_loss",
-                    step_metrics["td_loss"],
-                    step=self._global_step,
-                    epoch=epoch,
-                )
-                self._metric_logger.log_scalar(
-                    "cql_loss",
-                    step_metrics["cql_loss"],
-                    step=self._global_step,
-                    epoch=epoch,
-                )
-                self._metric_logger.log_scalar(
-                    "mean_q_dataset",
-                    step_metrics["mean_q_dataset"],
-                    step=self._global_step,
-                    epoch=epoch,
-                )
-                self._metric_logger.log_scalar(
-                    "mean_q_max",
-                    step_metrics["mean_q_max"],
-                    step=self._global_step,
-                    epoch=epoch,
-                )
-                self._metric_logger.log_scalar(
-                    "conservative_gap",
-                    step_metrics["conservative_gap"],
-                    step=self._global_step,
-                    epoch=epoch,
+                step_metrics.update(
+                    self._training_step(batch), step=self._global_step, epoch=epoch
                 )
 
             # Epoch summary
             epoch_duration = time.time() - epoch_started_at
             epoch_durations.append(epoch_duration)
+            means = step_metrics.end_epoch(step=self._global_step, epoch=epoch)
             epoch_metrics = {
-                "td_loss_mean": sum(td_losses) / max(len(td_losses), 1),
-                "cql_loss_mean": sum(cql_losses) / max(len(cql_losses), 1),
-                "total_loss_mean": sum(total_losses) / max(len(total_losses), 1),
+                "td_loss_mean": means["td_loss"],
+                "cql_loss_mean": means["cql_loss"],
+                "total_loss_mean": means["total_loss"],
             }
             self._metric_logger.log_epoch_summary(
                 epoch, self._global_step, epoch_metrics
@@ -663,6 +717,12 @@ class CQLTrainer:
                     metrics=epoch_metrics,
                     cfg=cfg,
                     optimizer_state_dict=self._optimizer.state_dict(),
+                    training_state=build_training_state(
+                        self._metric_logger,
+                        epoch_metrics=epoch_metrics,
+                        epoch_durations=epoch_durations,
+                        target_state_dict=self._target_net.state_dict(),
+                    ),
                 )
                 self._training_event_logger.log_event(
                     level="INFO",
@@ -679,6 +739,8 @@ class CQLTrainer:
             final_cql = epoch_metrics["cql_loss_mean"]
             final_total = epoch_metrics["total_loss_mean"]
 
+        # Barrier for background checkpoint writes: last_ckpt is durable below.
+        self._ckpt_mgr.close()
         elapsed = time.time() - self._start_time
         logger.info(
             "CQL training complete: %d epochs, %d steps, %.1fs elapsed.",
@@ -953,6 +1015,11 @@ def main(argv: list[str] | None = None) -> None:
         default=25,
         help="Number of discrete actions (default: 25).",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the latest checkpoint in checkpoint_dir.",
+    )
     args = parser.parse_args(argv)
 
     # Build/load config
@@ -988,7 +1055,7 @@ def main(argv: list[str] | None = None) -> None:
     dataset = load_replay_dataset(cfg)
 
     trainer = CQLTrainer(cfg, dataset, n_actions=args.n_actions)
-    result = trainer.train()
+    result = trainer.train(resume=args.resume)
 
     import json
 
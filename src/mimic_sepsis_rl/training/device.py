@@ -14,6 +14,8 @@ Capabilities
 - Backend metadata snapshot for reproducible run records.
 - MPS unsupported-op fallback flag so issues are surfaced early rather
   than silently during training.
+- ``torch.compile`` support probing, with the requested and effective
+  choice recorded in the metadata snapshot.
 
 CLI self-check
 --------------
@@ -22,6 +24,7 @@ CLI self-check
 Version history
 ---------------
 v1.0.0  2026-03-29  Initial cross-platform device abstraction.
+v1.1.0  2026-10-18  Probe torch.compile support and record the compile choice.
 """
 
 from __future__ import annotations
@@ -43,7 +46,7 @@ logger = logging.getLogger(__name__)
 # Public constants
 # ---------------------------------------------------------------------------
 
-DEVICE_MODULE_VERSION: Final[str] = "1.0.0"
+DEVICE_MODULE_VERSION: Final[str] = "1.1.0"
 
 # Environment variable that can override device selection at run-time.
 _ENV_DEVICE_OVERRIDE: Final[str] = "MIMIC_RL_DEVICE"
@@ -150,6 +153,12 @@ class DeviceMetadata:
     mps_fallback_ops_enabled : bool
         Whether ``PYTORCH_ENABLE_MPS_FALLBACK`` is active for ops not
         supported on MPS.
+    compile_requested : bool
+        Whether ``runtime.compile`` asked for ``torch.compile``.
+    compile_enabled : bool
+        Whether training steps actually run through ``torch.compile``.
+    compile_fallback_reason : str | None
+        Why a requested compile fell back to eager execution.
     """
 
     backend: str
@@ -167,6 +176,9 @@ class DeviceMetadata:
     device_module_version: str
     fallback_applied: bool
     mps_fallback_ops_enabled: bool
+    compile_requested: bool = False
+    compile_enabled: bool = False
+    compile_fallback_reason: str | None = None
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -310,6 +322,36 @@ def resolve_device(
     return device, metadata
 
 
+def compile_unsupported_reason(device: torch.device) -> str | None:
+    """Return why ``torch.compile`` cannot be used on *device*, or ``None``."""
+    if not hasattr(torch, "compile"):
+        return f"torch.compile is not available in PyTorch {torch.__version__}"
+    if device.type == "mps":
+        return "torch.compile is not supported for MPS training steps"
+    return None
+
+
+def resolve_compile(
+    requested: bool,
+    device: torch.device,
+    meta: DeviceMetadata,
+) -> bool:
+    """Decide whether training steps are compiled and record it in *meta*.
+
+    Returns
+    -------
+    bool
+        ``True`` when ``torch.compile`` should be used.
+    """
+    reason = compile_unsupported_reason(device) if requested else None
+    meta.compile_requested = requested
+    meta.compile_enabled = requested and reason is None
+    meta.compile_fallback_reason = reason
+    if reason is not None:
+        logger.warning("runtime.compile requested but disabled: %s.", reason)
+    return meta.compile_enabled
+
+
 def get_device_metadata(requested: str | Backend = Backend.AUTO) -> DeviceMetadata:
     """Convenience wrapper that returns only the :class:`DeviceMetadata`."""
     _, meta = resolve_device(requested)
@@ -414,6 +456,7 @@ def _self_check(verbose: bool = True) -> int:
         print(f"MPS built          : {meta.mps_built}")
         print(f"MPS fallback env   : {meta.mps_fallback_ops_enabled}")
         print(f"Fallback applied   : {meta.fallback_applied}")
+        print(f"torch.compile      : {compile_unsupported_reason(device) or 'supported'}")
         print(f"Module version     : {meta.device_module_version}")
 
     # Smoke test: allocate a small tensor on the resolved device.
@@ -488,5 +531,7 @@ __all__ = [
     "DeviceMetadata",
     "resolve_device",
     "get_device_metadata",
+    "compile_unsupported_reason",
+    "resolve_compile",
     "validate_mps_ops",
 ]
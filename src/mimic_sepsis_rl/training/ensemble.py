@@ -0,0 +1,704 @@
+"""
+Multi-seed ensemble training: K seeded CQL runs in one vectorised pass.
+
+The evaluation protocol trains every algorithm under several seeds. Run as
+separate processes, each seed re-loads the replay export and drives small
+batch-256 matmuls that leave most of the device idle. The ensemble trainer
+instead stacks the K members' parameters with
+:func:`torch.func.stack_module_state` and evaluates all members with one
+:func:`torch.func.vmap`'d forward/backward per step:
+
+- every member keeps its own seed: network initialisation uses
+  ``torch.manual_seed(seed)`` and each member draws the same per-epoch
+  shuffle a stand-alone run with that seed draws, from one shared
+  :class:`~mimic_sepsis_rl.training.common.ReplayDataset`;
+- Adam is element-wise, so one optimiser over the stacked parameters is
+  exactly K independent optimisers; gradient clipping is applied per
+  member;
+- every member writes checkpoints, manifests, metrics JSONL and event
+  logs in the regular layout under ``<checkpoint_dir>/seed_<seed>/`` and
+  ``<log_dir>/seed_<seed>/`` (see :func:`member_training_config`), so
+  comparison code treats them as K ordinary runs;
+- member checkpoints carry the regular ``training_state`` (target network,
+  RNG state, metrics log position), so ``train(resume=True)`` restacks the
+  members' latest checkpoints and continues the ensemble.
+
+Usage
+-----
+    python -m mimic_sepsis_rl.training.ensemble \\
+        --config configs/training/cql.yaml --seeds 1 2 3 4 5
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial vmap'd multi-seed CQL ensemble trainer.
+v1.1.0  2026-10-18  Wait for background checkpoint writes before returning results.
+v1.2.0  2026-10-18  Member metrics logs hold every step instead of window means.
+v1.3.0  2026-10-18  Member checkpoints carry training_state; ensembles can resume.
+v1.4.0  2026-10-18  Per-member step metrics go through the shared StepMetricAccumulator.
+v1.5.0  2026-10-18  clip_grad_norm_per_member_ moved to training.common.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Sequence
+
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from mimic_sepsis_rl.reporting.offline_rl import generate_training_report_artifacts
+from mimic_sepsis_rl.training.common import (
+    EventLogger,
+    MetricLogger,
+    ReplayDataset,
+    ResumePoint,
+    StepMetricAccumulator,
+    TransitionBatch,
+    build_adam,
+    clip_grad_norm_per_member_,
+    build_checkpoint_manager,
+    build_training_state,
+    load_replay_dataset,
+    load_resume_point,
+    should_checkpoint,
+)
+from mimic_sepsis_rl.training.config import TrainingConfig, load_training_config
+from mimic_sepsis_rl.training.cql import (
+    _DEFAULT_CQL_ALPHA,
+    _DEFAULT_GRAD_CLIP,
+    _DEFAULT_HIDDEN_SIZES,
+    _DEFAULT_LR,
+    _DEFAULT_POLYAK_TAU,
+    _DEFAULT_TARGET_UPDATE_FREQ,
+    _LOGGED_STEP_METRICS,
+    _STEP_METRICS,
+    CQLPolicy,
+    CQLTrainingResult,
+    QNetwork,
+    cql_loss,
+    td_loss,
+)
+
+logger = logging.getLogger(__name__)
+
+ENSEMBLE_MODULE_VERSION: str = "1.5.0"
+
+
+def member_training_config(cfg: TrainingConfig, seed: int) -> TrainingConfig:
+    """Return the config of the ensemble member trained with *seed*.
+
+    The member gets *seed* as its runtime seed and its own
+    ``seed_<seed>`` sub-directories for checkpoints and logs; everything
+    else is shared with *cfg*.
+    """
+    return replace(
+        cfg,
+        runtime=replace(cfg.runtime, seed=seed),
+        checkpoint=replace(
+            cfg.checkpoint,
+            checkpoint_dir=cfg.checkpoint.checkpoint_dir / f"seed_{seed}",
+        ),
+        logging=replace(cfg.logging, log_dir=cfg.logging.log_dir / f"seed_{seed}"),
+    )
+
+
+class CQLEnsembleTrainer:
+    """Train K seeded CQL runs together with stacked, vmap'd Q-networks.
+
+    Parameters
+    ----------
+    cfg:
+        Shared training config; :func:`member_training_config` derives each
+        member's seed and output directories from it.
+    dataset:
+        Replay dataset shared by all members.
+    seeds:
+        One distinct seed per member.
+    n_actions:
+        Number of discrete actions (default 25).
+    """
+
+    def __init__(
+        self,
+        cfg: TrainingConfig,
+        dataset: ReplayDataset,
+        *,
+        seeds: Sequence[int],
+        n_actions: int = 25,
+    ) -> None:
+        seeds = [int(seed) for seed in seeds]
+        if not seeds:
+            raise ValueError("An ensemble needs at least one seed.")
+        if len(set(seeds)) != len(seeds):
+            raise ValueError(f"Ensemble seeds must be distinct, got {seeds}.")
+
+        self._cfg = cfg
+        self._dataset = dataset
+        self._device = cfg.device
+        self._n_actions = n_actions
+        self._seeds = seeds
+        self._member_cfgs = [member_training_config(cfg, seed) for seed in seeds]
+
+        extra = cfg.extra
+        self._hidden_sizes: list[int] = extra.get("hidden_sizes", _DEFAULT_HIDDEN_SIZES)
+        self._cql_alpha = float(extra.get("cql_alpha", _DEFAULT_CQL_ALPHA))
+        lr = float(extra.get("lr", _DEFAULT_LR))
+        self._target_update_freq = int(
+            extra.get("target_update_freq", _DEFAULT_TARGET_UPDATE_FREQ)
+        )
+        self._polyak_tau = float(extra.get("polyak_tau", _DEFAULT_POLYAK_TAU))
+        self._use_soft_update = bool(extra.get("use_soft_update", False))
+        self._grad_clip = float(extra.get("grad_clip", _DEFAULT_GRAD_CLIP))
+
+        members = []
+        for seed in seeds:
+            torch.manual_seed(seed)
+            members.append(
+                QNetwork(dataset.state_dim, n_actions, self._hidden_sizes).to(self._device)
+            )
+        params, buffers = stack_module_state(members)
+        self._params: dict[str, torch.Tensor] = params
+        self._buffers: dict[str, torch.Tensor] = buffers
+        self._target_params = {name: p.detach().clone() for name, p in params.items()}
+        self._base_net = copy.deepcopy(members[0]).to("meta")
+        self._member_losses = vmap(self._losses)
+
+        self._optimizer = build_adam(self._params.values(), lr=lr, device=self._device)
+
+        self._ckpt_mgrs = [build_checkpoint_manager(m) for m in self._member_cfgs]
+        self._metric_loggers = [MetricLogger.from_config(m) for m in self._member_cfgs]
+        self._training_event_loggers = [
+            EventLogger.from_config(m, filename="training.log") for m in self._member_cfgs
+        ]
+        self._runtime_event_loggers = [
+            EventLogger.from_config(m, filename="runtime.log") for m in self._member_cfgs
+        ]
+
+        self._global_step = 0
+        self._start_time = 0.0
+
+        logger.info(
+            "CQLEnsembleTrainer initialised: members=%d seeds=%s state_dim=%d "
+            "n_actions=%d device=%s",
+            len(seeds),
+            seeds,
+            dataset.state_dim,
+            n_actions,
+            self._device,
+        )
+
+    @property
+    def seeds(self) -> list[int]:
+        return list(self._seeds)
+
+    @property
+    def member_configs(self) -> list[TrainingConfig]:
+        return list(self._member_cfgs)
+
+    # ------------------------------------------------------------------
+    # Core training step
+    # ------------------------------------------------------------------
+
+    def _q_values(self, params: dict[str, torch.Tensor], states: torch.Tensor) -> torch.Tensor:
+        return functional_call(self._base_net, (params, self._buffers), (states,))
+
+    def _losses(
+        self,
+        params: dict[str, torch.Tensor],
+        target_params: dict[str, torch.Tensor],
+        *tensors: torch.Tensor,
+    ) -> tuple[torch.Tensor, dict[str, torch.Tensor]]:
+        """One member's CQL losses, as in ``CQLTrainer._losses`` (vmapped)."""
+        batch = TransitionBatch(*tensors)
+        q_values = self._q_values(params, batch.states)
+        q_data = q_values.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
+        q_max = q_values.max(dim=1).values
+        conservative_gap = (torch.logsumexp(q_values, dim=1) - q_data).mean()
+        with torch.no_grad():
+            next_q_values = self._q_values(target_params, batch.next_states)
+
+        loss_td = td_loss(
+            q_values,
+            batch.actions,
+            batch.rewards,
+            next_q_values,
+            batch.dones,
+            gamma=self._cfg.gamma,
+        )
+        loss_cql = cql_loss(q_values, batch.actions)
+        total_loss = loss_td + self._cql_alpha * loss_cql
+
+        return total_loss, {
+            "td_loss": loss_td.detach(),
+            "cql_loss": loss_cql.detach(),
+            "total_loss": total_loss.detach(),
+            "mean_q_dataset": q_data.detach().mean(),
+            "mean_q_max": q_max.detach().mean(),
+            "conservative_gap": conservative_gap.detach(),
+        }
+
+    def _training_step(self, batch: TransitionBatch) -> dict[str, torch.Tensor]:
+        """One gradient update of every member on its own ``(K, B, …)`` batch.
+
+        Returns
+        -------
+        dict[str, torch.Tensor]
+            ``(K,)`` device tensors for each step metric.
+        """
+        total_losses, step_metrics = self._member_losses(
+            self._params,
+            self._target_params,
+            batch.states,
+            batch.actions,
+            batch.rewards,
+            batch.next_states,
+            batch.dones,
+        )
+
+        self._optimizer.zero_grad()
+        # Member k's loss only depends on member k's slice, so the gradient
+        # of the sum is every member's own gradient.
+        total_losses.sum().backward()
+
+        if self._grad_clip > 0:
+            clip_grad_norm_per_member_(self._params.values(), self._grad_clip)
+
+        self._optimizer.step()
+        self._global_step += 1
+
+        return step_metrics
+
+    # ------------------------------------------------------------------
+    # Target network updates
+    # ------------------------------------------------------------------
+
+    @torch.no_grad()
+    def _maybe_update_target(self, epoch: int) -> None:
+        targets = list(self._target_params.values())
+        online = list(self._params.values())
+        if self._use_soft_update:
+            torch._foreach_lerp_(targets, online, self._polyak_tau)
+        elif epoch % self._target_update_freq == 0:
+            torch._foreach_copy_(targets, online)
+
+    # ------------------------------------------------------------------
+    # Per-member state
+    # ------------------------------------------------------------------
+
+    def member_state_dict(self, member: int) -> dict[str, torch.Tensor]:
+        """``QNetwork.state_dict()`` of one member (copied out of the stack)."""
+        state = {**self._params, **self._buffers}
+        return {name: tensor[member].detach().clone() for name, tensor in state.items()}
+
+    def _member_target_state_dict(self, member: int) -> dict[str, torch.Tensor]:
+        """Target ``QNetwork.state_dict()`` of one member."""
+        state = {**self._target_params, **self._buffers}
+        return {name: tensor[member].detach().clone() for name, tensor in state.items()}
+
+    def _member_optimizer_state(self, member: int) -> dict[str, Any]:
+        """Adam state of one member, loadable into a single-run optimiser."""
+        full = self._optimizer.state_dict()
+        state = {
+            index: {
+                key: value[member].clone()
+                if torch.is_tensor(value) and value.dim() > 0
+                else value
+                for key, value in param_state.items()
+            }
+            for index, param_state in full["state"].items()
+        }
+        return {"state": state, "param_groups": full["param_groups"]}
+
+    def get_policies(self) -> list[CQLPolicy]:
+        """Return every member's current Q-network as a :class:`CQLPolicy`."""
+        policies = []
+        for member, ckpt_mgr in enumerate(self._ckpt_mgrs):
+            q_net = QNetwork(self._dataset.state_dim, self._n_actions, self._hidden_sizes)
+            q_net.load_state_dict(self.member_state_dict(member))
+            policies.append(
+                CQLPolicy(
+                    q_network=q_net.to(self._device).eval(),
+                    device=self._device,
+                    state_dim=self._dataset.state_dim,
+                    n_actions=self._n_actions,
+                    checkpoint_path=ckpt_mgr.latest_checkpoint(),
+                )
+            )
+        return policies
+
+    # ------------------------------------------------------------------
+    # Full training loop
+    # ------------------------------------------------------------------
+
+    def _load_resume_points(self) -> list[ResumePoint] | None:
+        """Every member's resume point, or ``None`` if no member has a checkpoint.
+
+        Raises
+        ------
+        ValueError
+            If only some members have a checkpoint, or the members' latest
+            checkpoints are from different epochs.
+        """
+        points = [
+            load_resume_point(ckpt_mgr, metric_logger, device=self._device)
+            for ckpt_mgr, metric_logger in zip(self._ckpt_mgrs, self._metric_loggers)
+        ]
+        missing = [seed for seed, point in zip(self._seeds, points) if point is None]
+        if len(missing) == len(points):
+            return None
+        if missing:
+            raise ValueError(
+                f"Cannot resume the ensemble: members with seeds {missing} have no "
+                "checkpoint. Resume needs every member's checkpoint."
+            )
+        resumed = [point for point in points if point is not None]
+        epochs = sorted({(point.epoch, point.global_step) for point in resumed})
+        if len(epochs) > 1:
+            raise ValueError(
+                "Cannot resume the ensemble: member checkpoints are from different "
+                f"(epoch, global_step) pairs {epochs}."
+            )
+        return resumed
+
+    @torch.no_grad()
+    def _restore(self, points: Sequence[ResumePoint]) -> None:
+        """Restack weights, targets and Adam state; restore step counter and RNG."""
+        models = [point.payload["model_state_dict"] for point in points]
+        targets = [point.training_state["target_state_dict"] for point in points]
+        for name, tensor in self._params.items():
+            tensor.copy_(torch.stack([model[name] for model in models]))
+        for name, tensor in self._buffers.items():
+            tensor.copy_(torch.stack([model[name] for model in models]))
+        for name, tensor in self._target_params.items():
+            tensor.copy_(torch.stack([target[name] for target in targets]))
+
+        # Inverse of _member_optimizer_state: stack the member slices again.
+        member_states = [point.payload["optimizer_state_dict"] for point in points]
+        state = {
+            index: {
+                key: torch.stack([m["state"][index][key] for m in member_states])
+                if torch.is_tensor(value) and value.dim() > 0
+                else value
+                for key, value in param_state.items()
+            }
+            for index, param_state in member_states[0]["state"].items()
+        }
+        self._optimizer.load_state_dict(
+            {"state": state, "param_groups": member_states[0]["param_groups"]}
+        )
+        self._global_step = points[0].global_step
+        points[0].restore_rng_state()
+
+    def train(self, *, resume: bool = False) -> list[CQLTrainingResult]:
+        """Run the ensemble and return one :class:`CQLTrainingResult` per seed.
+
+        Parameters
+        ----------
+        resume:
+            Continue from every member's latest checkpoint, as
+            ``CQLTrainer.train(resume=True)`` does for a single run. Starts
+            from epoch 1 when no member has a checkpoint.
+        """
+        cfg = self._cfg
+        self._start_time = time.time()
+        n_members = len(self._seeds)
+
+        final_metrics: list[dict[str, float]] = [{} for _ in range(n_members)]
+        last_ckpts: list[Path | None] = [None] * n_members
+        epoch_durations: list[float] = []
+        start_epoch = 1
+
+        step_metrics = StepMetricAccumulator(
+            self._metric_loggers,
+            _STEP_METRICS,
+            device=self._device,
+            log_names=_LOGGED_STEP_METRICS,
+        )
+
+        points = self._load_resume_points() if resume else None
+        if points is not None:
+            self._restore(points)
+            start_epoch = points[0].epoch + 1
+            epoch_durations = list(points[0].epoch_durations)
+            final_metrics = [dict(point.epoch_metrics) for point in points]
+            last_ckpts = [point.checkpoint_path for point in points]
+
+        for member, (member_cfg, event_logger) in enumerate(
+            zip(self._member_cfgs, self._training_event_loggers)
+        ):
+            event_logger.log_event(
+                level="INFO",
+                component="trainer",
+                event="run_start",
+                payload={
+                    "algorithm": cfg.algorithm,
+                    "experiment_name": cfg.logging.experiment_name,
+                    "seed": member_cfg.runtime.seed,
+                    "ensemble_seeds": self._seeds,
+                    "device_backend": cfg.device_meta.backend,
+                    "batch_size": cfg.batch_size,
+                    "gamma": cfg.gamma,
+                    "n_epochs": cfg.n_epochs,
+                    "n_actions": self._n_actions,
+                    "resumed_from": str(points[member].checkpoint_path) if points else None,
+                },
+            )
+
+        logger.info(
+            "Starting CQL ensemble training: members=%d epochs=%d batch_size=%d",
+            n_members,
+            cfg.n_epochs,
+            cfg.batch_size,
+        )
+
+        for epoch in range(start_epoch, cfg.n_epochs + 1):
+            epoch_started_at = time.time()
+
+            for batch in self._dataset.iter_member_batches(
+                cfg.batch_size, seeds=self._seeds, epoch=epoch
+            ):
+                step_metrics.update(
+                    self._training_step(batch), step=self._global_step, epoch=epoch
+                )
+
+            epoch_duration = time.time() - epoch_started_at
+            epoch_durations.append(epoch_duration)
+            member_means = step_metrics.end_epoch(step=self._global_step, epoch=epoch)
+
+            self._maybe_update_target(epoch)
+
+            is_last = epoch == cfg.n_epochs
+            for member, means in enumerate(member_means):
+                member_cfg = self._member_cfgs[member]
+                epoch_metrics = {
+                    "td_loss_mean": means["td_loss"],
+                    "cql_loss_mean": means["cql_loss"],
+                    "total_loss_mean": means["total_loss"],
+                }
+                final_metrics[member] = epoch_metrics
+                self._metric_loggers[member].log_epoch_summary(
+                    epoch, self._global_step, epoch_metrics
+                )
+                self._training_event_loggers[member].log_event(
+                    level="INFO",
+                    component="trainer",
+                    event="epoch_end",
+                    payload={
+                        "epoch": epoch,
+                        "global_step": self._global_step,
+                        "metrics": epoch_metrics,
+                    },
+                )
+
+                if should_checkpoint(epoch, member_cfg, is_last=is_last):
+                    last_ckpts[member] = self._ckpt_mgrs[member].save(
+                        self.member_state_dict(member),
+                        epoch=epoch,
+                        global_step=self._global_step,
+                        metrics=epoch_metrics,
+                        cfg=member_cfg,
+                        optimizer_state_dict=self._member_optimizer_state(member),
+                        training_state=build_training_state(
+                            self._metric_loggers[member],
+                            epoch_metrics=epoch_metrics,
+                            epoch_durations=epoch_durations,
+                            target_state_dict=self._member_target_state_dict(member),
+                        ),
+                    )
+                    self._training_event_loggers[member].log_event(
+                        level="INFO",
+                        component="checkpoint",
+                        event="saved",
+                        payload={
+                            "epoch": epoch,
+                            "global_step": self._global_step,
+                            "checkpoint_path": str(last_ckpts[member]),
+                        },
+                    )
+
+            for event_logger in self._runtime_event_loggers:
+                event_logger.log_event(
+                    level="INFO",
+                    component="runtime",
+                    event="epoch_runtime",
+                    payload={
+                        "epoch": epoch,
+                        "global_step": self._global_step,
+                        "epoch_elapsed_seconds": epoch_duration,
+                        "device_backend": cfg.device_meta.backend,
+                        "ensemble_size": n_members,
+                    },
+                )
+
+            if epoch % 10 == 0 or is_last:
+                logger.info(
+                    "Epoch %d/%d | total loss per seed: %s | steps=%d",
+                    epoch,
+                    cfg.n_epochs,
+                    ", ".join(
+                        f"{seed}={m['total_loss_mean']:.4f}"
+                        for seed, m in zip(self._seeds, final_metrics)
+                    ),
+                    self._global_step,
+                )
+
+        # Barrier for background checkpoint writes: member checkpoints are durable below.
+        for ckpt_mgr in self._ckpt_mgrs:
+            ckpt_mgr.close()
+        elapsed = time.time() - self._start_time
+        logger.info(
+            "CQL ensemble training complete: %d members, %d epochs, %d steps, %.1fs.",
+            n_members,
+            cfg.n_epochs,
+            self._global_step,
+            elapsed,
+        )
+
+        results = []
+        for member, member_cfg in enumerate(self._member_cfgs):
+            metrics = final_metrics[member]
+            td = metrics.get("td_loss_mean", float("nan"))
+            cql = metrics.get("cql_loss_mean", float("nan"))
+            total = metrics.get("total_loss_mean", float("nan"))
+
+            report_artifacts: dict[str, Any] | None = None
+            try:
+                artifacts = generate_training_report_artifacts(
+                    member_cfg,
+                    algorithm=cfg.algorithm,
+                    state_dim=self._dataset.state_dim,
+                    n_actions=self._n_actions,
+                    total_steps=self._global_step,
+                    elapsed_seconds=elapsed,
+                    final_metrics={
+                        "td_loss_mean": td,
+                        "cql_loss_mean": cql,
+                        "total_loss_mean": total,
+                    },
+                    checkpoint_path=last_ckpts[member],
+                    epoch_durations=epoch_durations,
+                    training_log_path=self._training_event_loggers[member].log_path,
+                    runtime_log_path=self._runtime_event_loggers[member].log_path,
+                )
+                report_artifacts = artifacts.to_dict()
+            except Exception:
+                logger.exception(
+                    "Failed to generate CQL reporting artifacts for seed %d.",
+                    member_cfg.runtime.seed,
+                )
+
+            self._training_event_loggers[member].log_event(
+                level="INFO",
+                component="trainer",
+                event="run_complete",
+                payload={
+                    "elapsed_seconds": elapsed,
+                    "total_steps": self._global_step,
+                    "checkpoint_path": str(last_ckpts[member]) if last_ckpts[member] else None,
+                    "report_artifact_dir": report_artifacts["artifact_dir"]
+                    if report_artifacts
+                    else None,
+                },
+            )
+            results.append(
+                CQLTrainingResult(
+                    n_epochs=cfg.n_epochs,
+                    total_steps=self._global_step,
+                    final_td_loss=td,
+                    final_cql_loss=cql,
+                    final_total_loss=total,
+                    checkpoint_path=last_ckpts[member],
+                    elapsed_seconds=elapsed,
+                    state_dim=self._dataset.state_dim,
+                    n_actions=self._n_actions,
+                    device_backend=cfg.device_meta.backend,
+                    report_artifacts=report_artifacts,
+                )
+            )
+        return results
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point for ``python -m mimic_sepsis_rl.training.ensemble``."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mimic_sepsis_rl.training.ensemble",
+        description="Train several seeded CQL runs in one vectorised process.",
+    )
+    parser.add_argument(
+        "--config",
+        default="configs/training/cql.yaml",
+        help="Path to the CQL training config YAML (default: configs/training/cql.yaml).",
+    )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        nargs="+",
+        required=True,
+        help="One seed per ensemble member.",
+    )
+    parser.add_argument(
+        "--device",
+        default=None,
+        help="Override the device in the config (auto, cuda, mps, cpu).",
+    )
+    parser.add_argument(
+        "--n-actions",
+        type=int,
+        default=25,
+        help="Number of discrete actions (default: 25).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue every member from its latest checkpoint.",
+    )
+    args = parser.parse_args(argv)
+
+    overrides: dict[str, Any] = {}
+    if args.device:
+        overrides["runtime"] = {"device": args.device}
+    cfg = load_training_config(Path(args.config), overrides=overrides or None)
+    if cfg.algorithm != "cql":
+        raise ValueError(
+            f"Ensemble training supports the 'cql' algorithm, got {cfg.algorithm!r}."
+        )
+
+    dataset = load_replay_dataset(cfg)
+    trainer = CQLEnsembleTrainer(cfg, dataset, seeds=args.seeds, n_actions=args.n_actions)
+    results = trainer.train(resume=args.resume)
+
+    print(
+        json.dumps(
+            {str(seed): result.to_dict() for seed, result in zip(args.seeds, results)},
+            indent=2,
+        )
+    )
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "ENSEMBLE_MODULE_VERSION",
+    "CQLEnsembleTrainer",
+    "member_training_config",
+]
@@ -93,11 +93,13 @@ class ResolvedExperiment:
         *,
         dry_run: bool = False,
         n_actions: int | None = None,
+        resume: bool = False,
     ) -> dict[str, Any]:
         registry = get_default_registry()
         request = AlgorithmRunRequest(
             dry_run=dry_run,
             n_actions=self.resolve_n_actions(n_actions),
+            resume=resume,
         )
         return registry.execute(self.definition.name, self.config, request)
 
@@ -214,6 +216,11 @@ def main(argv: list[str] | None = None) -> None:
         default=None,
         help="Override the discrete action count; defaults to dataset metadata.",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the latest checkpoint in the config's checkpoint_dir.",
+    )
     parser.add_argument(
         "--describe",
         action="store_true",
@@ -238,7 +245,11 @@ def main(argv: list[str] | None = None) -> None:
         print(json.dumps(resolved.to_dict(), indent=2))
         return
 
-    result = resolved.execute(dry_run=args.dry_run, n_actions=args.n_actions)
+    result = resolved.execute(
+        dry_run=args.dry_run,
+        n_actions=args.n_actions,
+        resume=args.resume,
+    )
     print(
         json.dumps(
             {
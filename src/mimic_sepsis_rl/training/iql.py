@@ -19,19 +19,29 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 from mimic_sepsis_rl.training.common import (
+    CompiledStep,
     EventLogger,
     MetricLogger,
     ReplayDataset,
+    ResumePoint,
+    StepMetricAccumulator,
     TransitionBatch,
+    as_state_batch,
+    build_adam,
     build_checkpoint_manager,
+    build_training_state,
+    greedy_action_probabilities,
     load_replay_dataset,
+    load_resume_point,
     set_global_seed,
     should_checkpoint,
+    soft_update_,
 )
 from mimic_sepsis_rl.training.config import (
     TrainingConfig,
@@ -59,6 +69,19 @@ _DEFAULT_TEMPERATURE: float = 3.0
 _DEFAULT_MAX_ADV_WEIGHT: float = 100.0
 _DEFAULT_GRAD_CLIP: float = 10.0
 
+# Per-step metrics, buffered on the device and written one record per step
+# every ``log_every_n_steps`` steps.
+_STEP_METRICS: tuple[str, ...] = (
+    "critic_loss",
+    "value_loss",
+    "actor_loss",
+    "total_loss",
+    "mean_q_dataset",
+    "mean_v_dataset",
+    "advantage_mean",
+    "advantage_std",
+)
+
 
 class PolicyNetwork(nn.Module):
     """Discrete actor that outputs action logits."""
@@ -186,18 +209,23 @@ class IQLPolicy:
     checkpoint_path: Path | None = None
 
     def select_action(self, state: list[float] | torch.Tensor) -> int:
-        if not isinstance(state, torch.Tensor):
-            state_tensor = torch.tensor(state, dtype=torch.float32, device=self.device)
-        else:
-            state_tensor = state.to(self.device)
-
-        if state_tensor.dim() == 1:
-            state_tensor = state_tensor.unsqueeze(0)
+        return int(self.select_actions(state)[0])
 
+    def select_actions(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Return the argmax actor action for every row of an ``[N, state_dim]`` batch."""
         self.policy_network.eval()
         with torch.no_grad():
-            logits = self.policy_network(state_tensor)
-        return int(logits.argmax(dim=1).item())
+            logits = self.policy_network(as_state_batch(states, device=self.device))
+        return logits.argmax(dim=1).cpu().numpy()
+
+    def action_probabilities(self, states: np.ndarray | torch.Tensor) -> np.ndarray:
+        """Return the greedy actor as one-hot probabilities.
+
+        The actor's softmax is a training-time object; held-out evaluation
+        scores the same greedy policy that :meth:`select_action` returns.
+        """
+        actions = torch.from_numpy(self.select_actions(states))
+        return greedy_action_probabilities(actions, self.n_actions)
 
 
 class IQLTrainer:
@@ -214,6 +242,7 @@ class IQLTrainer:
         self._dataset = dataset
         self._device = cfg.device
         self._n_actions = n_actions
+        self._metric_dtype = torch.float32 if self._device.type == "mps" else torch.float64
 
         extra = cfg.extra
         policy_hidden_sizes: list[int] = extra.get(
@@ -257,17 +286,35 @@ class IQLTrainer:
             hidden_sizes=policy_hidden_sizes,
         ).to(self._device)
 
-        self._critic_optimizer = torch.optim.Adam(
+        self._critic_optimizer = build_adam(
             list(self._q1.parameters()) + list(self._q2.parameters()),
             lr=self._critic_lr,
+            device=self._device,
         )
-        self._value_optimizer = torch.optim.Adam(
+        self._value_optimizer = build_adam(
             self._value_network.parameters(),
             lr=self._value_lr,
+            device=self._device,
         )
-        self._actor_optimizer = torch.optim.Adam(
+        self._actor_optimizer = build_adam(
             self._policy_network.parameters(),
             lr=self._actor_lr,
+            device=self._device,
+        )
+        self._compute_critic_loss = CompiledStep(
+            self._critic_loss,
+            enabled=cfg.runtime.compile,
+            device_meta=cfg.device_meta,
+        )
+        self._compute_value_loss = CompiledStep(
+            self._value_loss,
+            enabled=cfg.runtime.compile,
+            device_meta=cfg.device_meta,
+        )
+        self._compute_actor_loss = CompiledStep(
+            self._actor_loss,
+            enabled=cfg.runtime.compile,
+            device_meta=cfg.device_meta,
         )
 
         self._checkpoint_manager = build_checkpoint_manager(cfg)
@@ -301,25 +348,68 @@ class IQLTrainer:
             return
 
         tau = min(max(self._polyak_tau, 0.0), 1.0)
-        for online_param, target_param in zip(
-            self._q1.parameters(),
-            self._target_q1.parameters(),
-        ):
-            target_param.data.mul_(1.0 - tau)
-            target_param.data.add_(tau * online_param.data)
-        for online_param, target_param in zip(
-            self._q2.parameters(),
-            self._target_q2.parameters(),
-        ):
-            target_param.data.mul_(1.0 - tau)
-            target_param.data.add_(tau * online_param.data)
-
-    def _training_step(self, batch: TransitionBatch) -> dict[str, float]:
+        soft_update_(self._target_q1, self._q1, tau)
+        soft_update_(self._target_q2, self._q2, tau)
+
+    def _training_step(self, batch: TransitionBatch) -> dict[str, torch.Tensor]:
         self._q1.train()
         self._q2.train()
         self._value_network.train()
         self._policy_network.train()
 
+        critic_loss = self._compute_critic_loss(batch)
+
+        self._critic_optimizer.zero_grad()
+        critic_loss.backward()
+        if self._grad_clip > 0:
+            nn.utils.clip_grad_norm_(
+                list(self._q1.parameters()) + list(self._q2.parameters()),
+                self._grad_clip,
+            )
+        self._critic_optimizer.step()
+
+        value_loss, target_q, values, advantages = self._compute_value_loss(batch)
+
+        self._value_optimizer.zero_grad()
+        value_loss.backward()
+        if self._grad_clip > 0:
+            nn.utils.clip_grad_norm_(self._value_network.parameters(), self._grad_clip)
+        self._value_optimizer.step()
+
+        actor_loss = self._compute_actor_loss(batch, target_q)
+
+        self._actor_optimizer.zero_grad()
+        actor_loss.backward()
+        if self._grad_clip > 0:
+            nn.utils.clip_grad_norm_(
+                self._policy_network.parameters(),
+                self._grad_clip,
+            )
+        self._actor_optimizer.step()
+
+        self._global_step += 1
+        self._update_target_networks()
+
+        return {
+            "critic_loss": critic_loss.detach(),
+            "value_loss": value_loss.detach(),
+            "actor_loss": actor_loss.detach(),
+            # Summed in float64 (except on MPS) like the former host-side float sum.
+            "total_loss": (
+                critic_loss.detach().to(self._metric_dtype)
+                + value_loss.detach().to(self._metric_dtype)
+                + actor_loss.detach().to(self._metric_dtype)
+            ),
+            "mean_q_dataset": target_q.mean(),
+            "mean_v_dataset": values.detach().mean(),
+            "advantage_mean": advantages.detach().mean(),
+            "advantage_std": advantages.detach().std(unbiased=False),
+        }
+
+    # Each phase reads the networks updated by the previous optimiser step, so
+    # the three losses are separate ``torch.compile`` regions.
+
+    def _critic_loss(self, batch: TransitionBatch) -> torch.Tensor:
         with torch.no_grad():
             next_values = self._value_network(batch.next_states).squeeze(1)
             critic_targets = (
@@ -330,20 +420,14 @@ class IQLTrainer:
         q2_values = self._q2(batch.states)
         q1_taken = q1_values.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
         q2_taken = q2_values.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
-        critic_loss = F.mse_loss(q1_taken, critic_targets) + F.mse_loss(
+        return F.mse_loss(q1_taken, critic_targets) + F.mse_loss(
             q2_taken,
             critic_targets,
         )
 
-        self._critic_optimizer.zero_grad()
-        critic_loss.backward()
-        if self._grad_clip > 0:
-            nn.utils.clip_grad_norm_(
-                list(self._q1.parameters()) + list(self._q2.parameters()),
-                self._grad_clip,
-            )
-        self._critic_optimizer.step()
-
+    def _value_loss(
+        self, batch: TransitionBatch
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
         with torch.no_grad():
             target_q1_values = self._target_q1(batch.states)
             target_q2_values = self._target_q2(batch.states)
@@ -359,14 +443,9 @@ class IQLTrainer:
 
         values = self._value_network(batch.states).squeeze(1)
         advantages = target_q - values
-        value_loss = expectile_loss(advantages, self._expectile)
-
-        self._value_optimizer.zero_grad()
-        value_loss.backward()
-        if self._grad_clip > 0:
-            nn.utils.clip_grad_norm_(self._value_network.parameters(), self._grad_clip)
-        self._value_optimizer.step()
+        return expectile_loss(advantages, self._expectile), target_q, values, advantages
 
+    def _actor_loss(self, batch: TransitionBatch, target_q: torch.Tensor) -> torch.Tensor:
         with torch.no_grad():
             detached_values = self._value_network(batch.states).squeeze(1)
             actor_advantages = target_q - detached_values
@@ -377,34 +456,26 @@ class IQLTrainer:
         logits = self._policy_network(batch.states)
         log_probs = F.log_softmax(logits, dim=1)
         action_log_probs = log_probs.gather(1, batch.actions.unsqueeze(1)).squeeze(1)
-        actor_loss = -(actor_weights * action_log_probs).mean()
-
-        self._actor_optimizer.zero_grad()
-        actor_loss.backward()
-        if self._grad_clip > 0:
-            nn.utils.clip_grad_norm_(
-                self._policy_network.parameters(),
-                self._grad_clip,
-            )
-        self._actor_optimizer.step()
-
-        self._global_step += 1
-        self._update_target_networks()
-
-        return {
-            "critic_loss": critic_loss.item(),
-            "value_loss": value_loss.item(),
-            "actor_loss": actor_loss.item(),
-            "total_loss": critic_loss.item()
-            + value_loss.item()
-            + actor_loss.item(),
-            "mean_q_dataset": target_q.mean().item(),
-            "mean_v_dataset": values.mean().item(),
-            "advantage_mean": advantages.mean().item(),
-            "advantage_std": advantages.std(unbiased=False).item(),
-        }
-
-    def train(self) -> IQLTrainingResult:
+        return -(actor_weights * action_log_probs).mean()
+
+    def _restore(self, point: ResumePoint) -> None:
+        """Load networks, optimizers, step counter and RNG state from *point*."""
+        model_state = point.payload["model_state_dict"]
+        self._q1.load_state_dict(model_state["q1"])
+        self._q2.load_state_dict(model_state["q2"])
+        self._target_q1.load_state_dict(model_state["target_q1"])
+        self._target_q2.load_state_dict(model_state["target_q2"])
+        self._value_network.load_state_dict(model_state["value_network"])
+        self._policy_network.load_state_dict(model_state["policy_network"])
+        optimizer_state = point.payload["optimizer_state_dict"]
+        self._critic_optimizer.load_state_dict(optimizer_state["critic"])
+        self._value_optimizer.load_state_dict(optimizer_state["value"])
+        self._actor_optimizer.load_state_dict(optimizer_state["actor"])
+        self._global_step = point.global_step
+        point.restore_rng_state()
+
+    def train(self, *, resume: bool = False) -> IQLTrainingResult:
+        """Run the IQL training loop, optionally resuming the latest checkpoint."""
         cfg = self._cfg
         set_global_seed(cfg.runtime.seed)
         self._start_time = time.time()
@@ -415,11 +486,32 @@ class IQLTrainer:
         final_total_loss = float("nan")
         last_checkpoint: Path | None = None
 
-        critic_losses: list[float] = []
-        value_losses: list[float] = []
-        actor_losses: list[float] = []
-        total_losses: list[float] = []
+        step_metrics = StepMetricAccumulator(
+            self._metric_logger,
+            _STEP_METRICS,
+            device=self._device,
+        )
         epoch_durations: list[float] = []
+        start_epoch = 1
+
+        point = (
+            load_resume_point(
+                self._checkpoint_manager,
+                self._metric_logger,
+                device=self._device,
+            )
+            if resume
+            else None
+        )
+        if point is not None:
+            self._restore(point)
+            start_epoch = point.epoch + 1
+            epoch_durations = list(point.epoch_durations)
+            final_critic_loss = point.epoch_metrics["critic_loss_mean"]
+            final_value_loss = point.epoch_metrics["value_loss_mean"]
+            final_actor_loss = point.epoch_metrics["actor_loss_mean"]
+            final_total_loss = point.epoch_metrics["total_loss_mean"]
+            last_checkpoint = point.checkpoint_path
 
         self._training_event_logger.log_event(
             level="INFO",
@@ -434,6 +526,7 @@ class IQLTrainer:
                 "gamma": cfg.gamma,
                 "n_epochs": cfg.n_epochs,
                 "n_actions": self._n_actions,
+                "resumed_from": str(point.checkpoint_path) if point else None,
             },
         )
 
@@ -445,39 +538,28 @@ class IQLTrainer:
             self._expectile,
         )
 
-        for epoch in range(1, cfg.n_epochs + 1):
+        for epoch in range(start_epoch, cfg.n_epochs + 1):
             epoch_started_at = time.time()
-            critic_losses.clear()
-            value_losses.clear()
-            actor_losses.clear()
-            total_losses.clear()
 
             for batch in self._dataset.iter_batches(
                 cfg.batch_size,
                 shuffle=True,
                 epoch=epoch,
             ):
-                step_metrics = self._training_step(batch)
-                critic_losses.append(step_metrics["critic_loss"])
-                value_losses.append(step_metrics["value_loss"])
-                actor_losses.append(step_metrics["actor_loss"])
-                total_losses.append(step_metrics["total_loss"])
-
-                for name, value in step_metrics.items():
-                    self._metric_logger.log_scalar(
-                        name,
-                        value,
-                        step=self._global_step,
-                        epoch=epoch,
-                    )
+                step_metrics.update(
+                    self._training_step(batch),
+                    step=self._global_step,
+                    epoch=epoch,
+                )
 
             epoch_duration = time.time() - epoch_started_at
             epoch_durations.append(epoch_duration)
+            means = step_metrics.end_epoch(step=self._global_step, epoch=epoch)
             epoch_metrics = {
-                "critic_loss_mean": sum(critic_losses) / max(len(critic_losses), 1),
-                "value_loss_mean": sum(value_losses) / max(len(value_losses), 1),
-                "actor_loss_mean": sum(actor_losses) / max(len(actor_losses), 1),
-                "total_loss_mean": sum(total_losses) / max(len(total_losses), 1),
+                "critic_loss_mean": means["critic_loss"],
+                "value_loss_mean": means["value_loss"],
+                "actor_loss_mean": means["actor_loss"],
+                "total_loss_mean": means["total_loss"],
             }
             self._metric_logger.log_epoch_summary(
                 epoch,
@@ -538,6 +620,11 @@ class IQLTrainer:
                         "value": self._value_optimizer.state_dict(),
                         "actor": self._actor_optimizer.state_dict(),
                     },
+                    training_state=build_training_state(
+                        self._metric_logger,
+                        epoch_metrics=epoch_metrics,
+                        epoch_durations=epoch_durations,
+                    ),
                 )
                 self._training_event_logger.log_event(
                     level="INFO",
@@ -555,6 +642,8 @@ class IQLTrainer:
             final_actor_loss = epoch_metrics["actor_loss_mean"]
             final_total_loss = epoch_metrics["total_loss_mean"]
 
+        # Barrier for background checkpoint writes: last_checkpoint is durable below.
+        self._checkpoint_manager.close()
         elapsed_seconds = time.time() - self._start_time
         logger.info(
             "IQL training complete: %d epochs, %d steps, %.1fs elapsed.",
@@ -828,6 +917,11 @@ def main(argv: list[str] | None = None) -> None:
         default=25,
         help="Number of discrete actions (default: 25).",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the latest checkpoint in checkpoint_dir.",
+    )
     args = parser.parse_args(argv)
 
     config_path = Path(args.config)
@@ -853,7 +947,7 @@ def main(argv: list[str] | None = None) -> None:
 
     dataset = load_replay_dataset(cfg)
     trainer = IQLTrainer(cfg, dataset, n_actions=args.n_actions)
-    result = trainer.train()
+    result = trainer.train(resume=args.resume)
     print(json.dumps(result.to_dict(), indent=2))
     sys.exit(0)
 
@@ -53,6 +53,7 @@ class AlgorithmRunRequest:
 
     dry_run: bool = False
     n_actions: int | None = None
+    resume: bool = False
 
 
 @dataclass(frozen=True)
@@ -175,7 +176,7 @@ def _run_cql_experiment(
 
     dataset = load_replay_dataset(cfg)
     trainer = CQLTrainer(cfg, dataset, n_actions=n_actions)
-    return trainer.train().to_dict()
+    return trainer.train(resume=request.resume).to_dict()
 
 
 def _run_bcq_experiment(
@@ -197,7 +198,7 @@ def _run_bcq_experiment(
 
     dataset = load_replay_dataset(cfg)
     trainer = BCQTrainer(cfg, dataset, n_actions=n_actions)
-    return trainer.train().to_dict()
+    return trainer.train(resume=request.resume).to_dict()
 
 
 def _run_iql_experiment(
@@ -219,7 +220,7 @@ def _run_iql_experiment(
 
     dataset = load_replay_dataset(cfg)
     trainer = IQLTrainer(cfg, dataset, n_actions=n_actions)
-    return trainer.train().to_dict()
+    return trainer.train(resume=request.resume).to_dict()
 
 
 def build_default_registry() -> AlgorithmRegistry:
@@ -0,0 +1,220 @@
+"""
+Training-step throughput benchmark: eager versus ``torch.compile``.
+
+Builds a synthetic replay export, constructs the requested trainer twice
+(``runtime.compile`` off and on, same seed) and times
+``_training_step`` on identical batches. Warm-up steps, which include
+compilation for the compiled trainer, are excluded from the timing and
+reported separately. Both runs use the fused-Adam / foreach fast path, so
+the comparison isolates the effect of compilation.
+
+Usage
+-----
+    python -m mimic_sepsis_rl.training.step_benchmark --algorithm cql --device cpu
+    python -m mimic_sepsis_rl.training.step_benchmark --algorithm iql --steps 500
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial eager vs compiled step benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import torch
+
+from mimic_sepsis_rl.training.common import ReplayDataset
+from mimic_sepsis_rl.training.config import build_training_config
+
+logger = logging.getLogger(__name__)
+
+_ALGORITHMS = ("cql", "bcq", "iql")
+
+
+def _trainer_class(algorithm: str) -> type:
+    if algorithm == "cql":
+        from mimic_sepsis_rl.training.cql import CQLTrainer
+
+        return CQLTrainer
+    if algorithm == "bcq":
+        from mimic_sepsis_rl.training.bcq import BCQTrainer
+
+        return BCQTrainer
+    if algorithm == "iql":
+        from mimic_sepsis_rl.training.iql import IQLTrainer
+
+        return IQLTrainer
+    raise ValueError(f"Unknown algorithm {algorithm!r}; expected one of {_ALGORITHMS}.")
+
+
+def _write_synthetic_replay(
+    path: Path,
+    *,
+    n_transitions: int,
+    state_dim: int,
+    n_actions: int,
+    seed: int,
+) -> None:
+    generator = torch.Generator().manual_seed(seed)
+    states = torch.randn(n_transitions, state_dim, generator=generator)
+    next_states = torch.randn(n_transitions, state_dim, generator=generator)
+    columns: dict[str, Any] = {
+        "action": torch.randint(0, n_actions, (n_transitions,), generator=generator).tolist(),
+        "reward": torch.randn(n_transitions, generator=generator).tolist(),
+        "done": (torch.rand(n_transitions, generator=generator) < 0.1).float().tolist(),
+    }
+    for j in range(state_dim):
+        columns[f"s_f{j:03d}"] = states[:, j].tolist()
+        columns[f"ns_f{j:03d}"] = next_states[:, j].tolist()
+    pl.DataFrame(columns).write_parquet(path)
+
+
+def _time_steps(
+    trainer: Any,
+    batches: list,
+    *,
+    warmup: int,
+    steps: int,
+    device: torch.device,
+) -> tuple[float, float]:
+    """Return (warm-up seconds, timed seconds) for *steps* training steps."""
+    stream = cycle(batches)
+    start = time.perf_counter()
+    for batch in islice(stream, warmup):
+        trainer._training_step(batch)
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    warmup_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch in islice(stream, steps):
+        metrics = trainer._training_step(batch)
+    # Step metrics are device tensors; reading one waits for queued work.
+    float(next(iter(metrics.values())))
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return warmup_s, time.perf_counter() - start
+
+
+def run_step_benchmark(
+    *,
+    algorithm: str,
+    device: str = "auto",
+    steps: int = 300,
+    warmup: int = 20,
+    batch_size: int = 256,
+    state_dim: int = 48,
+    n_actions: int = 25,
+    hidden_sizes: list[int] | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Time eager and compiled training steps and return a JSON-able report."""
+    trainer_cls = _trainer_class(algorithm)
+    hidden_sizes = hidden_sizes or [256, 256]
+    n_transitions = batch_size * 32
+
+    with tempfile.TemporaryDirectory(prefix="step_benchmark_") as tmp:
+        root = Path(tmp)
+        replay_path = root / "replay_train.parquet"
+        _write_synthetic_replay(
+            replay_path,
+            n_transitions=n_transitions,
+            state_dim=state_dim,
+            n_actions=n_actions,
+            seed=seed,
+        )
+
+        report: dict[str, Any] = {
+            "algorithm": algorithm,
+            "torch_version": torch.__version__,
+            "batch_size": batch_size,
+            "state_dim": state_dim,
+            "hidden_sizes": hidden_sizes,
+            "steps": steps,
+            "warmup_steps": warmup,
+        }
+        for mode in ("eager", "compiled"):
+            cfg = build_training_config(
+                algorithm=algorithm,
+                device=device,
+                dataset_path=replay_path,
+                batch_size=batch_size,
+                seed=seed,
+                compile=mode == "compiled",
+                checkpoint_dir=root / mode / "checkpoints",
+                log_dir=root / mode / "runs",
+                experiment_name=f"{algorithm}_{mode}",
+                extra={"hidden_sizes": hidden_sizes},
+            )
+            dataset = ReplayDataset(replay_path, device=cfg.device, seed=seed)
+            batches = list(dataset.iter_batches(batch_size, shuffle=True, epoch=0))
+            torch.manual_seed(seed)
+            trainer = trainer_cls(cfg, dataset, n_actions=n_actions)
+            warmup_s, timed_s = _time_steps(
+                trainer, batches, warmup=warmup, steps=steps, device=cfg.device
+            )
+            report["device"] = str(cfg.device)
+            report[mode] = {
+                "compile_enabled": cfg.device_meta.compile_enabled,
+                "compile_fallback_reason": cfg.device_meta.compile_fallback_reason,
+                "warmup_seconds": round(warmup_s, 3),
+                "steps_per_second": round(steps / timed_s, 2),
+                "ms_per_step": round(1e3 * timed_s / steps, 4),
+            }
+
+    report["speedup"] = round(
+        report["compiled"]["steps_per_second"] / report["eager"]["steps_per_second"], 3
+    )
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point for ``python -m mimic_sepsis_rl.training.step_benchmark``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mimic_sepsis_rl.training.step_benchmark",
+        description="Compare eager and torch.compile'd training-step throughput.",
+    )
+    parser.add_argument("--algorithm", choices=_ALGORITHMS, default="cql")
+    parser.add_argument("--device", default="auto", help="auto, cuda, mps or cpu.")
+    parser.add_argument("--steps", type=int, default=300, help="Timed steps per mode.")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed warm-up steps.")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--state-dim", type=int, default=48)
+    parser.add_argument(
+        "--hidden-sizes",
+        type=int,
+        nargs="+",
+        default=[256, 256],
+        help="Hidden layer widths (default: 256 256).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run_step_benchmark(
+        algorithm=args.algorithm,
+        device=args.device,
+        steps=args.steps,
+        warmup=args.warmup,
+        batch_size=args.batch_size,
+        state_dim=args.state_dim,
+        hidden_sizes=args.hidden_sizes,
+        seed=args.seed,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ["run_step_benchmark"]
@@ -0,0 +1,749 @@
+"""
+Parallel hyper-parameter and ablation sweeps over the algorithm registry.
+
+``AlgorithmRegistry.execute`` and the experiment runner launch one config at
+a time. This module expands a grid (for example ``cql_alpha x lr x
+runtime.seed``) or a tuple of :class:`~mimic_sepsis_rl.evaluation.ablations.AblationPlan`
+into :class:`SweepRun` entries and executes them on a local process pool.
+
+Each run is keyed by a hash of its fully merged config. The merged config is
+written to ``<output_dir>/<algorithm>_<hash>/config.yaml``, with the
+checkpoint and log directories redirected into the same run directory, so
+:func:`~mimic_sepsis_rl.training.comparison.build_run_artifact` can load a
+finished run like any other. A ``_COMPLETE.json`` marker is written when a
+run finishes; re-launching the same sweep skips every run whose marker
+matches its hash, and runs that were interrupted continue from their latest
+checkpoint, so an interrupted sweep resumes where it stopped. With
+``skip_completed=False`` a finished run is reset (marker, checkpoints and
+logs removed) and trained again from epoch 1.
+
+Workers are started with ``spawn`` and each caps its intra-op thread pool
+with ``torch.set_num_threads(threads_per_worker)``. By default the pool has
+``os.cpu_count() // threads_per_worker`` workers, which keeps a many-core
+CPU host busy with small trainers instead of letting one trainer
+oversubscribe every core.
+
+Usage
+-----
+    python -m mimic_sepsis_rl.training.sweep --algorithm cql \\
+        --grid cql_alpha=0.1,1.0,5.0 --grid lr=0.0001,0.0003 \\
+        --grid runtime.seed=0,1,2 --device cpu --threads-per-worker 4 \\
+        --output-dir sweeps/cql --report sweeps/cql/comparison.json
+
+    from mimic_sepsis_rl.training.sweep import expand_grid, run_sweep
+    runs = expand_grid("cql", {"cql_alpha": [0.1, 1.0], "runtime.seed": [0, 1]})
+    result = run_sweep(runs, output_dir="sweeps/cql", threads_per_worker=2)
+    report = result.comparison_report()
+
+Version history
+---------------
+v1.0.0  2026-10-18  Initial grid / ablation sweep scheduler.
+v1.1.0  2026-10-18  Interrupted runs resume from their latest checkpoint.
+v1.2.0  2026-10-18  Re-running a completed run starts fresh instead of resuming its final checkpoint.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Final, Iterable, Mapping, Sequence
+
+import polars as pl
+import yaml
+
+from mimic_sepsis_rl.training.common import set_global_seed
+from mimic_sepsis_rl.training.comparison import (
+    ComparisonReport,
+    aggregate_comparison_report,
+    build_run_artifact,
+)
+from mimic_sepsis_rl.training.config import load_training_config
+from mimic_sepsis_rl.training.registry import (
+    AlgorithmRegistry,
+    AlgorithmRunRequest,
+    _deep_merge,
+    _load_yaml_mapping,
+    get_default_registry,
+)
+
+if TYPE_CHECKING:
+    from mimic_sepsis_rl.evaluation.ablations import AblationPlan
+
+logger = logging.getLogger(__name__)
+
+SWEEP_MODULE_VERSION: Final[str] = "1.1.0"
+
+_CONFIG_FILENAME: Final[str] = "config.yaml"
+_COMPLETE_MARKER: Final[str] = "_COMPLETE.json"
+_RESULTS_FILENAME: Final[str] = "sweep_results.jsonl"
+_HASH_LENGTH: Final[int] = 12
+
+STATUS_COMPLETED: Final[str] = "completed"
+STATUS_SKIPPED: Final[str] = "skipped"
+STATUS_FAILED: Final[str] = "failed"
+
+
+# ---------------------------------------------------------------------------
+# Sweep definitions
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SweepRun:
+    """One launchable run: an algorithm, a base config and nested overrides."""
+
+    algorithm: str
+    label: str
+    overrides: dict[str, Any] = field(default_factory=dict)
+    request: AlgorithmRunRequest = field(default_factory=AlgorithmRunRequest)
+    config_path: Path | None = None
+
+
+def _nest(dotted_key: str, value: Any) -> dict[str, Any]:
+    """Turn ``"runtime.seed", 3`` into ``{"runtime": {"seed": 3}}``."""
+    parts = dotted_key.split(".")
+    if not all(parts):
+        raise ValueError(f"Invalid sweep key {dotted_key!r}.")
+    nested: dict[str, Any] = {parts[-1]: value}
+    for part in reversed(parts[:-1]):
+        nested = {part: nested}
+    return nested
+
+
+def _grid_points(
+    grid: Mapping[str, Sequence[Any]] | None,
+) -> list[tuple[str, dict[str, Any]]]:
+    """Return ``(label, nested overrides)`` for every point of *grid*."""
+    if not grid:
+        return [("", {})]
+    keys = list(grid)
+    for key in keys:
+        if len(grid[key]) == 0:
+            raise ValueError(f"Sweep grid axis {key!r} has no values.")
+
+    points: list[tuple[str, dict[str, Any]]] = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        overrides: dict[str, Any] = {}
+        for key, value in zip(keys, values):
+            overrides = _deep_merge(overrides, _nest(key, value))
+        label = ",".join(f"{key}={value}" for key, value in zip(keys, values))
+        points.append((label, overrides))
+    return points
+
+
+def expand_grid(
+    algorithm: str,
+    grid: Mapping[str, Sequence[Any]],
+    *,
+    base_overrides: Mapping[str, Any] | None = None,
+    config_path: str | Path | None = None,
+    n_actions: int | None = None,
+) -> tuple[SweepRun, ...]:
+    """Expand the Cartesian product of *grid* into sweep runs.
+
+    Grid keys are dotted config paths: top-level algorithm extras such as
+    ``cql_alpha`` or ``lr``, or nested keys such as ``runtime.seed``.
+    """
+    base = dict(base_overrides or {})
+    request = AlgorithmRunRequest(n_actions=n_actions)
+    resolved_config = Path(config_path) if config_path is not None else None
+    return tuple(
+        SweepRun(
+            algorithm=algorithm,
+            label=label or algorithm,
+            overrides=_deep_merge(base, overrides),
+            request=request,
+            config_path=resolved_config,
+        )
+        for label, overrides in _grid_points(grid)
+    )
+
+
+def expand_ablation_plans(
+    algorithm: str,
+    plans: Iterable["AblationPlan"],
+    *,
+    variant_overrides: Mapping[str, Mapping[str, Any]] | None = None,
+    grid: Mapping[str, Sequence[Any]] | None = None,
+    base_overrides: Mapping[str, Any] | None = None,
+    config_path: str | Path | None = None,
+    n_actions: int | None = None,
+) -> tuple[SweepRun, ...]:
+    """Expand ablation plans (optionally crossed with *grid*) into sweep runs.
+
+    Reward, action, timestep and feature ablations change the replay export,
+    not the trainer, so *variant_overrides* maps a ``variant_id`` to the
+    config overrides that select its export (typically ``dataset_path`` and
+    ``dataset_meta_path``). The variant itself is recorded under the
+    ``ablation`` config key, which keeps its provenance in the run config
+    and gives every variant a distinct config hash. Run labels start with
+    the ``variant_id`` so :meth:`SweepResult.metrics_by_label` feeds
+    :meth:`AblationRegistry.build_report` directly.
+    """
+    base = dict(base_overrides or {})
+    per_variant = variant_overrides or {}
+    request = AlgorithmRunRequest(n_actions=n_actions)
+    resolved_config = Path(config_path) if config_path is not None else None
+
+    runs: list[SweepRun] = []
+    for plan in plans:
+        variant_id = plan.variant.variant_id
+        variant_base = _deep_merge(base, dict(per_variant.get(variant_id, {})))
+        variant_base = _deep_merge(variant_base, {"ablation": plan.variant.to_dict()})
+        for label, overrides in _grid_points(grid):
+            runs.append(
+                SweepRun(
+                    algorithm=algorithm,
+                    label=f"{variant_id},{label}" if label else variant_id,
+                    overrides=_deep_merge(variant_base, overrides),
+                    request=request,
+                    config_path=resolved_config,
+                )
+            )
+    return tuple(runs)
+
+
+# ---------------------------------------------------------------------------
+# Planning: merged configs and config hashes
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class PlannedRun:
+    """A sweep run with its merged config, config hash and run directory."""
+
+    run: SweepRun
+    config_hash: str
+    run_dir: Path
+    config: dict[str, Any]
+
+    @property
+    def config_path(self) -> Path:
+        return self.run_dir / _CONFIG_FILENAME
+
+    @property
+    def marker_path(self) -> Path:
+        return self.run_dir / _COMPLETE_MARKER
+
+    def is_complete(self) -> bool:
+        """Return True when a completion marker for this exact hash exists."""
+        if not self.marker_path.exists():
+            return False
+        try:
+            marker = json.loads(self.marker_path.read_text())
+        except json.JSONDecodeError:
+            return False
+        return marker.get("config_hash") == self.config_hash
+
+    def reset(self) -> None:
+        """Remove the completion marker, checkpoints and logs of a finished run."""
+        for key, dir_key in (("checkpoint", "checkpoint_dir"), ("logging", "log_dir")):
+            shutil.rmtree(self.config[key][dir_key], ignore_errors=True)
+        self.marker_path.unlink(missing_ok=True)
+
+    def write_config(self) -> Path:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        with self.config_path.open("w") as handle:
+            yaml.safe_dump(self.config, handle, sort_keys=True)
+        return self.config_path
+
+
+def compute_config_hash(
+    algorithm: str,
+    config: Mapping[str, Any],
+    *,
+    n_actions: int | None = None,
+    dry_run: bool = False,
+) -> str:
+    """Return a short stable hash of a merged config mapping.
+
+    Checkpoint and log directories are excluded: the sweep derives them from
+    the hash, and they do not change what the run computes.
+    """
+    hashed = _deep_merge(dict(config), {})
+    for section, key in (("checkpoint", "checkpoint_dir"), ("logging", "log_dir")):
+        if isinstance(hashed.get(section), dict):
+            hashed[section] = {k: v for k, v in hashed[section].items() if k != key}
+    payload = json.dumps(
+        {
+            "algorithm": algorithm,
+            "config": hashed,
+            "n_actions": n_actions,
+            "dry_run": dry_run,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:_HASH_LENGTH]
+
+
+def plan_sweep(
+    runs: Iterable[SweepRun],
+    *,
+    output_dir: str | Path,
+    registry: AlgorithmRegistry | None = None,
+) -> tuple[PlannedRun, ...]:
+    """Merge every run into its base config and assign hashed run directories."""
+    registry = registry or get_default_registry()
+    root = Path(output_dir)
+
+    planned: list[PlannedRun] = []
+    seen: dict[str, str] = {}
+    for run in runs:
+        registry.require(run.algorithm)
+        base_path = registry.resolve_config_path(run.algorithm, config_path=run.config_path)
+        merged = _deep_merge(_load_yaml_mapping(base_path), run.overrides)
+        if str(merged.get("algorithm", run.algorithm)) != run.algorithm:
+            raise ValueError(
+                f"Sweep run {run.label!r} targets {run.algorithm!r} but its config "
+                f"{base_path} declares algorithm {merged.get('algorithm')!r}."
+            )
+        merged["algorithm"] = run.algorithm
+
+        config_hash = compute_config_hash(
+            run.algorithm,
+            merged,
+            n_actions=run.request.n_actions,
+            dry_run=run.request.dry_run,
+        )
+        if config_hash in seen:
+            raise ValueError(
+                f"Sweep runs {seen[config_hash]!r} and {run.label!r} resolve to "
+                "the same config."
+            )
+        seen[config_hash] = run.label
+
+        run_dir = root / f"{run.algorithm}_{config_hash}"
+        merged = _deep_merge(
+            merged,
+            {
+                "checkpoint": {"checkpoint_dir": str(run_dir / "checkpoints")},
+                "logging": {"log_dir": str(run_dir / "runs")},
+            },
+        )
+        planned.append(
+            PlannedRun(run=run, config_hash=config_hash, run_dir=run_dir, config=merged)
+        )
+    return tuple(planned)
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+def _init_worker(threads_per_worker: int) -> None:
+    """Process-pool initializer: cap torch's intra-op thread pool."""
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+
+
+def _execute_planned_run(
+    algorithm: str,
+    config_path: str,
+    config_hash: str,
+    label: str,
+    request: AlgorithmRunRequest,
+) -> dict[str, Any]:
+    """Train one planned run and write its completion marker.
+
+    Runs in a pool worker, so it only takes picklable arguments and
+    re-resolves the algorithm through the default registry. The global seed
+    is set before the trainer builds its networks, so a run's result does
+    not depend on which worker, or which earlier run, it followed.
+    """
+    start = time.perf_counter()
+    cfg = load_training_config(config_path)
+    set_global_seed(cfg.runtime.seed)
+    # The run directory is private to this config hash, so without a
+    # completion marker any checkpoint in it comes from an interrupted
+    # attempt at this very run.
+    marker_path = Path(config_path).parent / _COMPLETE_MARKER
+    request = replace(request, resume=not request.dry_run and not marker_path.exists())
+    result = get_default_registry().execute(algorithm, cfg, request)
+    elapsed = time.perf_counter() - start
+
+    marker = {
+        "config_hash": config_hash,
+        "algorithm": algorithm,
+        "label": label,
+        "elapsed_seconds": round(elapsed, 3),
+        "result": result,
+    }
+    tmp_path = marker_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(marker, indent=2, default=str))
+    tmp_path.replace(marker_path)
+    return marker
+
+
+@dataclass(frozen=True)
+class SweepRecord:
+    """Outcome of one sweep run."""
+
+    label: str
+    algorithm: str
+    config_hash: str
+    run_dir: Path
+    config_path: Path
+    overrides: dict[str, Any]
+    status: str
+    elapsed_seconds: float | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in (STATUS_COMPLETED, STATUS_SKIPPED)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "label": self.label,
+            "algorithm": self.algorithm,
+            "config_hash": self.config_hash,
+            "run_dir": str(self.run_dir),
+            "config_path": str(self.config_path),
+            "overrides": self.overrides,
+            "status": self.status,
+            "elapsed_seconds": self.elapsed_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _numeric_result_fields(result: Mapping[str, Any] | None) -> dict[str, float]:
+    if not result:
+        return {}
+    return {
+        key: float(value)
+        for key, value in result.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """Results table for one sweep invocation."""
+
+    output_dir: Path
+    records: tuple[SweepRecord, ...]
+
+    @property
+    def n_completed(self) -> int:
+        return sum(record.status == STATUS_COMPLETED for record in self.records)
+
+    @property
+    def n_skipped(self) -> int:
+        return sum(record.status == STATUS_SKIPPED for record in self.records)
+
+    @property
+    def n_failed(self) -> int:
+        return sum(record.status == STATUS_FAILED for record in self.records)
+
+    @property
+    def results_path(self) -> Path:
+        return self.output_dir / _RESULTS_FILENAME
+
+    def to_frame(self) -> pl.DataFrame:
+        """One row per run with the numeric fields of each training result."""
+        rows = []
+        for record in self.records:
+            row: dict[str, Any] = {
+                "label": record.label,
+                "algorithm": record.algorithm,
+                "config_hash": record.config_hash,
+                "status": record.status,
+                "elapsed_seconds": record.elapsed_seconds,
+                "run_dir": str(record.run_dir),
+                "error": record.error,
+            }
+            row.update(_numeric_result_fields(record.result))
+            rows.append(row)
+        return pl.DataFrame(rows, infer_schema_length=None)
+
+    def metrics_by_label(self) -> dict[str, dict[str, float]]:
+        """Numeric result fields per successful run label.
+
+        For ablation sweeps this is the ``metrics_by_variant_id`` mapping
+        expected by :meth:`AblationRegistry.build_report`.
+        """
+        return {
+            record.label: _numeric_result_fields(record.result)
+            for record in self.records
+            if record.succeeded
+        }
+
+    def comparison_report(self) -> ComparisonReport:
+        """Aggregate every successful training run into one comparison report."""
+        artifacts = [
+            build_run_artifact(record.config_path)
+            for record in self.records
+            if record.succeeded
+        ]
+        return aggregate_comparison_report(artifacts)
+
+    def write(self) -> Path:
+        """Write the results table as JSONL next to the run directories."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self.results_path.open("w") as handle:
+            for record in self.records:
+                handle.write(json.dumps(record.to_dict(), default=str) + "\n")
+        return self.results_path
+
+
+def _record(
+    planned: PlannedRun,
+    status: str,
+    *,
+    marker: Mapping[str, Any] | None = None,
+    error: str | None = None,
+) -> SweepRecord:
+    return SweepRecord(
+        label=planned.run.label,
+        algorithm=planned.run.algorithm,
+        config_hash=planned.config_hash,
+        run_dir=planned.run_dir,
+        config_path=planned.config_path,
+        overrides=planned.run.overrides,
+        status=status,
+        elapsed_seconds=marker.get("elapsed_seconds") if marker else None,
+        result=marker.get("result") if marker else None,
+        error=error,
+    )
+
+
+def default_max_workers(threads_per_worker: int) -> int:
+    """Number of pool workers that fills the host at *threads_per_worker* each."""
+    return max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+
+def run_sweep(
+    runs: Iterable[SweepRun],
+    *,
+    output_dir: str | Path,
+    max_workers: int | None = None,
+    threads_per_worker: int = 1,
+    skip_completed: bool = True,
+    registry: AlgorithmRegistry | None = None,
+) -> SweepResult:
+    """Run every sweep entry, in parallel, and return the results table.
+
+    Parameters
+    ----------
+    runs:
+        Runs from :func:`expand_grid` / :func:`expand_ablation_plans`.
+    output_dir:
+        Root directory for per-run directories and ``sweep_results.jsonl``.
+    max_workers:
+        Pool size. Defaults to ``os.cpu_count() // threads_per_worker``.
+        With ``1`` the runs execute sequentially in the calling process
+        and its thread settings are left untouched.
+    threads_per_worker:
+        ``torch.set_num_threads`` value applied in every pool worker.
+    skip_completed:
+        Skip runs whose completion marker matches their config hash. When
+        False, completed runs are reset and trained again from scratch.
+    registry:
+        Registry used to validate algorithms and resolve base configs.
+        Workers always execute through the default registry.
+    """
+    if threads_per_worker < 1:
+        raise ValueError(f"threads_per_worker must be >= 1, got {threads_per_worker}.")
+    if max_workers is None:
+        max_workers = default_max_workers(threads_per_worker)
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be >= 1, got {max_workers}.")
+
+    root = Path(output_dir)
+    planned_runs = plan_sweep(runs, output_dir=root, registry=registry)
+
+    records: dict[str, SweepRecord] = {}
+    pending: list[PlannedRun] = []
+    for planned in planned_runs:
+        if skip_completed and planned.is_complete():
+            marker = json.loads(planned.marker_path.read_text())
+            records[planned.config_hash] = _record(planned, STATUS_SKIPPED, marker=marker)
+            continue
+        if planned.marker_path.exists():
+            planned.reset()
+        planned.write_config()
+        pending.append(planned)
+
+    logger.info(
+        "Sweep: %d runs (%d already complete), %d workers x %d threads.",
+        len(planned_runs),
+        len(planned_runs) - len(pending),
+        min(max_workers, max(len(pending), 1)),
+        threads_per_worker,
+    )
+
+    def _collect(planned: PlannedRun, outcome: Callable[[], dict[str, Any]]) -> None:
+        try:
+            marker = outcome()
+        except Exception as exc:  # noqa: BLE001 - one failed run must not stop the sweep
+            logger.error("Sweep run %s failed: %s", planned.run.label, exc)
+            records[planned.config_hash] = _record(
+                planned, STATUS_FAILED, error=f"{type(exc).__name__}: {exc}"
+            )
+            return
+        records[planned.config_hash] = _record(planned, STATUS_COMPLETED, marker=marker)
+        logger.info("Sweep run %s completed.", planned.run.label)
+
+    if pending and max_workers == 1:
+        for planned in pending:
+            _collect(planned, partial(_execute_planned_run, *_worker_args(planned)))
+    elif pending:
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker,),
+        ) as pool:
+            futures = [
+                (planned, pool.submit(_execute_planned_run, *_worker_args(planned)))
+                for planned in pending
+            ]
+            for planned, future in futures:
+                _collect(planned, future.result)
+
+    result = SweepResult(
+        output_dir=root,
+        records=tuple(records[planned.config_hash] for planned in planned_runs),
+    )
+    result.write()
+    return result
+
+
+def _worker_args(planned: PlannedRun) -> tuple[Any, ...]:
+    return (
+        planned.run.algorithm,
+        str(planned.config_path),
+        planned.config_hash,
+        planned.run.label,
+        planned.run.request,
+    )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def _parse_grid_axis(spec: str) -> tuple[str, list[Any]]:
+    """Parse ``key=v1,v2,...``; values are YAML scalars (``1e-4``, ``true``)."""
+    key, sep, raw_values = spec.partition("=")
+    if not sep or not key.strip() or not raw_values.strip():
+        raise ValueError(f"Invalid --grid spec {spec!r}; expected key=v1,v2,...")
+    return key.strip(), [yaml.safe_load(value) for value in raw_values.split(",")]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point for ``python -m mimic_sepsis_rl.training.sweep``."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mimic_sepsis_rl.training.sweep",
+        description="Run a hyper-parameter grid on a local process pool.",
+    )
+    parser.add_argument("--algorithm", required=True, help="cql, bcq or iql.")
+    parser.add_argument("--config", default=None, help="Base training YAML config.")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        metavar="KEY=V1,V2",
+        help="One grid axis; repeat for a Cartesian product (e.g. runtime.seed=0,1,2).",
+    )
+    parser.add_argument("--device", default=None, help="Override runtime.device.")
+    parser.add_argument("--n-actions", type=int, default=None)
+    parser.add_argument("--output-dir", default="sweeps", help="Root for run directories.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Pool size (default: cpu_count // threads-per-worker).",
+    )
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument(
+        "--no-skip",
+        action="store_true",
+        help="Re-run configs that already have a completion marker.",
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Optional path for the aggregated comparison report JSON.",
+    )
+    args = parser.parse_args(argv)
+
+    grid = dict(_parse_grid_axis(spec) for spec in args.grid)
+    base_overrides = {"runtime": {"device": args.device}} if args.device else None
+    runs = expand_grid(
+        args.algorithm,
+        grid,
+        base_overrides=base_overrides,
+        config_path=args.config,
+        n_actions=args.n_actions,
+    )
+    result = run_sweep(
+        runs,
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        skip_completed=not args.no_skip,
+    )
+
+    if args.report:
+        report_path = Path(args.report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(result.comparison_report().to_dict(), indent=2))
+
+    print(
+        json.dumps(
+            {
+                "results_path": str(result.results_path),
+                "completed": result.n_completed,
+                "skipped": result.n_skipped,
+                "failed": result.n_failed,
+            },
+            indent=2,
+        )
+    )
+    if result.n_failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "SWEEP_MODULE_VERSION",
+    "STATUS_COMPLETED",
+    "STATUS_FAILED",
+    "STATUS_SKIPPED",
+    "PlannedRun",
+    "SweepRecord",
+    "SweepResult",
+    "SweepRun",
+    "compute_config_hash",
+    "default_max_workers",
+    "expand_ablation_plans",
+    "expand_grid",
+    "plan_sweep",
+    "run_sweep",
+]
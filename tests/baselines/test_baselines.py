@@ -200,6 +200,17 @@ class TestBehaviorCloning:
         assert sum(probs) == pytest.approx(1.0, abs=1e-6)
         assert all(p >= 0 for p in probs)
 
+    def test_batched_probabilities_match_per_state(self) -> None:
+        """action_probabilities / select_actions agree with the per-state path."""
+        model = SoftmaxClassifier(state_dim=4, n_actions=25, seed=7)
+        rng = random.Random(3)
+        states = [tuple(rng.gauss(0, 1) for _ in range(4)) for _ in range(6)]
+        probs = model.action_probabilities(states)
+        assert probs.shape == (6, 25)
+        for row, state in zip(probs, states):
+            assert row.tolist() == pytest.approx(model.predict_probs(state), rel=1e-12)
+        assert model.select_actions(states).tolist() == [model.predict(s) for s in states]
+
     def test_accuracy_improves_with_training(self) -> None:
         """Accuracy should not decrease after training (imperfect guarantee)."""
         # Use a dataset with a learnable pattern
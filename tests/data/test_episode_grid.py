@@ -13,10 +13,14 @@ Covers:
 - Batch grid builder
 - DataFrame conversion
 - Audit summary
+- Columnar grid builder parity with the per-episode path
+- Multi-resolution grids (2h / 4h / 6h) from one bounds pass
 """
 
 from __future__ import annotations
 
+import io
+import random
 from datetime import datetime, timedelta
 
 import polars as pl
@@ -31,12 +35,20 @@ from mimic_sepsis_rl.data.episode_models import (
     EpisodeGrid,
     EpisodeStep,
     TruncationReason,
+    max_steps_for,
 )
 from mimic_sepsis_rl.data.episodes import (
+    build_base_step_grid,
+    build_episode_frames,
     build_grid_for_episode,
     build_episode_grids,
+    build_multi_resolution_frames,
+    common_step_hours,
     generate_grid_audit,
     grids_to_dataframes,
+    iter_episode_grids,
+    resolution_path,
+    summarize_episode_frames,
 )
 
 
@@ -343,6 +355,143 @@ class TestBatchAndSerialisation:
         assert audit["spec_version"] == EPISODE_SPEC_VERSION
 
 
+# ---------------------------------------------------------------------------
+# Columnar builder
+# ---------------------------------------------------------------------------
+
+
+def _random_episode_inputs(
+    n: int = 80, seed: int = 0,
+) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Onsets, ICU stays and admissions covering every truncation path."""
+    rng = random.Random(seed)
+    onsets, stays, admissions = [], [], []
+    for i in range(n):
+        onset = ONSET + timedelta(minutes=rng.randint(0, 10_000))
+        onsets.append({
+            "stay_id": i, "subject_id": 100 + i, "hadm_id": 1000 + i,
+            "sepsis_onset_time": onset,
+        })
+        stays.append({
+            "stay_id": i,
+            "intime": onset + timedelta(minutes=rng.randint(-3000, 600)),
+            "outtime": onset + timedelta(minutes=rng.choice([-1700, 0, 3000, 6000])
+                                         + rng.randint(-200, 200)),
+        })
+        death = rng.random()
+        admissions.append({
+            "hadm_id": 1000 + i,
+            "deathtime": (
+                onset + timedelta(minutes=rng.randint(-200, 3500)) if death < 0.3 else None
+            ),
+        })
+    return pl.DataFrame(onsets), pl.DataFrame(stays), pl.DataFrame(admissions)
+
+
+def _parquet_bytes(df: pl.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.write_parquet(buffer)
+    return buffer.getvalue()
+
+
+class TestColumnarGridBuilder:
+    @pytest.mark.parametrize("with_admissions", [True, False])
+    def test_matches_per_episode_builder(self, with_admissions):
+        onset_df, icustays_df, admissions_df = _random_episode_inputs()
+        admissions = admissions_df if with_admissions else None
+
+        grids = build_episode_grids(onset_df, icustays_df, admissions)
+        expected = grids_to_dataframes(grids)
+        actual = build_episode_frames(onset_df, icustays_df, admissions)
+
+        for want, got in zip(expected, actual):
+            assert got.schema == want.schema
+            assert got.equals(want)
+            assert _parquet_bytes(got) == _parquet_bytes(want)
+        assert summarize_episode_frames(actual[0]) == generate_grid_audit(grids)
+        assert list(iter_episode_grids(*actual)) == grids
+        reasons = set(actual[0]["truncation_reason"].to_list())
+        assert reasons >= {"not_truncated", "icu_discharge", "onset_near_icu_start"}
+        if with_admissions:
+            assert "death" in reasons
+
+    def test_all_full_and_empty_inputs_keep_row_builder_dtypes(self):
+        onset_df = pl.DataFrame({
+            "stay_id": [1], "subject_id": [1], "hadm_id": [1], "sepsis_onset_time": [ONSET],
+        })
+        icustays_df = pl.DataFrame({"stay_id": [1], "intime": [ICU_START], "outtime": [ICU_END]})
+        for inputs in ((onset_df, icustays_df), (onset_df.clear(), icustays_df)):
+            expected = grids_to_dataframes(build_episode_grids(*inputs))
+            actual = build_episode_frames(*inputs)
+            for want, got in zip(expected, actual):
+                assert got.schema == want.schema
+                assert got.equals(want)
+
+
+class TestMultiResolutionGrids:
+    def test_default_resolution_matches_single_build(self):
+        onset_df, icustays_df, admissions_df = _random_episode_inputs()
+        frames = build_multi_resolution_frames(
+            onset_df, icustays_df, admissions_df, step_hours=[6, 2, 4, 6]
+        )
+
+        assert list(frames) == [2, 4, 6]
+        for want, got in zip(build_episode_frames(onset_df, icustays_df, admissions_df), frames[4]):
+            assert got.equals(want)
+        for hours, (episodes_df, steps_df) in frames.items():
+            assert episodes_df["n_steps"].max() == max_steps_for(hours)
+            assert summarize_episode_frames(episodes_df, step_hours=hours)[
+                "expected_max_steps"
+            ] == max_steps_for(hours)
+            durations = (steps_df["step_end"] - steps_df["step_start"]).dt.total_minutes()
+            assert durations.max() == hours * 60
+            assert steps_df["hours_relative_to_onset"].min() == WINDOW_START_HOURS
+
+    @pytest.mark.parametrize("hours", [4, 6])
+    def test_coarse_steps_are_unions_of_fine_steps(self, hours):
+        onset_df, icustays_df, admissions_df = _random_episode_inputs(seed=3)
+        frames = build_multi_resolution_frames(
+            onset_df, icustays_df, admissions_df, step_hours=[2, hours]
+        )
+        fine = frames[2][1].select(
+            "stay_id", (pl.col("step_index") // (hours // 2)).alias("step_index")
+        )
+        coarse = frames[hours][1]
+
+        assert fine.unique().sort(["stay_id", "step_index"]).equals(
+            coarse.select("stay_id", "step_index")
+        )
+        ends = frames[2][1].group_by("stay_id").agg(pl.col("step_end").max())
+        assert ends.sort("stay_id").equals(
+            coarse.group_by("stay_id").agg(pl.col("step_end").max()).sort("stay_id")
+        )
+
+    def test_base_grid_keeps_slots_before_icu_admission(self):
+        onset_df, icustays_df, admissions_df = _random_episode_inputs(n=20, seed=5)
+        episodes_df, steps_df = build_episode_frames(
+            onset_df, icustays_df, admissions_df, step_hours=2
+        )
+        base = build_base_step_grid(episodes_df, 2)
+
+        assert steps_df.select("stay_id", "step_index", "step_start", "step_end").join(
+            base, on=["stay_id", "step_index"], how="anti"
+        ).is_empty()
+        assert base.height > steps_df.height
+        assert (base["step_start"] < base["step_end"]).all()
+        assert (base["episode_start"] <= base["step_start"]).all()
+
+    def test_step_size_validation_and_paths(self, tmp_path):
+        assert [max_steps_for(hours) for hours in (2, 4, 6)] == [36, 18, 12]
+        assert common_step_hours([4, 6]) == 2
+        for bad in ([5], [0], []):
+            with pytest.raises(ValueError):
+                common_step_hours(bad)
+
+        path = tmp_path / "episodes.parquet"
+        assert resolution_path(path, STEP_HOURS) == path
+        assert resolution_path(path, 6) == tmp_path / "episodes_6h.parquet"
+
+
 # ---------------------------------------------------------------------------
 # Version
 # ---------------------------------------------------------------------------
@@ -10,15 +10,25 @@ Covers:
 - OnsetResult mutual exclusivity invariant
 - OnsetCandidate immutability
 - Audit summary correctness
+- Columnar engine parity with the per-stay path
+- Suspected-infection pairing against the cross-join reference
 """
 
 from __future__ import annotations
 
+import csv
+import gzip
+import random
 from datetime import datetime, timedelta
 
 import polars as pl
 import pytest
 
+from mimic_sepsis_rl.data import onset as onset_module
+from mimic_sepsis_rl.data.infection_benchmark import (
+    cross_join_infection_times,
+    synthetic_infection_events,
+)
 from mimic_sepsis_rl.data.onset_models import (
     ONSET_SPEC_VERSION,
     OnsetCandidate,
@@ -26,11 +36,17 @@ from mimic_sepsis_rl.data.onset_models import (
     UnusableReason,
 )
 from mimic_sepsis_rl.data.onset import (
+    antibiotic_drug_names,
     assign_onset_for_stay,
+    compute_suspected_infection_times,
     generate_audit_summary,
+    resolve_onsets,
     results_to_dataframes,
     load_onset_config,
+    pair_infection_events,
+    summarize_onset_frames,
 )
+from mimic_sepsis_rl.data.raw_cache import raw_table_path
 
 
 # ---------------------------------------------------------------------------
@@ -336,6 +352,95 @@ class TestAuditAndSerialisation:
         assert candidates.height == 0
 
 
+# ---------------------------------------------------------------------------
+# Columnar engine tests
+# ---------------------------------------------------------------------------
+
+
+def _random_inputs(
+    n_stays: int = 60, seed: int = 0,
+) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Cohort, infection times and SOFA rows covering every unusable reason."""
+    rng = random.Random(seed)
+    stays, infections, sofa_rows = [], [], []
+    for i in range(n_stays):
+        intime = BASE_TIME + timedelta(hours=rng.randint(0, 500))
+        stays.append({
+            "stay_id": 1000 + i,
+            "subject_id": i // 2,
+            "hadm_id": 500 + i // 2,  # two stays share each admission
+            "intime": intime,
+            "outtime": intime + timedelta(hours=rng.randint(6, 120)),
+        })
+        if i % 2 == 0 and rng.random() < 0.8:
+            infections.append({
+                "hadm_id": 500 + i // 2,
+                "suspected_infection_time": intime + timedelta(hours=rng.randint(-30, 40)),
+            })
+        for _ in range(rng.randint(0, 6)):
+            sofa_rows.append({
+                "stay_id": 1000 + i,
+                "charttime": intime + timedelta(hours=rng.randint(-40, 60)),
+                "sofa_score": rng.randint(0, 4),
+            })
+    sofa = pl.DataFrame(sofa_rows).unique(
+        subset=["stay_id", "charttime"], keep="first", maintain_order=True,
+    )
+    return pl.DataFrame(stays), pl.DataFrame(infections), sofa
+
+
+def _per_stay_frames(cohort, infections, sofa, cfg):
+    lookup = {r["hadm_id"]: r["suspected_infection_time"] for r in infections.iter_rows(named=True)}
+    results = [
+        assign_onset_for_stay(
+            stay, lookup.get(stay["hadm_id"]),
+            sofa.filter(pl.col("stay_id") == stay["stay_id"]), cfg,
+        )
+        for stay in cohort.iter_rows(named=True)
+    ]
+    return results, results_to_dataframes(results)
+
+
+class TestColumnarOnsets:
+    @pytest.mark.parametrize("variant", ["default", "first", "no_icu_check"])
+    def test_matches_per_stay_results(self, variant):
+        cfg = {"onset": dict(DEFAULT_CFG["onset"]), "icu_boundary": dict(DEFAULT_CFG["icu_boundary"])}
+        if variant == "first":
+            cfg["onset"]["tie_break"] = "first"
+        if variant == "no_icu_check":
+            cfg["icu_boundary"]["require_within_icu"] = False
+        cohort, infections, sofa = _random_inputs()
+
+        results, expected = _per_stay_frames(cohort, infections, sofa, cfg)
+        actual = resolve_onsets(cohort, infections, sofa, cfg)
+
+        for want, got in zip(expected, actual):
+            assert got.schema == want.schema
+            assert got.equals(want)
+        assert summarize_onset_frames(actual[0], actual[1]) == generate_audit_summary(results)
+        reasons = set(actual[1]["unusable_reason"].to_list())
+        if variant == "default":
+            assert {r.value for r in (
+                UnusableReason.NO_SUSPECTED_INFECTION,
+                UnusableReason.NO_SOFA_INCREASE,
+                UnusableReason.ONSET_OUTSIDE_ICU,
+            )} <= reasons
+
+    def test_empty_inputs_and_skipped_candidates(self):
+        cohort, infections, sofa = _random_inputs(n_stays=4, seed=1)
+        _, expected = _per_stay_frames(cohort.clear(), infections, sofa, DEFAULT_CFG)
+        actual = resolve_onsets(cohort.clear(), infections, sofa, DEFAULT_CFG)
+        for want, got in zip(expected, actual):
+            assert got.schema == want.schema
+            assert got.height == 0
+
+        usable, unusable, candidates = resolve_onsets(
+            cohort, infections, sofa, DEFAULT_CFG, include_candidates=False,
+        )
+        assert usable.height + unusable.height == cohort.height
+        assert candidates.height == 0
+
+
 # ---------------------------------------------------------------------------
 # Config validation tests
 # ---------------------------------------------------------------------------
@@ -385,3 +490,78 @@ class TestOnsetVersion:
         ]
         audit = generate_audit_summary(results)
         assert audit["spec_version"] == ONSET_SPEC_VERSION
+
+
+# ---------------------------------------------------------------------------
+# Suspected infection pairing tests
+# ---------------------------------------------------------------------------
+
+
+def _write_raw_csv(raw_root, table: str, rows: list[dict]) -> None:
+    path = raw_table_path(raw_root, table)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class TestSuspectedInfectionPairing:
+    def test_asof_pairing_matches_cross_join(self):
+        abx, cultures = synthetic_infection_events(
+            n_antibiotics=300, n_cultures=200, n_background_admissions=80, seed=4,
+        )
+        expected = cross_join_infection_times(abx, cultures)
+        actual = pair_infection_events(abx, cultures)
+        assert actual.height > 10
+        assert actual.equals(expected)
+
+    def test_tolerance_is_inclusive(self):
+        abx = pl.DataFrame({
+            "hadm_id": [1, 2, 3],
+            "abx_time": [BASE_TIME + timedelta(hours=72)] * 3,
+        })
+        cultures = pl.DataFrame({
+            "hadm_id": [1, 2, 4],
+            "culture_time": [BASE_TIME, BASE_TIME - timedelta(seconds=1), BASE_TIME],
+        })
+        result = pair_infection_events(abx, cultures)
+        assert result.to_dicts() == [{"hadm_id": 1, "suspected_infection_time": BASE_TIME}]
+
+    def test_antibiotic_names_are_matched_once_per_distinct_drug(self):
+        drugs = pl.Series(["Vancomycin", "vancomycin", "Vancomycin", "NS", None, "Pip-Tazo"])
+        assert sorted(antibiotic_drug_names(drugs).to_list()) == ["Vancomycin", "vancomycin"]
+
+    def test_compute_from_raw_tables(self, tmp_path, monkeypatch):
+        raw_root = tmp_path / "raw"
+        fmt = "%Y-%m-%d %H:%M:%S"
+        _write_raw_csv(raw_root, "hosp/microbiologyevents", [
+            {"subject_id": 1, "hadm_id": 10, "chartdate": "2150-01-15",
+             "charttime": (BASE_TIME + timedelta(hours=5)).strftime(fmt), "spec_type_desc": "BLOOD"},
+            {"subject_id": 2, "hadm_id": 20, "chartdate": "2150-01-15",
+             "charttime": "", "spec_type_desc": "URINE"},
+            {"subject_id": 3, "hadm_id": 30, "chartdate": "2150-01-15",
+             "charttime": BASE_TIME.strftime(fmt), "spec_type_desc": "BLOOD"},
+        ])
+        _write_raw_csv(raw_root, "hosp/prescriptions", [
+            {"subject_id": 1, "hadm_id": 10, "starttime": BASE_TIME.strftime(fmt),
+             "stoptime": "", "drug": "Vancomycin", "route": "IV"},
+            {"subject_id": 2, "hadm_id": 20, "starttime": BASE_TIME.strftime(fmt),
+             "stoptime": "", "drug": "CefTRIAXone", "route": "IV"},
+            {"subject_id": 3, "hadm_id": 30, "starttime": BASE_TIME.strftime(fmt),
+             "stoptime": "", "drug": "Sodium Chloride 0.9%", "route": "IV"},
+            {"subject_id": 4, "hadm_id": 40, "starttime": BASE_TIME.strftime(fmt),
+             "stoptime": "", "drug": "Vancomycin", "route": "IV"},
+        ])
+        monkeypatch.setenv("MIMIC_RAW_CACHE", "0")
+        monkeypatch.setattr(onset_module, "MIMIC_RAW_ROOT", raw_root)
+
+        cohort = pl.DataFrame({"hadm_id": [10, 20, 30]})
+        result = compute_suspected_infection_times(cohort)
+
+        # hadm 20 falls back to chartdate midnight; hadm 30 has no antibiotic;
+        # hadm 40 is outside the cohort.
+        assert result.to_dicts() == [
+            {"hadm_id": 10, "suspected_infection_time": BASE_TIME},
+            {"hadm_id": 20, "suspected_infection_time": datetime(2150, 1, 15)},
+        ]
@@ -0,0 +1,161 @@
+"""
+Tests for the CSV.gz → Parquet raw table cache.
+
+Coverage:
+- Cached scans return the same rows and dtypes as a typed CSV scan, and
+  the same order when asked to preserve it
+- Datetime columns arrive parsed; malformed values become nulls
+- Unchanged sources are served without re-conversion
+- Touched but identical sources reuse their entry; edited sources do not
+- Event tables are cached as one file sorted by itemid, then stay
+- The cache can be disabled through the environment
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from mimic_sepsis_rl.data.raw_cache import (
+    RawTableCache,
+    default_raw_cache,
+    raw_table_path,
+    scan_raw_csv,
+    scan_raw_table,
+)
+
+CHART_FIELDS = ["subject_id", "hadm_id", "stay_id", "charttime", "itemid", "value", "valuenum"]
+
+
+def _write_chartevents(raw_root: Path, rows: list[dict[str, object]]) -> Path:
+    path = raw_table_path(raw_root, "icu/chartevents")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=CHART_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _chart_rows() -> list[dict[str, object]]:
+    rows = []
+    # Deliberately unsorted by stay and time, with mixed itemids.
+    for index, (stay_id, itemid) in enumerate(
+        [(3, 220045), (1, 220052), (2, 220045), (1, 220045), (3, 220277), (2, 220052)]
+    ):
+        rows.append(
+            {
+                "subject_id": 10 + stay_id,
+                "hadm_id": 100 + stay_id,
+                "stay_id": stay_id,
+                "charttime": f"2150-01-01 0{index}:00:00",
+                "itemid": itemid,
+                "value": "abnormal" if index == 4 else str(80 + index),
+                "valuenum": "" if index == 4 else 80.0 + index,
+            }
+        )
+    rows[2]["charttime"] = "not-a-time"
+    return rows
+
+
+@pytest.fixture()
+def raw_root(tmp_path: Path) -> Path:
+    root = tmp_path / "raw"
+    _write_chartevents(root, _chart_rows())
+    return root
+
+
+def test_cached_scan_matches_typed_csv_scan(raw_root, tmp_path):
+    cache = RawTableCache(tmp_path / "cache", row_group_size=2)
+    path = raw_table_path(raw_root, "icu/chartevents")
+
+    expected = scan_raw_csv(path, "icu/chartevents").collect()
+    cached = cache.scan(path, "icu/chartevents", preserve_order=True).collect()
+
+    assert cached.schema == expected.schema
+    assert cached.equals(expected)
+    unordered = cache.scan(path, "icu/chartevents").collect()
+    assert unordered.sort(unordered.columns).equals(expected.sort(expected.columns))
+    assert cached.schema["charttime"] == pl.Datetime("us")
+    assert cached["charttime"].null_count() == 1
+    assert cached["valuenum"].null_count() == 1
+    assert cached["value"].dtype == pl.Utf8
+
+
+def test_cached_scan_prunes_and_optionally_preserves_source_order(raw_root, tmp_path):
+    cache = RawTableCache(tmp_path / "cache", row_group_size=2)
+    path = raw_table_path(raw_root, "icu/chartevents")
+
+    def _filtered(preserve_order: bool) -> pl.DataFrame:
+        return (
+            cache.scan(path, "icu/chartevents", preserve_order=preserve_order)
+            .filter(pl.col("stay_id") == 1)
+            .filter(pl.col("itemid").is_in([220045, 220052]))
+            .collect()
+        )
+
+    assert _filtered(True)["itemid"].to_list() == [220052, 220045]
+    assert sorted(_filtered(False)["itemid"].to_list()) == [220045, 220052]
+
+    entry = cache.ensure(path, "icu/chartevents")
+    entry_dir = tmp_path / "cache" / "icu" / "chartevents" / entry.key
+    assert entry.files == ("part-0.parquet",)
+    part = pl.read_parquet(entry_dir / entry.files[0])
+    assert part["itemid"].is_sorted()
+    for _, group in part.group_by("itemid"):
+        assert group["stay_id"].is_sorted()
+
+
+def test_unchanged_source_is_not_reconverted(raw_root, tmp_path, monkeypatch):
+    cache = RawTableCache(tmp_path / "cache")
+    path = raw_table_path(raw_root, "icu/chartevents")
+    first = cache.ensure(path, "icu/chartevents")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("cache entry was rebuilt")
+
+    monkeypatch.setattr(cache, "_convert", _fail)
+    assert cache.ensure(path, "icu/chartevents") == first
+
+    # Touching the file changes mtime but not content: same entry, no rebuild.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    assert cache.ensure(path, "icu/chartevents").key == first.key
+
+
+def test_edited_source_gets_a_new_entry(raw_root, tmp_path):
+    cache = RawTableCache(tmp_path / "cache")
+    path = raw_table_path(raw_root, "icu/chartevents")
+    first = cache.ensure(path, "icu/chartevents")
+
+    _write_chartevents(raw_root, _chart_rows()[:2])
+    second = cache.ensure(path, "icu/chartevents")
+
+    assert second.key != first.key
+    assert second.n_rows == 2
+    assert cache.scan(path, "icu/chartevents").collect().height == 2
+
+
+def test_cache_can_be_disabled_from_environment(raw_root, tmp_path, monkeypatch):
+    monkeypatch.setenv("MIMIC_RAW_CACHE_DIR", str(tmp_path / "env_cache"))
+    assert default_raw_cache().root == tmp_path / "env_cache"
+
+    scan_raw_table(raw_root, "icu/chartevents").collect()
+    assert (tmp_path / "env_cache" / "icu" / "chartevents").exists()
+
+    monkeypatch.setenv("MIMIC_RAW_CACHE", "0")
+    assert default_raw_cache() is None
+    direct = scan_raw_table(raw_root, "icu/chartevents").collect()
+    assert direct.height == len(_chart_rows())
+
+
+def test_unknown_table_and_missing_source_raise(tmp_path):
+    with pytest.raises(ValueError, match="Unknown raw table"):
+        raw_table_path(tmp_path, "icu/nonexistent")
+    with pytest.raises(FileNotFoundError, match="Raw table not found"):
+        scan_raw_table(tmp_path, "icu/chartevents", use_cache=False)
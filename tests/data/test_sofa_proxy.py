@@ -0,0 +1,169 @@
+"""
+Tests for the streaming SOFA proxy intermediate.
+
+Coverage:
+- Streaming scan equals the eager filtered-min reference per chart time
+- Stays outside the cohort are never scored
+- The Parquet intermediate is reused for the same cohort and rebuilt otherwise
+- Changing the raw chartevents source or raw root invalidates the intermediate
+- Step-level SOFA from state columns keeps the original null semantics
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import os
+import random
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from mimic_sepsis_rl.data import sofa as sofa_module
+from mimic_sepsis_rl.data.raw_cache import raw_table_path, scan_raw_table
+from mimic_sepsis_rl.data.sofa import (
+    SOFA_PROXY_COLUMNS,
+    load_or_build_sofa_proxy,
+    scan_sofa_proxy,
+    sofa_proxy_state_expr,
+    sofa_source_fingerprint,
+)
+
+BASE_TIME = datetime(2150, 1, 1)
+CHART_FIELDS = ["subject_id", "hadm_id", "stay_id", "charttime", "itemid", "value", "valuenum"]
+ITEMIDS = [220052, 220181, 220277, 223901, 226559, 220045]
+
+
+@pytest.fixture(autouse=True)
+def _no_raw_cache(monkeypatch):
+    monkeypatch.setenv("MIMIC_RAW_CACHE", "0")
+
+
+@pytest.fixture()
+def raw_root(tmp_path: Path) -> Path:
+    rng = random.Random(0)
+    rows = []
+    for _ in range(600):
+        stay_id = rng.randint(1, 8)
+        rows.append({
+            "subject_id": stay_id // 2,
+            "hadm_id": 100 + stay_id,
+            "stay_id": stay_id,
+            "charttime": (BASE_TIME + timedelta(hours=rng.randint(0, 30))).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+            "itemid": rng.choice(ITEMIDS),
+            "value": "",
+            "valuenum": "" if rng.random() < 0.1 else round(rng.uniform(5, 110), 1),
+        })
+    root = tmp_path / "raw"
+    path = raw_table_path(root, "icu/chartevents")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=CHART_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return root
+
+
+def _reference_sofa(raw_root: Path, stay_ids: list[int]) -> pl.DataFrame:
+    """Eager filtered-min implementation the streaming plan replaces."""
+    df = (
+        scan_raw_table(raw_root, "icu/chartevents")
+        .filter(pl.col("itemid").is_in([220052, 220181, 220277, 223901, 226559]))
+        .select(["subject_id", "hadm_id", "stay_id", "charttime", "itemid", "valuenum"])
+        .collect()
+        .filter(pl.col("valuenum").is_not_null() & pl.col("stay_id").is_in(stay_ids))
+    )
+    scored = df.group_by(["subject_id", "hadm_id", "stay_id", "charttime"]).agg([
+        (pl.col("valuenum").filter(pl.col("itemid").is_in([220052, 220181])).min() < 70)
+        .cast(pl.Int32).fill_null(0).first().alias("cardio_score"),
+        (pl.col("valuenum").filter(pl.col("itemid") == 220277).min() < 94)
+        .cast(pl.Int32).fill_null(0).first().alias("resp_score"),
+        (pl.col("valuenum").filter(pl.col("itemid") == 223901).min() < 15)
+        .cast(pl.Int32).fill_null(0).first().alias("neuro_score"),
+    ]).with_columns(
+        (pl.col("cardio_score") + pl.col("resp_score") + pl.col("neuro_score"))
+        .alias("sofa_score")
+    )
+    return scored.select(list(SOFA_PROXY_COLUMNS)).sort(["stay_id", "charttime"])
+
+
+def test_streaming_scan_matches_reference(raw_root) -> None:
+    cohort = pl.DataFrame({"stay_id": [1, 2, 3, 5, 8]})
+    actual = (
+        scan_sofa_proxy(cohort, raw_root=raw_root)
+        .collect(engine="streaming")
+        .sort(["stay_id", "charttime"])
+    )
+    expected = _reference_sofa(raw_root, [1, 2, 3, 5, 8])
+
+    assert actual.height > 50
+    assert actual.equals(expected)
+    assert set(actual["stay_id"].unique().to_list()) <= {1, 2, 3, 5, 8}
+    assert actual["sofa_score"].max() >= 2
+
+
+def test_intermediate_is_reused_for_the_same_cohort(raw_root, tmp_path, monkeypatch) -> None:
+    cohort = pl.DataFrame({"stay_id": [4, 2, 6]})
+    path = tmp_path / "onset" / "sofa_proxy.parquet"
+
+    first = load_or_build_sofa_proxy(cohort, path, raw_root=raw_root)
+    assert first.equals(_reference_sofa(raw_root, [2, 4, 6]))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("unchanged cohort must reuse the intermediate")
+
+    write = sofa_module.write_sofa_proxy
+    monkeypatch.setattr(sofa_module, "write_sofa_proxy", _fail)
+    again = load_or_build_sofa_proxy(cohort.reverse(), path, raw_root=raw_root)
+    assert again.equals(first)
+
+    monkeypatch.setattr(sofa_module, "write_sofa_proxy", write)
+    rebuilt = load_or_build_sofa_proxy(pl.DataFrame({"stay_id": [7]}), path, raw_root=raw_root)
+    assert set(rebuilt["stay_id"].to_list()) == {7}
+
+
+def test_intermediate_is_rebuilt_when_the_raw_source_changes(raw_root, tmp_path) -> None:
+    cohort = pl.DataFrame({"stay_id": [1, 2, 3]})
+    path = tmp_path / "onset" / "sofa_proxy.parquet"
+    first = load_or_build_sofa_proxy(cohort, path, raw_root=raw_root)
+
+    source = raw_table_path(raw_root, "icu/chartevents")
+    with gzip.open(source, "rt", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    with gzip.open(source, "wt", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=CHART_FIELDS)
+        writer.writeheader()
+        writer.writerows(row for row in rows if row["stay_id"] != "1")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    edited = load_or_build_sofa_proxy(cohort, path, raw_root=raw_root)
+    assert 1 in first["stay_id"].to_list()
+    assert 1 not in edited["stay_id"].to_list()
+    assert edited.equals(_reference_sofa(raw_root, [1, 2, 3]))
+
+    meta_path = path.with_name(f"{path.name}.meta.json")
+    built_from = json.loads(meta_path.read_text())["source_fingerprint"]
+    other_root = tmp_path / "raw_copy"
+    shutil.copytree(raw_root, other_root)
+    moved = load_or_build_sofa_proxy(cohort, path, raw_root=other_root)
+    assert moved.equals(edited)
+    rebuilt_from = json.loads(meta_path.read_text())["source_fingerprint"]
+    assert rebuilt_from == sofa_source_fingerprint(other_root) != built_from
+
+
+def test_state_expression_keeps_null_semantics() -> None:
+    state = pl.DataFrame({
+        "map": [65.0, 80.0, None, 60.0],
+        "spo2": [90.0, 99.0, 90.0, 93.0],
+        "gcs_total": [15.0, 14.0, 10.0, 3.0],
+    })
+    result = state.select(sofa_proxy_state_expr())["sofa_score"]
+    assert result.dtype == pl.Int32
+    assert result.to_list() == [2, 1, None, 3]
@@ -3,9 +3,11 @@ from __future__ import annotations
 import csv
 import gzip
 import json
+import shutil
 from pathlib import Path
 
 import polars as pl
+import pytest
 import yaml
 
 from mimic_sepsis_rl.cli.build_transitions import main as build_transitions_main
@@ -310,3 +312,239 @@ def test_live_build_transitions_exports_replay_files(tmp_path, monkeypatch) -> N
     assert meta["n_actions"] == 25
     assert meta["n_episodes"] == 2
     assert meta["state_dim"] > 0
+
+
+def _run_live_build(extra_args: list[str]) -> int:
+    return build_transitions_main(
+        [
+            "--raw-root",
+            "data/raw/physionet.org/files/mimiciv/3.1",
+            "--cohort-path",
+            "data/processed/cohort/cohort.parquet",
+            "--episodes-path",
+            "data/processed/episodes/episodes.parquet",
+            "--steps-path",
+            "data/processed/episodes/episode_steps.parquet",
+            "--split-manifest-dir",
+            "data/splits",
+            "--output-dir",
+            "data/replay",
+            *extra_args,
+        ]
+    )
+
+
+def test_state_engines_export_identical_state_tables(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    feature_config = yaml.safe_load((tmp_path / "configs" / "features" / "test.yaml").read_text())
+    feature_config["include_features"] = [
+        *feature_config["include_features"],
+        "cum_iv_fluid_ml",
+        "cum_vasopressor_dose_nor_equiv",
+        "urine_output_4h",
+    ]
+    feature_config["missingness_flags_default"] = True
+    (tmp_path / "configs" / "features" / "engines.yaml").write_text(yaml.safe_dump(feature_config))
+    state_dir = tmp_path / "data" / "processed" / "features" / "state_vectors"
+
+    tables: dict[str, pl.DataFrame] = {}
+    for engine in ("rows", "columnar"):
+        exit_code = _run_live_build(
+            ["--features-config", "configs/features/engines.yaml", "--state-engine", engine]
+        )
+        assert exit_code == 0
+        tables[engine] = pl.read_parquet(state_dir / "state_table_raw.parquet")
+
+    assert tables["columnar"].schema == tables["rows"].schema
+    assert tables["columnar"].equals(tables["rows"])
+    assert tables["columnar"]["cum_iv_fluid_ml"].max() > 0.0
+
+
+_EXPORT_DIRS = (
+    "data/replay",
+    "data/processed/features",
+    "data/processed/actions",
+    "data/processed/rewards",
+)
+
+
+def _snapshot_exports(root: Path) -> dict[str, object]:
+    """Read every export, then remove it so the next build starts clean."""
+    exports: dict[str, object] = {}
+    for pattern in (
+        "data/replay/*.parquet",
+        "data/replay/*.json",
+        "data/replay/timestep_*/*.parquet",
+        "data/replay/timestep_*/*.json",
+        "data/replay/actions_*/*.parquet",
+        "data/replay/actions_*/*.json",
+        "data/processed/features/**/*.parquet",
+        "data/processed/features/**/*.json",
+        "data/processed/actions/*.*",
+        "data/processed/actions/timestep_*/*",
+        "data/processed/rewards/*.*",
+        "data/processed/rewards/timestep_*/*",
+    ):
+        for path in sorted(root.glob(pattern)):
+            key = str(path.relative_to(root))
+            exports[key] = (
+                pl.read_parquet(path) if path.suffix == ".parquet" else json.loads(path.read_text())
+            )
+    for export_dir in _EXPORT_DIRS:
+        shutil.rmtree(root / export_dir, ignore_errors=True)
+    return exports
+
+
+def _assert_same_exports(actual: dict[str, object], expected: dict[str, object]) -> None:
+    assert sorted(actual) == sorted(expected)
+    for key, value in expected.items():
+        if isinstance(value, pl.DataFrame):
+            assert actual[key].equals(value), key
+        else:
+            assert actual[key] == value, key
+
+
+def test_sharded_build_matches_single_process_build(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    config_args = ["--features-config", "configs/features/test.yaml"]
+
+    assert _run_live_build(config_args) == 0
+    expected = _snapshot_exports(tmp_path)
+    assert "data/replay/replay_validation.parquet" in expected
+
+    # Four shards leave shards 0 and 1 without any stays.
+    assert _run_live_build([*config_args, "--shards", "4", "--workers", "1"]) == 0
+    _assert_same_exports(_snapshot_exports(tmp_path), expected)
+
+    shard_args = [*config_args, "--shards", "3", "--shard-dir", "data/shards"]
+    for stage in ("extract", "state", "export"):
+        for shard_index in range(3):
+            exit_code = _run_live_build(
+                [*shard_args, "--shard-index", str(shard_index), "--shard-stage", stage]
+            )
+            assert exit_code == 0
+    assert _run_live_build([*shard_args, "--shard-stage", "merge"]) == 0
+    _assert_same_exports(_snapshot_exports(tmp_path), expected)
+
+
+def test_sharded_stage_requires_previous_stage(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError, match="have not completed the 'extract' stage"):
+        _run_live_build(
+            [
+                "--features-config",
+                "configs/features/test.yaml",
+                "--shards",
+                "2",
+                "--shard-index",
+                "0",
+                "--shard-stage",
+                "state",
+            ]
+        )
+
+
+def _write_two_hour_grid(root: Path) -> None:
+    """Split every 4h step of the synthetic grid into two 2h steps."""
+    episodes_dir = root / "data" / "processed" / "episodes"
+    steps_df = pl.read_parquet(episodes_dir / "episode_steps.parquet")
+    halves = []
+    for half in (0, 1):
+        offset = pl.duration(hours=2 * half)
+        halves.append(
+            steps_df.with_columns(
+                (pl.col("step_index") * 2 + half).alias("step_index"),
+                (pl.col("step_start") + offset).alias("step_start"),
+                (pl.col("step_start") + offset + pl.duration(hours=2)).alias("step_end"),
+                (pl.col("hours_relative_to_onset") + 2 * half).alias("hours_relative_to_onset"),
+            ).with_columns((pl.col("hours_relative_to_onset") < 0).alias("is_pre_onset"))
+        )
+    pl.concat(halves).sort(["stay_id", "step_index"]).write_parquet(
+        episodes_dir / "episode_steps_2h.parquet"
+    )
+    pl.read_parquet(episodes_dir / "episodes.parquet").with_columns(
+        pl.col("n_steps") * 2
+    ).write_parquet(episodes_dir / "episodes_2h.parquet")
+
+
+def test_multi_resolution_build_tags_each_replay_export(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    _write_two_hour_grid(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    config_args = ["--features-config", "configs/features/test.yaml"]
+
+    assert _run_live_build(config_args) == 0
+    expected = _snapshot_exports(tmp_path)
+
+    assert _run_live_build([*config_args, "--step-hours", "2", "4"]) == 0
+    exports = _snapshot_exports(tmp_path)
+    two_hour = {key: value for key, value in exports.items() if "2h" in key}
+    # The 4h grid rolled up from the shared 2h bucketing matches a 4h-only build.
+    _assert_same_exports(
+        {key: value for key, value in exports.items() if key not in two_hour}, expected
+    )
+    assert expected["data/replay/replay_train_meta.json"]["step_hours"] == 4
+
+    meta = two_hour["data/replay/timestep_2h/replay_train_meta.json"]
+    assert meta["step_hours"] == 2
+    assert meta["n_transitions"] == 2 * expected["data/replay/replay_train_meta.json"][
+        "n_transitions"
+    ]
+    assert "data/processed/actions/timestep_2h/action_bins.json" in two_hour
+    assert "data/processed/features/train_medians_2h.json" in two_hour
+
+
+def test_multi_resolution_build_rejects_unsupported_options(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    for extra_args in (
+        ["--step-hours", "5"],
+        ["--step-hours", "2", "4", "--state-engine", "rows"],
+        ["--step-hours", "2", "--shards", "2"],
+        ["--action-granularities", "1"],
+        ["--action-granularities", "3", "--shards", "2"],
+    ):
+        with pytest.raises(SystemExit):
+            _run_live_build(extra_args)
+
+
+def test_action_granularity_build_exports_each_grid(tmp_path, monkeypatch) -> None:
+    _prepare_synthetic_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    config_args = ["--features-config", "configs/features/test.yaml"]
+
+    assert _run_live_build(config_args) == 0
+    expected = _snapshot_exports(tmp_path)
+
+    assert _run_live_build([*config_args, "--action-granularities", "3", "5", "7"]) == 0
+    exports = _snapshot_exports(tmp_path)
+    step_actions_key = "data/processed/actions/step_actions.parquet"
+    step_actions = exports[step_actions_key]
+    # The default 5x5 exports are untouched; step actions only gain columns.
+    assert step_actions.select(expected[step_actions_key].columns).equals(
+        expected[step_actions_key]
+    )
+    _assert_same_exports(
+        {
+            key: value
+            for key, value in exports.items()
+            if key != step_actions_key and "3x3" not in key and "7x7" not in key
+        },
+        {key: value for key, value in expected.items() if key != step_actions_key},
+    )
+
+    default_meta = expected["data/replay/replay_train_meta.json"]
+    for n_bins in (3, 7):
+        suffix = f"{n_bins}x{n_bins}"
+        assert f"data/processed/actions/action_bins_{suffix}.json" in exports
+        meta = exports[f"data/replay/actions_{suffix}/replay_train_meta.json"]
+        assert meta["n_actions"] == n_bins * n_bins
+        assert meta["n_transitions"] == default_meta["n_transitions"]
+        replay = exports[f"data/replay/actions_{suffix}/replay_train.parquet"]
+        assert replay.get_column("action").max() < n_bins * n_bins
+        assert step_actions.get_column(f"action_id_{suffix}").max() < n_bins * n_bins
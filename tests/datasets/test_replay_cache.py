@@ -0,0 +1,150 @@
+"""
+Tests for the memory-mapped replay cache.
+
+Coverage:
+- Replay exports write a cache entry next to the Parquet file
+- ReplayDataset maps the cache and yields the same tensors as Parquet
+- Mapped tensors share memory with the cache files (no copy)
+- Rewritten exports invalidate old entries; mismatched columns fall back
+- Missing columns and null actions are rejected
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import warnings
+from pathlib import Path
+
+import polars as pl
+import pytest
+import torch
+
+from mimic_sepsis_rl.datasets.replay_buffer import save_replay_frame
+from mimic_sepsis_rl.datasets.replay_cache import (
+    open_replay_cache,
+    replay_cache_root,
+    write_replay_cache,
+)
+from mimic_sepsis_rl.datasets.transitions import build_frame_meta, build_transition_frame
+from mimic_sepsis_rl.training import common
+from mimic_sepsis_rl.training.common import ReplayDataset
+
+FEATURES = ["sofa", "map", "lactate"]
+
+
+def _merged(n_stays: int = 4, steps: int = 5, seed: int = 7) -> pl.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for stay in range(n_stays):
+        for step in range(steps):
+            rows.append(
+                {
+                    "stay_id": 100 + stay,
+                    "step_index": step,
+                    "action_id": rng.randint(0, 24),
+                    "reward_total": rng.uniform(-1.0, 1.0),
+                    **{f: rng.gauss(0.0, 1.0) for f in FEATURES},
+                }
+            )
+    return pl.DataFrame(rows)
+
+
+def _export(tmp_path: Path, **kwargs) -> Path:
+    frame = build_transition_frame(_merged(**kwargs), feature_columns=FEATURES)
+    meta = build_frame_meta(
+        frame,
+        feature_columns=FEATURES,
+        split_label="train",
+        manifest_seed=42,
+        action_spec_version="1.0.0",
+        reward_spec_version="1.0.0",
+    )
+    parquet_path, _ = save_replay_frame(frame, tmp_path, meta=meta)
+    return parquet_path
+
+
+def _tensors(ds: ReplayDataset) -> list[torch.Tensor]:
+    batch = next(ds.iter_batches(len(ds), shuffle=False))
+    return [batch.states, batch.actions, batch.rewards, batch.next_states, batch.dones]
+
+
+def test_export_writes_cache_matching_parquet(tmp_path):
+    path = _export(tmp_path)
+    cache = open_replay_cache(path)
+    assert cache is not None
+    assert cache.path.parent == replay_cache_root(path)
+    assert cache.state_columns == tuple(sorted(f"s_{f}" for f in FEATURES))
+
+    mapped = ReplayDataset(path, device=torch.device("cpu"))
+    assert mapped.memory_mapped
+
+    for entry in replay_cache_root(path).iterdir():
+        for name in os.listdir(entry):
+            os.remove(entry / name)
+    decoded = ReplayDataset(path, device=torch.device("cpu"))
+    assert not decoded.memory_mapped
+
+    assert mapped.state_columns == decoded.state_columns
+    for left, right in zip(_tensors(mapped), _tensors(decoded)):
+        assert left.dtype == right.dtype
+        assert torch.equal(left, right)
+
+
+def test_mapped_tensors_share_cache_memory(tmp_path, monkeypatch):
+    path = _export(tmp_path)
+    opened = []
+
+    def _capture(parquet_path):
+        opened.append(open_replay_cache(parquet_path))
+        return opened[-1]
+
+    monkeypatch.setattr(common, "open_replay_cache", _capture)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ds = ReplayDataset(path, device=torch.device("cpu"))
+
+    cache = opened[0]
+    assert ds._states.data_ptr() == cache.states.ctypes.data
+    assert ds._next_states.data_ptr() == cache.next_states.ctypes.data
+    assert ds._actions.data_ptr() == cache.actions.ctypes.data
+    assert ds._actions.dtype == torch.int64
+
+
+def test_rewritten_export_replaces_stale_entry(tmp_path):
+    path = _export(tmp_path, n_stays=2)
+    first = open_replay_cache(path).path
+
+    _export(tmp_path, n_stays=3)
+    second = open_replay_cache(path)
+    assert second.path != first
+    assert not first.exists()
+    assert second.n_transitions == 15
+
+    # A Parquet file rewritten without the cache is not served stale arrays.
+    pl.read_parquet(path).head(4).write_parquet(path)
+    assert open_replay_cache(path) is None
+    assert ReplayDataset(path, device=torch.device("cpu")).n_transitions == 4
+
+
+def test_explicit_state_columns_in_another_order_fall_back(tmp_path):
+    path = _export(tmp_path)
+    columns = [f"s_{f}" for f in FEATURES]
+    ds = ReplayDataset(path, device=torch.device("cpu"), state_columns=columns)
+    assert not ds.memory_mapped
+    assert ds.state_columns == columns
+
+
+def test_invalid_exports_are_rejected(tmp_path):
+    path = _export(tmp_path)
+    df = pl.read_parquet(path)
+
+    df.drop("ns_map").write_parquet(path)
+    with pytest.raises(ValueError, match="missing columns"):
+        write_replay_cache(path)
+
+    df.with_columns(
+        pl.when(pl.col("step_index") == 0).then(None).otherwise(pl.col("action")).alias("action")
+    ).write_parquet(path)
+    with pytest.raises(ValueError, match="nulls in \\['action'\\]"):
+        write_replay_cache(path)
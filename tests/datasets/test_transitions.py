@@ -13,6 +13,7 @@ Covers:
 - Replay buffer grouping and validation
 - Empty input edge cases
 - Step alignment (transitions align with step_index)
+- Columnar transition frames match the per-episode row builder
 """
 
 from __future__ import annotations
@@ -31,9 +32,11 @@ from mimic_sepsis_rl.datasets.transitions import (
     TransitionDatasetMeta,
     build_episode_transitions,
     build_transitions,
+    build_transition_frame,
     build_dataset_meta,
     transitions_to_dataframe,
     save_transitions,
+    save_transition_frame,
     load_transition_meta,
 )
 from mimic_sepsis_rl.datasets.replay_buffer import (
@@ -43,7 +46,9 @@ from mimic_sepsis_rl.datasets.replay_buffer import (
     ReplayBufferValidationError,
     build_replay_buffer,
     validate_replay_buffer,
+    validate_transition_frame,
     save_replay_buffer,
+    save_replay_frame,
     load_replay_buffer_meta,
 )
 
@@ -517,6 +522,160 @@ class TestPersistence:
             assert meta["replay_buffer_version"] == REPLAY_BUFFER_VERSION
 
 
+# ===================================================================
+# Columnar Transition Frame Tests
+# ===================================================================
+
+
+def _make_messy_batch() -> pl.DataFrame:
+    """Shuffled multi-episode batch with nulls, NaNs and a one-step episode."""
+    batch = pl.concat(
+        [
+            _make_episode(stay_id=300, n_steps=4, mortality=1),
+            _make_episode(stay_id=100, n_steps=1),
+            _make_episode(stay_id=200, n_steps=3),
+        ]
+    ).with_columns(
+        pl.when(pl.col("step_index") == 1)
+        .then(None)
+        .otherwise(pl.col("feat_a"))
+        .alias("feat_a"),
+        pl.when(pl.col("step_index") == 2)
+        .then(float("nan"))
+        .otherwise(pl.col("feat_b"))
+        .alias("feat_b"),
+    )
+    return batch.sample(fraction=1.0, shuffle=True, seed=7)
+
+
+class TestTransitionFrame:
+    """Verify the columnar builder against the per-episode row builder."""
+
+    def test_matches_per_episode_builder(self) -> None:
+        """Frame equals the row builder applied episode by episode."""
+        batch = _make_messy_batch()
+        expected_rows = []
+        for sid in sorted(batch["stay_id"].unique().to_list()):
+            expected_rows.extend(
+                build_episode_transitions(
+                    batch.filter(pl.col("stay_id") == sid),
+                    feature_columns=FEATURE_COLS,
+                )
+            )
+        expected = transitions_to_dataframe(expected_rows, FEATURE_COLS)
+
+        frame = build_transition_frame(batch, feature_columns=FEATURE_COLS)
+
+        assert frame.schema == expected.schema
+        assert frame.equals(expected)
+        assert build_transitions(batch, feature_columns=FEATURE_COLS) == expected_rows
+
+    def test_lazy_input_stays_lazy(self) -> None:
+        """A LazyFrame input yields a LazyFrame with the same rows."""
+        batch = _make_messy_batch()
+        lazy = build_transition_frame(batch.lazy(), feature_columns=FEATURE_COLS)
+        assert isinstance(lazy, pl.LazyFrame)
+        assert lazy.collect().equals(
+            build_transition_frame(batch, feature_columns=FEATURE_COLS)
+        )
+
+    def test_null_action_raises(self) -> None:
+        """Every step needs an action before transitions can be built."""
+        batch = _make_batch().with_columns(
+            pl.when(pl.col("step_index") == 0)
+            .then(None)
+            .otherwise(pl.col("action_id"))
+            .alias("action_id")
+        )
+        with pytest.raises(ValueError, match="action_id"):
+            build_transition_frame(batch, feature_columns=FEATURE_COLS)
+
+    def test_null_reward_raises_when_lazy_frame_is_collected(self) -> None:
+        """Lazy inputs are checked when the plan runs, not skipped."""
+        batch = _make_batch().with_columns(
+            pl.when(pl.col("step_index") == 1)
+            .then(None)
+            .otherwise(pl.col("reward_total"))
+            .alias("reward_total")
+        )
+        lazy = build_transition_frame(batch.lazy(), feature_columns=FEATURE_COLS)
+        with pytest.raises(ValueError, match="reward_total"):
+            lazy.collect()
+        with pytest.raises(ValueError, match="reward_total"):
+            lazy.collect(engine="streaming")
+
+    def test_frame_validation(self) -> None:
+        """Columnar validation reports the same failures as the buffer check."""
+        frame = build_transition_frame(_make_batch(), feature_columns=FEATURE_COLS)
+        validate_transition_frame(frame, feature_columns=FEATURE_COLS)
+
+        bad_action = frame.with_columns(
+            pl.when(pl.col("step_index") == 1).then(30).otherwise(pl.col("action")).alias("action")
+        )
+        with pytest.raises(ReplayBufferValidationError, match="out of range"):
+            validate_transition_frame(bad_action, feature_columns=FEATURE_COLS)
+
+        not_done = frame.with_columns(pl.lit(False).alias("done"))
+        with pytest.raises(ReplayBufferValidationError, match="not marked done"):
+            validate_transition_frame(not_done, feature_columns=FEATURE_COLS)
+
+        with pytest.raises(ReplayBufferValidationError, match="missing columns"):
+            validate_transition_frame(frame.drop("ns_feat_c"), feature_columns=FEATURE_COLS)
+
+        validate_transition_frame(
+            frame, feature_columns=FEATURE_COLS, expected_state_dim=len(FEATURE_COLS)
+        )
+        with pytest.raises(ReplayBufferValidationError, match="state dim 3 != expected 4"):
+            validate_transition_frame(
+                frame, feature_columns=FEATURE_COLS, expected_state_dim=4
+            )
+
+    def test_frame_exports_match_row_exports(self) -> None:
+        """Direct frame exports write the same files as the row-based path."""
+        batch = _make_messy_batch()
+        trans = build_transitions(batch, feature_columns=FEATURE_COLS)
+        buffer = build_replay_buffer(
+            trans,
+            feature_columns=FEATURE_COLS,
+            split_label="train",
+            manifest_seed=42,
+            action_spec_version="1.0.0",
+            reward_spec_version="1.0.0",
+        )
+        frame = build_transition_frame(batch, feature_columns=FEATURE_COLS)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            row_dir, frame_dir = Path(tmpdir) / "rows", Path(tmpdir) / "frame"
+            save_transitions(
+                trans,
+                FEATURE_COLS,
+                row_dir,
+                split_label="train",
+                manifest_seed=42,
+                action_spec_version="1.0.0",
+                reward_spec_version="1.0.0",
+            )
+            save_replay_buffer(buffer, row_dir)
+            _, _, meta = save_transition_frame(
+                frame.lazy(),
+                FEATURE_COLS,
+                frame_dir,
+                split_label="train",
+                manifest_seed=42,
+                action_spec_version="1.0.0",
+                reward_spec_version="1.0.0",
+            )
+            save_replay_frame(frame, frame_dir, meta=meta)
+
+            for name in ("transitions_train", "replay_train"):
+                assert pl.read_parquet(frame_dir / f"{name}.parquet").equals(
+                    pl.read_parquet(row_dir / f"{name}.parquet")
+                )
+                assert json.loads((frame_dir / f"{name}_meta.json").read_text()) == json.loads(
+                    (row_dir / f"{name}_meta.json").read_text()
+                )
+
+
 # ===================================================================
 # Determinism Tests
 # ===================================================================
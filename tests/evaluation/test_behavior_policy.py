@@ -0,0 +1,183 @@
+"""Regression tests for the kNN behavior-policy estimator."""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import polars as pl
+import pytest
+import torch
+
+from mimic_sepsis_rl.evaluation.behavior_policy import (
+    KNNBehaviorPolicy,
+    with_behavior_probabilities,
+)
+from mimic_sepsis_rl.evaluation.ope import HeldOutEpisode, HeldOutStep
+from mimic_sepsis_rl.evaluation.safety import (
+    ActionSupport,
+    BatchActionSupportLookup,
+    build_safety_review_rows,
+)
+from mimic_sepsis_rl.training.common import ReplayDataset
+
+N_ACTIONS = 4
+
+
+class ConstantPolicy:
+    def __init__(self, action: int) -> None:
+        self.action = action
+
+    def select_action(self, state) -> int:
+        return self.action
+
+
+class _TreeSpy:
+    """Counts KD-tree queries."""
+
+    def __init__(self, tree) -> None:
+        self._tree = tree
+        self.calls = 0
+
+    def query(self, *args, **kwargs):
+        self.calls += 1
+        return self._tree.query(*args, **kwargs)
+
+
+def _train_arrays(n: int = 200, *, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Clinicians pick action 0 when the first feature is negative, else 3."""
+    rng = np.random.default_rng(seed)
+    states = rng.normal(size=(n, 2)) * np.array([1.0, 50.0])
+    actions = np.where(states[:, 0] < 0.0, 0, 3)
+    return states, actions
+
+
+def _held_out() -> tuple[HeldOutEpisode, ...]:
+    rng = random.Random(1)
+    return tuple(
+        HeldOutEpisode(
+            episode_id=f"ep-{i}",
+            steps=tuple(
+                HeldOutStep(
+                    episode_id=f"ep-{i}",
+                    step_index=t,
+                    state=(rng.gauss(0, 1), rng.gauss(0, 50)),
+                    action=rng.randrange(N_ACTIONS),
+                    reward=0.0,
+                    done=t == 2,
+                    behavior_action_prob=1.0,
+                )
+                for t in range(3)
+            ),
+        )
+        for i in range(5)
+    )
+
+
+def _brute_force_counts(model_states, model_actions, query, *, k) -> np.ndarray:
+    mean = model_states.mean(axis=0)
+    scale = model_states.std(axis=0)
+    train = (model_states - mean) / scale
+    counts = np.zeros((len(query), N_ACTIONS), dtype=np.int64)
+    for row, state in enumerate((np.asarray(query) - mean) / scale):
+        nearest = np.argsort(((train - state) ** 2).sum(axis=1), kind="stable")[:k]
+        counts[row] = np.bincount(model_actions[nearest], minlength=N_ACTIONS)
+    return counts
+
+
+def test_bulk_support_matches_brute_force_neighbours() -> None:
+    states, actions = _train_arrays()
+    model = KNNBehaviorPolicy(n_neighbors=7, n_actions=N_ACTIONS, smoothing=0.5)
+    model.fit(states, actions)
+    query, _ = _train_arrays(30, seed=4)
+    query_actions = np.arange(30) % N_ACTIONS
+
+    probs, counts = model.support_batch(query, query_actions)
+
+    expected = _brute_force_counts(states, actions, query, k=7)
+    assert model.neighbor_action_counts(query).tolist() == expected.tolist()
+    assert counts.tolist() == expected[np.arange(30), query_actions].tolist()
+    assert probs.tolist() == pytest.approx(((counts + 0.5) / (7 + 0.5 * N_ACTIONS)).tolist())
+    assert model.action_probabilities(query).sum(axis=1) == pytest.approx(np.ones(30))
+    single = model(query[0], int(query_actions[0]))
+    assert single == ActionSupport(behavior_prob=float(probs[0]), count=int(counts[0]))
+
+
+def test_save_load_round_trip_and_memoised_queries(tmp_path) -> None:
+    states, actions = _train_arrays()
+    model = KNNBehaviorPolicy(n_neighbors=5, n_actions=N_ACTIONS).fit(states, actions)
+    query, _ = _train_arrays(12, seed=9)
+    path = model.save(tmp_path / "behavior" / "knn.pkl")
+
+    loaded = KNNBehaviorPolicy.load(path)
+    assert loaded.n_neighbors == 5
+    assert loaded.neighbor_action_counts(query).tolist() == (
+        model.neighbor_action_counts(query).tolist()
+    )
+
+    # The round trip above already memoised ``query``; later calls reuse it.
+    loaded._tree = _TreeSpy(loaded._tree)
+    for action in range(N_ACTIONS):
+        loaded.support_batch(query, np.full(12, action))
+    assert loaded._tree.calls == 0
+
+
+def test_from_replay_and_attaching_behavior_probabilities(tmp_path) -> None:
+    states, actions = _train_arrays(60)
+    records = [
+        {
+            "s_f0": s[0],
+            "s_f1": s[1],
+            "action": int(a),
+            "reward": 0.0,
+            "done": True,
+            "ns_f0": 0.0,
+            "ns_f1": 0.0,
+        }
+        for s, a in zip(states.tolist(), actions.tolist())
+    ]
+    path = tmp_path / "replay_train.parquet"
+    pl.DataFrame(records).write_parquet(path)
+    model = KNNBehaviorPolicy.from_replay(
+        ReplayDataset(path, device=torch.device("cpu")), n_neighbors=5, n_actions=N_ACTIONS
+    )
+
+    episodes = _held_out()
+    scored = with_behavior_probabilities(episodes, model)
+    steps = [step for episode in scored for step in episode.steps]
+    expected, _ = model.support_batch(
+        [step.state for step in steps], [step.action for step in steps]
+    )
+    assert [step.behavior_action_prob for step in steps] == expected.tolist()
+    assert [episode.episode_id for episode in scored] == [e.episode_id for e in episodes]
+    assert all(0.0 < step.behavior_action_prob < 1.0 for step in steps)
+
+
+def test_safety_rows_use_bulk_support_lookup() -> None:
+    states, actions = _train_arrays()
+    model = KNNBehaviorPolicy(n_neighbors=9, n_actions=N_ACTIONS).fit(states, actions)
+    assert isinstance(model, BatchActionSupportLookup)
+    episodes = _held_out()
+
+    bulk = build_safety_review_rows(ConstantPolicy(3), episodes, model)
+    per_step = build_safety_review_rows(
+        ConstantPolicy(3), episodes, lambda state, action: model(state, action)
+    )
+
+    assert bulk == per_step
+    assert len(bulk) == 15
+
+
+def test_validation_errors() -> None:
+    states, actions = _train_arrays(10)
+    with pytest.raises(ValueError, match="not fitted"):
+        KNNBehaviorPolicy().support_batch(states, actions)
+    with pytest.raises(ValueError, match="n_neighbors"):
+        KNNBehaviorPolicy(n_neighbors=20, n_actions=N_ACTIONS).fit(states, actions)
+    model = KNNBehaviorPolicy(n_neighbors=3, n_actions=N_ACTIONS).fit(states, actions)
+    with pytest.raises(ValueError, match="states\\[N, 2\\]"):
+        model.support_batch(np.zeros((2, 3)), [0, 0])
+    with pytest.raises(ValueError, match="Actions must lie"):
+        model.support_batch(states[:2], [0, N_ACTIONS])
+    with pytest.raises(ValueError, match="Train actions"):
+        KNNBehaviorPolicy(n_neighbors=3, n_actions=2).fit(states, actions)
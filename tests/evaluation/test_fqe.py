@@ -0,0 +1,182 @@
+"""Regression tests for the batched FQE trainer and its cached artifacts."""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+import torch
+
+from mimic_sepsis_rl.evaluation import fqe as fqe_module
+from mimic_sepsis_rl.evaluation.fqe import (
+    BatchedFQETrainer,
+    FQEConfig,
+    fit_frozen_fqe_outputs,
+    fqe_cache_key,
+    target_action_distribution,
+)
+from mimic_sepsis_rl.evaluation.ope import HeldOutEpisode, HeldOutStep
+from mimic_sepsis_rl.training.common import ReplayDataset
+
+CPU = torch.device("cpu")
+STATE_DIM = 3
+N_ACTIONS = 3
+
+
+@dataclass
+class ConstantPolicy:
+    """Always picks one action; optionally backed by a checkpoint file."""
+
+    action: int
+    checkpoint_path: Path | None = None
+
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        return np.full(len(states), self.action, dtype=np.int64)
+
+
+def _bandit_replay(tmp_path: Path, *, n: int = 96) -> ReplayDataset:
+    """One-step episodes paying 1.0 for action 0 and 0.0 otherwise."""
+    rng = random.Random(0)
+    records = []
+    for i in range(n):
+        action = i % N_ACTIONS
+        row: dict = {"action": action, "reward": 1.0 if action == 0 else 0.0, "done": True}
+        for j in range(STATE_DIM):
+            row[f"s_f{j}"] = rng.gauss(0, 1)
+            row[f"ns_f{j}"] = rng.gauss(0, 1)
+        records.append(row)
+    path = tmp_path / "replay_train.parquet"
+    pl.DataFrame(records).write_parquet(path)
+    return ReplayDataset(path, device=CPU, seed=0)
+
+
+def _held_out(n_episodes: int = 4) -> tuple[HeldOutEpisode, ...]:
+    return tuple(
+        HeldOutEpisode(
+            episode_id=f"ep-{i}",
+            steps=(
+                HeldOutStep(
+                    episode_id=f"ep-{i}",
+                    step_index=0,
+                    state=(0.1 * i, -0.2, 0.3),
+                    action=0,
+                    reward=1.0,
+                    done=True,
+                    behavior_action_prob=0.5,
+                ),
+            ),
+        )
+        for i in range(n_episodes)
+    )
+
+
+_CONFIG = FQEConfig(
+    gamma=0.9,
+    hidden_sizes=(16,),
+    lr=1e-2,
+    batch_size=32,
+    max_epochs=80,
+    patience=10,
+    min_delta=0.0,
+)
+
+
+def test_fqe_recovers_bandit_values_for_every_policy(tmp_path) -> None:
+    dataset = _bandit_replay(tmp_path)
+    episodes = _held_out()
+    outputs = fit_frozen_fqe_outputs(
+        {"good": ConstantPolicy(0), "bad": ConstantPolicy(1)},
+        episodes,
+        dataset=dataset,
+        config=_CONFIG,
+        n_actions=N_ACTIONS,
+    )
+
+    assert list(outputs) == ["good", "bad"]
+    assert outputs["good"].fitted_split == "train"
+    good = outputs["good"].estimate_policy_value(ConstantPolicy(0), episodes, n_actions=N_ACTIONS)
+    bad = outputs["bad"].estimate_policy_value(ConstantPolicy(1), episodes, n_actions=N_ACTIONS)
+    assert good == pytest.approx(1.0, abs=0.15)
+    assert bad == pytest.approx(0.0, abs=0.15)
+
+
+def test_shared_pass_matches_fitting_each_policy_alone(tmp_path) -> None:
+    dataset = _bandit_replay(tmp_path)
+    config = FQEConfig(hidden_sizes=(8,), lr=1e-2, batch_size=16, max_epochs=6, patience=2)
+
+    together = BatchedFQETrainer(
+        dataset,
+        {"a": ConstantPolicy(0), "b": ConstantPolicy(2)},
+        config=config,
+        n_actions=N_ACTIONS,
+    ).fit()
+    alone = BatchedFQETrainer(
+        dataset, {"b": ConstantPolicy(2)}, config=config, n_actions=N_ACTIONS
+    ).fit()
+
+    assert together["b"].best_epoch == alone["b"].best_epoch
+    assert together["b"].held_in_td_errors == pytest.approx(alone["b"].held_in_td_errors, rel=1e-5)
+    for name, tensor in alone["b"].q_network.state_dict().items():
+        assert torch.allclose(together["b"].q_network.state_dict()[name], tensor, atol=1e-5)
+
+
+def test_early_stopping_keeps_best_epoch(tmp_path) -> None:
+    dataset = _bandit_replay(tmp_path)
+    config = FQEConfig(hidden_sizes=(8,), max_epochs=50, patience=1, min_delta=10.0)
+    fitted = BatchedFQETrainer(
+        dataset, {"a": ConstantPolicy(0)}, config=config, n_actions=N_ACTIONS
+    ).fit()["a"]
+
+    # The first epoch always improves on +inf; nothing later clears min_delta.
+    assert fitted.best_epoch == 1
+    assert len(fitted.held_in_td_errors) == 2
+    assert fitted.best_held_in_td_error == fitted.held_in_td_errors[0]
+
+
+def test_cached_outputs_skip_refitting_unchanged_policies(tmp_path, monkeypatch) -> None:
+    dataset = _bandit_replay(tmp_path)
+    episodes = _held_out()
+    checkpoint = tmp_path / "policy.pt"
+    checkpoint.write_bytes(b"weights-v1")
+    targets = {"cql": ConstantPolicy(0, checkpoint_path=checkpoint)}
+    config = FQEConfig(hidden_sizes=(8,), max_epochs=2)
+    cache_dir = tmp_path / "fqe_cache"
+
+    first = fit_frozen_fqe_outputs(
+        targets, episodes, dataset=dataset, config=config, cache_dir=cache_dir, n_actions=N_ACTIONS
+    )
+    assert len(list(cache_dir.glob("fqe_*.json"))) == 1
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("cached policy must not be refitted")
+
+    monkeypatch.setattr(fqe_module, "BatchedFQETrainer", _fail)
+    second = fit_frozen_fqe_outputs(
+        targets, episodes, dataset=dataset, config=config, cache_dir=cache_dir, n_actions=N_ACTIONS
+    )
+    assert second["cql"] == first["cql"]
+
+    key = fqe_cache_key(
+        targets["cql"], dataset=dataset, episodes=episodes, config=config, n_actions=N_ACTIONS
+    )
+    checkpoint.write_bytes(b"weights-v2")
+    assert fqe_cache_key(
+        targets["cql"], dataset=dataset, episodes=episodes, config=config, n_actions=N_ACTIONS
+    ) != key
+    assert fqe_cache_key(
+        ConstantPolicy(0), dataset=dataset, episodes=episodes, config=config
+    ) is None
+
+
+def test_target_distribution_and_config_validation() -> None:
+    states = np.zeros((4, STATE_DIM))
+    distribution = target_action_distribution(ConstantPolicy(2), states, n_actions=N_ACTIONS)
+    assert distribution.tolist() == [[0.0, 0.0, 1.0]] * 4
+    with pytest.raises(ValueError, match="outside"):
+        target_action_distribution(ConstantPolicy(5), states, n_actions=N_ACTIONS)
+    with pytest.raises(ValueError, match="validation_fraction"):
+        FQEConfig(validation_fraction=1.0).validate()
@@ -0,0 +1,228 @@
+"""Regression tests for the columnar importance-sampling core."""
+
+from __future__ import annotations
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+from mimic_sepsis_rl.evaluation.importance_sampling import (
+    TrajectoryArrays,
+    bootstrap_confidence_intervals,
+    importance_sampling_estimates,
+)
+from mimic_sepsis_rl.evaluation.ope import (
+    FrozenFQEOutputs,
+    HeldOutEpisode,
+    HeldOutStep,
+    build_trajectory_arrays,
+    compute_wis_and_ess,
+    evaluate_policy_run,
+)
+from mimic_sepsis_rl.training.comparison import ConfigProvenance, RunArtifact
+
+N_ACTIONS = 25
+
+
+class FeaturePolicy:
+    """Stochastic policy whose preferences depend on the first feature."""
+
+    def _probs(self, state) -> list[float]:
+        weights = [1.0 + abs(state[0]) * ((action + 1) % 3) for action in range(N_ACTIONS)]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def select_action(self, state) -> int:
+        probs = self._probs(state)
+        return max(range(N_ACTIONS), key=lambda action: probs[action])
+
+    def action_probability(self, state, action: int) -> float:
+        return self._probs(state)[action]
+
+
+def _episodes(n_episodes: int = 12, *, seed: int = 0) -> tuple[HeldOutEpisode, ...]:
+    rng = random.Random(seed)
+    episodes = []
+    for episode in range(n_episodes):
+        n_steps = rng.randint(1, 6)
+        first = rng.randint(0, 2)
+        episodes.append(
+            HeldOutEpisode(
+                episode_id=f"ep-{episode}",
+                steps=tuple(
+                    HeldOutStep(
+                        episode_id=f"ep-{episode}",
+                        step_index=first + step,
+                        state=(rng.gauss(0, 1), rng.gauss(0, 1)),
+                        action=rng.randrange(N_ACTIONS),
+                        reward=rng.uniform(-1.0, 1.0),
+                        done=step == n_steps - 1,
+                        behavior_action_prob=rng.uniform(0.1, 0.6),
+                    )
+                    for step in range(n_steps)
+                ),
+            )
+        )
+    return tuple(episodes)
+
+
+def _reference(episodes, policy, *, gamma, max_ratio=None) -> dict[str, float]:
+    """Per-step loop implementation of every estimator."""
+    weights, returns, decision_terms = [], [], []
+    for episode in episodes:
+        weight, ret, per_step = 1.0, 0.0, []
+        for step in episode.steps:
+            ratio = policy.action_probability(step.state, step.action) / step.behavior_action_prob
+            if max_ratio is not None:
+                ratio = min(ratio, max_ratio)
+            weight *= ratio
+            discounted = (gamma**step.step_index) * step.reward
+            ret += discounted
+            per_step.append((weight, discounted))
+        weights.append(weight)
+        returns.append(ret)
+        decision_terms.append(per_step)
+
+    n = len(episodes)
+    horizon = max(len(terms) for terms in decision_terms)
+    pdwis = 0.0
+    for t in range(horizon):
+        numerator = denominator = 0.0
+        for terms in decision_terms:
+            w, d = terms[t] if t < len(terms) else (terms[-1][0], 0.0)
+            numerator += w * d
+            denominator += w
+        pdwis += numerator / denominator if denominator > 0 else 0.0
+    weight_sum = sum(weights)
+    return {
+        "is_estimate": sum(w * r for w, r in zip(weights, returns)) / n,
+        "wis": sum(w * r for w, r in zip(weights, returns)) / weight_sum,
+        "pdis": sum(w * d for terms in decision_terms for w, d in terms) / n,
+        "pdwis": pdwis,
+        "ess": weight_sum**2 / sum(w * w for w in weights),
+        "weights": weights,
+        "returns": returns,
+    }
+
+
+@pytest.mark.parametrize("max_ratio", [None, 2.5])
+def test_vectorized_estimates_match_per_step_reference(max_ratio) -> None:
+    episodes = _episodes()
+    policy = FeaturePolicy()
+    expected = _reference(episodes, policy, gamma=0.9, max_ratio=max_ratio)
+
+    metrics, per_episode = compute_wis_and_ess(
+        episodes, policy, gamma=0.9, max_importance_ratio=max_ratio
+    )
+
+    # Weights and returns accumulate left to right, exactly like the loop.
+    assert [e.importance_weight for e in per_episode] == expected["weights"]
+    assert [e.discounted_return for e in per_episode] == expected["returns"]
+    for name in ("is_estimate", "wis", "pdis", "pdwis", "ess"):
+        assert getattr(metrics, name) == pytest.approx(expected[name], rel=1e-12), name
+
+
+def test_from_ragged_pads_and_validates() -> None:
+    arrays = TrajectoryArrays.from_ragged(
+        lengths=[2, 1],
+        step_index=[0, 1, 0],
+        rewards=[1.0, 2.0, 3.0],
+        behavior_probs=[0.5, 0.5, 0.25],
+        target_probs=[1.0, 0.0, 1.0],
+    )
+    assert arrays.rewards.tolist() == [[1.0, 2.0], [3.0, 0.0]]
+    assert arrays.mask.tolist() == [[True, True], [True, False]]
+    assert arrays.cumulative_weights()[:, -1].tolist() == [0.0, 4.0]
+    assert arrays.discounted_returns(0.5).tolist() == [2.0, 3.0]
+
+    with pytest.raises(ValueError, match="one value per step"):
+        TrajectoryArrays.from_ragged(
+            lengths=[2], step_index=[0], rewards=[1.0], behavior_probs=[1.0], target_probs=[1.0]
+        )
+    with pytest.raises(ValueError, match="at least one step"):
+        TrajectoryArrays.from_ragged(
+            lengths=[0], step_index=[], rewards=[], behavior_probs=[], target_probs=[]
+        )
+
+
+def test_bootstrap_matches_explicit_resampling_loop() -> None:
+    episodes = _episodes(20, seed=3)
+    arrays = build_trajectory_arrays(episodes, FeaturePolicy())
+    intervals = bootstrap_confidence_intervals(
+        arrays, gamma=0.95, n_resamples=300, confidence=0.9, seed=11
+    )
+
+    draws = np.random.default_rng(11).integers(0, len(episodes), size=(300, len(episodes)))
+    resampled = {name: [] for name in ("wis", "ess", "pdwis")}
+    for row in draws:
+        sample = build_trajectory_arrays([episodes[i] for i in row], FeaturePolicy())
+        estimates = importance_sampling_estimates(sample, gamma=0.95)
+        for name in resampled:
+            resampled[name].append(getattr(estimates, name))
+
+    point = importance_sampling_estimates(arrays, gamma=0.95)
+    for name, values in resampled.items():
+        lower, upper = np.quantile(values, [0.05, 0.95])
+        assert intervals[name].estimate == getattr(point, name)
+        assert intervals[name].lower == pytest.approx(lower, rel=1e-9)
+        assert intervals[name].upper == pytest.approx(upper, rel=1e-9)
+    assert intervals["wis"].lower <= intervals["wis"].estimate <= intervals["wis"].upper
+
+    with pytest.raises(ValueError, match="confidence"):
+        bootstrap_confidence_intervals(arrays, confidence=1.0)
+
+
+def test_evaluate_policy_run_attaches_bootstrap_intervals() -> None:
+    episodes = _episodes(8, seed=5)
+    artifact = RunArtifact(
+        algorithm="cql",
+        checkpoint=None,
+        curves=tuple(),
+        final_metrics={},
+        config_provenance=ConfigProvenance(
+            config_path="configs/training/cql.yaml",
+            checkpoint_dir="checkpoints/cql",
+            log_dir="runs/cql",
+            experiment_name="cql_reference",
+            dataset_path="data/replay/replay_train.parquet",
+            dataset_meta_path=None,
+            batch_size=256,
+            gamma=0.99,
+            requested_device="cpu",
+            effective_backend="cpu",
+        ),
+        dataset_contract=None,
+    )
+    frozen_fqe = FrozenFQEOutputs(
+        fitted_split="train",
+        initial_state_action_values={
+            episode.episode_id: tuple(float(a) for a in range(N_ACTIONS))
+            for episode in episodes
+        },
+    )
+
+    plain = evaluate_policy_run(artifact, episodes, FeaturePolicy(), frozen_fqe)
+    report = evaluate_policy_run(
+        artifact,
+        episodes,
+        FeaturePolicy(),
+        frozen_fqe,
+        bootstrap_resamples=200,
+        bootstrap_seed=1,
+    )
+
+    assert plain.confidence_intervals is None
+    assert report.metrics == plain.metrics
+    assert report.confidence_intervals.n_resamples == 200
+    assert report.confidence_intervals["wis"].estimate == report.metrics.wis
+    payload = json.loads(json.dumps(report.to_dict()))
+    assert set(payload["confidence_intervals"]["intervals"]) == {
+        "is_estimate",
+        "wis",
+        "pdis",
+        "pdwis",
+        "ess",
+        "mean_behavior_return",
+    }
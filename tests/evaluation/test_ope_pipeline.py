@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+import numpy as np
 import pytest
 
 from mimic_sepsis_rl.evaluation.ope import (
+    BatchActionProbabilityPolicy,
+    BatchActionSelectionPolicy,
     FrozenFQEOutputs,
     HeldOutEpisode,
     HeldOutStep,
+    compute_wis_and_ess,
     evaluate_policy_run,
 )
 from mimic_sepsis_rl.training.comparison import (
@@ -29,6 +33,49 @@ class MappingPolicy:
         return self.actions[tuple(float(value) for value in state)]
 
 
+@dataclass
+class BatchMappingPolicy:
+    """Batched variant of :class:`MappingPolicy` that records its call sizes."""
+
+    actions: dict[tuple[float, ...], int]
+    calls: list[int] = field(default_factory=list)
+
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        self.calls.append(len(states))
+        return np.asarray(
+            [self.actions[tuple(float(value) for value in state)] for state in states]
+        )
+
+
+@dataclass
+class StochasticPolicy:
+    """Per-step stochastic policy: π(a | s) depends on the first feature."""
+
+    def _probs(self, state) -> list[float]:
+        weights = [1.0 + abs(float(state[0])) * (action % 3) for action in range(25)]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def select_action(self, state) -> int:
+        probs = self._probs(state)
+        return max(range(25), key=lambda action: probs[action])
+
+    def action_probability(self, state, action: int) -> float:
+        return self._probs(state)[action]
+
+
+@dataclass
+class BatchStochasticPolicy(StochasticPolicy):
+    calls: list[int] = field(default_factory=list)
+
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        return self.action_probabilities(states).argmax(axis=1)
+
+    def action_probabilities(self, states: np.ndarray) -> np.ndarray:
+        self.calls.append(len(states))
+        return np.asarray([self._probs(state) for state in states])
+
+
 def _q_values(best_action: int, *, best_value: float) -> tuple[float, ...]:
     values = [0.0] * 25
     values[best_action] = best_value
@@ -230,3 +277,74 @@ def test_evaluate_policy_run_rejects_fqe_fit_on_held_out_split() -> None:
             frozen_fqe,
             held_out_contract=_held_out_contract(),
         )
+
+
+def test_batched_policies_match_per_step_scoring_in_one_call_per_chunk() -> None:
+    mapping = {
+        (0.0, 1.0): 0,
+        (0.1, 1.1): 1,
+        (2.0, 0.0): 1,
+        (2.1, 0.1): 2,
+    }
+    frozen_fqe = FrozenFQEOutputs(
+        fitted_split="train",
+        initial_state_action_values={
+            "ep-1": _q_values(0, best_value=2.5),
+            "ep-2": _q_values(1, best_value=1.5),
+        },
+    )
+    batched = BatchMappingPolicy(actions=mapping)
+    assert isinstance(batched, BatchActionSelectionPolicy)
+
+    expected = evaluate_policy_run(
+        _run_artifact(),
+        _held_out_episodes(),
+        MappingPolicy(actions=mapping),
+        frozen_fqe,
+        held_out_contract=_held_out_contract(),
+    )
+    actual = evaluate_policy_run(
+        _run_artifact(),
+        _held_out_episodes(),
+        batched,
+        frozen_fqe,
+        held_out_contract=_held_out_contract(),
+        chunk_size=3,
+    )
+
+    assert actual.metrics == expected.metrics
+    assert actual.per_episode == expected.per_episode
+    # Four held-out steps in chunks of three, then both initial states for FQE.
+    assert batched.calls == [3, 1, 2]
+
+
+def test_batched_action_probabilities_match_per_step_probabilities() -> None:
+    batched = BatchStochasticPolicy()
+    assert isinstance(batched, BatchActionProbabilityPolicy)
+
+    expected_metrics, expected_episodes = compute_wis_and_ess(
+        _held_out_episodes(), StochasticPolicy()
+    )
+    metrics, episodes = compute_wis_and_ess(_held_out_episodes(), batched, chunk_size=2)
+
+    assert batched.calls == [2, 2]
+    assert metrics.wis == pytest.approx(expected_metrics.wis, rel=1e-12)
+    assert metrics.ess == pytest.approx(expected_metrics.ess, rel=1e-12)
+    for left, right in zip(episodes, expected_episodes):
+        assert left.importance_weight == pytest.approx(right.importance_weight, rel=1e-12)
+        assert left.matched_steps == right.matched_steps
+
+    frozen_fqe = FrozenFQEOutputs(
+        fitted_split="train",
+        initial_state_action_values={
+            "ep-1": _q_values(0, best_value=2.5),
+            "ep-2": _q_values(4, best_value=1.5),
+        },
+    )
+    assert frozen_fqe.estimate_policy_value(
+        batched, _held_out_episodes(), n_actions=25
+    ) == pytest.approx(
+        frozen_fqe.estimate_policy_value(StochasticPolicy(), _held_out_episodes(), n_actions=25)
+    )
+    with pytest.raises(ValueError, match="width mismatch"):
+        frozen_fqe.estimate_policy_value(batched, _held_out_episodes(), n_actions=24)
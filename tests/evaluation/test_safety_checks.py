@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+import numpy as np
 import pytest
 
 from mimic_sepsis_rl.evaluation.ope import HeldOutEpisode, HeldOutStep
@@ -26,6 +27,20 @@ class MappingPolicy:
         return self.actions[tuple(float(value) for value in state)]
 
 
+@dataclass
+class BatchMappingPolicy:
+    """Batched policy keyed by exact state tuple; records call sizes."""
+
+    actions: dict[tuple[float, ...], int]
+    calls: list[int] = field(default_factory=list)
+
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        self.calls.append(len(states))
+        return np.asarray(
+            [self.actions[tuple(float(value) for value in state)] for state in states]
+        )
+
+
 def _action_bins() -> ActionBinArtifacts:
     return ActionBinArtifacts(
         spec_version="1.0.0",
@@ -143,3 +158,41 @@ def test_build_safety_review_rows_uses_policy_and_support_lookup() -> None:
     assert [row.subgroup for row in rows] == ["early", "late"]
     assert rows[1].policy_action_support_prob == pytest.approx(0.01)
     assert rows[1].policy_action_support_count == 2
+
+
+def test_build_safety_review_rows_batches_policy_calls_per_chunk() -> None:
+    episodes = tuple(
+        HeldOutEpisode(
+            episode_id=f"ep-{episode}",
+            steps=tuple(
+                HeldOutStep(
+                    episode_id=f"ep-{episode}",
+                    step_index=step,
+                    state=(float(episode), float(step)),
+                    action=(episode + step) % 25,
+                    reward=0.0,
+                    done=step == 2,
+                    behavior_action_prob=0.5,
+                )
+                for step in range(3)
+            ),
+        )
+        for episode in range(3)
+    )
+    mapping = {
+        (float(episode), float(step)): (episode * 7 + step) % 25
+        for episode in range(3)
+        for step in range(3)
+    }
+    support = ActionSupport(behavior_prob=0.2, count=12)
+    batched = BatchMappingPolicy(actions=mapping)
+
+    rows = build_safety_review_rows(
+        batched, episodes, lambda state, action: support, chunk_size=4
+    )
+    expected = build_safety_review_rows(
+        MappingPolicy(actions=mapping), episodes, lambda state, action: support
+    )
+
+    assert rows == expected
+    assert batched.calls == [4, 4, 1]
@@ -4,11 +4,13 @@ Regression tests for the 25-action treatment encoding pipeline.
 Covers:
 - Vasopressor NE-equivalent standardisation
 - IV fluid per-step aggregation
+- Grid-arithmetic step overlap matching (regular and irregular grids)
 - Train-only bin edge learning
 - 5×5 action mapping and decode round-trip
 - Zero-dose explicit handling
 - Leakage guard (no non-train data in fit)
 - Artifact serialisation round-trip
+- Vectorised assignment parity and multi-granularity grids
 """
 
 from __future__ import annotations
@@ -16,7 +18,7 @@ from __future__ import annotations
 import json
 import math
 import tempfile
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import polars as pl
@@ -31,6 +33,7 @@ from mimic_sepsis_rl.mdp.actions.fluids import (
     FluidAggregator,
     IV_FLUID_ITEM_IDS,
 )
+from mimic_sepsis_rl.mdp.actions.intervals import overlapping_steps
 from mimic_sepsis_rl.mdp.actions.bins import (
     ACTION_SPEC_VERSION,
     ActionBinArtifacts,
@@ -39,6 +42,9 @@ from mimic_sepsis_rl.mdp.actions.bins import (
     N_BINS,
     _assign_bin,
     _learn_edges,
+    action_grid_size,
+    encode_action_granularities,
+    fit_action_binners,
     save_action_bin_artifacts,
     load_action_bin_artifacts,
 )
@@ -270,6 +276,77 @@ class TestFluidAggregation:
         assert filtered.height == 1
 
 
+# ===================================================================
+# Step Overlap Tests
+# ===================================================================
+
+
+def _grid_steps(stay_id: int, first_index: int, n_steps: int, *, shift_minutes: int = 0) -> list[dict]:
+    origin = datetime(2024, 1, 1, 2, 0)
+    rows = []
+    for k in range(n_steps):
+        start = origin + timedelta(hours=4 * k)
+        if shift_minutes and k == 1:
+            start += timedelta(minutes=shift_minutes)
+        rows.append(
+            {
+                "stay_id": stay_id,
+                "step_index": first_index + k,
+                "step_start": start,
+                "step_end": start + timedelta(hours=4),
+            }
+        )
+    return rows
+
+
+class TestStepOverlap:
+    """Verify overlap matching against the stay-level cross join."""
+
+    @staticmethod
+    def _cross_join(events, steps, start_col, end_col=None):
+        joined = steps.join(events.with_row_index("_row"), on="stay_id", how="inner")
+        if end_col is None:
+            keep = (pl.col(start_col) >= pl.col("step_start")) & (pl.col(start_col) < pl.col("step_end"))
+        else:
+            keep = (pl.col(start_col) < pl.col("step_end")) & (pl.col(end_col) > pl.col("step_start"))
+        return sorted(joined.filter(keep).select("_row", "step_index").rows())
+
+    def _steps(self) -> pl.DataFrame:
+        # Stay 1: regular grid starting at step 2. Stay 2: step 1 shifted,
+        # so it is not a regular grid and takes the fallback path.
+        return pl.DataFrame(_grid_steps(1, 2, 4) + _grid_steps(2, 0, 3, shift_minutes=30))
+
+    def _events(self) -> pl.DataFrame:
+        def at(hours: float) -> datetime:
+            return datetime(2024, 1, 1, 2, 0) + timedelta(hours=hours)
+
+        return pl.DataFrame(
+            {
+                "stay_id": [1, 1, 1, 1, 1, 1, 2, 2, 3],
+                "starttime": [at(-3), at(4), at(3.5), at(15), at(20), None, at(3.9), at(4.2), at(1)],
+                "endtime": [at(-1), at(4), at(9), at(30), at(21), at(2), at(4.4), at(12), at(2)],
+            }
+        )
+
+    def test_interval_overlap_matches_cross_join(self) -> None:
+        events, steps = self._events(), self._steps()
+        matched = overlapping_steps(
+            events.with_row_index("_row"), steps, start_col="starttime", end_col="endtime"
+        )
+        assert sorted(matched.select("_row", "step_index").rows()) == self._cross_join(
+            events, steps, "starttime", "endtime"
+        )
+        # An infusion spanning steps is matched to each of them, in event order.
+        assert matched.filter(pl.col("_row") == 2)["step_index"].to_list() == [2, 3, 4]
+
+    def test_point_events_match_containing_step(self) -> None:
+        events, steps = self._events(), self._steps()
+        matched = overlapping_steps(events.with_row_index("_row"), steps, start_col="starttime")
+        assert sorted(matched.select("_row", "step_index").rows()) == self._cross_join(
+            events, steps, "starttime"
+        )
+
+
 # ===================================================================
 # Bin Edge Learning Tests
 # ===================================================================
@@ -457,6 +534,91 @@ class TestActionBinner:
         assert "×" in binner.action_label(12)
 
 
+# ===================================================================
+# Vectorised / Multi-Granularity Tests
+# ===================================================================
+
+
+def _granularity_train_data() -> pl.DataFrame:
+    import random
+
+    random.seed(11)
+    vaso = [0.0] * 30 + [round(random.uniform(0.01, 1.5), 2) for _ in range(170)]
+    fluid = [0.0] * 20 + [round(random.uniform(10.0, 2000.0), -1) for _ in range(180)]
+    return pl.DataFrame({"vaso_dose_4h": vaso, "fluid_volume_4h": fluid})
+
+
+class TestMultiGranularity:
+    """Verify the vectorised binner and n×n grids."""
+
+    def test_transform_matches_scalar_assignment(self) -> None:
+        """Vectorised 5×5 ids equal the scalar reference, edges and gaps included."""
+        binner = ActionBinner().fit(_granularity_train_data(), manifest_seed=3)
+        arts = binner.artifacts
+        vaso = [None, float("nan"), -1.0, 0.0, *arts.vaso_edges, 0.3, 99.0]
+        fluid = [0.0, 5.0, None, *arts.fluid_edges, 750.0, 1e6, 1.0]
+        df = pl.DataFrame({"vaso_dose_4h": vaso, "fluid_volume_4h": fluid})
+
+        result = binner.transform(df)
+
+        expected = [
+            _assign_bin(0.0 if v is None else v, arts.vaso_edges) * N_BINS
+            + _assign_bin(0.0 if f is None else f, arts.fluid_edges)
+            for v, f in zip(vaso, fluid)
+        ]
+        assert result.get_column("action_id").to_list() == expected
+        assert result.get_column("action_id").dtype == pl.Int32
+
+    def test_one_fit_pass_for_several_grids(self) -> None:
+        """The 5×5 binner from a multi-grid fit equals a standalone fit."""
+        train = _granularity_train_data()
+        binners = fit_action_binners(train, manifest_seed=3, n_bins=(3, 5, 7))
+
+        assert binners[5].artifacts == ActionBinner().fit(train, manifest_seed=3).artifacts
+        assert len(binners[3].artifacts.fluid_edges) == 1
+        assert len(binners[7].artifacts.vaso_edges) == 5
+
+        encoded = encode_action_granularities(train, binners)
+        for size in (3, 5, 7):
+            ids = encoded.get_column(f"action_id_{size}x{size}")
+            assert 0 <= ids.min() and ids.max() < size * size
+        # The first 20 rows have zero doses: action 0 at every granularity.
+        untreated = encoded.head(20)
+        for size in (3, 5, 7):
+            assert untreated.get_column(f"action_id_{size}x{size}").to_list() == [0] * 20
+
+    def test_grid_size_round_trips_through_artifacts(self) -> None:
+        """Loading 7×7 artifacts restores the 49-action decoder."""
+        binners = fit_action_binners(_granularity_train_data(), manifest_seed=3, n_bins=(7,))
+        restored = ActionBinner().load(
+            ActionBinArtifacts.from_dict(binners[7].artifacts.to_dict())
+        )
+        assert restored.n_actions == 49
+        assert restored.decode_action(48) == (6, 6)
+        assert restored.action_label(48) == "vaso_Q6×fluid_Q6"
+
+    def test_legacy_artifacts_default_to_5x5(self) -> None:
+        """Artifacts written before n_bins existed load as the 5×5 grid."""
+        payload = {
+            "spec_version": "1.0.0",
+            "manifest_seed": 42,
+            "vaso_edges": [0.1, 0.5, 1.0],
+            "fluid_edges": [100.0, 500.0, 1000.0],
+            "n_train_vaso_nonzero": 140,
+            "n_train_fluid_nonzero": 160,
+        }
+        assert ActionBinArtifacts.from_dict(payload).n_bins == N_BINS
+
+    def test_ablation_granularity_values(self) -> None:
+        """Ablation registry values parse to bins per axis."""
+        assert action_grid_size("3x3_bins") == 3
+        assert action_grid_size("7x7") == 7
+        with pytest.raises(ValueError, match="NxN_bins"):
+            action_grid_size("3x5_bins")
+        with pytest.raises(ValueError, match="n_bins must be"):
+            ActionBinner(1)
+
+
 # ===================================================================
 # Leakage Protection Tests
 # ===================================================================
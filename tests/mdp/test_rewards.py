@@ -11,6 +11,7 @@ Covers:
 - RewardConfig serialisation round-trip
 - RewardSummary correctness
 - Determinism (same input → same output)
+- Expression-based reward frame matches the per-episode loop for every variant
 """
 
 from __future__ import annotations
@@ -34,6 +35,7 @@ from mimic_sepsis_rl.mdp.rewards import (
     compute_step_reward,
     compute_episode_rewards,
     compute_rewards_batch,
+    compute_reward_frame,
     reward_summary,
     rewards_to_dataframe,
     save_reward_config,
@@ -428,6 +430,82 @@ class TestBatchAndSummary:
         assert "is_terminal" in df.columns
 
 
+# ===================================================================
+# Reward Frame Tests
+# ===================================================================
+
+
+def _make_messy_states() -> pl.DataFrame:
+    """Shuffled episodes with null / NaN / zero-lactate gaps and unknown outcome."""
+    return pl.DataFrame(
+        {
+            "stay_id": [7, 3, 7, 3, 9, 7, 3, 7, 5],
+            "step_index": [2, 1, 0, 0, 0, 1, 2, 3, 0],
+            "sofa_score": [5.0, None, 4.0, 6.0, 2.0, float("nan"), 7.0, 3.0, 1.0],
+            "lactate": [1.0, 0.0, 2.0, 3.0, None, float("nan"), 1.5, 0.5, 2.0],
+            "map": [60.0, None, 70.0, 50.0, 64.9, 65.0, float("nan"), 55.0, 80.0],
+            "mortality_90d": [1, 0, 1, 0, None, 1, 0, 1, 0],
+        }
+    )
+
+
+def _loop_rewards(states: pl.DataFrame, config: RewardConfig) -> pl.DataFrame:
+    rewards = []
+    for sid in sorted(states["stay_id"].unique().to_list()):
+        rewards.extend(
+            compute_episode_rewards(states.filter(pl.col("stay_id") == sid), config=config)
+        )
+    return rewards_to_dataframe(rewards)
+
+
+class TestRewardFrame:
+    """Verify the expression-based engine against compute_step_reward semantics."""
+
+    @pytest.mark.parametrize("variant", list(RewardVariant))
+    def test_matches_episode_loop(self, variant: RewardVariant) -> None:
+        """Every component matches the per-episode loop, nulls included."""
+        states = _make_messy_states()
+        config = RewardConfig(
+            variant=variant,
+            lactate_clearance_weight=0.5,
+            map_stability_weight=0.1,
+        )
+        expected = _loop_rewards(states, config)
+
+        frame = compute_reward_frame(states, config=config)
+
+        assert frame.schema == expected.schema
+        assert frame.equals(expected)
+        assert compute_rewards_batch(states, config=config) == _rewards_from(expected)
+
+    def test_all_variants_in_one_pass(self) -> None:
+        """Each total_<variant> column equals a separate run of that variant."""
+        states = _make_messy_states()
+        config = RewardConfig(lactate_clearance_weight=0.5, map_stability_weight=0.1)
+
+        frame = compute_reward_frame(states, config=config, variants=list(RewardVariant))
+
+        for variant in RewardVariant:
+            single = RewardConfig(
+                variant=variant,
+                lactate_clearance_weight=0.5,
+                map_stability_weight=0.1,
+            )
+            expected = _loop_rewards(states, single)
+            assert frame[f"total_{variant.value}"].to_list() == expected["total"].to_list()
+
+    def test_unknown_outcome_has_no_terminal_reward(self) -> None:
+        """A null 90-day outcome leaves the terminal component at zero."""
+        frame = compute_reward_frame(_make_messy_states())
+        stay_nine = frame.filter(pl.col("stay_id") == 9)
+        assert stay_nine["is_terminal"].to_list() == [True]
+        assert stay_nine["terminal"].to_list() == [0.0]
+
+
+def _rewards_from(frame: pl.DataFrame) -> list[StepReward]:
+    return [StepReward(**row) for row in frame.iter_rows(named=True)]
+
+
 # ===================================================================
 # Config Serialisation Tests
 # ===================================================================
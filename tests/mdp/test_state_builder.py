@@ -6,11 +6,17 @@ import polars as pl
 import pytest
 
 from mimic_sepsis_rl.data.split_models import SplitManifest
-from mimic_sepsis_rl.mdp.features.builder import StateTableBuilder
-from mimic_sepsis_rl.mdp.features.dictionary import FEATURE_REGISTRY
+from mimic_sepsis_rl.mdp.features.builder import StateTableBuilder, build_state_table
+from mimic_sepsis_rl.mdp.features.columnar import ColumnarStateTableBuilder
+from mimic_sepsis_rl.mdp.features.dictionary import FEATURE_REGISTRY, load_feature_registry
 from mimic_sepsis_rl.mdp.features.extractors import StepWindowData
 
 
+@pytest.fixture(params=[StateTableBuilder, ColumnarStateTableBuilder], ids=["rows", "columnar"])
+def builder_cls(request) -> type[StateTableBuilder]:
+    return request.param
+
+
 def _manifest() -> SplitManifest:
     return SplitManifest(
         spec_version="1.0.0",
@@ -61,12 +67,12 @@ def _step_window(
     )
 
 
-def test_builder_is_deterministic_and_manifest_aware():
+def test_builder_is_deterministic_and_manifest_aware(builder_cls):
     registry = {
         "heart_rate": FEATURE_REGISTRY["heart_rate"],
         "hours_since_onset": FEATURE_REGISTRY["hours_since_onset"],
     }
-    builder = StateTableBuilder(
+    builder = builder_cls(
         registry=registry,
         train_medians={"heart_rate": 55.0, "hours_since_onset": 0.0},
         emit_missingness_flags=False,
@@ -96,8 +102,8 @@ def test_builder_is_deterministic_and_manifest_aware():
     assert list(first["split"]) == ["train", "train"]
 
 
-def test_builder_uses_forward_fill_before_train_median():
-    builder = StateTableBuilder(
+def test_builder_uses_forward_fill_before_train_median(builder_cls):
+    builder = builder_cls(
         registry={"heart_rate": FEATURE_REGISTRY["heart_rate"]},
         train_medians={"heart_rate": 55.0},
         emit_missingness_flags=False,
@@ -121,8 +127,8 @@ def test_builder_uses_forward_fill_before_train_median():
     assert list(result["heart_rate"]) == pytest.approx([90.0, 90.0])
 
 
-def test_builder_uses_train_median_at_episode_boundary():
-    builder = StateTableBuilder(
+def test_builder_uses_train_median_at_episode_boundary(builder_cls):
+    builder = builder_cls(
         registry={"heart_rate": FEATURE_REGISTRY["heart_rate"]},
         train_medians={"heart_rate": 55.0},
         emit_missingness_flags=False,
@@ -145,8 +151,8 @@ def test_builder_uses_train_median_at_episode_boundary():
     assert list(result["heart_rate"]) == pytest.approx([55.0, 55.0])
 
 
-def test_builder_missingness_flags_track_invalid_and_missing_windows():
-    builder = StateTableBuilder(
+def test_builder_missingness_flags_track_invalid_and_missing_windows(builder_cls):
+    builder = builder_cls(
         registry={"map": FEATURE_REGISTRY["map"]},
         train_medians={"map": 70.0},
         emit_missingness_flags=True,
@@ -178,8 +184,8 @@ def test_builder_missingness_flags_track_invalid_and_missing_windows():
     assert list(result["map_missing"]) == [0, 1, 1]
 
 
-def test_builder_reads_weight_from_static_context():
-    builder = StateTableBuilder(
+def test_builder_reads_weight_from_static_context(builder_cls):
+    builder = builder_cls(
         registry={"weight_kg": FEATURE_REGISTRY["weight_kg"]},
         train_medians={"weight_kg": 70.0},
         emit_missingness_flags=False,
@@ -195,8 +201,8 @@ def test_builder_reads_weight_from_static_context():
     assert result["weight_kg"][0] == pytest.approx(78.0)
 
 
-def test_builder_rejects_subjects_missing_from_manifest():
-    builder = StateTableBuilder(
+def test_builder_rejects_subjects_missing_from_manifest(builder_cls):
+    builder = builder_cls(
         registry={"heart_rate": FEATURE_REGISTRY["heart_rate"]},
         train_medians={"heart_rate": 55.0},
         emit_missingness_flags=False,
@@ -210,3 +216,103 @@ def test_builder_rejects_subjects_missing_from_manifest():
 
     with pytest.raises(ValueError, match="not present"):
         builder.build([rogue_step], split_manifest=_manifest())
+
+
+def _mixed_windows() -> list[StepWindowData]:
+    base = datetime(2150, 1, 1, 12, 0, 0)
+    windows: list[StepWindowData] = []
+    for stay_id, subject_id in ((601, 11), (602, 22), (603, 33)):
+        for step_index in range(4):
+            offset = stay_id + step_index
+            chartevents = pl.DataFrame(
+                {
+                    # heart rate, MAP, SpO2 (MIN) and GCS with ties, nulls and
+                    # out-of-range values
+                    "itemid": [220045, 220045, 220052, 220277, 220277, 220739, 220045],
+                    "valuenum": [
+                        80.0 + offset,
+                        None,
+                        9999.0 if step_index == 1 else 65.0 + step_index,
+                        91.5,
+                        88.25 + step_index,
+                        12.0,
+                        84.0 + offset,
+                    ],
+                    "charttime": [
+                        base + timedelta(minutes=30),
+                        base + timedelta(minutes=40),
+                        base,
+                        base,
+                        base + timedelta(minutes=5),
+                        base,
+                        base + timedelta(minutes=30),
+                    ],
+                }
+            ) if step_index != 2 else _empty_chart_df()
+            windows.append(
+                StepWindowData(
+                    stay_id=stay_id,
+                    step_index=step_index,
+                    hours_relative_to_onset=-24.0 + 4 * step_index,
+                    chartevents=chartevents,
+                    labevents=pl.DataFrame(
+                        {
+                            "itemid": [50813, 50813, 50821],
+                            "valuenum": [1.1 * (step_index + 1), 0.7, 80.0 + step_index],
+                            "charttime": [base, base + timedelta(hours=1), base],
+                        }
+                    ),
+                    inputevents=pl.DataFrame(
+                        {"itemid": [220949] * (step_index + 1), "amount": [100.1] * (step_index + 1)}
+                    ),
+                    outputevents=pl.DataFrame({"itemid": [226559, 226559], "value": [50.3, 2500.0]}),
+                    age_years=None if stay_id == 602 else 64.0,
+                    weight_kg=78.0,
+                    subject_id=subject_id,
+                )
+            )
+    return windows
+
+
+@pytest.mark.parametrize("flags_default", [None, True])
+def test_columnar_engine_matches_row_engine(flags_default):
+    registry = load_feature_registry({"missingness_flags_default": flags_default})
+    windows = _mixed_windows()
+    medians = {"heart_rate": 55.0, "lactate": 1.5, "age_years": 61.0, "pf_ratio": 320.0}
+
+    rows = build_state_table(windows, registry, split_manifest=_manifest(), train_medians=medians)
+    columnar = build_state_table(
+        windows,
+        registry,
+        split_manifest=_manifest(),
+        train_medians=medians,
+        engine="columnar",
+    )
+
+    assert columnar.schema == rows.schema
+    assert columnar.equals(rows)
+
+
+def test_columnar_engine_resolves_subjects_from_mapping():
+    registry = {"map": FEATURE_REGISTRY["map"]}
+    window = _step_window(
+        stay_id=701,
+        subject_id=11,
+        step_index=0,
+        hours_relative_to_onset=-24.0,
+        chartevents=_chart_df([220052], [72.0]),
+    )
+    window.subject_id = None
+
+    result = ColumnarStateTableBuilder(registry=registry).build(
+        [window],
+        split_manifest=_manifest(),
+        stay_to_subject_id={701: 22},
+    )
+    assert list(result["subject_id"]) == [22]
+    assert list(result["split"]) == ["validation"]
+
+
+def test_build_state_table_rejects_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown state-table engine"):
+        build_state_table([], {"map": FEATURE_REGISTRY["map"]}, engine="vectorised")
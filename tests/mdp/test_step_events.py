@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import polars as pl
+import pytest
+
+from mimic_sepsis_rl.cli.build_transitions import _build_step_windows
+from mimic_sepsis_rl.data.episodes import build_base_step_grid, build_multi_resolution_frames
+from mimic_sepsis_rl.data.split_models import SplitManifest
+from mimic_sepsis_rl.mdp.features.builder import build_state_table
+from mimic_sepsis_rl.mdp.features.columnar import build_state_table_from_events
+from mimic_sepsis_rl.mdp.features.dictionary import load_feature_registry
+from mimic_sepsis_rl.mdp.features.step_events import (
+    CUMULATIVE_EVENT_TABLES,
+    bucket_step_events,
+    build_step_context,
+    roll_up_step_events,
+)
+
+BASE = datetime(2150, 1, 1, 0, 0, 0)
+
+
+def _at(hours: float) -> datetime:
+    return BASE + timedelta(hours=hours)
+
+
+def _step_context_df() -> pl.DataFrame:
+    # Stay 1 starts at the episode start; stay 2 lost its first step to a late
+    # ICU admission, so its first realised step opens 4h after episode start.
+    rows = []
+    for stay_id, subject_id, hadm_id, first_step in ((1, 11, 100, 0), (2, 22, 200, 1)):
+        for step_index in range(first_step, 3):
+            rows.append(
+                {
+                    "stay_id": stay_id,
+                    "subject_id": subject_id,
+                    "hadm_id": hadm_id,
+                    "step_index": step_index,
+                    "step_start": _at(4 * step_index),
+                    "step_end": _at(4 * step_index + 4),
+                    "hours_relative_to_onset": -24 + 4 * step_index,
+                    "episode_start": BASE,
+                    "onset_time": _at(24),
+                    "anchor_age": 70,
+                }
+            )
+    return pl.DataFrame(rows)
+
+
+def _chartevents() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "stay_id": [1, 1, 1, 1, 2, 2],
+            "charttime": [_at(0.5), _at(4.0), _at(3.9), _at(11.5), _at(2.0), _at(5.0)],
+            "itemid": [220045, 220045, 220045, 220045, 220052, 220052],
+            "valuenum": [80.0, 90.0, 85.0, 70.0, 60.0, 9999.0],
+        }
+    )
+
+
+def _labevents() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "hadm_id": [100, 200, 300],
+            "charttime": [_at(1.0), _at(9.0), _at(1.0)],
+            "itemid": [50813, 50813, 50813],
+            "valuenum": [2.5, 4.0, 9.0],
+        }
+    )
+
+
+def _inputevents() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "stay_id": [1, 1, 2, 2],
+            "starttime": [_at(1.0), _at(9.0), _at(2.0), _at(6.0)],
+            "endtime": [_at(2.0), _at(10.0), _at(3.0), _at(7.0)],
+            "itemid": [220949, 220949, 220949, 220949],
+            "amount": [250.0, 500.0, 100.0, 300.0],
+            "rate": [0.0, 0.0, 0.0, 0.0],
+            "patientweight": [70.0, 72.0, 90.0, None],
+        }
+    )
+
+
+def _outputevents() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "stay_id": [1, 2],
+            "charttime": [_at(5.0), _at(11.0)],
+            "itemid": [226559, 226559],
+            "value": [400.0, 150.0],
+        }
+    )
+
+
+def _manifest() -> SplitManifest:
+    return SplitManifest(
+        spec_version="1.0.0",
+        seed=42,
+        source_episode_set="tests",
+        train_ids=frozenset({11}),
+        validation_ids=frozenset({22}),
+        test_ids=frozenset(),
+    )
+
+
+def test_events_land_in_half_open_step_buckets():
+    events = bucket_step_events(
+        _step_context_df(),
+        _chartevents(),
+        pl.DataFrame(),
+        pl.DataFrame(),
+        pl.DataFrame(),
+    )
+    stay_one = events.filter(pl.col("stay_id") == 1).sort(["step_index", "event_order"])
+
+    assert stay_one["step_index"].to_list() == [0, 0, 1, 2]
+    # Within a step, event_order follows charttime.
+    assert stay_one["value"].to_list() == [80.0, 85.0, 90.0, 70.0]
+    # Stay 2 has no step 0, so its 02:00 chart event is dropped.
+    assert events.filter(pl.col("stay_id") == 2)["step_index"].to_list() == [1]
+
+
+def test_labevents_follow_admission_to_stay():
+    events = bucket_step_events(
+        _step_context_df(),
+        pl.DataFrame(),
+        _labevents(),
+        pl.DataFrame(),
+        pl.DataFrame(),
+    )
+
+    assert events.select(["stay_id", "step_index", "value"]).sort("stay_id").rows() == [
+        (1, 0, 2.5),
+        (2, 2, 4.0),
+    ]
+
+
+def test_inputevents_before_first_step_count_towards_it():
+    events = bucket_step_events(
+        _step_context_df(),
+        pl.DataFrame(),
+        pl.DataFrame(),
+        _inputevents(),
+        pl.DataFrame(),
+    )
+    stay_two = events.filter(pl.col("stay_id") == 2).sort("step_index")
+
+    assert stay_two.select(["step_index", "value"]).rows() == [(1, 100.0), (1, 300.0)]
+    assert not events["range_checked"].any()
+
+
+@pytest.mark.parametrize("flags_default", [None, True])
+def test_bucketed_events_match_window_state_table(flags_default):
+    registry = load_feature_registry(
+        {
+            "include_features": [
+                "heart_rate",
+                "map",
+                "lactate",
+                "cum_iv_fluid_ml",
+                "urine_output_4h",
+                "age_years",
+                "weight_kg",
+                "hours_since_onset",
+            ],
+            "missingness_flags_default": flags_default,
+        }
+    )
+    step_context_df = _step_context_df()
+    medians = {"heart_rate": 75.0, "map": 65.0, "lactate": 1.2}
+
+    windows = _build_step_windows(
+        step_context_df,
+        _chartevents(),
+        _labevents(),
+        _inputevents(),
+        _outputevents(),
+    )
+    expected = build_state_table(
+        windows,
+        registry,
+        split_manifest=_manifest(),
+        train_medians=medians,
+    )
+    result = build_state_table_from_events(
+        build_step_context(step_context_df, _inputevents()),
+        bucket_step_events(
+            step_context_df,
+            _chartevents(),
+            _labevents(),
+            _inputevents(),
+            _outputevents(),
+        ),
+        registry,
+        split_manifest=_manifest(),
+        train_medians=medians,
+        cumulative_tables=CUMULATIVE_EVENT_TABLES,
+    )
+
+    assert result.schema == expected.schema
+    assert result.equals(expected)
+    assert result.filter(pl.col("stay_id") == 1)["cum_iv_fluid_ml"].to_list() == [
+        250.0,
+        250.0,
+        750.0,
+    ]
+
+
+def _multi_resolution_inputs(seed: int = 0):
+    """2h/4h/6h step contexts plus raw events around randomly truncated stays."""
+    rng = random.Random(seed)
+    onsets, stays = [], []
+    for stay_id in range(1, 13):
+        onset = _at(48 + rng.randint(0, 600) / 10)
+        onsets.append(
+            {
+                "stay_id": stay_id,
+                "subject_id": 10 + stay_id % 2,
+                "hadm_id": 100 + stay_id // 2,
+                "sepsis_onset_time": onset,
+            }
+        )
+        stays.append(
+            {
+                "stay_id": stay_id,
+                "intime": onset + timedelta(hours=rng.choice([-30, -23, -17.5, -3])),
+                "outtime": onset + timedelta(hours=rng.choice([9.5, 30, 60])),
+            }
+        )
+    frames = build_multi_resolution_frames(
+        pl.DataFrame(onsets), pl.DataFrame(stays), step_hours=[2, 4, 6]
+    )
+    contexts = {
+        hours: steps_df.join(
+            episodes_df.select(
+                "stay_id",
+                "subject_id",
+                "hadm_id",
+                "onset_time",
+                pl.col("window_start").alias("episode_start"),
+                pl.lit(70).alias("anchor_age"),
+            ),
+            on="stay_id",
+        )
+        for hours, (episodes_df, steps_df) in frames.items()
+    }
+
+    def _times(n: int) -> list[datetime]:
+        # Whole hours land on step boundaries; repeats exercise stable ordering.
+        return [
+            _at(20 + rng.choice([rng.randint(0, 100), rng.randint(0, 1000) / 10]))
+            for _ in range(n)
+        ]
+
+    def _stays(n: int) -> list[int]:
+        return [rng.randint(1, 12) for _ in range(n)]
+
+    starts = _times(200)
+    events = (
+        pl.DataFrame(
+            {
+                "stay_id": _stays(400),
+                "charttime": _times(400),
+                "itemid": [rng.choice([220045, 220052]) for _ in range(400)],
+                "valuenum": [float(rng.randint(40, 140)) for _ in range(400)],
+            }
+        ),
+        pl.DataFrame(
+            {
+                "hadm_id": [100 + rng.randint(0, 6) for _ in range(100)],
+                "charttime": _times(100),
+                "itemid": [50813] * 100,
+                "valuenum": [rng.randint(5, 60) / 10 for _ in range(100)],
+            }
+        ),
+        pl.DataFrame(
+            {
+                "stay_id": _stays(200),
+                "starttime": starts,
+                "endtime": [start + timedelta(hours=1) for start in starts],
+                "itemid": [220949] * 200,
+                "amount": [float(rng.randint(50, 500)) for _ in range(200)],
+                "rate": [0.0] * 200,
+                "patientweight": [70.0] * 200,
+            }
+        ),
+        pl.DataFrame(
+            {
+                "stay_id": _stays(100),
+                "charttime": _times(100),
+                "itemid": [226559] * 100,
+                "value": [float(rng.randint(0, 300)) for _ in range(100)],
+            }
+        ),
+    )
+    return frames, contexts, events
+
+
+def test_rolled_up_events_match_direct_bucketing():
+    frames, contexts, events = _multi_resolution_inputs()
+    base_events = bucket_step_events(build_base_step_grid(frames[2][0], 2), *events)
+    registry = load_feature_registry(
+        {
+            "include_features": [
+                "heart_rate",
+                "map",
+                "lactate",
+                "cum_iv_fluid_ml",
+                "urine_output_4h",
+            ],
+            "missingness_flags_default": True,
+        }
+    )
+    manifest = SplitManifest(
+        spec_version="1.0.0",
+        seed=42,
+        source_episode_set="tests",
+        train_ids=frozenset({10}),
+        validation_ids=frozenset({11}),
+        test_ids=frozenset(),
+    )
+
+    for hours, step_context_df in contexts.items():
+        direct = bucket_step_events(step_context_df, *events)
+        rolled = roll_up_step_events(
+            base_events, step_context_df, base_step_hours=2, step_hours=hours
+        )
+        assert rolled.equals(direct), hours
+
+        step_context = build_step_context(step_context_df, events[2])
+        states = [
+            build_state_table_from_events(
+                step_context,
+                step_events,
+                registry,
+                split_manifest=manifest,
+                train_medians={},
+                cumulative_tables=CUMULATIVE_EVENT_TABLES,
+            )
+            for step_events in (direct, rolled)
+        ]
+        assert states[0].equals(states[1])
+        assert states[0]["cum_iv_fluid_ml"].max() > 0.0
+
+    # Some stays start late, so early inputevents are clamped into their first step.
+    first_steps = contexts[6].group_by("stay_id").agg(pl.col("step_index").min())
+    assert first_steps["step_index"].max() > 0
+    with pytest.raises(ValueError, match="multiple"):
+        roll_up_step_events(base_events, contexts[4], base_step_hours=4, step_hours=6)
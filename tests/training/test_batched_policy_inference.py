@@ -0,0 +1,147 @@
+"""
+Regression tests for the batched policy inference surface.
+
+Covers:
+- CQLPolicy, BCQPolicy and IQLPolicy select_actions match per-state
+  select_action on the same rows
+- action_probabilities is the one-hot greedy distribution
+- OPE and safety review score real policies identically through the
+  batched and the per-step paths
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pytest
+import torch
+
+from mimic_sepsis_rl.evaluation.ope import (
+    BatchActionProbabilityPolicy,
+    HeldOutEpisode,
+    HeldOutStep,
+    compute_wis_and_ess,
+)
+from mimic_sepsis_rl.evaluation.safety import ActionSupport, build_safety_review_rows
+from mimic_sepsis_rl.training.bcq import BCQPolicy, BehaviorPolicy
+from mimic_sepsis_rl.training.common import as_state_batch
+from mimic_sepsis_rl.training.cql import CQLPolicy, QNetwork
+from mimic_sepsis_rl.training.iql import IQLPolicy, PolicyNetwork
+
+CPU = torch.device("cpu")
+STATE_DIM = 6
+N_ACTIONS = 25
+
+
+def _make_policy(algorithm: str):
+    torch.manual_seed(0)
+    if algorithm == "cql":
+        return CQLPolicy(
+            q_network=QNetwork(STATE_DIM, N_ACTIONS, [16]),
+            device=CPU,
+            state_dim=STATE_DIM,
+            n_actions=N_ACTIONS,
+        )
+    if algorithm == "bcq":
+        return BCQPolicy(
+            q_network=QNetwork(STATE_DIM, N_ACTIONS, [16]),
+            behavior_policy=BehaviorPolicy(STATE_DIM, N_ACTIONS, hidden_sizes=[16]),
+            device=CPU,
+            state_dim=STATE_DIM,
+            n_actions=N_ACTIONS,
+            threshold=0.3,
+        )
+    return IQLPolicy(
+        policy_network=PolicyNetwork(STATE_DIM, N_ACTIONS, hidden_sizes=[16]),
+        device=CPU,
+        state_dim=STATE_DIM,
+        n_actions=N_ACTIONS,
+    )
+
+
+@dataclass
+class PerStepOnly:
+    """Hide the batched methods so OPE takes the per-step path."""
+
+    policy: object
+
+    def select_action(self, state) -> int:
+        return self.policy.select_action(state)
+
+
+def _episodes(n_episodes: int = 7, steps: int = 4) -> tuple[HeldOutEpisode, ...]:
+    rng = np.random.default_rng(5)
+    episodes = []
+    for episode in range(n_episodes):
+        episodes.append(
+            HeldOutEpisode(
+                episode_id=episode,
+                steps=tuple(
+                    HeldOutStep(
+                        episode_id=episode,
+                        step_index=step,
+                        state=tuple(float(v) for v in rng.normal(size=STATE_DIM)),
+                        action=int(rng.integers(0, N_ACTIONS)),
+                        reward=float(rng.normal()),
+                        done=step == steps - 1,
+                        behavior_action_prob=float(rng.uniform(0.05, 1.0)),
+                    )
+                    for step in range(steps)
+                ),
+            )
+        )
+    return tuple(episodes)
+
+
+@pytest.mark.parametrize("algorithm", ["cql", "bcq", "iql"])
+def test_select_actions_matches_per_state_selection(algorithm) -> None:
+    policy = _make_policy(algorithm)
+    assert isinstance(policy, BatchActionProbabilityPolicy)
+    states = np.random.default_rng(1).normal(size=(33, STATE_DIM))
+
+    actions = policy.select_actions(states)
+    assert actions.shape == (33,)
+    assert actions.tolist() == [policy.select_action(list(state)) for state in states]
+
+    probs = policy.action_probabilities(torch.as_tensor(states))
+    assert probs.shape == (33, N_ACTIONS)
+    np.testing.assert_array_equal(probs.sum(axis=1), np.ones(33))
+    np.testing.assert_array_equal(probs.argmax(axis=1), actions)
+
+
+@pytest.mark.parametrize("algorithm", ["cql", "bcq", "iql"])
+def test_ope_and_safety_batched_paths_match_per_step(algorithm) -> None:
+    policy = _make_policy(algorithm)
+    episodes = _episodes()
+    # Make a few logged actions agree with the policy so weights are non-zero.
+    episodes = tuple(
+        HeldOutEpisode(
+            episode_id=episode.episode_id,
+            steps=tuple(
+                replace(step, action=policy.select_action(step.state))
+                if episode.episode_id % 2 == 0
+                else step
+                for step in episode.steps
+            ),
+        )
+        for episode in episodes
+    )
+
+    batched_metrics, batched_episodes = compute_wis_and_ess(episodes, policy, chunk_size=5)
+    metrics, per_episode = compute_wis_and_ess(episodes, PerStepOnly(policy))
+    assert batched_metrics == metrics
+    assert batched_episodes == per_episode
+    assert metrics.wis_nonzero_episodes == 4
+
+    support = ActionSupport(behavior_prob=0.1, count=20)
+    assert build_safety_review_rows(
+        policy, episodes, lambda state, action: support, chunk_size=5
+    ) == build_safety_review_rows(PerStepOnly(policy), episodes, lambda state, action: support)
+
+
+def test_as_state_batch_accepts_single_states_and_rejects_bad_rank() -> None:
+    assert as_state_batch([0.0] * STATE_DIM, device=CPU).shape == (1, STATE_DIM)
+    assert as_state_batch(np.zeros((3, STATE_DIM)), device=CPU).dtype == torch.float32
+    with pytest.raises(ValueError, match="state_dim"):
+        as_state_batch(np.zeros((2, 3, STATE_DIM)), device=CPU)
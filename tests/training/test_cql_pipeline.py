@@ -4,17 +4,21 @@ Regression tests for the CQL training pipeline.
 Covers:
 - QNetwork: forward pass shape, action output range
 - td_loss / cql_loss: gradient flow, value constraints
-- ReplayDataset: loading from synthetic Parquet, iter_batches, sample_batch
+- ReplayDataset: loading from synthetic Parquet, iter_batches, sample_batch,
+  device-resident and pinned-prefetch samplers
 - CQLTrainer: accepts replay-buffer inputs, training loop completes
-- CheckpointManager: save and reload model weights
-- CQLPolicy: select_action and q_values on held-out states
+- CheckpointManager: save and reload model weights, background writer
+- CQLPolicy: select_action, q_values and batched select_actions /
+  action_probabilities on held-out states
 - load_cql_policy: round-trips a checkpoint to a runnable policy
 - _dry_run: completes without errors on CPU
 - TrainingConfig wiring: device routes through shared device abstraction
+- Optimiser fast path: fused Adam, foreach soft updates, compile fallback
 """
 
 from __future__ import annotations
 
+import json
 import math
 import random
 import tempfile
@@ -26,13 +30,17 @@ import torch
 
 from mimic_sepsis_rl.training.common import (
     CheckpointManager,
+    CompiledStep,
     MetricLogger,
     ReplayDataset,
+    StepMetricAccumulator,
     TransitionBatch,
+    build_adam,
     build_checkpoint_manager,
     compute_epoch_metrics,
     set_global_seed,
     should_checkpoint,
+    soft_update_,
 )
 from mimic_sepsis_rl.training.config import build_training_config
 from mimic_sepsis_rl.training.cql import (
@@ -352,6 +360,46 @@ class TestReplayDataset:
         )
         assert ds.state_dim == STATE_DIM
 
+    @pytest.mark.parametrize(
+        ("sampler", "num_workers"), [("device", 0), ("pinned", 0), ("pinned", 3)]
+    )
+    def test_samplers_match_seed_epoch_shuffle(self, tmp_path, sampler, num_workers) -> None:
+        path = _save_transitions(tmp_path, n_episodes=12, steps=7)
+        ds = ReplayDataset(
+            path,
+            device=torch.device("cpu"),
+            seed=5,
+            sampler=sampler,
+            num_workers=num_workers,
+        )
+        assert ds.sampler_mode == sampler
+        for epoch in (0, 3):
+            g = torch.Generator()
+            g.manual_seed(5 + epoch)
+            expected = ds._actions[torch.randperm(ds.n_transitions, generator=g)]
+            actions = torch.cat(
+                [b.actions for b in ds.iter_batches(BATCH_SIZE, shuffle=True, epoch=epoch)]
+            )
+            assert torch.equal(actions, expected)
+
+    @pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+    def test_cuda_samplers_draw_the_same_shuffle(self, tmp_path) -> None:
+        path = _save_transitions(tmp_path, n_episodes=12, steps=7)
+        orders = {}
+        for sampler in ("device", "pinned"):
+            ds = ReplayDataset(path, device=torch.device("cuda"), seed=5, sampler=sampler)
+            orders[sampler] = torch.cat(
+                [b.actions.cpu() for b in ds.iter_batches(BATCH_SIZE, shuffle=True, epoch=2)]
+            )
+        assert torch.equal(orders["device"], orders["pinned"])
+
+    def test_unknown_sampler_raises(self, tmp_path) -> None:
+        path = _save_transitions(tmp_path)
+        with pytest.raises(ValueError, match="Unknown sampler mode"):
+            ReplayDataset(path, device=torch.device("cpu"), sampler="gpu")
+        with pytest.raises(ValueError, match="runtime.sampler"):
+            build_training_config(algorithm="cql", dataset_path=path, sampler="gpu")
+
 
 # ---------------------------------------------------------------------------
 # CheckpointManager tests
@@ -462,6 +510,53 @@ class TestCheckpointManager:
         assert manifest.global_step == 500
         assert manifest.metrics["td_loss"] == pytest.approx(0.1)
 
+    def test_async_save_snapshots_state_before_returning(self, tmp_path) -> None:
+        cfg = _make_cpu_config(tmp_path)
+        mgr = CheckpointManager(
+            tmp_path / "ckpts", algorithm="cql", keep_last_n=0, async_write=True
+        )
+        net = self._make_net()
+        original = {k: v.clone() for k, v in net.state_dict().items()}
+        path = mgr.save(net.state_dict(), epoch=1, global_step=10, metrics={}, cfg=cfg)
+        # Training keeps updating the live parameters while the writer runs.
+        with torch.no_grad():
+            for p in net.parameters():
+                p.fill_(123.0)
+        mgr.close()
+
+        payload = CheckpointManager.load(path, device=torch.device("cpu"))
+        for k, v in payload["model_state_dict"].items():
+            assert torch.equal(v, original[k])
+        assert CheckpointManager.load_manifest(path).global_step == 10
+        assert not list((tmp_path / "ckpts").glob("*.tmp"))
+
+    def test_async_prune_and_latest_checkpoint(self, tmp_path) -> None:
+        cfg = _make_cpu_config(tmp_path)
+        ckpt_dir = tmp_path / "ckpts"
+        mgr = CheckpointManager(ckpt_dir, algorithm="cql", keep_last_n=2, async_write=True)
+        net = self._make_net()
+        for epoch in range(1, 6):
+            mgr.save(net.state_dict(), epoch=epoch, global_step=epoch, metrics={}, cfg=cfg)
+        latest = mgr.latest_checkpoint()
+        assert latest is not None and "epoch0005" in latest.name
+        mgr.flush()
+        assert len(list(ckpt_dir.glob("cql_epoch*.pt"))) == 2
+        mgr.close()
+        mgr.close()  # idempotent
+
+    def test_async_writer_errors_surface_on_flush(self, tmp_path, monkeypatch) -> None:
+        cfg = _make_cpu_config(tmp_path)
+        mgr = CheckpointManager(tmp_path / "ckpts", algorithm="cql", async_write=True)
+
+        def _fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(torch, "save", _fail)
+        mgr.save(self._make_net().state_dict(), epoch=1, global_step=1, metrics={}, cfg=cfg)
+        with pytest.raises(OSError, match="disk full"):
+            mgr.flush()
+        mgr.close()
+
 
 # ---------------------------------------------------------------------------
 # CQLPolicy inference tests
@@ -519,6 +614,23 @@ class TestCQLPolicy:
         a2 = policy.select_action(state)
         assert a1 == a2
 
+    def test_select_actions_matches_per_state_selection(self) -> None:
+        torch.manual_seed(0)
+        policy = self._make_policy()
+        states = torch.randn(17, STATE_DIM)
+        actions = policy.select_actions(states.numpy())
+        assert actions.shape == (17,)
+        assert actions.tolist() == [policy.select_action(state) for state in states]
+
+    def test_action_probabilities_are_greedy_one_hot(self) -> None:
+        torch.manual_seed(0)
+        policy = self._make_policy()
+        states = torch.randn(5, STATE_DIM)
+        probs = policy.action_probabilities(states)
+        assert probs.shape == (5, N_ACTIONS)
+        assert probs.sum(axis=1).tolist() == [1.0] * 5
+        assert probs.argmax(axis=1).tolist() == policy.select_actions(states).tolist()
+
 
 # ---------------------------------------------------------------------------
 # load_cql_policy round-trip
@@ -649,6 +761,15 @@ class TestCQLTrainer:
         assert result.checkpoint_path is not None
         assert result.checkpoint_path.exists()
 
+    def test_async_checkpoint_is_durable_when_train_returns(self, tmp_path) -> None:
+        cfg = _make_cpu_config(tmp_path, async_checkpoint=True)
+        assert cfg.checkpoint.async_write
+        dataset = ReplayDataset(cfg.dataset_path, device=cfg.device)
+        result = CQLTrainer(cfg, dataset, n_actions=N_ACTIONS).train()
+        assert result.checkpoint_path is not None
+        payload = CheckpointManager.load(result.checkpoint_path, device=torch.device("cpu"))
+        assert payload["epoch"] == cfg.n_epochs
+
     def test_get_policy_returns_cql_policy(self, tmp_path) -> None:
         cfg = _make_cpu_config(tmp_path, n_epochs=1)
         dataset = ReplayDataset(cfg.dataset_path, device=cfg.device)
@@ -665,6 +786,34 @@ class TestCQLTrainer:
         log_files = list((tmp_path / "runs").rglob("*.jsonl"))
         assert len(log_files) >= 1
 
+    def test_metric_log_holds_every_step_and_epoch_summaries(self, tmp_path) -> None:
+        cfg = _make_cpu_config(tmp_path, n_epochs=2)
+        dataset = ReplayDataset(cfg.dataset_path, device=cfg.device)
+        trainer = CQLTrainer(cfg, dataset, n_actions=N_ACTIONS)
+        trainer.train()
+        log_path = tmp_path / "runs" / "test_cql_metrics.jsonl"
+        records = [json.loads(line) for line in log_path.read_text().splitlines()]
+
+        # 2 steps per epoch, fewer than log_every_n_steps: every step is still logged.
+        assert sorted({r["step"] for r in records}) == [1, 2, 3, 4]
+        step_names = [
+            "td_loss",
+            "cql_loss",
+            "mean_q_dataset",
+            "mean_q_max",
+            "conservative_gap",
+        ]
+        assert [r["name"] for r in records if r["step"] == 1] == step_names
+        assert [r["name"] for r in records if r["step"] == 2] == [
+            *step_names,
+            "td_loss_mean",
+            "cql_loss_mean",
+            "total_loss_mean",
+        ]
+        td = {r["step"]: r["value"] for r in records if r["name"] == "td_loss"}
+        summary = next(r for r in records if r["name"] == "td_loss_mean" and r["step"] == 2)
+        assert summary["value"] == (td[1] + td[2]) / 2
+
     def test_training_generates_reporting_artifacts(self, tmp_path) -> None:
         cfg = _make_cpu_config(tmp_path, n_epochs=1)
         dataset = ReplayDataset(cfg.dataset_path, device=cfg.device)
@@ -798,6 +947,111 @@ class TestCommonUtilities:
         lines = log_files[0].read_text().strip().splitlines()
         assert len(lines) >= 1
 
+    def test_step_metric_accumulator_logs_every_step(self, tmp_path) -> None:
+        metric_logger = MetricLogger(
+            tmp_path / "logs", experiment_name="acc", log_every_n_steps=2
+        )
+        acc = StepMetricAccumulator(
+            metric_logger,
+            ("loss", "q"),
+            device=torch.device("cpu"),
+            log_names=("loss",),
+        )
+        log_path = tmp_path / "logs" / "acc_metrics.jsonl"
+        for step, value in enumerate([1.0, 2.0, 3.0, 4.0, 5.0], start=1):
+            acc.update(
+                {"loss": torch.tensor(value), "q": torch.tensor(-value)},
+                step=step,
+                epoch=1,
+            )
+            if step == 3:
+                # Step 3 is still buffered on the device.
+                assert len(log_path.read_text().splitlines()) == 2
+        means = acc.end_epoch(step=5, epoch=1)
+        metric_logger.flush()
+
+        records = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert [(r["name"], r["step"], r["value"]) for r in records] == [
+            ("loss", 1, 1.0),
+            ("loss", 2, 2.0),
+            ("loss", 3, 3.0),
+            ("loss", 4, 4.0),
+            ("loss", 5, 5.0),
+        ]
+        assert means == {"loss": 3.0, "q": -3.0}
+        assert acc.end_epoch(step=5, epoch=2) == {"loss": 0.0, "q": 0.0}
+
+    def test_step_metric_accumulator_logs_each_member(self, tmp_path) -> None:
+        loggers = [
+            MetricLogger(tmp_path / f"m{k}", experiment_name="acc", log_every_n_steps=2)
+            for k in range(2)
+        ]
+        acc = StepMetricAccumulator(loggers, ("loss",), device=torch.device("cpu"))
+        for step in (1, 2, 3):
+            acc.update({"loss": torch.tensor([step, 10.0 * step])}, step=step, epoch=1)
+        means = acc.end_epoch(step=3, epoch=1)
+
+        for k, metric_logger in enumerate(loggers):
+            metric_logger.flush()
+            records = [
+                json.loads(line)
+                for line in (tmp_path / f"m{k}" / "acc_metrics.jsonl").read_text().splitlines()
+            ]
+            scale = 10.0 if k else 1.0
+            assert [(r["step"], r["value"]) for r in records] == [
+                (1, scale), (2, 2 * scale), (3, 3 * scale)
+            ]
+        assert means == [{"loss": 2.0}, {"loss": 20.0}]
+
+    def test_step_metric_accumulator_rejects_unknown_log_names(self, tmp_path) -> None:
+        metric_logger = MetricLogger(tmp_path / "logs")
+        with pytest.raises(ValueError, match="not accumulated"):
+            StepMetricAccumulator(
+                metric_logger, ("loss",), device=torch.device("cpu"), log_names=("q",)
+            )
+
+    def test_soft_update_matches_polyak_formula(self) -> None:
+        online = QNetwork(STATE_DIM, N_ACTIONS, [16])
+        target = QNetwork(STATE_DIM, N_ACTIONS, [16])
+        expected = [
+            (1.0 - 0.1) * t.detach() + 0.1 * o.detach()
+            for t, o in zip(target.parameters(), online.parameters())
+        ]
+        soft_update_(target, online, 0.1)
+        for param, want in zip(target.parameters(), expected):
+            assert torch.allclose(param, want, atol=1e-6)
+
+    def test_build_adam_uses_fused_kernel_on_cpu(self) -> None:
+        net = QNetwork(STATE_DIM, N_ACTIONS, [16])
+        opt = build_adam(net.parameters(), lr=1e-3, device=torch.device("cpu"))
+        assert opt.defaults["fused"] is True
+
+    def test_compiled_step_falls_back_to_eager(self, monkeypatch) -> None:
+        def _broken_compile(fn):
+            def _raise(*args, **kwargs):
+                raise RuntimeError("no compiler toolchain")
+
+            return _raise
+
+        monkeypatch.setattr(torch, "compile", _broken_compile)
+        cfg = build_training_config(
+            algorithm="cql",
+            device="cpu",
+            dataset_path=Path("dummy.parquet"),
+            compile=True,
+        )
+        step = CompiledStep(lambda x: x + 1, enabled=True, device_meta=cfg.device_meta)
+        assert step.compiled
+        assert step(1) == 2
+        assert not step.compiled
+        assert cfg.device_meta.compile_enabled is False
+        assert "no compiler toolchain" in cfg.device_meta.compile_fallback_reason
+
+    def test_compiled_step_disabled_calls_eager(self) -> None:
+        step = CompiledStep(lambda x: x * 2, enabled=False)
+        assert not step.compiled
+        assert step(3) == 6
+
     def test_transition_batch_to_device(self) -> None:
         batch = TransitionBatch(
             states=torch.randn(4, STATE_DIM),
@@ -10,6 +10,7 @@ Covers:
 - validate_mps_ops: non-MPS device returns empty list
 - CLI self-check exit-code contract
 - TrainingConfig device resolution via build_training_config
+- torch.compile support probing and the recorded compile choice
 """
 
 from __future__ import annotations
@@ -26,7 +27,9 @@ from mimic_sepsis_rl.training.device import (
     Backend,
     DeviceMetadata,
     _self_check,
+    compile_unsupported_reason,
     get_device_metadata,
+    resolve_compile,
     resolve_device,
     validate_mps_ops,
 )
@@ -420,3 +423,39 @@ class TestTrainingConfigDeviceResolution:
         d = cfg.to_dict()
         assert "device_meta" in d["runtime"]
         assert d["runtime"]["effective_device"] == "cpu"
+
+
+class TestResolveCompile:
+    """runtime.compile is recorded in the metadata and disabled where unsupported."""
+
+    def test_not_requested(self) -> None:
+        _, meta = resolve_device("cpu")
+        assert resolve_compile(False, torch.device("cpu"), meta) is False
+        assert meta.compile_requested is False
+        assert meta.compile_fallback_reason is None
+
+    def test_requested_on_cpu(self) -> None:
+        _, meta = resolve_device("cpu")
+        assert resolve_compile(True, torch.device("cpu"), meta) is True
+        assert meta.compile_requested is True
+        assert meta.compile_enabled is True
+
+    def test_mps_falls_back_with_reason(self) -> None:
+        _, meta = resolve_device("cpu")
+        assert compile_unsupported_reason(torch.device("mps")) is not None
+        assert resolve_compile(True, torch.device("mps"), meta) is False
+        assert meta.compile_requested is True
+        assert meta.compile_enabled is False
+        assert "MPS" in meta.compile_fallback_reason
+
+    def test_config_records_compile(self, tmp_path) -> None:
+        cfg = build_training_config(
+            algorithm="cql",
+            device="cpu",
+            dataset_path=tmp_path / "replay.parquet",
+            compile=True,
+        )
+        assert cfg.runtime.compile is True
+        d = cfg.to_dict()
+        assert d["runtime"]["compile"] is True
+        assert d["runtime"]["device_meta"]["compile_enabled"] is True
@@ -0,0 +1,263 @@
+"""
+Regression tests for vmap'd multi-seed ensemble training.
+
+Covers:
+- ReplayDataset.iter_member_batches: row k equals the seed-k shuffle
+- clip_grad_norm_per_member_ matches clip_grad_norm_ per member
+- CQLEnsembleTrainer members reproduce stand-alone CQLTrainer runs
+- Per-member checkpoints, manifests and metric logs in the regular layout
+- Member metric logs hold the same per-step records as stand-alone runs
+- A resumed ensemble is bit-identical to an uninterrupted one; partial
+  ensembles are rejected
+- Invalid seed lists are rejected
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import random
+from pathlib import Path
+
+import polars as pl
+import pytest
+import torch
+import torch.nn as nn
+
+from mimic_sepsis_rl.training.common import (
+    CheckpointManager,
+    ReplayDataset,
+    clip_grad_norm_per_member_,
+)
+from mimic_sepsis_rl.training.comparison import load_metric_curves, resolve_metrics_log_path
+from mimic_sepsis_rl.training.config import build_training_config
+from mimic_sepsis_rl.training.cql import CQLTrainer, load_cql_policy
+from mimic_sepsis_rl.training.ensemble import (
+    CQLEnsembleTrainer,
+    member_training_config,
+)
+
+CPU = torch.device("cpu")
+STATE_DIM = 6
+EXTRA = {"hidden_sizes": [16, 16], "target_update_freq": 1}
+
+
+def _save_transitions(tmp_path: Path, *, n_episodes: int = 6, steps: int = 5) -> Path:
+    rng = random.Random(42)
+    records = []
+    for ep in range(n_episodes):
+        for step in range(steps):
+            row: dict = {
+                "action": rng.randint(0, 24),
+                "reward": rng.uniform(-1.0, 1.0),
+                "done": step == steps - 1,
+            }
+            for i in range(STATE_DIM):
+                row[f"s_f{i}"] = rng.gauss(0, 1)
+                row[f"ns_f{i}"] = rng.gauss(0, 1)
+            records.append(row)
+    path = tmp_path / "replay_train.parquet"
+    pl.DataFrame(records).write_parquet(path)
+    return path
+
+
+def _config(
+    tmp_path: Path,
+    parquet_path: Path,
+    *,
+    seed: int = 42,
+    tag: str = "ens",
+    n_epochs: int = 2,
+):
+    return build_training_config(
+        algorithm="cql",
+        device="cpu",
+        dataset_path=parquet_path,
+        n_epochs=n_epochs,
+        batch_size=8,
+        seed=seed,
+        checkpoint_dir=tmp_path / tag / "checkpoints",
+        log_dir=tmp_path / tag / "runs",
+        experiment_name="cql",
+        extra=EXTRA,
+    )
+
+
+@pytest.mark.parametrize("sampler", ["device", "pinned"])
+def test_member_batches_match_seeded_runs(tmp_path, sampler) -> None:
+    path = _save_transitions(tmp_path, n_episodes=5)
+    shared = ReplayDataset(path, device=CPU, sampler=sampler)
+    seeds = [7, 11, 13]
+
+    stacked = list(shared.iter_member_batches(8, seeds=seeds, epoch=2))
+    for k, seed in enumerate(seeds):
+        solo = ReplayDataset(path, device=CPU, seed=seed, sampler=sampler)
+        batches = list(solo.iter_batches(8, shuffle=True, epoch=2))
+        assert len(batches) == len(stacked)
+        for member_batch, batch in zip(stacked, batches):
+            assert member_batch.states.shape == (len(seeds), *batch.states.shape)
+            assert torch.equal(member_batch.states[k], batch.states)
+            assert torch.equal(member_batch.actions[k], batch.actions)
+            assert torch.equal(member_batch.dones[k], batch.dones)
+
+
+def test_clip_grad_norm_per_member_matches_single_clip() -> None:
+    torch.manual_seed(0)
+    grads = [torch.randn(3, 4, 5) * 10, torch.randn(3, 5) * 0.01]
+    stacked = [torch.zeros_like(g, requires_grad=True) for g in grads]
+    for param, grad in zip(stacked, grads):
+        param.grad = grad.clone()
+    clip_grad_norm_per_member_(stacked, 1.0)
+
+    for k in range(3):
+        single = [nn.Parameter(torch.zeros_like(g[k])) for g in grads]
+        for param, grad in zip(single, grads):
+            param.grad = grad[k].clone()
+        nn.utils.clip_grad_norm_(single, 1.0)
+        for param, ensemble_param in zip(single, stacked):
+            assert torch.allclose(param.grad, ensemble_param.grad[k], atol=1e-6)
+
+
+def test_members_reproduce_standalone_runs(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    seeds = [3, 5]
+    ensemble = CQLEnsembleTrainer(
+        _config(tmp_path, path), ReplayDataset(path, device=CPU), seeds=seeds
+    )
+    results = ensemble.train()
+
+    for k, seed in enumerate(seeds):
+        torch.manual_seed(seed)
+        solo_cfg = _config(tmp_path, path, seed=seed, tag=f"solo_{seed}")
+        solo = CQLTrainer(solo_cfg, ReplayDataset(path, device=CPU, seed=seed))
+        solo_result = solo.train()
+        member_state = ensemble.member_state_dict(k)
+        for name, tensor in solo._q_net.state_dict().items():
+            assert torch.allclose(member_state[name], tensor, atol=1e-6), name
+        assert results[k].total_steps == solo_result.total_steps
+        assert results[k].final_total_loss == pytest.approx(
+            solo_result.final_total_loss, rel=1e-6
+        )
+
+        member_curves = {
+            c.name: c for c in load_metric_curves(resolve_metrics_log_path(ensemble.member_configs[k]))
+        }
+        solo_curves = {c.name: c for c in load_metric_curves(resolve_metrics_log_path(solo_cfg))}
+        assert member_curves.keys() == solo_curves.keys()
+        for name, curve in solo_curves.items():
+            assert [pt.step for pt in member_curves[name].points] == [pt.step for pt in curve.points]
+
+
+def test_members_write_regular_run_layout(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    cfg = _config(tmp_path, path)
+    ensemble = CQLEnsembleTrainer(cfg, ReplayDataset(path, device=CPU), seeds=[1, 2])
+    results = ensemble.train()
+
+    for seed, result in zip([1, 2], results):
+        member_cfg = member_training_config(cfg, seed)
+        assert member_cfg.runtime.seed == seed
+        assert member_cfg.checkpoint.checkpoint_dir == cfg.checkpoint.checkpoint_dir / f"seed_{seed}"
+
+        assert result.checkpoint_path is not None
+        assert result.checkpoint_path.parent == member_cfg.checkpoint.checkpoint_dir
+        manifest = CheckpointManager.load_manifest(result.checkpoint_path)
+        assert manifest.config_dict["runtime"]["seed"] == seed
+        assert manifest.global_step == result.total_steps
+
+        curves = {c.name for c in load_metric_curves(resolve_metrics_log_path(member_cfg))}
+        assert {"td_loss", "total_loss_mean"} <= curves
+
+        policy = load_cql_policy(
+            result.checkpoint_path,
+            state_dim=STATE_DIM,
+            hidden_sizes=EXTRA["hidden_sizes"],
+        )
+        assert 0 <= policy.select_action(torch.zeros(STATE_DIM).tolist()) < 25
+
+        payload = CheckpointManager.load(result.checkpoint_path, device=CPU)
+        optimizer = torch.optim.Adam(policy.q_network.parameters())
+        optimizer.load_state_dict(payload["optimizer_state_dict"])
+
+
+def _assert_nested_equal(left, right) -> None:
+    if isinstance(left, torch.Tensor):
+        assert torch.equal(left, right)
+    elif isinstance(left, dict):
+        assert left.keys() == right.keys()
+        for key in left:
+            _assert_nested_equal(left[key], right[key])
+    elif isinstance(left, (list, tuple)):
+        assert len(left) == len(right)
+        for a, b in zip(left, right):
+            _assert_nested_equal(a, b)
+    else:
+        assert left == right
+
+
+def _resume_config(tmp_path: Path, parquet_path: Path, *, tag: str, n_epochs: int):
+    cfg = _config(tmp_path, parquet_path, tag=tag, n_epochs=n_epochs)
+    checkpoint = dataclasses.replace(cfg.checkpoint, save_every_n_epochs=1, keep_last_n=0)
+    return dataclasses.replace(cfg, checkpoint=checkpoint)
+
+
+def test_resumed_ensemble_is_bit_identical(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    seeds = [3, 5]
+
+    full_cfg = _resume_config(tmp_path, path, tag="full", n_epochs=3)
+    full = CQLEnsembleTrainer(full_cfg, ReplayDataset(path, device=CPU), seeds=seeds)
+    full_results = full.train()
+
+    crash_cfg = _resume_config(tmp_path, path, tag="crash", n_epochs=2)
+    CQLEnsembleTrainer(crash_cfg, ReplayDataset(path, device=CPU), seeds=seeds).train()
+
+    resume_cfg = dataclasses.replace(crash_cfg, n_epochs=3)
+    resumed = CQLEnsembleTrainer(
+        resume_cfg, ReplayDataset(path, device=CPU), seeds=[3, 5]
+    )
+    resumed_results = resumed.train(resume=True)
+
+    for k, seed in enumerate(seeds):
+        assert resumed_results[k].total_steps == full_results[k].total_steps
+        assert resumed_results[k].final_total_loss == full_results[k].final_total_loss
+        full_payload = CheckpointManager.load(full_results[k].checkpoint_path, device=CPU)
+        resumed_payload = CheckpointManager.load(
+            resumed_results[k].checkpoint_path, device=CPU
+        )
+        assert resumed_payload["epoch"] == full_payload["epoch"] == 3
+        for key in ("model_state_dict", "optimizer_state_dict"):
+            _assert_nested_equal(resumed_payload[key], full_payload[key])
+        _assert_nested_equal(
+            resumed_payload["training_state"]["target_state_dict"],
+            full_payload["training_state"]["target_state_dict"],
+        )
+        full_log = resolve_metrics_log_path(member_training_config(full_cfg, seed))
+        resumed_log = resolve_metrics_log_path(member_training_config(resume_cfg, seed))
+        full_rows = [
+            (r.step, r.value) for c in load_metric_curves(full_log) for r in c.points
+        ]
+        resumed_rows = [
+            (r.step, r.value) for c in load_metric_curves(resumed_log) for r in c.points
+        ]
+        assert resumed_rows == full_rows
+
+
+def test_resume_rejects_partial_ensemble(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    cfg = _resume_config(tmp_path, path, tag="partial", n_epochs=1)
+    CQLEnsembleTrainer(cfg, ReplayDataset(path, device=CPU), seeds=[1, 2]).train()
+    for checkpoint in member_training_config(cfg, 2).checkpoint.checkpoint_dir.glob("*.pt"):
+        checkpoint.unlink()
+
+    trainer = CQLEnsembleTrainer(cfg, ReplayDataset(path, device=CPU), seeds=[1, 2])
+    with pytest.raises(ValueError, match=r"seeds \[2\] have no checkpoint"):
+        trainer.train(resume=True)
+
+
+def test_invalid_seed_lists_are_rejected(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    dataset = ReplayDataset(path, device=CPU)
+    with pytest.raises(ValueError, match="at least one seed"):
+        CQLEnsembleTrainer(_config(tmp_path, path), dataset, seeds=[])
+    with pytest.raises(ValueError, match="distinct"):
+        CQLEnsembleTrainer(_config(tmp_path, path), dataset, seeds=[1, 1])
@@ -0,0 +1,199 @@
+"""
+Regression tests for crash-safe resume-from-checkpoint.
+
+Covers:
+- RNG snapshots round-trip through a weights_only checkpoint load
+- MetricLogger.truncate cuts the log back to a recorded position
+- CQL, BCQ and IQL runs resumed after a simulated crash are bit-identical
+  to uninterrupted runs (weights, optimizer state and metrics log)
+- Resuming without a checkpoint starts at epoch 1
+- Checkpoints without training_state are rejected
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+import torch
+
+from mimic_sepsis_rl.training.bcq import BCQTrainer
+from mimic_sepsis_rl.training.common import (
+    MetricLogger,
+    ReplayDataset,
+    build_checkpoint_manager,
+    capture_rng_state,
+    load_resume_point,
+    restore_rng_state,
+)
+from mimic_sepsis_rl.training.comparison import resolve_metrics_log_path
+from mimic_sepsis_rl.training.config import build_training_config
+from mimic_sepsis_rl.training.cql import CQLTrainer
+from mimic_sepsis_rl.training.iql import IQLTrainer
+
+CPU = torch.device("cpu")
+STATE_DIM = 5
+TRAINERS = {"cql": CQLTrainer, "bcq": BCQTrainer, "iql": IQLTrainer}
+
+
+def _save_transitions(tmp_path: Path) -> Path:
+    rng = random.Random(7)
+    records = []
+    for ep in range(6):
+        for step in range(5):
+            row: dict = {
+                "action": rng.randint(0, 24),
+                "reward": rng.uniform(-1.0, 1.0),
+                "done": step == 4,
+            }
+            for i in range(STATE_DIM):
+                row[f"s_f{i}"] = rng.gauss(0, 1)
+                row[f"ns_f{i}"] = rng.gauss(0, 1)
+            records.append(row)
+    path = tmp_path / "replay_train.parquet"
+    pl.DataFrame(records).write_parquet(path)
+    return path
+
+
+def _config(tmp_path: Path, parquet_path: Path, algorithm: str, *, tag: str, n_epochs: int):
+    cfg = build_training_config(
+        algorithm=algorithm,
+        device="cpu",
+        dataset_path=parquet_path,
+        n_epochs=n_epochs,
+        batch_size=8,
+        seed=3,
+        checkpoint_dir=tmp_path / tag / "checkpoints",
+        log_dir=tmp_path / tag / "runs",
+        experiment_name=algorithm,
+        extra={"hidden_sizes": [16], "target_update_freq": 1, "use_soft_update": True},
+    )
+    checkpoint = dataclasses.replace(cfg.checkpoint, save_every_n_epochs=2, keep_last_n=0)
+    return dataclasses.replace(cfg, checkpoint=checkpoint)
+
+
+def _metric_rows(cfg) -> list[tuple]:
+    rows = []
+    for line in resolve_metrics_log_path(cfg).read_text().splitlines():
+        record = json.loads(line)
+        rows.append((record["step"], record["epoch"], record["name"], record["value"]))
+    return rows
+
+
+def _latest_payload(cfg) -> dict:
+    path = build_checkpoint_manager(cfg).latest_checkpoint()
+    return torch.load(path, map_location=CPU, weights_only=True)
+
+
+def _assert_nested_equal(left, right) -> None:
+    if isinstance(left, torch.Tensor):
+        assert torch.equal(left, right)
+    elif isinstance(left, dict):
+        assert left.keys() == right.keys()
+        for key in left:
+            _assert_nested_equal(left[key], right[key])
+    elif isinstance(left, (list, tuple)):
+        assert len(left) == len(right)
+        for a, b in zip(left, right):
+            _assert_nested_equal(a, b)
+    else:
+        assert left == right
+
+
+def test_rng_state_round_trips_through_checkpoint(tmp_path) -> None:
+    random.seed(1)
+    np.random.seed(1)
+    torch.manual_seed(1)
+    path = tmp_path / "rng.pt"
+    torch.save({"rng_state": capture_rng_state()}, path)
+    expected = (random.random(), np.random.rand(), torch.rand(3))
+
+    random.seed(99)
+    np.random.seed(99)
+    torch.manual_seed(99)
+    restore_rng_state(torch.load(path, weights_only=True)["rng_state"])
+    actual = (random.random(), np.random.rand(), torch.rand(3))
+
+    assert actual[0] == expected[0]
+    assert actual[1] == expected[1]
+    assert torch.equal(actual[2], expected[2])
+
+
+def test_metric_logger_truncate_drops_later_records(tmp_path) -> None:
+    metric_logger = MetricLogger(tmp_path, experiment_name="m", log_every_n_steps=1)
+    metric_logger.log_scalar("loss", 1.0, step=1, epoch=1)
+    position = metric_logger.position()
+    metric_logger.log_scalar("loss", 2.0, step=2, epoch=1)
+    metric_logger.flush()
+
+    metric_logger.truncate(position)
+    lines = metric_logger.log_path.read_text().splitlines()
+    assert [json.loads(line)["value"] for line in lines] == [1.0]
+    with pytest.raises(ValueError, match="expects at least"):
+        metric_logger.truncate(position + 100)
+
+
+@pytest.mark.parametrize("algorithm", sorted(TRAINERS))
+def test_resumed_run_is_bit_identical(tmp_path, algorithm) -> None:
+    path = _save_transitions(tmp_path)
+    trainer_cls = TRAINERS[algorithm]
+
+    full_cfg = _config(tmp_path, path, algorithm, tag="full", n_epochs=4)
+    torch.manual_seed(0)
+    full = trainer_cls(full_cfg, ReplayDataset(path, device=CPU, seed=3))
+    full_result = full.train()
+
+    # "Crash" during epoch 3: train to epoch 3, then drop its checkpoint so
+    # the epoch-3 metric records are newer than the latest checkpoint.
+    crash_cfg = _config(tmp_path, path, algorithm, tag="crash", n_epochs=3)
+    torch.manual_seed(0)
+    trainer_cls(crash_cfg, ReplayDataset(path, device=CPU, seed=3)).train()
+    for stale in crash_cfg.checkpoint.checkpoint_dir.glob(f"{algorithm}_epoch0003_*"):
+        stale.unlink()
+
+    resume_cfg = dataclasses.replace(crash_cfg, n_epochs=4)
+    torch.manual_seed(123)  # different init: everything must come from the checkpoint
+    resumed = trainer_cls(resume_cfg, ReplayDataset(path, device=CPU, seed=3))
+    resumed_result = resumed.train(resume=True)
+
+    assert resumed_result.total_steps == full_result.total_steps
+    assert resumed_result.final_total_loss == full_result.final_total_loss
+
+    full_payload = _latest_payload(full_cfg)
+    resumed_payload = _latest_payload(resume_cfg)
+    assert resumed_payload["epoch"] == full_payload["epoch"] == 4
+    _assert_nested_equal(resumed_payload["model_state_dict"], full_payload["model_state_dict"])
+    _assert_nested_equal(
+        resumed_payload["optimizer_state_dict"], full_payload["optimizer_state_dict"]
+    )
+    assert _metric_rows(resume_cfg) == _metric_rows(full_cfg)
+
+
+def test_resume_without_checkpoint_starts_fresh(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    cfg = _config(tmp_path, path, "cql", tag="fresh", n_epochs=2)
+    torch.manual_seed(0)
+    result = CQLTrainer(cfg, ReplayDataset(path, device=CPU, seed=3)).train(resume=True)
+    assert result.total_steps == 2 * 4
+    assert result.checkpoint_path is not None
+
+
+def test_resume_rejects_checkpoint_without_training_state(tmp_path) -> None:
+    path = _save_transitions(tmp_path)
+    cfg = _config(tmp_path, path, "cql", tag="legacy", n_epochs=1)
+    torch.manual_seed(0)
+    CQLTrainer(cfg, ReplayDataset(path, device=CPU, seed=3)).train()
+
+    manager = build_checkpoint_manager(cfg)
+    checkpoint_path = manager.latest_checkpoint()
+    payload = torch.load(checkpoint_path, weights_only=True)
+    del payload["training_state"]
+    torch.save(payload, checkpoint_path)
+
+    with pytest.raises(ValueError, match="no training_state"):
+        load_resume_point(manager, MetricLogger.from_config(cfg), device=CPU)
@@ -0,0 +1,266 @@
+"""
+Regression tests for the parallel sweep scheduler.
+
+Covers:
+- Grid expansion over top-level and dotted config keys
+- Stable, distinct config hashes and hashed run directories
+- Ablation plans expand to one run per variant with per-variant overrides
+- Sequential and process-pool execution with skip-if-complete markers
+- skip_completed=False re-trains completed runs from epoch 1
+- Results table, metrics-by-label and aggregated comparison report
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import polars as pl
+import pytest
+import yaml
+
+from mimic_sepsis_rl.evaluation.ablations import (
+    DEFAULT_ABLATION_VARIANTS,
+    AblationDefaults,
+    AblationExperimentMetadata,
+    build_default_ablation_registry,
+)
+from mimic_sepsis_rl.training.comparison import (
+    ConfigProvenance,
+    RunArtifact,
+)
+from mimic_sepsis_rl.training.sweep import (
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    STATUS_SKIPPED,
+    compute_config_hash,
+    expand_ablation_plans,
+    expand_grid,
+    plan_sweep,
+    run_sweep,
+)
+
+STATE_DIM = 4
+
+
+def _write_base_config(tmp_path: Path) -> Path:
+    rng = random.Random(0)
+    records = []
+    for ep in range(4):
+        for step in range(4):
+            row: dict = {
+                "action": rng.randint(0, 24),
+                "reward": rng.uniform(-1.0, 1.0),
+                "done": step == 3,
+            }
+            for i in range(STATE_DIM):
+                row[f"s_f{i}"] = rng.gauss(0, 1)
+                row[f"ns_f{i}"] = rng.gauss(0, 1)
+            records.append(row)
+    dataset_path = tmp_path / "replay_train.parquet"
+    pl.DataFrame(records).write_parquet(dataset_path)
+
+    payload = {
+        "algorithm": "cql",
+        "schema_version": "1.0.0",
+        "runtime": {"device": "cpu", "seed": 0, "num_workers": 0},
+        "dataset_path": str(dataset_path),
+        "n_epochs": 1,
+        "batch_size": 8,
+        "hidden_sizes": [8],
+        "cql_alpha": 1.0,
+        "lr": 0.001,
+        "checkpoint": {"checkpoint_dir": str(tmp_path / "unused"), "save_every_n_epochs": 1},
+        "logging": {"log_dir": str(tmp_path / "unused"), "experiment_name": "cql_sweep"},
+    }
+    config_path = tmp_path / "cql.yaml"
+    config_path.write_text(yaml.safe_dump(payload))
+    return config_path
+
+
+def _base_metadata() -> AblationExperimentMetadata:
+    artifact = RunArtifact(
+        algorithm="cql",
+        checkpoint=None,
+        curves=tuple(),
+        final_metrics={},
+        config_provenance=ConfigProvenance(
+            config_path="configs/training/cql.yaml",
+            checkpoint_dir="checkpoints/cql",
+            log_dir="runs/cql",
+            experiment_name="cql_reference",
+            dataset_path="data/replay/replay_train.parquet",
+            dataset_meta_path=None,
+            batch_size=256,
+            gamma=0.99,
+            requested_device="cpu",
+            effective_backend="cpu",
+        ),
+        dataset_contract=None,
+    )
+    defaults = AblationDefaults(benchmark_version="phase9-benchmark-v1")
+    return AblationExperimentMetadata.from_run_artifact(artifact, defaults)
+
+
+def test_expand_grid_is_cartesian_over_dotted_keys() -> None:
+    runs = expand_grid(
+        "cql",
+        {"cql_alpha": [0.1, 1.0], "lr": [1e-4, 3e-4], "runtime.seed": [0, 1, 2]},
+        base_overrides={"runtime": {"device": "cpu"}},
+    )
+
+    assert len(runs) == 12
+    assert len({run.label for run in runs}) == 12
+    first = runs[0]
+    assert first.label == "cql_alpha=0.1,lr=0.0001,runtime.seed=0"
+    assert first.overrides == {
+        "runtime": {"device": "cpu", "seed": 0},
+        "cql_alpha": 0.1,
+        "lr": 1e-4,
+    }
+    with pytest.raises(ValueError, match="no values"):
+        expand_grid("cql", {"cql_alpha": []})
+
+
+def test_config_hash_ignores_output_dirs_and_tracks_settings(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    runs = expand_grid("cql", {"runtime.seed": [0, 1]}, config_path=config_path)
+
+    first = plan_sweep(runs, output_dir=tmp_path / "a")
+    second = plan_sweep(runs, output_dir=tmp_path / "b")
+    assert [p.config_hash for p in first] == [p.config_hash for p in second]
+    assert first[0].config_hash != first[1].config_hash
+    assert first[0].run_dir == tmp_path / "a" / f"cql_{first[0].config_hash}"
+    assert first[0].config["checkpoint"]["checkpoint_dir"] == str(
+        first[0].run_dir / "checkpoints"
+    )
+
+    config = dict(first[0].config)
+    assert compute_config_hash("cql", config) != compute_config_hash(
+        "cql", {**config, "cql_alpha": 2.0}
+    )
+
+    with pytest.raises(ValueError, match="same config"):
+        plan_sweep(runs + runs[:1], output_dir=tmp_path / "c")
+
+
+def test_ablation_plans_expand_one_run_per_variant(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    plans = build_default_ablation_registry(_base_metadata()).plans()
+    sparse_export = str(tmp_path / "replay_sparse.parquet")
+
+    runs = expand_ablation_plans(
+        "cql",
+        plans,
+        variant_overrides={"reward_sparse": {"dataset_path": sparse_export}},
+        config_path=config_path,
+    )
+
+    assert len(runs) == len(DEFAULT_ABLATION_VARIANTS)
+    assert [run.label for run in runs] == [plan.variant.variant_id for plan in plans]
+    by_label = {run.label: run for run in runs}
+    assert by_label["reward_sparse"].overrides["dataset_path"] == sparse_export
+    assert by_label["timestep_2h"].overrides["ablation"]["value"] == 2
+
+    planned = plan_sweep(runs, output_dir=tmp_path / "sweep")
+    assert len({p.config_hash for p in planned}) == len(runs)
+
+    seeded = expand_ablation_plans(
+        "cql", plans[:2], grid={"runtime.seed": [0, 1]}, config_path=config_path
+    )
+    assert [run.label for run in seeded] == [
+        f"{plans[0].variant.variant_id},runtime.seed=0",
+        f"{plans[0].variant.variant_id},runtime.seed=1",
+        f"{plans[1].variant.variant_id},runtime.seed=0",
+        f"{plans[1].variant.variant_id},runtime.seed=1",
+    ]
+
+
+def test_sequential_sweep_trains_skips_and_reports(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    runs = expand_grid("cql", {"cql_alpha": [0.5, 2.0]}, config_path=config_path)
+    output_dir = tmp_path / "sweep"
+
+    result = run_sweep(runs, output_dir=output_dir, max_workers=1)
+    assert [r.status for r in result.records] == [STATUS_COMPLETED] * 2
+    for record in result.records:
+        assert (record.run_dir / "_COMPLETE.json").exists()
+        assert record.result["total_steps"] == 2
+        assert list((record.run_dir / "checkpoints").glob("cql_epoch*.pt"))
+
+    rows = [json.loads(line) for line in result.results_path.read_text().splitlines()]
+    assert [row["label"] for row in rows] == ["cql_alpha=0.5", "cql_alpha=2.0"]
+
+    frame = result.to_frame()
+    assert frame.height == 2
+    assert {"label", "config_hash", "status", "final_total_loss"} <= set(frame.columns)
+    assert set(result.metrics_by_label()) == {"cql_alpha=0.5", "cql_alpha=2.0"}
+
+    report = result.comparison_report()
+    assert report.algorithms == ("cql", "cql")
+    assert all(run.checkpoint is not None for run in report.runs)
+
+    rerun = run_sweep(runs, output_dir=output_dir, max_workers=1)
+    assert [r.status for r in rerun.records] == [STATUS_SKIPPED] * 2
+    assert rerun.metrics_by_label() == result.metrics_by_label()
+
+
+def _epochs_trained_in_last_attempt(run_dir: Path) -> int:
+    # Event log lines: "<timestamp> <level> <component> <event> <json payload>".
+    log_path = next(run_dir.glob("runs/**/training.log"))
+    events = [line.split(" ", 4)[3] for line in log_path.read_text().splitlines()]
+    last_start = max(i for i, event in enumerate(events) if event == "run_start")
+    return events[last_start:].count("epoch_end")
+
+
+def test_no_skip_retrains_completed_runs(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    runs = expand_grid("cql", {"n_epochs": [2]}, config_path=config_path)
+    output_dir = tmp_path / "sweep"
+
+    for _ in range(2):
+        result = run_sweep(runs, output_dir=output_dir, max_workers=1, skip_completed=False)
+        assert [r.status for r in result.records] == [STATUS_COMPLETED]
+        record = result.records[0]
+        assert _epochs_trained_in_last_attempt(record.run_dir) == 2
+        assert record.result["total_steps"] == 4
+
+
+def test_failed_runs_are_recorded_without_stopping_the_sweep(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    runs = expand_grid(
+        "cql",
+        {"dataset_path": [str(tmp_path / "missing.parquet"), str(tmp_path / "replay_train.parquet")]},
+        config_path=config_path,
+    )
+
+    result = run_sweep(runs, output_dir=tmp_path / "sweep", max_workers=1)
+    assert [r.status for r in result.records] == [STATUS_FAILED, STATUS_COMPLETED]
+    assert result.records[0].error
+    assert not (result.records[0].run_dir / "_COMPLETE.json").exists()
+    assert result.n_failed == 1
+
+
+def test_process_pool_sweep_matches_sequential_results(tmp_path) -> None:
+    config_path = _write_base_config(tmp_path)
+    runs = expand_grid("cql", {"runtime.seed": [0, 1]}, config_path=config_path)
+
+    pooled = run_sweep(
+        runs, output_dir=tmp_path / "pool", max_workers=2, threads_per_worker=1
+    )
+    sequential = run_sweep(runs, output_dir=tmp_path / "serial", max_workers=1)
+
+    assert [r.status for r in pooled.records] == [STATUS_COMPLETED] * 2
+    for pool_record, serial_record in zip(pooled.records, sequential.records):
+        assert pool_record.config_hash == serial_record.config_hash
+        assert pool_record.result["final_total_loss"] == pytest.approx(
+            serial_record.result["final_total_loss"], rel=1e-5
+        )
+
+
+def test_invalid_pool_settings_are_rejected(tmp_path) -> None:
+    with pytest.raises(ValueError, match="threads_per_worker"):
+        run_sweep([], output_dir=tmp_path, threads_per_worker=0)
+    with pytest.raises(ValueError, match="max_workers"):
+        run_sweep([], output_dir=tmp_path, max_workers=0)